@@ -0,0 +1,808 @@
+"""
+Sesja analizy sygnału niezależna od GUI.
+
+AnalysisSession przechowuje sygnał, częstotliwość próbkowania i pamięć podręczną
+wyników. Udostępnia segmentację, cechy czasowe, parametry częstotliwościowe,
+spektrogram i przebieg F0 jako tablice NumPy, dzięki czemu ten sam kod może
+działać w oknach Tk, w skryptach wsadowych, benchmarkach i usługach.
+
+Nagranie wielokanałowe przechowywane jest jako macierz (kanały, próbki).
+Analizy liczone są dla wybranego widoku (kanał, mono, mid, side) albo – w
+widoku 'all' – dla wszystkich kanałów naraz, z osią kanałów na początku wyników.
+
+Opcjonalnie analizy mogą działać na sygnale przepróbkowanym do niższej
+częstotliwości (set_analysis_rate); sygnał do odtwarzania (playback_signal)
+zachowuje oryginalną częstotliwość próbkowania.
+
+Po ustawieniu widoku (set_view) analizy ramkowe liczone są tylko dla ramek
+z wybranego zakresu czasu, a wyniki są rozszerzane przyrostowo przy
+przesuwaniu widoku (RangeCache).
+
+W trybie analizy samej mowy (set_speech_only) najpierw liczona jest
+segmentacja, a kosztowne potoki (pipelines.SPEECH_ONLY_PIPELINES) liczone są
+tylko dla ramek z mową; pozostałe ramki wyników mają wartość NaN.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+import fft_backend
+from audio_processing import VoicedAudioProcessor, frame_values
+from cepstrum_analysis import compute_cepstrum, compute_deltas, mel_frequencies
+from chirp_z import zoom_fft
+from feature_registry import feature_names, registry_version
+from features import compute_volume, compute_zcr
+from frequency_features import compute_spectral_features, compute_peak_leakage, compute_dynamic_range
+from ltas import compute_ltas, DEFAULT_PERCENTILES
+from pipelines import (
+    run_pipeline, run_pipeline_masked, pipeline_frames, pipeline_geometry, frames_touching, SPEECH_ONLY_PIPELINES
+)
+from pitch import ESTIMATOR_NAMES as PITCH_ESTIMATORS
+from precision import real_dtype, DEFAULT_PRECISION
+from windowing import apply_window, get_window_bank, window_properties, WINDOW_TYPES
+
+
+def load_wav(filepath, keep_channels=False):
+    """
+    Wczytuje plik WAV tak, jak robi to aplikacja (float32, normalizacja do 1).
+
+    Args:
+        filepath: Ścieżka do pliku WAV lub obiekt plikopodobny.
+        keep_channels: Czy zachować wszystkie kanały (domyślnie tylko pierwszy).
+
+    Returns:
+        Krotka (częstotliwość próbkowania, sygnał float32 – 1D lub macierz (kanały, próbki)).
+    """
+    import warnings
+    from scipy.io import wavfile
+    from scipy.io.wavfile import WavFileWarning
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", WavFileWarning)
+        fs, raw_data = wavfile.read(filepath)
+
+    if len(raw_data.shape) > 1:
+        # scipy zwraca próbki × kanały, a sesja przechowuje kanały × próbki
+        raw_data = raw_data.T if keep_channels else raw_data[:, 0]
+
+    raw_data = np.ascontiguousarray(raw_data, dtype=np.float32)
+    peak = np.max(np.abs(raw_data)) if raw_data.size else 0.0
+    if peak > 1e-9:
+        # Bez dzielenia w miejscu – próbki float32 odczytane z bajtów (BytesIO) są tylko do odczytu
+        raw_data = raw_data / peak
+    return fs, raw_data
+
+
+def channel_mix(channels, mix):
+    """
+    Zwraca wybrany widok sygnału wielokanałowego.
+
+    Args:
+        channels: Macierz (kanały, próbki).
+        mix: 'all' (wszystkie kanały), numer kanału (od 0), 'mono' (średnia kanałów),
+            'mid' lub 'side' (tylko dla nagrań dwukanałowych).
+
+    Returns:
+        Sygnał 1D (dla pojedynczego kanału – widok bez kopiowania) lub macierz kanałów dla 'all'.
+    """
+    if mix == 'all':
+        return channels
+    if isinstance(mix, (int, np.integer)):
+        if not 0 <= mix < len(channels):
+            raise ValueError(f"Nagranie nie ma kanału {mix + 1}.")
+        return channels[mix]
+    if mix == 'mono':
+        return np.mean(channels, axis=0, dtype=channels.dtype)
+    if mix in ('mid', 'side'):
+        if len(channels) != 2:
+            raise ValueError("Widok mid/side wymaga nagrania dwukanałowego.")
+        left, right = channels
+        return (left + right) / 2 if mix == 'mid' else (left - right) / 2
+    raise ValueError(f"Nieznany widok kanałów: {mix}")
+
+
+def hop_from_overlap(frame_length, overlap):
+    """Zamienia nakładanie ramek (0-1) na przesunięcie w próbkach."""
+    return int(frame_length * (1 - overlap))
+
+
+def _frame_count(result, frame_axis):
+    # Liczba ramek wyniku potoku (oś ramek następuje po osi kanałów)
+    return next((np.shape(value)[frame_axis] for value in result.values()), 0)
+
+
+class RangeCache:
+    """
+    Wyniki potoku dla ciągłego zakresu ramek, rozszerzane przyrostowo.
+
+    Przy żądaniu zakresu zachodzącego na już policzony liczone są tylko brakujące
+    ramki z lewej i prawej strony. Zakres rozłączny zastępuje poprzednie wyniki,
+    a zbyt duży jest przycinany, więc pamięć zależy od oglądanego fragmentu,
+    a nie od długości nagrania.
+    """
+
+    # Maksymalny zapamiętany zakres względem długości żądanego zakresu
+    MAX_SPAN_FACTOR = 8
+
+    def __init__(self, compute, frame_axis=0):
+        """
+        Args:
+            compute: Funkcja (start_frame, stop_frame) -> słownik tablic.
+            frame_axis: Oś ramek w tablicach wyników.
+        """
+        self.compute = compute
+        self.frame_axis = frame_axis
+        self.start = 0
+        self.stop = 0
+        self.data = None
+        self.frames_computed = 0
+
+    def _compute(self, start, stop):
+        self.frames_computed += stop - start
+        return self.compute(start, stop)
+
+    def _slice(self, start, stop, copy=False):
+        index = [slice(None)] * (self.frame_axis + 1)
+        index[self.frame_axis] = slice(start - self.start, stop - self.start)
+        return {key: value[tuple(index)].copy() if copy else value[tuple(index)]
+                for key, value in self.data.items()}
+
+    def get(self, start, stop):
+        """Zwraca wyniki dla ramek [start, stop) jako widoki na zapamiętane tablice."""
+        if self.data is None or stop < self.start or start > self.stop:
+            self.data = self._compute(start, stop)
+            self.start, self.stop = start, stop
+        else:
+            parts = []
+            if start < self.start:
+                parts.append(self._compute(start, self.start))
+            parts.append(self.data)
+            if stop > self.stop:
+                parts.append(self._compute(self.stop, stop))
+            if len(parts) > 1:
+                self.data = {key: np.concatenate([part[key] for part in parts], axis=self.frame_axis)
+                             for key in self.data}
+                self.start, self.stop = min(start, self.start), max(stop, self.stop)
+
+            # Zbyt duży zakres przycinamy od strony dalszej od żądanych ramek
+            limit = self.MAX_SPAN_FACTOR * max(stop - start, 1)
+            if self.stop - self.start > limit:
+                if self.stop - stop < start - self.start:
+                    keep_start, keep_stop = max(self.start, self.stop - limit), self.stop
+                else:
+                    keep_start, keep_stop = self.start, min(self.stop, self.start + limit)
+                keep_start, keep_stop = min(keep_start, start), max(keep_stop, stop)
+                self.data = self._slice(keep_start, keep_stop, copy=True)
+                self.start, self.stop = keep_start, keep_stop
+
+        return self._slice(start, stop)
+
+
+# Tryby analizy samej mowy (AnalysisSession.set_speech_only)
+SPEECH_MODES = (None, 'speech', 'voiced')
+
+
+class AnalysisSession:
+
+    def __init__(self, signal, sample_rate, cache_size=32, workers=1, precision=DEFAULT_PRECISION, mix=None,
+                 analysis_rate=None):
+        signal = np.asarray(signal)
+        # Kontener kanałów (kanały, próbki); sygnał mono to jeden kanał
+        self.original_channels = np.atleast_2d(signal)
+        self.original_rate = sample_rate
+        # Kanały przepróbkowane do kolejnych częstotliwości analizy (pamięć podręczna)
+        self._rate_channels = {sample_rate: self.original_channels}
+        self.channels = self.original_channels
+        self.sample_rate = sample_rate
+        self.processor = VoicedAudioProcessor()
+
+        # Liczba procesów roboczych dla potoków ramkowych (1 = bez równoległości)
+        self.workers = workers
+
+        # Precyzja obliczeń ('float64' lub 'float32') – patrz precision.py
+        real_dtype(precision)
+        self.precision = precision
+
+        # Pamięć podręczna wyników (LRU) – klucz to nazwa analizy i jej parametry
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        # Wyniki dla zakresów widoku (RangeCache) – osobne LRU
+        self._range_caches = OrderedDict()
+
+        # Zakres czasu (start, koniec) w sekundach, dla którego liczone są analizy ramkowe
+        self.view = None
+
+        # Tryb analizy samej mowy: None albo (tryb, parametry segmentacji) – patrz set_speech_only
+        self.speech_only = None
+
+        # Wybrany widok kanałów – domyślnie wszystkie kanały (lub jedyny kanał sygnału mono)
+        self._mixes = {}
+        if mix is None:
+            mix = 'all' if signal.ndim > 1 and len(self.channels) > 1 else 0
+        self.set_mix(mix)
+        self.set_analysis_rate(analysis_rate)
+
+    @classmethod
+    def from_wav(cls, filepath, keep_channels=False, **kwargs):
+        fs, data = load_wav(filepath, keep_channels)
+        return cls(data, fs, **kwargs)
+
+    @property
+    def num_samples(self):
+        return self.channels.shape[-1]
+
+    @property
+    def num_channels(self):
+        return len(self.channels)
+
+    def available_mixes(self):
+        """Lista widoków kanałów dostępnych dla nagrania (bez 'all')."""
+        mixes = list(range(self.num_channels))
+        if self.num_channels > 1:
+            mixes.append('mono')
+        if self.num_channels == 2:
+            mixes.extend(['mid', 'side'])
+        return mixes
+
+    def set_mix(self, mix):
+        """
+        Wybiera widok kanałów, na którym liczone są kolejne analizy.
+
+        Wyniki poprzednich widoków zostają w pamięci podręcznej (klucz zawiera widok).
+        Widoki mono/mid/side są wyliczane raz i zapamiętywane.
+        """
+        self.signal = self._mix_at_rate(self.sample_rate, mix)
+        self.mix = mix
+
+    def _mix_at_rate(self, rate, mix):
+        key = (rate, mix)
+        if key not in self._mixes:
+            self._mixes[key] = channel_mix(self._rate_channels[rate], mix)
+        return self._mixes[key]
+
+    @property
+    def playback_signal(self):
+        """Wybrany widok kanałów w oryginalnej częstotliwości próbkowania."""
+        return self._mix_at_rate(self.original_rate, self.mix)
+
+    def set_analysis_rate(self, rate=None):
+        """
+        Ustawia częstotliwość próbkowania, z jaką liczone są analizy.
+
+        Sygnał jest przepróbkowywany filtrem polifazowym (resampling.py) raz dla
+        każdej częstotliwości, a wynik zostaje zapamiętany w sesji.
+
+        Args:
+            rate: Docelowa częstotliwość w Hz; None – oryginalna częstotliwość nagrania.
+        """
+        rate = self.original_rate if rate is None else int(rate)
+        if rate not in self._rate_channels:
+            from resampling import resample
+            self._rate_channels[rate] = resample(self.original_channels, self.original_rate, rate)
+        self.sample_rate = rate
+        self.channels = self._rate_channels[rate]
+        self.set_mix(self.mix)
+
+    @property
+    def duration(self):
+        return self.num_samples / self.sample_rate if self.sample_rate else 0.0
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._range_caches.clear()
+
+    def set_view(self, view=None):
+        """
+        Ogranicza analizy ramkowe do zakresu czasu.
+
+        Args:
+            view: Krotka (start, koniec) w sekundach; None – cały sygnał.
+        """
+        if view is not None:
+            start, stop = view
+            view = (max(0.0, float(start)), min(self.duration, float(stop)))
+        self.view = view
+
+    def set_speech_only(self, mode=None, frame_size=256, silence_threshold=0.001, vol_threshold=0.02,
+                        zcr_threshold=0.3):
+        """
+        Ogranicza kosztowne analizy ramkowe do ramek z mową.
+
+        Ramka jest liczona, jeśli zawiera choć jedną próbkę z mową; pozostałe ramki wyników
+        mają wartość NaN, więc osie czasu są takie same jak bez ograniczenia. Dotyczy potoków
+        z pipelines.SPEECH_ONLY_PIPELINES oraz estymatorów F0 w cechach czasowych.
+
+        Args:
+            mode: None – wszystkie ramki, 'speech' – ramki poza ciszą (silence_regions),
+                'voiced' – tylko ramki dźwięczne (voiced_unvoiced_regions).
+            frame_size, silence_threshold, vol_threshold, zcr_threshold: Parametry segmentacji.
+        """
+        if mode not in SPEECH_MODES:
+            raise ValueError(f"Nieznany tryb analizy mowy: {mode}. Dostępne: {', '.join(map(str, SPEECH_MODES))}")
+        self.speech_only = None if mode is None else (mode, int(frame_size), float(silence_threshold),
+                                                      float(vol_threshold), float(zcr_threshold))
+
+    def speech_mask(self):
+        """
+        Maska próbek z mową według trybu set_speech_only (w widoku 'all' – mowa w którymkolwiek kanale).
+
+        Returns:
+            Tablica logiczna o długości sygnału; bez ustawionego trybu – same wartości True.
+        """
+        if self.speech_only is None:
+            return np.ones(self.num_samples, dtype=bool)
+        mode, frame_size, silence_threshold, vol_threshold, zcr_threshold = self.speech_only
+
+        def compute():
+            if mode == 'speech':
+                regions = self.silence_regions(frame_size, silence_threshold)
+            else:
+                regions = self.voiced_unvoiced_regions(frame_size, vol_threshold, zcr_threshold, silence_threshold)
+            channel_regions = regions if self.signal.ndim > 1 else [regions]
+            mask = np.zeros(self.num_samples, dtype=bool)
+            for regions in channel_regions:
+                if mode == 'speech':
+                    channel = np.ones(self.num_samples, dtype=bool)
+                    for start, stop in regions:
+                        channel[start:stop] = False
+                else:
+                    channel = np.zeros(self.num_samples, dtype=bool)
+                    for start, stop, voiced in regions:
+                        channel[start:stop] = voiced
+                mask |= channel
+            mask.flags.writeable = False
+            return mask
+        return self._cached(('speech_mask',) + self.speech_only, compute)
+
+    def set_precision(self, precision):
+        """Zmienia precyzję obliczeń; wyniki w poprzedniej precyzji są usuwane z pamięci podręcznej."""
+        real_dtype(precision)
+        if precision != self.precision:
+            self.precision = precision
+            self.clear_cache()
+
+    @property
+    def dtype(self):
+        return real_dtype(self.precision)
+
+    def _run(self, name, **params):
+        params['precision'] = self.precision
+        # Długie nagrania dzielimy na fragmenty liczone w puli procesów
+        if self.workers > 1:
+            from parallel import run_pipeline_parallel, MIN_FRAMES_PER_CHUNK
+            if pipeline_frames(name, self.num_samples, params) >= 2 * MIN_FRAMES_PER_CHUNK:
+                return run_pipeline_parallel(name, self.signal, self.sample_rate, params, self.workers)
+        return run_pipeline(name, self.signal, self.sample_rate, params)
+
+    def _view_frames(self, name, frame_step, params):
+        # Ramki, których początek leży w zakresie widoku
+        total = pipeline_frames(name, self.num_samples, params)
+        start_sample = int(self.view[0] * self.sample_rate)
+        stop_sample = int(np.ceil(self.view[1] * self.sample_rate))
+        start_frame = min(total, start_sample // frame_step)
+        stop_frame = min(total, max(start_frame, -(-stop_sample // frame_step)))
+        return start_frame, stop_frame
+
+    def _frame_analysis(self, name, frame_step, build, key_extra=(), **params):
+        """
+        Wynik potoku dla całego sygnału albo – gdy ustawiono widok – tylko dla ramek widoku.
+
+        Args:
+            name: Nazwa potoku (pipelines.PIPELINES).
+            frame_step: Przesunięcie między ramkami potoku (w próbkach).
+            build: Funkcja (indeks pierwszej ramki, wynik potoku) -> wynik metody sesji.
+            key_extra: Dodatkowe elementy klucza pamięci podręcznej, które nie są parametrami potoku.
+            **params: Parametry potoku.
+        """
+        key = (name,) + tuple(sorted(params.items())) + tuple(key_extra)
+        masked = self.speech_only is not None and name in SPEECH_ONLY_PIPELINES
+        if masked:
+            key += ('speech_only',) + self.speech_only
+        if self.view is None:
+            if masked:
+                total = pipeline_frames(name, self.num_samples, params)
+                return self._cached(key, lambda: build(0, self._masked_compute(name, params)(0, total)))
+            return self._cached(key, lambda: build(0, self._run(name, **params)))
+
+        start_frame, stop_frame = self._view_frames(name, frame_step, params)
+        key = (self.mix, self.sample_rate, fft_backend.result_key()) + key
+        cache = self._range_caches.get(key)
+        if cache is None:
+            signal, sample_rate = self.signal, self.sample_rate
+            run_params = {**params, 'precision': self.precision}
+            if masked:
+                compute = self._masked_compute(name, params)
+            else:
+                def compute(start, stop):
+                    return run_pipeline(name, signal, sample_rate, run_params, start, stop)
+            cache = RangeCache(compute, frame_axis=signal.ndim - 1)
+            self._range_caches[key] = cache
+            if len(self._range_caches) > self.cache_size:
+                self._range_caches.popitem(last=False)
+        else:
+            self._range_caches.move_to_end(key)
+        return build(start_frame, cache.get(start_frame, stop_frame))
+
+    def _masked_compute(self, name, params):
+        # Funkcja (start_frame, stop_frame) -> wynik potoku liczony tylko dla ramek z mową
+        signal, sample_rate = self.signal, self.sample_rate
+        run_params = {**params, 'precision': self.precision}
+        sample_mask = self.speech_mask()
+        frame_length, hop_length = pipeline_geometry(name, params)
+
+        def compute(start, stop):
+            frame_mask = frames_touching(sample_mask, frame_length, hop_length, start, stop)
+            return run_pipeline_masked(name, signal, sample_rate, run_params, frame_mask, start)
+        return compute
+
+    def _cached(self, key, compute):
+        # Ustawienia FFT zmieniające długość transformaty (fast_len) dają inne wyniki
+        key = (self.mix, self.sample_rate, fft_backend.result_key()) + key
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        value = compute()
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    # ------------------------------------------------------------------
+    # Segmentacja
+    # ------------------------------------------------------------------
+    def _per_channel(self, func):
+        # Segmentacja zwraca listy przedziałów – w widoku 'all' osobną listę dla każdego kanału
+        if self.signal.ndim > 1:
+            return [func(channel) for channel in self.signal]
+        return func(self.signal)
+
+    def silence_regions(self, frame_size=256, threshold=0.001):
+        """Zwraca listę przedziałów ciszy (start, koniec) w próbkach."""
+        return self._cached(
+            ('silence', frame_size, threshold),
+            lambda: self._per_channel(
+                lambda signal: self.processor.detect_silence(signal, self.sample_rate, frame_size, threshold)
+            )
+        )
+
+    def voiced_unvoiced_regions(self, frame_size=256, vol_threshold=0.02, zcr_threshold=0.3,
+                                silence_threshold=0.001):
+        """Zwraca listę segmentów (start, koniec, czy_dźwięczny) w próbkach."""
+        return self._cached(
+            ('voiced', frame_size, vol_threshold, zcr_threshold, silence_threshold),
+            lambda: self._per_channel(
+                lambda signal: self.processor.detect_voiced_unvoiced(
+                    signal, self.sample_rate, frame_size, vol_threshold, zcr_threshold, silence_threshold
+                )
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # Cechy w dziedzinie czasu
+    # ------------------------------------------------------------------
+    def frame_params(self, frame_size=256):
+        """Średni RMS i średnie ZCR liczone po kolejnych ramkach sygnału."""
+        def compute(signal):
+            rms = frame_values(signal, frame_size, compute_volume)
+            zcr = frame_values(signal, frame_size, compute_zcr)
+            avg_rms = float(np.mean(rms)) if len(rms) else 0.0
+            avg_zcr = float(np.mean(zcr)) if len(zcr) else 0.0
+            return avg_rms, avg_zcr
+        return self._cached(('frame_params', frame_size), lambda: self._per_channel(compute))
+
+    def time_features(self, frame_size, pitch_estimators=('autocorr', 'amdf'), features=None):
+        """
+        Oblicza cechy czasowe (Volume, STE, ZCR, SR, F0) dla ramek sygnału lub widoku.
+
+        Args:
+            frame_size: Długość nienakładających się ramek.
+            pitch_estimators: Estymatory F0 (pitch.ESTIMATORS) liczone na tych samych ramkach.
+            features: Nazwy cech z rejestru feature_registry (grupa 'time'); domyślnie wszystkie
+                zarejestrowane.
+
+        Returns:
+            Słownik {nazwa: tablica} z kluczami 'f0_<estymator>' i 'confidence_<estymator>',
+            zawiera również oś czasu pod kluczem 'time'.
+        """
+        # Lista cech i wersja rejestru są częścią klucza pamięci podręcznej – nowo zarejestrowane
+        # lub zastąpione cechy nie trafią na stare wyniki
+        features = tuple(feature_names('time') if features is None else features)
+        registry = ('feature_registry', registry_version())
+
+        def build(start_frame, result):
+            num_frames = _frame_count(result, self.signal.ndim - 1)
+            return {'time': (start_frame + np.arange(num_frames)) * frame_size / self.sample_rate, **result}
+        if self.speech_only is None or not pitch_estimators:
+            return self._frame_analysis('time_features', frame_size, build, registry, frame_size=frame_size,
+                                        pitch_estimators=tuple(pitch_estimators), features=features)
+
+        # Tryb samej mowy: tanie cechy dla wszystkich ramek, F0 (AMDF, cepstrum...) tylko dla ramek z mową.
+        # Potok 'pitch' na ramkach bez nakładania daje te same ramki, poza dopełnioną ostatnią (NaN).
+        output = dict(self._frame_analysis('time_features', frame_size, build, registry, frame_size=frame_size,
+                                           pitch_estimators=(), features=features))
+        pitch = self._frame_analysis('pitch', frame_size, lambda start_frame, result: result,
+                                     frame_length=frame_size, hop_length=frame_size, window_type='hamming',
+                                     estimators=tuple(pitch_estimators), min_f0=50, max_f0=500)
+        num_frames = len(output['time'])
+        for key, value in pitch.items():
+            missing = num_frames - value.shape[-1]
+            pad = np.full(value.shape[:-1] + (missing,), np.nan, dtype=value.dtype)
+            output[key] = np.concatenate((value, pad), axis=-1) if missing > 0 else value
+        return output
+
+    # ------------------------------------------------------------------
+    # Analiza widmowa
+    # ------------------------------------------------------------------
+    def frame(self, start, length):
+        """Zwraca fragment sygnału [start, start + length) (krótszy na końcu sygnału)."""
+        end_idx = min(start + length, self.num_samples)
+        return self.signal[..., start:end_idx]
+
+    def frame_spectrum(self, start, length, window_type):
+        """
+        Oblicza widmo pojedynczej ramki.
+
+        Returns:
+            Krotka (ramka z oknem, widmo zespolone, oś częstotliwości).
+        """
+        windowed_frame = apply_window(self.frame(start, length), window_type, self.dtype)
+        spectrum = fft_backend.rfft(windowed_frame, axis=-1)
+        freqs = fft_backend.rfft_freqs(windowed_frame.shape[-1], self.sample_rate, self.dtype)
+        return windowed_frame, spectrum, freqs
+
+    def frame_spectral_features(self, start, length, window_type):
+        """Parametry częstotliwościowe pojedynczej ramki."""
+        _, spectrum, freqs = self.frame_spectrum(start, length, window_type)
+        return compute_spectral_features(spectrum, freqs, self.sample_rate)
+
+    def zoom_spectrum(self, start, length, window_type, f_start, f_stop, num_points=1000):
+        """
+        Widmo pojedynczej ramki w paśmie [f_start, f_stop] (transformata chirp-z).
+
+        Gęstość punktów widma nie zależy od długości ramki, więc wąskie pasmo
+        (np. harmoniczne wokół F0) można obejrzeć bez liczenia pełnego FFT z dopełnieniem.
+
+        Returns:
+            Krotka (widmo zespolone, oś częstotliwości).
+        """
+        windowed_frame = apply_window(self.frame(start, length), window_type, self.dtype)
+        spectrum, freqs = zoom_fft(windowed_frame, self.sample_rate, f_start, f_stop, num_points, self.precision)
+        return spectrum, freqs.astype(self.dtype)
+
+    def zoom_spectrogram(self, frame_length, overlap, window_type, f_start, f_stop, num_points=500):
+        """
+        Spektrogram w dB ograniczony do pasma [f_start, f_stop] (transformata chirp-z).
+
+        Returns:
+            Krotka (spektrogram ([kanały,] punkty, ramki), oś częstotliwości, oś czasu).
+        """
+        hop_length = hop_from_overlap(frame_length, overlap)
+
+        def build(start_frame, result):
+            spec = np.swapaxes(result['spectrogram'], -1, -2)
+            freqs = np.linspace(f_start, f_stop, num_points).astype(self.dtype)
+            times = (start_frame + np.arange(spec.shape[-1])) * hop_length / self.sample_rate
+            return spec, freqs, times
+        return self._frame_analysis('zoom_spectrogram_db', hop_length, build, frame_length=frame_length,
+                                    hop_length=hop_length, window_type=window_type, f_start=float(f_start),
+                                    f_stop=float(f_stop), num_points=int(num_points))
+
+    def window_comparison(self, start, length, window_types=WINDOW_TYPES):
+        """
+        Widma jednej ramki dla wielu funkcji okienkowych, liczone jednym wywołaniem FFT.
+
+        Args:
+            start: Indeks pierwszej próbki ramki.
+            length: Długość ramki.
+            window_types: Krotka typów funkcji okienkowych.
+
+        Returns:
+            Krotka (ramki z oknami, widma zespolone, oś częstotliwości, parametry przecieku).
+            Ramki i widma mają oś okien na początku: (okna, [kanały,] próbki / biny).
+            Parametry przecieku to słownik {typ okna: parametry}: parametry okna
+            z windowing.window_properties oraz 'leakage_db' i 'dynamic_range_db' tej ramki.
+        """
+        window_types = tuple(window_types)
+        frame = self.frame(start, length).astype(self.dtype, copy=False)
+        bank = get_window_bank(window_types, frame.shape[-1], self.dtype)
+        # Okna rozgłaszamy na oś kanałów: (okna, [1,] próbki)
+        bank = bank.reshape(bank.shape[:1] + (1,) * (frame.ndim - 1) + bank.shape[1:])
+        windowed = frame * bank
+        spectra = fft_backend.rfft(windowed, axis=-1)
+        freqs = fft_backend.rfft_freqs(windowed.shape[-1], self.sample_rate, self.dtype)
+
+        properties = window_properties(window_types, frame.shape[-1])
+        mainlobe = np.array([properties[name]['mainlobe_width'] for name in window_types])
+        mainlobe = mainlobe.reshape(bank.shape[:-1])
+        leakage = compute_peak_leakage(spectra, mainlobe)
+        dynamic_range = compute_dynamic_range(spectra)
+        metrics = {name: {**properties[name], 'leakage_db': leakage[i], 'dynamic_range_db': dynamic_range[i]}
+                   for i, name in enumerate(window_types)}
+        return windowed, spectra, freqs, metrics
+
+    def spectrogram_comparison(self, frame_length, overlap, window_types=WINDOW_TYPES):
+        """
+        Spektrogramy w dB dla wielu funkcji okienkowych z jednego podziału na ramki.
+
+        Returns:
+            Krotka (spektrogramy (okna, [kanały,] biny, ramki), oś częstotliwości, oś czasu).
+        """
+        hop_length = hop_from_overlap(frame_length, overlap)
+
+        def build(start_frame, result):
+            # Wynik potoku ma kształt ([kanały,] ramki, okna, biny)
+            spec = np.swapaxes(np.moveaxis(result['spectrogram'], -2, 0), -1, -2)
+            freqs = fft_backend.rfft_freqs(frame_length, self.sample_rate, self.dtype)
+            times = (start_frame + np.arange(spec.shape[-1])) * hop_length / self.sample_rate
+            return spec, freqs, times
+        return self._frame_analysis('spectrogram_db_multi', hop_length, build, frame_length=frame_length,
+                                    hop_length=hop_length, window_types=tuple(window_types))
+
+    def stft(self, frame_length, hop_length, window_type):
+        """
+        Krótkoczasowa transformata Fouriera sygnału lub widoku.
+
+        Returns:
+            Macierz zespolona o kształcie ([kanały,] liczba_ramek, frame_length // 2 + 1).
+        """
+        return self._frame_analysis('stft', hop_length, lambda start_frame, result: result['stft'],
+                                    frame_length=frame_length, hop_length=hop_length, window_type=window_type)
+
+    def spectrogram(self, frame_length, overlap, window_type):
+        """
+        Spektrogram amplitudowy w dB.
+
+        Returns:
+            Krotka (macierz ([kanały,] biny, ramki) w dB, oś częstotliwości, oś czasu).
+        """
+        hop_length = hop_from_overlap(frame_length, overlap)
+
+        def build(start_frame, result):
+            spec = np.swapaxes(result['spectrogram'], -1, -2)
+            freqs = fft_backend.rfft_freqs(frame_length, self.sample_rate, self.dtype)
+            times = (start_frame + np.arange(spec.shape[-1])) * hop_length / self.sample_rate
+            return spec, freqs, times
+        return self._frame_analysis('spectrogram_db', hop_length, build, frame_length=frame_length,
+                                    hop_length=hop_length, window_type=window_type)
+
+    def formants(self, frame_length, overlap, window_type='hamming', order=None, num_formants=3, method='newton'):
+        """
+        Tory formantów (LPC z preemfazą) dla ramek sygnału lub widoku.
+
+        Args:
+            order: Rząd predykcji; None – formants.default_order(częstotliwość próbkowania).
+            num_formants: Liczba formantów (F1, F2, ...).
+            method: Wyznaczanie pierwiastków A(z): 'newton' lub 'eig' (patrz formants.py).
+
+        Returns:
+            Krotka (częstotliwości ([kanały,] formanty, ramki), szerokości pasm o tym samym kształcie,
+            oś czasu). Brakujące formanty mają wartość NaN.
+        """
+        hop_length = hop_from_overlap(frame_length, overlap)
+
+        def build(start_frame, result):
+            freqs = np.swapaxes(result['formants'], -1, -2)
+            times = (start_frame + np.arange(freqs.shape[-1])) * hop_length / self.sample_rate
+            return freqs, np.swapaxes(result['bandwidths'], -1, -2), times
+        return self._frame_analysis('formants', hop_length, build, frame_length=frame_length,
+                                    hop_length=hop_length, window_type=window_type, order=order,
+                                    num_formants=int(num_formants), method=method)
+
+    def spectral_features(self, frame_size, window_type, overlap=0.5, frame_step=None, features=None):
+        """
+        Parametry częstotliwościowe (Volume, FC, BW, ERSB1-3, SFM, SCF) dla ramek sygnału lub widoku.
+
+        Args:
+            features: Nazwy cech z rejestru feature_registry (grupa 'spectral'); domyślnie wszystkie
+                zarejestrowane.
+
+        Returns:
+            Słownik {nazwa: tablica}, zawiera również oś czasu pod kluczem 'time'.
+        """
+        frame_step = frame_step or hop_from_overlap(frame_size, overlap)
+        features = tuple(feature_names('spectral') if features is None else features)
+
+        def build(start_frame, result):
+            num_frames = _frame_count(result, self.signal.ndim - 1)
+            return {'time': (start_frame + np.arange(num_frames)) * frame_step / self.sample_rate, **result}
+        return self._frame_analysis('spectral_features', frame_step, build, ('feature_registry', registry_version()),
+                                    frame_length=frame_size, hop_length=frame_step, window_type=window_type,
+                                    features=features)
+
+    def ltas(self, frame_length=2048, overlap=0.5, window_type='hann', method='welch', num_tapers=4,
+             percentiles=DEFAULT_PERCENTILES):
+        """
+        Długoterminowe widmo średnie całego sygnału (niezależnie od widoku).
+
+        Sygnał jest podawany akumulatorowi ltas.LTASAccumulator fragmentami, więc –
+        w przeciwieństwie do spektrogramu – nie powstaje macierz wszystkich ramek.
+
+        Returns:
+            Słownik tablic: 'freq', 'mean' i 'variance' (gęstość mocy), 'mean_db', 'std_db',
+            'percentile', 'percentile_db' ((percentyle, [kanały,] biny)) oraz 'frames'.
+        """
+        percentiles = tuple(percentiles)
+        return self._cached(
+            ('ltas', frame_length, overlap, window_type, method, num_tapers, percentiles),
+            lambda: compute_ltas(self.signal, self.sample_rate, percentiles=percentiles,
+                                 frame_length=frame_length, overlap=overlap, window_type=window_type,
+                                 method=method, num_tapers=num_tapers, precision=self.precision)
+        )
+
+    # ------------------------------------------------------------------
+    # Cepstrum i F0
+    # ------------------------------------------------------------------
+    def cepstrum(self, start, length, window_type):
+        """
+        Cepstrum pojedynczej ramki.
+
+        Returns:
+            Krotka (cepstrum, oś kwefrencji, logarytmiczne widmo amplitudowe).
+        """
+        return compute_cepstrum(self.frame(start, length), self.sample_rate, window_type, self.dtype)
+
+    def f0_track(self, frame_size=2048, hop_size=512, window_type='hamming', min_f0=50, max_f0=500):
+        """
+        Przebieg F0 w czasie wyznaczony metodą cepstralną.
+
+        Returns:
+            Krotka (oś czasu, wartości F0 w Hz).
+        """
+        result = self.pitch(frame_size, hop_size, window_type, ('cepstrum',), min_f0, max_f0)
+        return result['time'], result['f0_cepstrum']
+
+    def pitch(self, frame_length=2048, hop_length=512, window_type='hamming', estimators=PITCH_ESTIMATORS,
+              min_f0=50, max_f0=500):
+        """
+        Przebiegi F0 wielu estymatorów liczone na jednym podziale na ramki (pitch.py).
+
+        Args:
+            estimators: Nazwy estymatorów (pitch.ESTIMATORS).
+            min_f0, max_f0: Zakres poszukiwań F0 [Hz].
+
+        Returns:
+            Słownik {'time', 'f0_<estymator>', 'confidence_<estymator>'}; tablice mają kształt
+            ([kanały,] ramki), F0 równe 0 oznacza brak estymaty.
+        """
+        def build(start_frame, result):
+            num_frames = next(iter(result.values())).shape[-1]
+            return {'time': (start_frame + np.arange(num_frames)) * hop_length / self.sample_rate, **result}
+        return self._frame_analysis('pitch', hop_length, build, frame_length=frame_length, hop_length=hop_length,
+                                    window_type=window_type, estimators=tuple(estimators), min_f0=min_f0,
+                                    max_f0=max_f0)
+
+    def mfcc(self, frame_length=1024, hop_length=256, window_type='hamming', n_mels=40, n_mfcc=13,
+             f_min=0.0, f_max=None, deltas=2):
+        """
+        Współczynniki MFCC ramek sygnału lub widoku.
+
+        Args:
+            n_mels: Liczba pasm melowych.
+            n_mfcc: Liczba współczynników cepstralnych.
+            f_min, f_max: Zakres banku filtrów [Hz]; f_max None – połowa częstotliwości próbkowania.
+            deltas: 0 – bez współczynników delta, 1 – delta, 2 – delta i delta-delta
+                (liczone po ramkach wyniku, na brzegach zakresu powielane są skrajne ramki).
+
+        Returns:
+            Słownik {'time', 'mel_freq', 'log_mel' ([kanały,] pasma, ramki), 'mfcc' ([kanały,]
+            współczynniki, ramki)} oraz 'delta' i 'delta2' o kształcie 'mfcc'.
+        """
+        f_max = self.sample_rate / 2 if f_max is None else float(f_max)
+
+        def build(start_frame, result):
+            coefficients = np.swapaxes(result['mfcc'], -1, -2)
+            return {
+                'time': (start_frame + np.arange(coefficients.shape[-1])) * hop_length / self.sample_rate,
+                'mel_freq': mel_frequencies(n_mels, f_min, f_max).astype(self.dtype),
+                'log_mel': np.swapaxes(result['log_mel'], -1, -2),
+                'mfcc': coefficients,
+            }
+        output = dict(self._frame_analysis('mfcc', hop_length, build, frame_length=frame_length,
+                                           hop_length=hop_length, window_type=window_type, n_mels=int(n_mels),
+                                           n_mfcc=int(n_mfcc), f_min=float(f_min), f_max=f_max))
+        # Delty zależą od sąsiednich ramek, więc liczymy je po sklejeniu wyniku (poza pamięcią podręczną)
+        if deltas >= 1:
+            output['delta'] = compute_deltas(output['mfcc'])
+        if deltas >= 2:
+            output['delta2'] = compute_deltas(output['delta'])
+        return output
@@ -1,29 +1,31 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import numpy as np
-import sounddevice as sd
-import matplotlib
-
-matplotlib.use("TkAgg")
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.patches import Patch
-from scipy.io import wavfile
+from matplotlib.widgets import SpanSelector
 import sys
-import warnings
-from scipy.io.wavfile import WavFileWarning
 import os
+import time
 
+import fft_backend
 from design import ColorScheme, configure_style
-from audio_processing import VoicedAudioProcessor
-from features_window import FeaturesWindow
-# Dodajemy import klas analizy częstotliwościowej
-from frequency_analysis import FrequencyAnalysisWindow, CepstrumAnalysisWindow
+from analysis_session import AnalysisSession
 
-warnings.simplefilter("ignore", WavFileWarning)
+# Okna analizy, scipy oraz sounddevice importujemy dopiero przy pierwszym użyciu,
+# aby start aplikacji ładował tylko to, czego potrzebuje okno główne.
 
 
 class AudioApp:
+    # Granice okresu odświeżania pozycji odtwarzania [ms]
+    UI_MIN_INTERVAL_MS = 16
+    UI_MAX_INTERVAL_MS = 100
+    # Częstotliwości analizy dostępne dla nagrań o wyższej częstotliwości próbkowania
+    ANALYSIS_RATES = (8000, 16000, 22050)
+    # Opóźnienie przeliczenia analiz po zmianie widoku (przybliżenie, przesunięcie, zaznaczenie)
+    VIEW_DEBOUNCE_MS = 200
+
     def __init__(self, master):
         self.master = master
 
@@ -31,12 +33,17 @@ class AudioApp:
         self.style = ttk.Style()
         configure_style(self.style)
 
-        # Klasa do przetwarzania audio (analizy ciszy, dźwięczności itd.)
-        self.processor = VoicedAudioProcessor()
+        # Sesja analizy wczytanego sygnału (segmentacja, cechy, widma – bez GUI)
+        self.session = None
 
         self.master.title("Aplikacja Audio")
         self.master.geometry("900x700")
 
+        # Silnik odtwarzania (bufor pierścieniowy + strumień sounddevice)
+        self.player = None
+        self.playback_blocksize = 1024
+        self.playback_latency = None  # 'low', 'high' lub liczba sekund; None – domyślne urządzenia
+
         # Zmienne audio
         self.fs = None
         self.data = None
@@ -48,32 +55,57 @@ class AudioApp:
         # Flagi sterowania
         self.playing = False
         self.paused = False
-
-        # Strumień audio w sounddevice
-        self.stream = None
+        # Ustawianie suwaka z pętli UI nie powinno przewijać odtwarzania
+        self.updating_slider = False
 
         # Parametry analizy
         self.silence_threshold = 0.001
         self.frame_size = 256
+        # Liczba procesów roboczych dla analiz długich nagrań
+        self.analysis_workers = os.cpu_count() or 1
 
         # Zmienna do wyboru trybu podświetlania
         self.highlight_mode = tk.StringVar(value="silence")  # domyślnie "silence"
 
+        # Tryb pojedynczej precyzji (float32/complex64) dla całego potoku analizy
+        self.float32_mode = tk.BooleanVar(value=False)
+
+        # FFT: scipy.fft w kilku wątkach, strojenie z benchmarks.py fft --save (jeśli zapisane)
+        # oraz opcjonalne dopełnienie ramek do szybkiej długości FFT
+        fft_backend.configure(backend="scipy", workers=self.analysis_workers)
+        try:
+            fft_backend.load_tuning()
+        except (OSError, ValueError) as e:
+            # Uszkodzony plik strojenia nie blokuje startu – FFT działa wtedy bez strojenia
+            messagebox.showwarning("Strojenie FFT", f"Pominięto plik strojenia FFT:\n{e}")
+        self.fast_fft_mode = tk.BooleanVar(value=False)
+
         # Referencja do pionowej linii
         self.line = None
 
         # Bliting – statyczne tło wykresu
         self.background = None
 
+        # Widoczny zakres osi czasu (None – cały sygnał) i zaznaczony fragment
+        self.view_xlim = None
+        self.selection = None
+        self.selection_patch = None
+        self.span_selector = None
+        self.view_after = None
+        # Pary (widżet, funkcja) odświeżane po zmianie zakresu analizy
+        self.view_listeners = []
+
         # Główna ramka
         self.main_frame = ttk.Frame(self.master, style="App.TFrame")
         self.main_frame.pack(fill="both", expand=True)
 
         self.create_widgets()
 
-        # Wywołujemy pętlę do aktualizowania UI (pozycji odtwarzania itp.)
+        # Pętla aktualizacji UI działa tylko podczas odtwarzania (start_ui_loop)
         self.ui_after = None
-        self.update_ui()
+        self.ui_interval = self.UI_MIN_INTERVAL_MS
+        # Funkcje wywoływane przy starcie / wznowieniu odtwarzania (np. okna analizy na żywo)
+        self.playback_listeners = []
         self.master.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
@@ -137,12 +169,27 @@ class AudioApp:
         )
         self.cepstrum_button.grid(row=0, column=6, padx=5, pady=5)
 
+        self.live_button = ttk.Button(
+            self.top_frame,
+            text="Analiza na żywo",
+            command=self.open_live_analysis,
+            state="disabled"
+        )
+        self.live_button.grid(row=0, column=7, padx=5, pady=5)
+
+        self.mic_button = ttk.Button(
+            self.top_frame,
+            text="Mikrofon",
+            command=self.open_microphone_analysis
+        )
+        self.mic_button.grid(row=0, column=8, padx=5, pady=5)
+
         self.close_button = ttk.Button(
             self.top_frame,
             text="Zamknij",
             command=self.on_close
         )
-        self.close_button.grid(row=0, column=7, padx=5, pady=5)
+        self.close_button.grid(row=0, column=9, padx=5, pady=5)
 
         # --- Sekcja info: nazwa pliku, czas, tryb ---
         info_frame = ttk.Frame(self.main_frame, style="App.TFrame")
@@ -180,6 +227,13 @@ class AudioApp:
         )
         self.params_label.pack(side="top", anchor="w", pady=5)
 
+        # Zakres czasu, dla którego liczone są analizy w oknach
+        self.view_label = ttk.Label(
+            info_frame,
+            text="Zakres analizy: cały sygnał"
+        )
+        self.view_label.pack(side="top", anchor="w", pady=5)
+
         # --- Opcje wyboru trybu podświetlania ---
         mode_frame = ttk.Frame(self.main_frame, style="Controls.TFrame")
         mode_frame.pack(side="top", fill="x", padx=10, pady=5)
@@ -208,6 +262,59 @@ class AudioApp:
         )
         rb_voiced.pack(side="left", padx=5)
 
+        # Częstotliwość próbkowania analizy (odtwarzanie zawsze w oryginalnej)
+        self.analysis_rates = [None]
+        self.rate_combo = ttk.Combobox(
+            mode_frame,
+            values=[self.rate_label(None)],
+            state="disabled",
+            width=12
+        )
+        self.rate_combo.current(0)
+        self.rate_combo.bind("<<ComboboxSelected>>", self.update_analysis_rate)
+        self.rate_combo.pack(side="right", padx=5)
+        ttk.Label(mode_frame, text="Analiza:").pack(side="right", padx=(10, 0))
+
+        # Widok kanałów (dla nagrań wielokanałowych)
+        self.channel_mixes = [0]
+        self.channel_combo = ttk.Combobox(
+            mode_frame,
+            values=[self.mix_label(0)],
+            state="disabled",
+            width=16
+        )
+        self.channel_combo.current(0)
+        self.channel_combo.bind("<<ComboboxSelected>>", self.update_channel_mix)
+        self.channel_combo.pack(side="right", padx=5)
+        ttk.Label(mode_frame, text="Kanał:").pack(side="right", padx=(10, 0))
+
+        # Kosztowne analizy tylko dla ramek z mową (segmentacja jak w podświetlaniu wykresu)
+        self.speech_modes = (None, 'speech', 'voiced')
+        self.speech_combo = ttk.Combobox(
+            mode_frame,
+            values=["Wszystkie", "Bez ciszy", "Dźwięczne"],
+            state="readonly",
+            width=12
+        )
+        self.speech_combo.current(0)
+        self.speech_combo.bind("<<ComboboxSelected>>", self.update_speech_only)
+        self.speech_combo.pack(side="right", padx=5)
+        ttk.Label(mode_frame, text="Ramki:").pack(side="right", padx=(10, 0))
+
+        ttk.Checkbutton(
+            mode_frame,
+            text="Precyzja float32",
+            variable=self.float32_mode,
+            command=self.update_precision
+        ).pack(side="right", padx=5)
+
+        ttk.Checkbutton(
+            mode_frame,
+            text="Szybka długość FFT",
+            variable=self.fast_fft_mode,
+            command=self.update_fft_mode
+        ).pack(side="right", padx=5)
+
         # --- Ramka z wykresem audio ---
         plot_frame = ttk.LabelFrame(
             self.main_frame,
@@ -216,17 +323,25 @@ class AudioApp:
         )
         plot_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.fig, self.ax = plt.subplots(figsize=(8, 3))
+        self.fig = Figure(figsize=(8, 3))
+        self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=plot_frame)
+
+        # Pasek narzędzi matplotlib – przybliżanie i przesuwanie osi czasu
+        self.toolbar = NavigationToolbar2Tk(self.canvas, plot_frame, pack_toolbar=False)
+        self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
         # Podpięcie obsługi zdarzenia zmiany rozmiaru wykresu
         self.canvas.mpl_connect('resize_event', self.on_resize)
+        # Po każdym pełnym rysowaniu (także z paska narzędzi) zapamiętujemy tło do blittingu
+        self.canvas.mpl_connect('draw_event', self.on_draw)
 
     # Dodajemy nowe metody do obsługi analizy częstotliwościowej
     def open_frequency_analysis(self):
         """Otwiera okno analizy częstotliwościowej."""
         if self.data is not None:
+            from frequency_analysis import FrequencyAnalysisWindow
             FrequencyAnalysisWindow(self.master, self)
         else:
             messagebox.showerror("Błąd", "Najpierw wczytaj plik audio.")
@@ -234,15 +349,134 @@ class AudioApp:
     def open_cepstrum_analysis(self):
         """Otwiera okno analizy cepstralnej do estymacji częstotliwości podstawowej."""
         if self.data is not None:
+            from frequency_analysis import CepstrumAnalysisWindow
             CepstrumAnalysisWindow(self.master, self)
         else:
             messagebox.showerror("Błąd", "Najpierw wczytaj plik audio.")
 
+    def open_live_analysis(self):
+        """Otwiera okno spektrogramu, poziomu i F0 aktualizowane podczas odtwarzania."""
+        if self.data is not None:
+            from live_view import LiveAnalysisWindow
+            LiveAnalysisWindow(self.master, self)
+        else:
+            messagebox.showerror("Błąd", "Najpierw wczytaj plik audio.")
+
+    def open_microphone_analysis(self):
+        """Otwiera okno analizy na żywo sygnału z domyślnego wejścia audio."""
+        from audio_sources import MicrophoneSource
+        from live_view import LiveAnalysisWindow
+        try:
+            source = MicrophoneSource()
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Nie udało się otworzyć wejścia audio:\n{e}")
+            return
+        LiveAnalysisWindow(self.master, self, source=source)
+
     def on_resize(self, event):
+        # Nowe tło zapamięta on_draw po przerysowaniu płótna
         self.background = None
-        if self.line is not None:
-            self.canvas.draw()
-            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+
+    def on_draw(self, event):
+        """Zapamiętuje tło wykresu i dorysowuje linię pozycji (animowaną, pomijaną w pełnym rysowaniu)."""
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self.line is not None and self.data is not None:
+            self.line.set_xdata([self.current_index / self.fs] * 2)
+            self.ax.draw_artist(self.line)
+
+    # ------------------------------------------------------------------
+    # Zakres analizy (widok wykresu i zaznaczenie)
+    # ------------------------------------------------------------------
+    def on_xlim_changed(self, ax):
+        """Zapamiętuje widoczny zakres osi czasu po przybliżeniu lub przesunięciu wykresu."""
+        start, stop = ax.get_xlim()
+        duration = self.total_samples / self.fs
+        if start <= 0 and stop >= duration:
+            self.view_xlim = None
+        else:
+            self.view_xlim = (max(0.0, start), min(duration, stop))
+        self.schedule_view_update()
+
+    def on_span_select(self, start, stop):
+        """Zaznacza fragment sygnału; kliknięcie bez przeciągania usuwa zaznaczenie."""
+        if self.fs is None:
+            return
+        if stop - start < 2 * self.frame_size / self.fs:
+            self.selection = None
+        else:
+            self.selection = (start, stop)
+        self.draw_selection()
+        self.canvas.draw_idle()
+        self.schedule_view_update()
+
+    def draw_selection(self):
+        if self.selection_patch is not None:
+            self.selection_patch.remove()
+            self.selection_patch = None
+        if self.selection is not None:
+            self.selection_patch = self.ax.axvspan(*self.selection, color=ColorScheme.ACCENT, alpha=0.15)
+
+    def current_view(self):
+        """
+        Zakres czasu, dla którego liczone są analizy.
+
+        Returns:
+            Zaznaczony fragment, widoczny zakres przybliżonego wykresu lub None (cały sygnał).
+        """
+        return self.selection if self.selection is not None else self.view_xlim
+
+    def schedule_view_update(self):
+        # Przeliczamy analizy dopiero po zakończeniu serii zmian (np. przeciągania wykresu)
+        if self.view_after is not None:
+            self.master.after_cancel(self.view_after)
+        self.view_after = self.master.after(self.VIEW_DEBOUNCE_MS, self.apply_view)
+
+    def apply_view(self):
+        """Ustawia zakres analizy w sesji i odświeża zależne okna."""
+        self.view_after = None
+        if self.session is None:
+            return
+        view = self.current_view()
+        self.session.set_view(view)
+        if view is None:
+            self.view_label.config(text="Zakres analizy: cały sygnał")
+        else:
+            kind = "zaznaczenie" if self.selection is not None else "widok"
+            self.view_label.config(text=f"Zakres analizy ({kind}): {view[0]:.2f} – {view[1]:.2f} s")
+        self.notify_view_listeners()
+
+    def add_view_listener(self, widget, callback):
+        """
+        Rejestruje funkcję odświeżającą okno po zmianie zakresu analizy.
+
+        Args:
+            widget: Okno (Toplevel) – po jego zamknięciu funkcja jest wyrejestrowywana.
+            callback: Funkcja bez argumentów.
+        """
+        self.view_listeners.append((widget, callback))
+
+    def notify_view_listeners(self):
+        alive = []
+        for widget, callback in self.view_listeners:
+            try:
+                exists = widget.winfo_exists()
+            except tk.TclError:
+                exists = False
+            if exists:
+                alive.append((widget, callback))
+                callback()
+        self.view_listeners = alive
+
+    def reset_view(self):
+        """Przywraca analizę całego sygnału (np. po wczytaniu nowego pliku)."""
+        self.view_xlim = None
+        self.selection = None
+        if self.view_after is not None:
+            self.master.after_cancel(self.view_after)
+            self.view_after = None
+        self.view_label.config(text="Zakres analizy: cały sygnał")
+        # Czyścimy historię przybliżeń paska narzędzi
+        self.toolbar.update()
 
     def update_highlight_mode(self):
         mode = self.highlight_mode.get()
@@ -254,6 +488,42 @@ class AudioApp:
         if self.data is not None:
             self.draw_main_plot()
 
+    def update_precision(self):
+        """Przełącza precyzję obliczeń sesji analizy (kolejne okna liczą już w nowej precyzji)."""
+        if self.session is not None:
+            self.session.set_precision(self.precision)
+
+    def update_speech_only(self, event=None):
+        """Ogranicza kosztowne analizy (widma, F0, MFCC, formanty) do ramek z mową i odświeża otwarte okna."""
+        if self.session is None:
+            return
+        self.session.set_speech_only(self.speech_modes[self.speech_combo.current()], self.frame_size,
+                                     self.silence_threshold)
+        self.notify_view_listeners()
+
+    def update_fft_mode(self):
+        """Włącza dopełnianie ramek zerami do szybkiej długości FFT i odświeża otwarte okna."""
+        fft_backend.configure(fast_len=self.fast_fft_mode.get())
+        if self.session is not None:
+            self.notify_view_listeners()
+
+    @property
+    def precision(self):
+        return "float32" if self.float32_mode.get() else "float64"
+
+    @property
+    def current_index(self):
+        """Pozycja odtwarzania w próbkach (odczytywana z silnika odtwarzania)."""
+        if self.player is not None:
+            return self.player.position
+        return self._current_index
+
+    @current_index.setter
+    def current_index(self, value):
+        self._current_index = int(value)
+        if self.player is not None:
+            self.player.seek(self._current_index)
+
     def load_file(self):
         filepath = filedialog.askopenfilename(
             filetypes=[("WAV files", "*.wav"), ("All files", "*.*")]
@@ -261,29 +531,47 @@ class AudioApp:
         if not filepath:
             return
 
+        # Zatrzymujemy i zamykamy poprzedni strumień (jeśli był) –
+        # nowy zostanie utworzony przy pierwszym odtworzeniu
+        self.stop_audio()
+        if self.player is not None:
+            self.player.close()
+            self.player = None
+
         self.filename = filepath
         base_name = os.path.basename(filepath)
         self.file_label.config(text=f"Plik: {base_name}")
 
         try:
-            self.fs, raw_data = wavfile.read(filepath)
+            self.session = AnalysisSession.from_wav(
+                filepath, keep_channels=True, workers=self.analysis_workers,
+                precision=self.precision, mix=0
+            )
         except Exception as e:
             messagebox.showerror("Błąd", f"Nie udało się wczytać pliku WAV:\n{e}")
             return
 
-        if len(raw_data.shape) > 1:
-            raw_data = raw_data[:, 0]
-
-        raw_data = raw_data.astype(np.float32)
-        peak = np.max(np.abs(raw_data))
-        if peak > 1e-9:
-            raw_data /= peak
-
-        self.data = raw_data
+        self.fs = self.session.sample_rate
+        self.data = self.session.playback_signal
+        self.channel_mixes = self.session.available_mixes()
+        self.channel_combo.config(
+            values=[self.mix_label(mix) for mix in self.channel_mixes],
+            state="readonly" if len(self.channel_mixes) > 1 else "disabled"
+        )
+        self.channel_combo.current(0)
+        self.analysis_rates = [None] + [rate for rate in self.ANALYSIS_RATES if rate < self.fs]
+        self.rate_combo.config(
+            values=[self.rate_label(rate) for rate in self.analysis_rates],
+            state="readonly" if len(self.analysis_rates) > 1 else "disabled"
+        )
+        self.rate_combo.current(0)
+        self.session.set_speech_only(self.speech_modes[self.speech_combo.current()], self.frame_size,
+                                     self.silence_threshold)
         self.total_samples = len(self.data)
         duration = self.total_samples / self.fs if self.fs else 0.001
         self.time_array = np.linspace(0, duration, self.total_samples)
         self.current_index = 0
+        self.reset_view()
 
         # Rysujemy główny wykres
         self.draw_main_plot()
@@ -312,21 +600,73 @@ class AudioApp:
         # Włączamy nowe przyciski analizy częstotliwościowej
         self.freq_analysis_button.state(["!disabled"])
         self.cepstrum_button.state(["!disabled"])
+        self.live_button.state(["!disabled"])
+
+    @staticmethod
+    def mix_label(mix):
+        """Nazwa widoku kanałów wyświetlana w GUI."""
+        labels = {'mono': "Mono (średnia)", 'mid': "Mid (L+R)/2", 'side': "Side (L−R)/2"}
+        return labels.get(mix, f"Kanał {mix + 1}" if isinstance(mix, int) else str(mix))
+
+    @staticmethod
+    def rate_label(rate):
+        return "Oryginalna" if rate is None else f"{rate} Hz"
+
+    def update_analysis_rate(self, event=None):
+        """Przełącza częstotliwość próbkowania analiz (przebieg i odtwarzanie pozostają bez zmian)."""
+        if self.session is None:
+            return
+        self.session.set_analysis_rate(self.analysis_rates[self.rate_combo.current()])
+        self.draw_main_plot()
+        self.calculate_and_display_frame_params()
 
-        # Zatrzymujemy poprzedni strumień (jeśli był)
+    def update_channel_mix(self, event=None):
+        """Przełącza widok kanałów – wykres, analizy i odtwarzanie korzystają z wybranego miksu."""
+        if self.session is None:
+            return
+        mix = self.channel_mixes[self.channel_combo.current()]
+        if mix == self.session.mix:
+            return
+        position = self.current_index
+        was_playing = self.playing and not self.paused
         self.stop_audio()
+        if self.player is not None:
+            self.player.close()
+            self.player = None
 
-        # Tworzymy nowy strumień audio
-        self.stream = sd.OutputStream(
-            samplerate=self.fs,
-            blocksize=1024,
-            channels=1,
-            dtype='float32',
-            callback=self.audio_callback
+        self.session.set_mix(mix)
+        self.data = self.session.playback_signal
+        self.current_index = position
+        self.draw_main_plot()
+        self.calculate_and_display_frame_params()
+        if was_playing:
+            self.play_audio()
+
+    def ensure_player(self):
+        """Tworzy silnik odtwarzania i strumień sounddevice przy pierwszym żądaniu odtwarzania."""
+        if self.player is not None:
+            return True
+        from playback import PlaybackEngine
+        player = PlaybackEngine(
+            self.data, self.fs,
+            blocksize=self.playback_blocksize,
+            latency=self.playback_latency
         )
+        try:
+            # Import sounddevice inicjalizuje PortAudio, dlatego odkładamy go do tej chwili
+            player.open()
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Nie udało się otworzyć urządzenia audio:\n{e}")
+            return False
+        player.seek(self._current_index)
+        self.player = player
+        return True
 
     def draw_main_plot(self):
         self.ax.clear()
+        # clear() usuwa też linię pozycji – odtwarzamy ją, jeśli była widoczna
+        if self.line is not None:
+            self.create_playhead()
         self.ax.set_title("Przebieg czasowy sygnału", fontsize=11, color=ColorScheme.ACCENT)
         self.ax.set_xlabel("Czas [s]", fontsize=9)
         self.ax.set_ylabel("Amplituda", fontsize=9)
@@ -334,24 +674,22 @@ class AudioApp:
 
         legend_patches = []
         mode = self.highlight_mode.get()
+        # Segmentacja liczona jest na sygnale analizy (może mieć inną częstotliwość niż odtwarzanie)
+        analysis_rate = self.session.sample_rate
 
         if mode == "silence":
-            silence_regions = self.processor.detect_silence(
-                self.data, self.fs, self.frame_size, self.silence_threshold
-            )
+            silence_regions = self.session.silence_regions(self.frame_size, self.silence_threshold)
             for (start_idx, end_idx) in silence_regions:
-                start_t = start_idx / self.fs
-                end_t = end_idx / self.fs
+                start_t = start_idx / analysis_rate
+                end_t = end_idx / analysis_rate
                 self.ax.axvspan(start_t, end_t, color=ColorScheme.SILENCE_COLOR, alpha=0.6)
             silence_patch = Patch(facecolor=ColorScheme.SILENCE_COLOR, alpha=0.6, label="Cisza")
             legend_patches.append(silence_patch)
         else:
-            vu_regions = self.processor.detect_voiced_unvoiced(
-                self.data, self.fs, self.frame_size
-            )
+            vu_regions = self.session.voiced_unvoiced_regions(self.frame_size)
             for (start_idx, end_idx, is_voiced) in vu_regions:
-                start_t = start_idx / self.fs
-                end_t = end_idx / self.fs
+                start_t = start_idx / analysis_rate
+                end_t = end_idx / analysis_rate
                 if is_voiced:
                     self.ax.axvspan(start_t, end_t, color=ColorScheme.VOICED_COLOR, alpha=0.3)
                 else:
@@ -363,24 +701,45 @@ class AudioApp:
         if legend_patches:
             self.ax.legend(handles=legend_patches, loc="upper right", fontsize=8)
 
-        self.canvas.draw()
+        # Zachowujemy przybliżenie i zaznaczenie – clear() usuwa je razem z wywołaniami zwrotnymi osi
+        self.selection_patch = None
+        self.draw_selection()
+        if self.view_xlim is not None:
+            self.ax.set_xlim(self.view_xlim)
+        else:
+            self.ax.set_xlim(0, self.total_samples / self.fs)
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
+        self.span_selector = SpanSelector(
+            self.ax, self.on_span_select, 'horizontal', useblit=True,
+            props=dict(facecolor=ColorScheme.ACCENT, alpha=0.2)
+        )
 
-        # Po narysowaniu wykresu usuwamy background,
-        # który zostanie zaktualizowany przy starcie odtwarzania
-        self.background = None
+        # Linia pozycji jest animowana (nie wchodzi do pełnego rysowania) –
+        # tło do blittingu zapamiętuje on_draw
+        self.canvas.draw()
 
     def on_slider_move(self, value):
-        if self.data is not None:
+        if self.data is not None and not self.updating_slider:
             new_index = int(float(value) * self.fs) if self.fs else 0
             self.current_index = np.clip(new_index, 0, self.total_samples)
             self.update_time_label(float(value))
 
             # Jeżeli linia istnieje, przesuwamy ją
-            if self.line is not None and self.background is not None:
-                self.canvas.restore_region(self.background)
-                self.line.set_xdata([float(value), float(value)])
-                self.ax.draw_artist(self.line)
-                self.canvas.blit(self.ax.bbox)
+            self.blit_playhead(float(value))
+
+    def create_playhead(self):
+        # Linia animowana – pomijana przy pełnym rysowaniu, rysowana tylko przez blitting
+        self.line = self.ax.axvline(x=0, color="#004D40", linewidth=2, animated=True)
+
+    def blit_playhead(self, current_time):
+        """Rysuje linię pozycji odtwarzania przez blitting (bez pełnego odświeżenia wykresu)."""
+        if self.background is None:
+            return
+        self.canvas.restore_region(self.background)
+        if self.line is not None:
+            self.line.set_xdata([current_time, current_time])
+            self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
 
     def update_time_label(self, current_time):
         minutes = int(current_time // 60)
@@ -388,20 +747,7 @@ class AudioApp:
         self.time_label.config(text=f"Czas: {minutes:02d}:{seconds:02d}")
 
     def calculate_and_display_frame_params(self):
-        frame_step = self.frame_size
-        rms_values = []
-        zcr_values = []
-        for i in range(0, self.total_samples, frame_step):
-            frame = self.data[i:i + frame_step]
-            if len(frame) == 0:
-                continue
-            rms = np.sqrt(np.mean(frame ** 2))
-            rms_values.append(rms)
-            zero_crosses = np.count_nonzero(np.diff(np.sign(frame)))
-            zcr = zero_crosses / len(frame) if len(frame) != 0 else 0
-            zcr_values.append(zcr)
-        avg_rms = np.mean(rms_values) if rms_values else 0
-        avg_zcr = np.mean(zcr_values) if zcr_values else 0
+        avg_rms, avg_zcr = self.session.frame_params(self.frame_size)
         text = (
             f"Parametry nagrania (ramkowe):\n"
             f"  • Średni RMS (Volume): {avg_rms:.6f}\n"
@@ -410,91 +756,50 @@ class AudioApp:
         )
         self.frame_params_text.set(text)
 
-    def audio_callback(self, outdata, frames, time_info, status):
-        """Funkcja wywoływana przez sounddevice przy każdej porcji danych."""
-        if status:
-            # print("Status audio_callback:", status, flush=True)
-            pass
-
-        if (self.data is None) or (not self.playing) or (self.paused):
-            outdata.fill(0)
-            return
-
-        end_index = self.current_index + frames
-        if end_index > self.total_samples:
-            end_index = self.total_samples
-
-        chunk = self.data[self.current_index:end_index]
-        out_len = len(chunk)
-        if out_len < frames:
-            outdata[:out_len, 0] = chunk
-            outdata[out_len:, 0] = 0
-            self.playing = False
-            self.current_index = self.total_samples
-        else:
-            outdata[:, 0] = chunk
-            self.current_index = end_index
-
     def play_audio(self):
-        if self.data is None or not self.stream:
+        if self.data is None or not self.ensure_player():
             return
 
         # Jeżeli linia nie istnieje, tworzymy ją
         if self.line is None:
-            self.line = self.ax.axvline(x=0, color="#004D40", linewidth=2)
-            # Najpierw pełne rysowanie wykresu
-            self.canvas.draw()
-            # Dopiero teraz pobieramy background
-            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+            self.create_playhead()
 
         # Jeżeli dotarliśmy do końca – wróćmy na początek
         if self.current_index >= self.total_samples:
             self.current_index = 0
-            if self.slider:
-                self.slider.set(0)
-            # Reset linii do 0
-            if self.line:
-                self.line.set_xdata([0, 0])
-                self.canvas.draw()
-                self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+            self.set_slider(0)
 
         self.playing = True
         self.paused = False
         self.pause_button.config(text="Pauza")
+        self.blit_playhead(self.current_index / self.fs)
 
         # Start strumienia
-        if not self.stream.active:
-            self.stream.start()
+        self.player.start()
+        self.start_ui_loop()
 
     def play_from_start(self):
         if self.data is None:
             return
         self.current_index = 0
-        if self.slider:
-            self.slider.set(0)
-        if self.line:
-            self.line.set_xdata([0, 0])
-            self.canvas.draw()
-            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.set_slider(0)
         self.play_audio()
 
     def stop_audio(self):
         self.playing = False
         self.paused = False
-        if self.stream and self.stream.active:
-            self.stream.stop()
+        self.stop_ui_loop()
+        if self.player is not None:
+            self.player.stop()
 
-        # Usuwamy linię z osi, jeśli istnieje
+        # Usuwamy linię z osi, jeśli istnieje, i odtwarzamy tło bez niej
         if self.line:
             self.line.remove()
             self.line = None
-
-        # Odśwież wykres (linia znika)
-        self.canvas.draw()
-        self.background = None
+            self.blit_playhead(0)
 
     def toggle_pause(self):
-        if self.data is None or not self.stream:
+        if self.data is None:
             return
 
         if not self.playing:
@@ -508,41 +813,70 @@ class AudioApp:
         else:
             self.paused = True
             self.pause_button.config(text="Wznów")
+        if self.player is not None:
+            self.player.paused = self.paused
+        if not self.paused:
+            self.start_ui_loop()
+
+    def set_slider(self, current_time):
+        if self.slider:
+            self.updating_slider = True
+            self.slider.set(current_time)
+            self.updating_slider = False
+
+    def start_ui_loop(self):
+        """Uruchamia pętlę aktualizacji pozycji odtwarzania i powiadamia okna zależne."""
+        if self.ui_after is None:
+            self.ui_after = self.master.after_idle(self.update_ui)
+        for listener in list(self.playback_listeners):
+            listener()
+
+    def stop_ui_loop(self):
+        if self.ui_after is not None:
+            self.master.after_cancel(self.ui_after)
+            self.ui_after = None
 
     def update_ui(self):
-        if self.data is not None and self.playing and not self.paused:
-            current_time = self.current_index / self.fs if self.fs else 0
+        self.ui_after = None
+        if self.data is None or self.player is None or not self.playing or self.paused:
+            # Bez odtwarzania pętla nie jest planowana ponownie
+            return
+
+        t0 = time.perf_counter()
+        if self.player.finished:
+            self.playing = False
+        # Pozycję bierzemy z zegara strumienia, a nie z liczby próbek przekazanych do urządzenia
+        current_time = self.player.audible_position() / self.fs
 
-            # Ustawiamy suwak
-            if self.slider:
-                self.slider.set(current_time)
+        # Ustawiamy suwak
+        self.set_slider(current_time)
 
-            # Aktualizujemy etykietę z czasem
-            self.update_time_label(current_time)
+        # Aktualizujemy etykietę z czasem
+        self.update_time_label(current_time)
 
-            # Przesuwamy linię (blitowanie)
-            if self.line and self.background:
-                self.canvas.restore_region(self.background)
-                self.line.set_xdata([current_time, current_time])
-                self.ax.draw_artist(self.line)
-                self.canvas.blit(self.ax.bbox)
+        # Przesuwamy linię (blitowanie)
+        self.blit_playhead(current_time)
 
-        # Wywołanie za 50 ms ponownie
-        self.ui_after = self.master.after(50, self.update_ui)
+        if self.playing:
+            # Okres odświeżania dopasowujemy do czasu rysowania klatki (ok. 25% czasu na rysowanie)
+            render_ms = (time.perf_counter() - t0) * 1000
+            target = min(max(4 * render_ms, self.UI_MIN_INTERVAL_MS), self.UI_MAX_INTERVAL_MS)
+            self.ui_interval = int(0.8 * self.ui_interval + 0.2 * target)
+            self.ui_after = self.master.after(self.ui_interval, self.update_ui)
 
     def open_features_window(self):
         if self.data is None:
             messagebox.showwarning("Brak danych", "Najpierw wczytaj plik WAV!")
             return
-        FeaturesWindow(self.master, self.data, self.fs, self.frame_size, self.silence_threshold)
+        from features_window import FeaturesWindow
+        FeaturesWindow(self.master, self.session.signal, self.session.sample_rate, self.frame_size,
+                       self.silence_threshold,
+                       session=self.session)
 
     def on_close(self):
         self.stop_audio()
-        if self.ui_after is not None:
-            self.master.after_cancel(self.ui_after)
-            self.ui_after = None
-        if self.stream:
-            self.stream.close()
-            self.stream = None
+        if self.player is not None:
+            self.player.close()
+            self.player = None
         self.master.destroy()
         sys.exit(0)
\ No newline at end of file
@@ -1,70 +1,98 @@
+import numpy as np
+
 from features import compute_volume, compute_zcr
 
 
+def split_frames(data, frame_size):
+    """
+    Dzieli sygnał na kolejne, nienakładające się ramki.
+
+    Args:
+        data: Sygnał (tablica 1D).
+        frame_size: Długość ramki w próbkach.
+
+    Returns:
+        Krotka (macierz pełnych ramek, krótsza ramka końcowa lub pusta tablica).
+    """
+    num_full = len(data) // frame_size
+    full = data[:num_full * frame_size].reshape(num_full, frame_size)
+    return full, data[num_full * frame_size:]
+
+
+def frame_values(data, frame_size, feature):
+    """
+    Oblicza cechę dla kolejnych ramek sygnału (ostatnia ramka może być krótsza).
+
+    Args:
+        data: Sygnał (tablica 1D).
+        frame_size: Długość ramki w próbkach.
+        feature: Funkcja cechy przyjmująca macierz ramek (np. compute_volume).
+
+    Returns:
+        Tablica wartości cechy dla każdej ramki.
+    """
+    full, tail = split_frames(data, frame_size)
+    values = np.asarray(feature(full), dtype=float).reshape(-1)
+    if len(tail) > 0:
+        values = np.append(values, feature(tail))
+    return values
+
+
 class BaseAudioProcessor:
 
     def detect_silence(self, data, fs, frame_size, silence_threshold):
         total_samples = len(data)
-        frame_step = frame_size
+        # Używamy compute_volume do obliczenia RMS wszystkich ramek naraz
+        is_silent = frame_values(data, frame_size, compute_volume) < silence_threshold
+        starts = np.arange(len(is_silent)) * frame_size
+
+        # Wyznaczamy początki i końce ciągów cichych ramek
+        edges = np.diff(np.concatenate(([False], is_silent, [False])).astype(np.int8))
+        region_starts = np.nonzero(edges == 1)[0]
+        region_ends = np.nonzero(edges == -1)[0]
+
         silence_regions = []
-        in_silence = False
-        start_silence = 0
-        for i in range(0, total_samples, frame_step):
-            frame = data[i:i + frame_size]
-            if len(frame) == 0:
-                continue
-            # Używamy compute_volume do obliczenia RMS
-            rms = compute_volume(frame)
-            if rms < silence_threshold:
-                if not in_silence:
-                    in_silence = True
-                    start_silence = i
-            else:
-                if in_silence:
-                    silence_regions.append((start_silence, i))
-                    in_silence = False
-        if in_silence:
-            silence_regions.append((start_silence, total_samples))
+        for start_frame, end_frame in zip(region_starts, region_ends):
+            end_idx = starts[end_frame] if end_frame < len(starts) else total_samples
+            silence_regions.append((int(starts[start_frame]), int(end_idx)))
         return silence_regions
 
 
 class VoicedAudioProcessor(BaseAudioProcessor):
 
+    def classify_frames(self, data, frame_size, vol_threshold=0.02, zcr_threshold=0.3,
+                        silence_threshold=0.001):
+        """
+        Klasyfikuje kolejne ramki sygnału.
+
+        Returns:
+            Tablica kodów ramek: -1 cisza, 0 bezdźwięczna, 1 dźwięczna.
+        """
+        rms = frame_values(data, frame_size, compute_volume)
+        zcr = frame_values(data, frame_size, compute_zcr)
+        # Klasyfikacja: dźwięczny, gdy RMS > vol_threshold i ZCR < zcr_threshold
+        labels = ((rms > vol_threshold) & (zcr < zcr_threshold)).astype(np.int8)
+        labels[rms < silence_threshold] = -1
+        return labels
+
     def detect_voiced_unvoiced(self, data, fs, frame_size, vol_threshold=0.02, zcr_threshold=0.3,
                                silence_threshold=0.001):
 
         total_samples = len(data)
-        frame_step = frame_size
-        results = []
-        current_state = None
-        start_idx = 0
+        labels = self.classify_frames(data, frame_size, vol_threshold, zcr_threshold, silence_threshold)
+        if len(labels) == 0:
+            return []
 
-        for i in range(0, total_samples, frame_step):
-            frame = data[i:i + frame_size]
-            if len(frame) == 0:
-                continue
+        # Segmenty kończą się przy każdej zmianie klasy ramki; ramki ciszy nie tworzą segmentów
+        change = np.nonzero(np.diff(labels))[0] + 1
+        seg_starts = np.concatenate(([0], change))
+        seg_ends = np.concatenate((change, [len(labels)]))
 
-            # Obliczamy RMS ramki za pomocą compute_volume
-            rms = compute_volume(frame)
-            # Jeśli ramka jest cicha, kończymy bieżący segment (jeśli istnieje)
-            if rms < silence_threshold:
-                if current_state is not None:
-                    results.append((start_idx, i, current_state))
-                    current_state = None
+        results = []
+        for start_frame, end_frame in zip(seg_starts, seg_ends):
+            label = labels[start_frame]
+            if label < 0:
                 continue
-
-            # Obliczamy ZCR dla niecichych ramek
-            zcr_val = compute_zcr(frame)
-            # Klasyfikacja: dźwięczny, gdy RMS > vol_threshold i ZCR < zcr_threshold
-            is_voiced = (rms > vol_threshold and zcr_val < zcr_threshold)
-            if current_state is None:
-                current_state = is_voiced
-                start_idx = i
-            elif is_voiced != current_state:
-                results.append((start_idx, i, current_state))
-                current_state = is_voiced
-                start_idx = i
-
-        if current_state is not None:
-            results.append((start_idx, total_samples, current_state))
+            end_idx = end_frame * frame_size if end_frame < len(labels) else total_samples
+            results.append((int(start_frame * frame_size), int(end_idx), bool(label)))
         return results
@@ -0,0 +1,192 @@
+"""
+Źródła strumienia próbek dla analizy na żywo.
+
+Źródło zapisuje kolejne bloki do puli wstępnie przydzielonych buforów i
+przekazuje ich numery przez ograniczoną kolejkę. Wywołanie zwrotne audio
+wykonuje więc tylko kopię bloku i nieblokujące put_nowait – gdy konsument
+nie nadąża, blok jest odrzucany i zliczany, zamiast blokować wątek audio.
+
+Konsument (StreamWorker) pobiera blok przez read(), analizuje go i oddaje
+bufor przez release() przed pobraniem następnego.
+"""
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class AudioSource:
+    """
+    Bazowe źródło bloków próbek (mono, float32).
+
+    Podklasy wywołują _push() z wątku produkującego dane oraz implementują
+    _open() i _close().
+    """
+
+    def __init__(self, sample_rate, block_size=1024, queue_blocks=32):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.queue_blocks = queue_blocks
+
+        # Pula o dwa bufory większa niż kolejka: jeden trzyma konsument,
+        # do drugiego pisze producent – żaden nie jest wtedy w kolejce
+        self._pool = np.zeros((queue_blocks + 2, block_size), dtype=np.float32)
+        self._queue = queue.Queue(maxsize=queue_blocks)
+        self._slot = 0
+        self.running = False
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.blocks_received = 0
+        self.dropped_blocks = 0
+        self.overruns = 0
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._open()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._close()
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+    def _push(self, samples, overrun=False):
+        """
+        Kopiuje blok do puli i wstawia go do kolejki (wywoływane z wątku producenta).
+
+        Args:
+            samples: Tablica 1D z próbkami (co najwyżej block_size).
+            overrun: Czy urządzenie zgłosiło utratę danych przed tym blokiem.
+        """
+        if overrun:
+            self.overruns += 1
+        count = min(len(samples), self.block_size)
+        self._pool[self._slot, :count] = samples[:count]
+        try:
+            self._queue.put_nowait((self._slot, count))
+        except queue.Full:
+            # Konsument nie nadąża – bufor zostanie nadpisany kolejnym blokiem
+            self.dropped_blocks += 1
+            return
+        self.blocks_received += 1
+        self._slot = (self._slot + 1) % len(self._pool)
+
+    def read(self, timeout=None):
+        """
+        Pobiera najstarszy blok z kolejki.
+
+        Args:
+            timeout: Maksymalny czas oczekiwania w sekundach.
+
+        Returns:
+            Widok bloku próbek (ważny do wywołania release()) lub None po przekroczeniu czasu.
+        """
+        try:
+            slot, count = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return self._pool[slot, :count]
+
+    def release(self):
+        """Sygnalizuje, że blok zwrócony przez read() został przetworzony."""
+        self._queue.task_done()
+
+    @property
+    def queued_blocks(self):
+        return self._queue.qsize()
+
+
+class MicrophoneSource(AudioSource):
+    """Źródło z wejścia audio (sounddevice.InputStream)."""
+
+    def __init__(self, sample_rate=None, block_size=1024, device=None, queue_blocks=32):
+        import sounddevice as sd
+
+        if sample_rate is None:
+            sample_rate = int(sd.query_devices(device, 'input')['default_samplerate'])
+        super().__init__(sample_rate, block_size, queue_blocks)
+        self.device = device
+        self.stream = sd.InputStream(
+            samplerate=sample_rate,
+            blocksize=block_size,
+            device=device,
+            channels=1,
+            dtype='float32',
+            callback=self._callback
+        )
+
+    def _callback(self, indata, frames, time_info, status):
+        self._push(indata[:, 0], overrun=bool(status.input_overflow))
+
+    def _open(self):
+        self.stream.start()
+
+    def _close(self):
+        self.stream.stop()
+
+    def close(self):
+        self.stop()
+        self.stream.close()
+
+
+class SyntheticSource(AudioSource):
+    """
+    Syntetyczne źródło mowy (harmoniczne z modulowaną F0, przerwy i szum).
+
+    Pozwala uruchomić tryb na żywo bez urządzenia wejściowego, np. w testach.
+    """
+
+    def __init__(self, sample_rate=16000, block_size=512, f0=140.0, noise=0.005,
+                 realtime=True, queue_blocks=32, seed=0):
+        super().__init__(sample_rate, block_size, queue_blocks)
+        self.f0 = f0
+        self.noise = noise
+        self.realtime = realtime
+        self._rng = np.random.default_rng(seed)
+        self._position = 0
+        self._phase = 0.0
+        self._thread = None
+
+    def generate(self):
+        """Zwraca kolejny blok sygnału syntetycznego."""
+        t = (self._position + np.arange(self.block_size)) / self.sample_rate
+        f0 = self.f0 + 0.3 * self.f0 * np.sin(2 * np.pi * 0.5 * t)
+        phase = self._phase + 2 * np.pi * np.cumsum(f0) / self.sample_rate
+        self._phase = phase[-1]
+        voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+        gate = np.sin(2 * np.pi * 0.7 * t) > -0.3
+        block = 0.4 * voiced * gate + self.noise * self._rng.standard_normal(self.block_size)
+        self._position += self.block_size
+        return block.astype(np.float32)
+
+    def _run(self):
+        period = self.block_size / self.sample_rate
+        deadline = time.perf_counter()
+        while self.running:
+            self._push(self.generate())
+            if self.realtime:
+                deadline += period
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    deadline = time.perf_counter()
+
+    def _open(self):
+        self._thread = threading.Thread(target=self._run, name="SyntheticSource", daemon=True)
+        self._thread.start()
+
+    def _close(self):
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
@@ -0,0 +1,1152 @@
+"""
+Benchmarki wydajnościowe aplikacji.
+
+Uruchomienie (z katalogu files/):
+    python benchmarks.py startup [--budget 1.5] [--repeat 5]
+    python benchmarks.py precision [--seconds 120]
+    python benchmarks.py channels [--seconds 30] [--max-channels 4]
+    python benchmarks.py resample [--seconds 30] [--rate 96000] [--target 16000]
+    python benchmarks.py zoom [--frames 500] [--band 50 600] [--points 1101]
+    python benchmarks.py ltas [--seconds 600]
+    python benchmarks.py mfcc [--seconds 600] [--workers 1]
+    python benchmarks.py formants [--seconds 60] [--frame-length 512] [--max-cost 6]
+    python benchmarks.py pitch [--seconds 6] [--frame-sizes 512 1024 2048] [--snr inf 20 10 0]
+    python benchmarks.py speech [--seconds 60] [--mode speech] [--silence-threshold 0.01]
+    python benchmarks.py featurefile [--seconds 600] [--files 20]
+    python benchmarks.py corpus [--files 100000] [--seconds 10]
+    python benchmarks.py fingerprint [--files 100] [--seconds 30] [--clip 5] [--snr 10]
+    python benchmarks.py service [--workers 1] [--burst 8]
+    python benchmarks.py live [--seconds 5] [--block 512]
+    python benchmarks.py playback [--seconds 5] [--blocksize 256] [--latency low]
+
+Każdy benchmark kończy się kodem wyjścia 1, jeśli przekroczy zadany budżet,
+dzięki czemu można go wpiąć w dowolny skrypt CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+
+# Moduły, które nie powinny być ładowane przy starcie okna głównego
+DEFERRED_MODULES = (
+    "sounddevice",
+    "scipy",
+    "matplotlib.pyplot",
+    "features_window",
+    "frequency_analysis",
+    "frequency_features_window",
+    "live_view",
+)
+
+FILES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_startup_import(repeat=5):
+    """
+    Mierzy czas importu modułu okna głównego w świeżym interpreterze.
+
+    Args:
+        repeat: Liczba powtórzeń pomiaru.
+
+    Returns:
+        Krotka (lista czasów w sekundach, lista niepożądanych modułów załadowanych przy starcie).
+    """
+    probe = (
+        "import sys, time\n"
+        "t0 = time.perf_counter()\n"
+        "import audio_app\n"
+        "dt = time.perf_counter() - t0\n"
+        f"heavy = [m for m in {DEFERRED_MODULES!r} if m in sys.modules]\n"
+        "print(dt)\n"
+        "print(','.join(heavy))\n"
+    )
+    times = []
+    heavy = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=FILES_DIR, capture_output=True, text=True, check=True
+        ).stdout.splitlines()
+        times.append(float(out[0]))
+        heavy = [m for m in out[1].split(",") if m] if len(out) > 1 else []
+    return times, heavy
+
+
+def bench_startup(args):
+    times, heavy = measure_startup_import(args.repeat)
+    median = float(np.median(times))
+    print(f"Import audio_app: mediana {median * 1000:.1f} ms "
+          f"(min {min(times) * 1000:.1f} ms, budżet {args.budget * 1000:.0f} ms)")
+    ok = median <= args.budget
+    if heavy:
+        print(f"Moduły załadowane przedwcześnie: {', '.join(heavy)}")
+        ok = False
+    return ok
+
+
+def synthetic_speech(seconds, fs=22050, seed=0):
+    """
+    Sygnał testowy przypominający mowę: harmoniczne z wolno zmienną F0, przerwy i szum.
+
+    Args:
+        seconds: Długość sygnału w sekundach.
+        fs: Częstotliwość próbkowania.
+        seed: Ziarno generatora liczb losowych.
+
+    Returns:
+        Krotka (sygnał float32, częstotliwość próbkowania).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fs)) / fs
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / fs
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    gate = (np.sin(2 * np.pi * 0.7 * t) > -0.3).astype(float)
+    signal = 0.4 * voiced * gate + 0.005 * rng.standard_normal(len(t))
+    return signal.astype(np.float32), fs
+
+
+def run_analysis(session):
+    """Pełny zestaw analiz sesji używany w benchmarkach."""
+    return {
+        'spectrogram': session.spectrogram(1024, 0.5, 'hamming')[0],
+        'spectral': session.spectral_features(1024, 'hamming', 0.5),
+        'f0': session.f0_track(2048, 512, 'hamming', 50, 500)[1],
+        'time': session.time_features(512),
+    }
+
+
+def measure(session_factory, repeat=3):
+    """
+    Mierzy czas i szczytowe zużycie pamięci pełnej analizy.
+
+    Returns:
+        Krotka (najkrótszy czas [s], szczyt pamięci [MB], wyniki ostatniego przebiegu).
+    """
+    times = []
+    for _ in range(repeat):
+        session = session_factory()
+        t0 = time.perf_counter()
+        results = run_analysis(session)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    run_analysis(session_factory())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 2 ** 20, results
+
+
+def compare_precision(ref, test):
+    """
+    Porównuje wyniki float32 z float64.
+
+    Returns:
+        Lista komunikatów o przekroczonych tolerancjach (pusta, gdy wszystko się zgadza).
+    """
+    errors = []
+    # Spektrogram: błąd w dB liczony tylko dla binów powyżej -80 dB względem maksimum
+    spec_ref, spec_test = ref['spectrogram'], test['spectrogram']
+    mask = spec_ref > spec_ref.max() - 80
+    spec_err = float(np.max(np.abs(spec_ref[mask] - spec_test[mask])))
+    print(f"  spektrogram: maks. różnica {spec_err:.4f} dB")
+    if spec_err > 0.05:
+        errors.append(f"spektrogram ({spec_err:.4f} dB)")
+
+    for name in ('volume', 'fc', 'bw', 'ersb1', 'ersb2', 'ersb3', 'sfm', 'scf'):
+        a = ref['spectral'][name]
+        b = test['spectral'][name].astype(np.float64)
+        err = float(np.median(np.abs(a - b) / (np.abs(a) + 1e-12)))
+        print(f"  {name}: mediana błędu względnego {err:.2e}")
+        if err > 1e-3:
+            errors.append(f"{name} ({err:.2e})")
+
+    for name, values_ref, values_test in (('f0 cepstrum', ref['f0'], test['f0']),
+                                          ('f0 autokorelacja', ref['time']['f0_autocorr'],
+                                           test['time']['f0_autocorr'])):
+        agree = float(np.mean(np.abs(values_ref - values_test) <= 0.01 * np.maximum(values_ref, 1.0)))
+        print(f"  {name}: zgodność ramek {agree * 100:.2f}%")
+        if agree < 0.98:
+            errors.append(f"{name} ({agree * 100:.2f}%)")
+    return errors
+
+
+def bench_precision(args):
+    from analysis_session import AnalysisSession
+
+    signal, fs = synthetic_speech(args.seconds)
+    print(f"Sygnał testowy: {args.seconds} s, {fs} Hz")
+    results = {}
+    for precision in ('float64', 'float32'):
+        elapsed, peak_mb, results[precision] = measure(
+            lambda: AnalysisSession(signal, fs, precision=precision), args.repeat
+        )
+        cached_mb = sum(np.asarray(v).nbytes for group in results[precision].values()
+                        for v in (group.values() if isinstance(group, dict) else [group])) / 2 ** 20
+        print(f"{precision}: czas {elapsed:.3f} s, szczyt pamięci {peak_mb:.1f} MB, "
+              f"wyniki w pamięci podręcznej {cached_mb:.1f} MB")
+
+    print("Tolerancja float32 względem float64:")
+    errors = compare_precision(results['float64'], results['float32'])
+    if errors:
+        print(f"Przekroczone tolerancje: {', '.join(errors)}")
+    return not errors
+
+
+def bench_channels(args):
+    from analysis_session import AnalysisSession
+
+    fs = 22050
+    rows = []
+    channel_counts = [c for c in (1, 2, 4, 8) if c <= args.max_channels]
+    for count in channel_counts:
+        channels = np.stack([synthetic_speech(args.seconds, fs, seed)[0] for seed in range(count)])
+        elapsed, peak_mb, _ = measure(lambda: AnalysisSession(channels, fs), args.repeat)
+        rows.append((count, elapsed, peak_mb))
+        print(f"{count} kan.: czas {elapsed:.3f} s ({elapsed / count:.3f} s/kanał), "
+              f"szczyt pamięci {peak_mb:.1f} MB ({peak_mb / count:.1f} MB/kanał)")
+
+    # Pamięć na kanał nie powinna rosnąć z liczbą kanałów (z zapasem 25%)
+    base = rows[0][2]
+    worst = max(peak_mb / (count * base) for count, _, peak_mb in rows)
+    print(f"Maks. pamięć na kanał względem 1 kanału: {worst:.2f}")
+    return worst <= 1.25
+
+
+def bench_resample(args):
+    from scipy.signal import resample_poly
+    from analysis_session import AnalysisSession
+    from resampling import resample, resample_ratio
+
+    signal, fs = synthetic_speech(args.seconds, args.rate)
+    t0 = time.perf_counter()
+    chunked = resample(signal, fs, args.target)
+    chunked_time = time.perf_counter() - t0
+    up, down = resample_ratio(fs, args.target)
+    exact = np.array_equal(chunked, resample_poly(signal, up, down))
+    print(f"Przepróbkowanie {fs} -> {args.target} Hz: {chunked_time:.3f} s, "
+          f"{'zgodne' if exact else 'NIEZGODNE'} z resample_poly")
+
+    for rate in (None, args.target):
+        elapsed, peak_mb, _ = measure(lambda: AnalysisSession(signal, fs, analysis_rate=rate), args.repeat)
+        print(f"Analiza przy {rate or fs} Hz: czas {elapsed:.3f} s, szczyt pamięci {peak_mb:.1f} MB")
+    return exact
+
+
+def bench_view(args):
+    from analysis_session import AnalysisSession
+
+    signal, fs = synthetic_speech(args.seconds)
+    session = AnalysisSession(signal, fs, workers=1)
+    t0 = time.perf_counter()
+    full_spec, _, _ = session.spectrogram(1024, 0.5, 'hamming')
+    full_time = time.perf_counter() - t0
+
+    # Przesuwanie okna o szerokości args.width sekund z krokiem 1/4 szerokości
+    ok = True
+    starts = np.arange(0, args.seconds - args.width, args.width / 4)
+    t0 = time.perf_counter()
+    for start in starts:
+        session.set_view((start, start + args.width))
+        spec, _, times = session.spectrogram(1024, 0.5, 'hamming')
+        first = int(round(times[0] * fs / 512))
+        ok &= np.array_equal(spec, full_spec[:, first:first + spec.shape[1]])
+    view_time = (time.perf_counter() - t0) / len(starts)
+    cache = next(iter(session._range_caches.values()))
+    print(f"Cały sygnał ({full_spec.shape[1]} ramek): {full_time:.3f} s")
+    print(f"Widok {args.width:.1f} s: średnio {view_time * 1000:.1f} ms na przesunięcie, "
+          f"policzone ramki {cache.frames_computed} (w pamięci {cache.stop - cache.start})")
+    print("Zgodność z pełną analizą:", "TAK" if ok else "NIE")
+    return bool(ok)
+
+
+def bench_windows(args):
+    from analysis_session import AnalysisSession
+    from windowing import WINDOW_TYPES
+
+    signal, fs = synthetic_speech(args.seconds)
+    session = AnalysisSession(signal, fs, workers=1)
+    t0 = time.perf_counter()
+    separate = [session.spectrogram(1024, 0.5, window_type)[0] for window_type in WINDOW_TYPES]
+    separate_time = time.perf_counter() - t0
+    session.clear_cache()
+    t0 = time.perf_counter()
+    batched, _, _ = session.spectrogram_comparison(1024, 0.5)
+    batched_time = time.perf_counter() - t0
+
+    ok = all(np.allclose(batched[i], spec, atol=1e-9) for i, spec in enumerate(separate))
+    print(f"{len(WINDOW_TYPES)} okien, {args.seconds:.0f} s sygnału: osobne potoki {separate_time:.3f} s, "
+          f"jeden podział na ramki i FFT {batched_time:.3f} s")
+    print("Zgodność z osobnymi spektrogramami:", "TAK" if ok else "NIE")
+    return ok
+
+
+def bench_fft(args):
+    import fft_backend
+
+    tuning, timings = fft_backend.autotune(repeat=args.repeat)
+    print(f"{'Ramka':>6} | {'numpy [ms]':>10} | {'bez dopełnienia':>22} | {'z dopełnieniem':>28}")
+    for n, (plain, padded) in tuning.items():
+        plain_ms = timings[n][plain + (n,)] * 1000
+        padded_ms = timings[n][padded] * 1000
+        print(f"{n:>6} | {timings[n][('numpy', 1, n)] * 1000:>10.2f} | "
+              f"{plain[0]:>6} x{plain[1]:<3} {plain_ms:>8.2f} ms | "
+              f"{padded[0]:>6} x{padded[1]:<3} n={padded[2]:<5} {padded_ms:>6.2f} ms")
+
+    # Długość będąca liczbą pierwszą – przypadek, w którym dopełnienie daje największy zysk
+    frames = np.random.default_rng(0).standard_normal((256, args.prime))
+    fast = fft_backend.next_fast_len(args.prime)
+    prime_ms = fft_backend._time_rfft(frames, 'numpy', 1, args.prime, args.repeat) * 1000
+    fast_ms = fft_backend._time_rfft(frames, 'numpy', 1, fast, args.repeat) * 1000
+    print(f"Ramka {args.prime} (liczba pierwsza): {prime_ms:.2f} ms, dopełniona do {fast}: {fast_ms:.2f} ms")
+
+    if args.save is not False:
+        path = args.save or fft_backend.TUNING_FILE
+        fft_backend.save_tuning(path)
+        print("Zapisano strojenie:", path)
+    return True
+
+
+def bench_zoom(args):
+    import fft_backend
+    from chirp_z import zoom_fft
+
+    fs = 22050
+    frames = np.random.default_rng(0).standard_normal((args.frames, args.frame_length))
+    f_start, f_stop, num_points = args.band[0], args.band[1], args.points
+    # Pełne FFT z dopełnieniem zerami do tej samej gęstości punktów widma
+    step = (f_stop - f_start) / (num_points - 1)
+    n_fft = int(round(fs / step))
+    bins = np.round(np.linspace(f_start, f_stop, num_points) / fs * n_fft).astype(int)
+
+    def padded():
+        return fft_backend.rfft(frames, n_fft, axis=-1)[:, bins]
+
+    def zoom():
+        return zoom_fft(frames, fs, f_start, f_stop, num_points)[0]
+
+    results = {}
+    for name, func in (("FFT z dopełnieniem", padded), ("chirp-z", zoom)):
+        func()
+        t0 = time.perf_counter()
+        spectrum = func()
+        elapsed = time.perf_counter() - t0
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = spectrum
+        print(f"{name:>18}: {elapsed * 1000:8.1f} ms, szczyt pamięci {peak / 2 ** 20:7.1f} MB")
+
+    # Dokładność porównujemy w częstotliwościach, które trafiają dokładnie w biny pełnego FFT
+    exact = np.isclose(bins * fs / n_fft, np.linspace(f_start, f_stop, num_points))
+    ref, test = results["FFT z dopełnieniem"][:, exact], results["chirp-z"][:, exact]
+    error = np.max(np.abs(test - ref)) / np.max(np.abs(ref))
+    ok = error < 1e-9
+    print(f"{args.frames} ramek x {args.frame_length}, pasmo {f_start:g}-{f_stop:g} Hz, {num_points} punktów "
+          f"(FFT n={n_fft}), błąd względny {error:.1e}")
+    print("Zgodność z pełnym FFT:", "TAK" if ok else "NIE")
+    return ok
+    return True
+
+
+def bench_ltas(args):
+    from scipy.signal import welch
+    from analysis_session import AnalysisSession
+    from ltas import compute_ltas
+    from windowing import get_window
+
+    signal, fs = synthetic_speech(args.seconds)
+    results = {}
+    for name, func in (
+        ("spektrogram (wszystkie ramki)", lambda: AnalysisSession(signal, fs, workers=1).spectrogram(2048, 0.5, 'hann')),
+        ("LTAS Welch", lambda: compute_ltas(signal, fs, frame_length=2048)),
+        ("LTAS wielookienkowe", lambda: compute_ltas(signal, fs, frame_length=2048, method='multitaper')),
+    ):
+        t0 = time.perf_counter()
+        tracemalloc.start()
+        results[name] = func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>30}: {time.perf_counter() - t0:6.2f} s, szczyt pamięci {peak / 2 ** 20:7.1f} MB")
+
+    # Zgodność średniej z scipy.signal.welch (to samo okno, nakładanie i skalowanie gęstości)
+    _, reference = welch(signal.astype(np.float64), fs, window=get_window('hann', 2048), nperseg=2048,
+                         noverlap=1024, detrend=False)
+    error = np.max(np.abs(results["LTAS Welch"]['mean'] - reference) / (reference + 1e-30))
+    ok = error < 1e-9
+    print(f"{args.seconds:.0f} s sygnału, {int(results['LTAS Welch']['frames'])} ramek; "
+          f"błąd względny średniej względem scipy.signal.welch {error:.1e}")
+    print("Zgodność z scipy.signal.welch:", "TAK" if ok else "NIE")
+    return ok
+
+
+def bench_mfcc(args):
+    from analysis_session import AnalysisSession
+    from cepstrum_analysis import mel_filterbank
+
+    signal, fs = synthetic_speech(args.seconds)
+    print(f"{args.seconds:.0f} s sygnału, ramka {args.frame_length}, przesunięcie {args.hop}, {args.mels} pasm, "
+          f"{args.coefficients} współczynników, delta i delta-delta")
+    results = {}
+    for precision in ('float64', 'float32'):
+        best = np.inf
+        for _ in range(args.repeat):
+            session = AnalysisSession(signal, fs, precision=precision, workers=args.workers)
+            t0 = time.perf_counter()
+            results[precision] = session.mfcc(args.frame_length, args.hop, 'hamming', args.mels,
+                                              args.coefficients, deltas=2)
+            best = min(best, time.perf_counter() - t0)
+        frames = results[precision]['mfcc'].shape[-1]
+        print(f"{precision}: {best:.3f} s, {args.seconds / best:8.0f} s audio/s, {frames / best:8.0f} ramek/s")
+
+    # Bank filtrów obejmuje tylko biny pasma – porównanie z pełną macierzą (biny × pasma)
+    weights, bins = mel_filterbank(fs, args.frame_length, args.mels)
+    print(f"Bank filtrów: {weights.size} wag (biny {bins.start}-{bins.stop - 1}) "
+          f"zamiast {args.mels * (args.frame_length // 2 + 1)}")
+    error = np.max(np.abs(results['float32']['mfcc'] - results['float64']['mfcc']))
+    scale = np.max(np.abs(results['float64']['mfcc']))
+    ok = error <= 1e-3 * scale
+    print(f"Największa różnica float32 / float64: {error:.2e} (skala {scale:.1f})")
+    print("Zgodność precyzji:", "TAK" if ok else "NIE")
+    return ok
+
+
+def synthetic_vowel(seconds, formants=(700, 1220, 2600), bandwidths=(80, 90, 120), fs=22050, seed=0):
+    """
+    Samogłoska syntetyczna: ciąg impulsów o wolno zmiennej F0 przez kaskadę rezonatorów (formanty).
+
+    Returns:
+        Krotka (sygnał float32, częstotliwość próbkowania).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * fs)) / fs
+    phase = np.cumsum(120 + 30 * np.sin(2 * np.pi * 0.3 * t)) / fs
+    signal = formant_filter(np.diff(np.floor(phase), prepend=0.0), fs, formants, bandwidths)
+    signal = signal / np.max(np.abs(signal)) + 1e-3 * rng.standard_normal(len(t))
+    return signal.astype(np.float32), fs
+
+
+def formant_filter(signal, fs, formants=(700, 1220, 2600), bandwidths=(80, 90, 120)):
+    """Kaskada rezonatorów dwubiegunowych – formanty o podanych częstotliwościach i szerokościach pasm [Hz]."""
+    from scipy.signal import lfilter
+
+    for freq, bandwidth in zip(formants, bandwidths):
+        r = np.exp(-np.pi * bandwidth / fs)
+        signal = lfilter([1.0 - r], [1.0, -2 * r * np.cos(2 * np.pi * freq / fs), r * r], signal)
+    return signal
+
+
+def bench_formants(args):
+    from analysis_session import AnalysisSession
+
+    true_formants = (700, 1220, 2600)
+    signal, fs = synthetic_vowel(args.seconds, true_formants)
+    print(f"{args.seconds:.0f} s samogłoski syntetycznej (F1-F3 = {true_formants} Hz), ramka {args.frame_length}, "
+          f"nakładanie {args.overlap:.0%}")
+
+    def timed(compute):
+        best = np.inf
+        for _ in range(args.repeat):
+            session = AnalysisSession(signal, fs)
+            t0 = time.perf_counter()
+            result = compute(session)
+            best = min(best, time.perf_counter() - t0)
+        return result, best
+
+    _, stft_time = timed(lambda s: s.spectrogram(args.frame_length, args.overlap, 'hamming'))
+    results = {}
+    costs = {}
+    for method in ('newton', 'eig'):
+        (freqs, _, times), elapsed = timed(lambda s: s.formants(args.frame_length, args.overlap, method=method))
+        results[method] = freqs
+        costs[method] = elapsed / stft_time
+        print(f"{method:>6}: {elapsed:.3f} s ({elapsed / stft_time:4.1f}x spektrogram {stft_time:.3f} s), "
+              f"{len(times) / elapsed:8.0f} ramek/s")
+
+    newton, eig = results['newton'], results['eig']
+    same = np.all((np.isnan(newton) & np.isnan(eig)) | (np.abs(newton - eig) < 1e-3), axis=0)
+    median = np.nanmedian(newton, axis=-1)
+    relative = np.abs(median - true_formants) / true_formants
+    print(f"Ramki zgodne newton / eig: {np.mean(same):.2%}")
+    print("Mediana F1-F3:", ", ".join(f"{f:.0f} Hz" for f in median))
+    ok = np.mean(same) >= 0.99 and np.all(relative < 0.05)
+    print("Zgodność:", "TAK" if ok else "NIE")
+    # Budżet dotyczy metody domyślnej; 'eig' jest dokładnym punktem odniesienia
+    within_budget = costs['newton'] <= args.max_cost
+    print(f"Koszt newton {costs['newton']:.1f}x spektrogramu (budżet {args.max_cost:g}x):",
+          "TAK" if within_budget else "NIE")
+    return ok and within_budget
+
+
+def glottal_voice(seconds, fs=16000, f0_range=(90, 320), vibrato_rate=5.5, vibrato_depth=0.03):
+    """
+    Głos syntetyczny o znanym przebiegu F0: ciąg impulsów krtaniowych Rosenberga przez kaskadę formantów.
+
+    F0 rośnie wykładniczo od f0_range[0] do f0_range[1] i jest modulowane vibrato.
+
+    Returns:
+        Krotka (sygnał float64 o wartości skutecznej 1, F0 w każdej próbce [Hz], częstotliwość próbkowania).
+    """
+    t = np.arange(int(seconds * fs)) / fs
+    glide = f0_range[0] * (f0_range[1] / f0_range[0]) ** (t / t[-1])
+    f0 = glide * (1 + vibrato_depth * np.sin(2 * np.pi * vibrato_rate * t))
+    # Impuls Rosenberga w każdym okresie: faza otwarcia 40%, zamykania 16% okresu
+    position = np.mod(np.cumsum(f0) / fs, 1.0)
+    opening, closing = 0.4, 0.16
+    pulse = np.where(position < opening, 0.5 * (1 - np.cos(np.pi * position / opening)),
+                     np.where(position < opening + closing,
+                              np.cos(0.5 * np.pi * (position - opening) / closing), 0.0))
+    # Pochodna przepływu (promieniowanie warg) i filtr formantowy
+    signal = formant_filter(np.diff(pulse, prepend=0.0), fs, (600, 1300, 2500), (90, 110, 160))
+    signal = signal - np.mean(signal)
+    return signal / np.sqrt(np.mean(signal ** 2)), f0, fs
+
+
+def bench_pitch(args):
+    from pitch import estimate_pitch, ESTIMATORS
+    from windowing import frame_signal
+
+    estimators = args.estimators or list(ESTIMATORS)
+    clean, true_f0, fs = glottal_voice(args.seconds, args.rate)
+    rng = np.random.default_rng(0)
+    noisy = {snr: clean if np.isinf(snr) else clean + 10 ** (-snr / 20) * rng.standard_normal(len(clean))
+             for snr in args.snr}
+    print(f"{args.seconds:.0f} s głosu syntetycznego (impulsy Rosenberga, F0 {true_f0.min():.0f}-"
+          f"{true_f0.max():.0f} Hz z vibrato), {fs} Hz, przesunięcie ramek 1/4 ramki")
+    print("GPE – odsetek ramek z błędem F0 > 20% (brak estymaty też jest błędem), "
+          "FPE – odchylenie standardowe błędu pozostałych ramek [centy]")
+    print("Przepustowość – sekundy audio na sekundę dla każdego estymatora osobno")
+
+    snr_names = ["czysty" if np.isinf(snr) else f"{snr:g} dB" for snr in args.snr]
+    header = f"{'estymator':<14}{'ramka':>6}" + "".join(f"{name:>17}" for name in snr_names) + f"{'audio s/s':>11}"
+    print()
+    print(f"{'':<20}" + "".join(f"{'GPE %':>9}{'FPE':>8}" for _ in snr_names))
+    print(header)
+    print("-" * len(header))
+
+    best = {}
+    clean_gpe = {}
+    for name in estimators:
+        for frame_size in args.frame_sizes:
+            hop = frame_size // 4
+            centers = np.arange(0, len(clean) - frame_size + 1, hop) + frame_size // 2
+            reference = true_f0[centers]
+            cells = []
+            for snr in args.snr:
+                frames = frame_signal(noisy[snr], frame_size, hop)
+                estimate = estimate_pitch(frames, fs, (name,), min_f0=args.min_f0, max_f0=args.max_f0)[f'f0_{name}']
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    cents = 1200 * np.log2(estimate / reference)
+                gross = ~(np.abs(estimate - reference) <= 0.2 * reference)
+                gpe = 100 * np.mean(gross)
+                fpe = np.std(cents[~gross]) if np.any(~gross) else np.nan
+                cells.append(f"{gpe:>9.1f}{fpe:>8.1f}")
+                best[snr] = min(best.get(snr, np.inf), gpe)
+                if snr == max(args.snr):
+                    clean_gpe[name] = min(clean_gpe.get(name, np.inf), gpe)
+
+            frames = frame_signal(noisy[args.snr[0]], frame_size, hop)
+            elapsed = np.inf
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                estimate_pitch(frames, fs, (name,), min_f0=args.min_f0, max_f0=args.max_f0)
+                elapsed = min(elapsed, time.perf_counter() - t0)
+            print(f"{ESTIMATORS[name][0]:<14}{frame_size:>6}" + "".join(cells) + f"{args.seconds / elapsed:>11.0f}")
+
+    # Wszystkie estymatory razem korzystają ze wspólnych danych pośrednich
+    print()
+    for frame_size in args.frame_sizes:
+        frames = frame_signal(noisy[args.snr[0]], frame_size, frame_size // 4)
+        elapsed = np.inf
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            estimate_pitch(frames, fs, estimators, min_f0=args.min_f0, max_f0=args.max_f0)
+            elapsed = min(elapsed, time.perf_counter() - t0)
+        print(f"Wszystkie estymatory razem, ramka {frame_size}: {args.seconds / elapsed:.0f} s audio/s")
+
+    # Kontrola poprawności danych odniesienia: najlepszy estymator na czystym sygnale prawie bez błędów grubych
+    ok = best[max(args.snr)] < 5.0
+    print("Najlepszy GPE dla najwyższego SNR:", f"{best[max(args.snr)]:.1f}%", "TAK" if ok else "NIE")
+    # Każdy estymator (przy najlepszej długości ramki) musi działać na sygnale o najwyższym SNR
+    for name, gpe in clean_gpe.items():
+        if gpe > args.max_clean_gpe:
+            print(f"{ESTIMATORS[name][0]}: GPE {gpe:.1f}% dla najwyższego SNR przekracza {args.max_clean_gpe:g}%")
+            ok = False
+    return ok
+
+
+def bench_speech(args):
+    from analysis_session import AnalysisSession
+
+    signal, fs = synthetic_speech(args.seconds)
+    full = AnalysisSession(signal, fs)
+    masked = AnalysisSession(signal, fs)
+    masked.set_speech_only(args.mode, silence_threshold=args.silence_threshold)
+    speech = masked.speech_mask()
+    print(f"{args.seconds:.0f} s sygnału, tryb '{args.mode}', mowa w {100 * np.mean(speech):.0f}% próbek")
+
+    analyses = {
+        'spectral_features': lambda s: s.spectral_features(1024, 'hamming', 0.5),
+        'pitch': lambda s: s.pitch(2048, 512),
+        'time_features': lambda s: s.time_features(512),
+        'mfcc': lambda s: s.mfcc(1024, 256),
+    }
+    ok = True
+    print(f"{'analiza':<20}{'wszystkie [s]':>14}{'mowa [s]':>10}{'ramki NaN':>11}{'zgodność':>10}")
+    for name, run in analyses.items():
+        times = {}
+        for label, session in (('full', full), ('masked', masked)):
+            elapsed = np.inf
+            for _ in range(args.repeat):
+                session.clear_cache()
+                t0 = time.perf_counter()
+                result = run(session)
+                elapsed = min(elapsed, time.perf_counter() - t0)
+            times[label] = elapsed
+            if label == 'full':
+                reference = result
+        # Ramki policzone w trybie mowy muszą być zgodne z analizą wszystkich ramek (do błędów zaokrągleń –
+        # bloki ramek mają inne granice)
+        match = True
+        skipped = []
+        for key, values in result.items():
+            if key == 'time':
+                continue
+            values, expected = np.asarray(values), np.asarray(reference[key])
+            computed = ~np.isnan(values) if np.issubdtype(values.dtype, np.inexact) else np.ones(values.shape, bool)
+            match &= values.shape == expected.shape and np.allclose(values[computed], expected[computed],
+                                                                    rtol=1e-9, atol=1e-9 * np.max(np.abs(expected)))
+            skipped.append(1 - np.mean(computed))
+        ok &= match
+        print(f"{name:<20}{times['full']:>14.3f}{times['masked']:>10.3f}{100 * max(skipped):>10.0f}%"
+              f"{'TAK' if match else 'NIE':>10}")
+    print("Zgodność policzonych ramek:", "TAK" if ok else "NIE")
+    return ok
+
+
+def bench_featurefile(args):
+    import tempfile
+    from analysis_session import AnalysisSession
+    from feature_file import FeatureFile, feature_table, read_columns, write_feature_file
+
+    signal, fs = synthetic_speech(args.seconds)
+    columns, info = feature_table(AnalysisSession(signal, fs), 'spectral', args.frame_length, args.frame_length // 4)
+    num_frames = len(next(iter(columns.values())))
+    print(f"{args.seconds:.0f} s sygnału, tabela 'spectral': {num_frames} ramek × {len(columns)} kolumn")
+    variants = {
+        'raw': {},
+        'float16': {name: 'float16' for name in columns},
+        'uint8': {name: 'uint8' for name in columns},
+    }
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'format':<14}{'zapis [s]':>10}{'rozmiar [B]':>13}{'kolumna [ms]':>14}")
+        for label, encodings in variants.items():
+            path = os.path.join(directory, label + ".afeat")
+            t0 = time.perf_counter()
+            write_feature_file(path, columns, encodings=encodings, **info)
+            written = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            values = np.array(FeatureFile(path).column('fc'))
+            read = time.perf_counter() - t0
+            print(f"{'afeat ' + label:<14}{written:>10.3f}{os.path.getsize(path):>13}{1000 * read:>14.2f}")
+
+            # Dokładność: zapis bez kodowania bezstratny, float16 względnie, kwantyzacja do połowy kroku
+            reader = FeatureFile(path)
+            for name, expected in columns.items():
+                decoded = np.asarray(reader.column(name), dtype=np.float64)
+                expected = expected.astype(np.float64)
+                finite = np.isfinite(expected)
+                error = np.abs(decoded[finite] - expected[finite])
+                if label == 'raw':
+                    ok &= np.array_equal(decoded, expected, equal_nan=True)
+                elif label == 'float16':
+                    ok &= bool(np.all(error <= 1e-3 * np.abs(expected[finite]) + 1e-7))
+                else:
+                    ok &= bool(np.all(error <= 0.5001 * reader.columns[name]['scale']))
+
+        path = os.path.join(directory, "features.npz")
+        t0 = time.perf_counter()
+        np.savez(path, **columns)
+        written = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        with np.load(path) as archive:
+            archive['fc']
+        read = time.perf_counter() - t0
+        print(f"{'npz':<14}{written:>10.3f}{os.path.getsize(path):>13}{1000 * read:>14.2f}")
+        path = os.path.join(directory, "features.csv")
+        t0 = time.perf_counter()
+        np.savetxt(path, np.column_stack(list(columns.values())), delimiter=',', header=','.join(columns))
+        written = time.perf_counter() - t0
+        print(f"{'csv':<14}{written:>10.3f}{os.path.getsize(path):>13}{'-':>14}")
+
+        # Sklejanie dwóch kolumn z wielu plików (jak przy budowie zbioru treningowego)
+        paths = [os.path.join(directory, "raw.afeat")] * args.files
+        t0 = time.perf_counter()
+        result, offsets = read_columns(paths, ['fc', 'sfm'])
+        elapsed = time.perf_counter() - t0
+        print(f"Sklejenie kolumn fc i sfm z {args.files} plików ({offsets[-1]} ramek): {elapsed:.3f} s, "
+              f"{offsets[-1] / elapsed / 1e6:.1f} mln ramek/s")
+        ok &= np.array_equal(result['fc'][offsets[-2]:], columns['fc'].astype(np.float32), equal_nan=True)
+    print("Zgodność odczytu:", "TAK" if ok else "NIE")
+    return ok
+
+
+def bench_corpus(args):
+    import tempfile
+    from analysis_session import AnalysisSession
+    from corpus_index import SUMMARY_COLUMNS, CorpusIndex, summarize_session
+
+    # Koszt wiersza indeksu dla jednego nagrania
+    signal, fs = synthetic_speech(args.seconds)
+    t0 = time.perf_counter()
+    summary = summarize_session(AnalysisSession(signal, fs))
+    elapsed = time.perf_counter() - t0
+    print(f"Statystyki {args.seconds:.0f} s nagrania: {elapsed:.3f} s ({args.seconds / elapsed:.0f}× czas rzeczywisty)")
+
+    # Syntetyczny indeks dużego korpusu: losowe statystyki, część F0 bez danych
+    rng = np.random.default_rng(0)
+    n = args.files
+    columns = {name: rng.uniform(0, 1, n).astype(np.float32) for name in SUMMARY_COLUMNS}
+    columns['f0_p50'] = rng.uniform(60, 400, n).astype(np.float32)
+    columns['f0_p50'][rng.uniform(size=n) < 0.05] = np.nan
+    columns['duration'] = rng.uniform(0.5, 600, n).astype(np.float32)
+    columns['path'] = np.array([f"/korpus/mowca_{i % 997}/nagranie_{i}.wav" for i in range(n)])
+    columns['size'] = rng.integers(1000, 10 ** 8, n)
+    columns['mtime'] = rng.uniform(1.6e9, 1.7e9, n)
+    conditions = [('f0_p50', '>=', 180.0), ('f0_p50', '<=', 250.0), ('silence_ratio', '>', 0.3)]
+
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "korpus.npz")
+        np.savez(path, version=np.array(1), **columns)
+        # Zapytanie jak w CLI: otwarcie indeksu, warunki, sortowanie, pierwsze wiersze
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            index = CorpusIndex(path)
+            rows = index.query(conditions, sort='duration', descending=True, limit=20)
+            index.rows(rows, ['path', 'f0_p50', 'duration'])
+            times.append(time.perf_counter() - t0)
+        print(f"Indeks {n} plików ({os.path.getsize(path)} B), zapytanie z otwarciem pliku: "
+              f"{1000 * min(times):.1f} ms")
+
+        f0, silence, duration = columns['f0_p50'], columns['silence_ratio'], columns['duration']
+        expected = [i for i in range(n) if 180 <= f0[i] <= 250 and silence[i] > 0.3]
+        expected.sort(key=lambda i: -duration[i])
+        ok &= np.array_equal(rows, expected[:20])
+
+        # Dopisanie wiersza i zapis przyrostowy
+        index.add(os.path.abspath(__file__), summary)
+        t0 = time.perf_counter()
+        index.save()
+        saved = time.perf_counter() - t0
+        ok &= len(CorpusIndex(path)) == n + 1
+        print(f"Dopisanie pliku i zapis indeksu: {saved:.3f} s")
+    print("Zgodność zapytania z przeglądem pełnym:", "TAK" if ok else "NIE")
+    if min(times) > args.budget:
+        print(f"Przekroczony budżet zapytania {1000 * args.budget:.0f} ms")
+        ok = False
+    return ok
+
+
+def synthetic_utterance(seconds, fs=22050, seed=0):
+    """Sygnał podobny do mowy o losowych sylabach (różna treść dla różnych ziaren)."""
+    rng = np.random.default_rng(seed)
+    pieces = []
+    total = int(seconds * fs)
+    while sum(map(len, pieces)) < total:
+        n = int(rng.uniform(0.08, 0.35) * fs)
+        t = np.arange(n) / fs
+        f0 = rng.uniform(90, 300) * (1 + rng.uniform(-0.2, 0.2) * t / t[-1])
+        phase = 2 * np.pi * np.cumsum(f0) / fs
+        weights = rng.uniform(0, 1, 12) / np.arange(1, 13)
+        syllable = sum(w * np.sin(k * phase) for k, w in enumerate(weights, start=1)) * np.hanning(n)
+        pieces.append(syllable)
+        pieces.append(np.zeros(int(rng.uniform(0.02, 0.2) * fs)))
+    signal = np.concatenate(pieces)[:total]
+    signal = 0.3 * signal / np.max(np.abs(signal)) + 0.002 * rng.standard_normal(total)
+    return signal.astype(np.float32), fs
+
+
+def bench_fingerprint(args):
+    import tempfile
+    from scipy.io import wavfile
+    from analysis_session import AnalysisSession
+    from fingerprint import FingerprintIndex, build_index, fingerprint_session
+
+    # Ziarno zapytań spoza ziaren nagrań – inaczej szum fragmentu powtarzałby szum któregoś nagrania
+    rng = np.random.default_rng([args.files, 1])
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(args.files):
+            signal, fs = synthetic_utterance(args.seconds, seed=i)
+            paths.append(os.path.join(directory, f"nagranie_{i}.wav"))
+            wavfile.write(paths[-1], fs, signal)
+
+        index = FingerprintIndex(os.path.join(directory, "odciski"))
+        t0 = time.perf_counter()
+        build_index(index, paths, args.workers, log=lambda message: None)
+        elapsed = time.perf_counter() - t0
+        hours = args.files * args.seconds / 3600
+        print(f"Budowa: {args.files} plików × {args.seconds:.0f} s w {elapsed:.1f} s "
+              f"({args.files * args.seconds / elapsed:.0f}× czas rzeczywisty, procesy: {args.workers})")
+        print(f"Indeks: {index.num_hashes} haszy, {index.size_bytes()} B "
+              f"({index.size_bytes() / hours / 2 ** 20:.1f} MiB na godzinę nagrań)")
+
+        # Zapytania: fragmenty zaindeksowanych plików ze wzmocnieniem i szumem oraz fragmenty spoza indeksu
+        index = FingerprintIndex(index.directory)
+        fingerprint_times, search_times, correct, false_positives = [], [], 0, 0
+        for q in range(args.queries):
+            known = q % 4 != 3
+            file = int(rng.integers(args.files))
+            signal, fs = synthetic_utterance(args.seconds, seed=file if known else args.files + q)
+            start = rng.uniform(0, args.seconds - args.clip)
+            clip = signal[int(start * fs):int((start + args.clip) * fs)] * rng.uniform(0.3, 2.0)
+            noise = rng.standard_normal(len(clip)) * np.sqrt(np.mean(clip ** 2) / 10 ** (args.snr / 10))
+            t0 = time.perf_counter()
+            hashes, times = fingerprint_session(AnalysisSession(clip + noise, fs), index.params)
+            t1 = time.perf_counter()
+            matches = index.query(hashes, times, args.min_matches, args.min_ratio, top=1)
+            search_times.append(time.perf_counter() - t1)
+            fingerprint_times.append(t1 - t0)
+            if known:
+                correct += bool(matches and matches[0]['path'] == os.path.abspath(paths[file])
+                                and abs(matches[0]['offset'] - start) < 0.05)
+            else:
+                false_positives += bool(matches)
+        known_queries = sum(q % 4 != 3 for q in range(args.queries))
+        print(f"Zapytania {args.clip:.0f} s przy SNR {args.snr:.0f} dB: trafione {correct}/{known_queries}, "
+              f"fałszywe trafienia {false_positives}/{args.queries - known_queries}")
+        print(f"Czas zapytania: odcisk fragmentu {1000 * np.median(fingerprint_times):.1f} ms, "
+              f"wyszukiwanie {1000 * np.median(search_times):.2f} ms (mediana), "
+              f"{1000 * np.max(search_times):.2f} ms (maks.)")
+        ok &= correct >= 0.9 * known_queries and false_positives == 0
+    print("Skuteczność wyszukiwania:", "TAK" if ok else "NIE")
+    return ok
+
+
+def _http_request(port, method, path, body=None, content_type='application/octet-stream'):
+    import http.client
+
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        conn.request(method, path, body=body, headers={'Content-Type': content_type})
+        response = conn.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        conn.close()
+
+
+def bench_service(args):
+    import asyncio
+    import io
+    import json
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from scipy.io import wavfile
+    from service import AnalysisService
+
+    def wav_bytes(seconds, seed):
+        signal, fs = synthetic_speech(seconds, seed=seed)
+        buffer = io.BytesIO()
+        wavfile.write(buffer, fs, signal)
+        return buffer.getvalue()
+
+    def strict_json(data):
+        # Jak JSON.parse: NaN i Infinity są niedozwolone
+        return json.loads(data, parse_constant=lambda token: (_ for _ in ()).throw(ValueError(token)))
+
+    checks = []
+
+    def check(label, condition, detail=''):
+        checks.append(bool(condition))
+        print(f"{label:<58}{'TAK' if condition else 'NIE'} {detail}")
+
+    async def run(directory):
+        service = AnalysisService(workers=args.workers, queue_size=args.queue)
+        await service.start('127.0.0.1', 0)
+        port = service.address[1]
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=args.burst)
+
+        def request(method, path, body=None, content_type='application/octet-stream'):
+            return loop.run_in_executor(pool, _http_request, port, method, path, body, content_type)
+
+        try:
+            path = os.path.join(directory, "nagranie.wav")
+            with open(path, 'wb') as file:
+                file.write(wav_bytes(args.seconds, 0))
+            t0 = time.perf_counter()
+            status, _, data = await request('POST', '/analyze?features=f0,spectral,pitch&format=json',
+                                            wav_bytes(args.seconds, 0))
+            elapsed = time.perf_counter() - t0
+            check("POST /analyze (WAV, JSON)", status == 200 and 'pitch' in strict_json(data)['features'],
+                  f"{status}, {1000 * elapsed:.0f} ms")
+
+            body = json.dumps({'path': path, 'features': ['mfcc'], 'format': 'npz'}).encode()
+            status, _, data = await request('POST', '/analyze', body, 'application/json')
+            ok = status == 200 and np.load(io.BytesIO(data))['mfcc/mfcc'].ndim == 2
+            check("POST /analyze (ścieżka, npz)", ok, str(status))
+
+            body = json.dumps({'path': path, 'features': ['pitch', 'spectral'],
+                               'params': {'speech_only': 'voiced'}}).encode()
+            status, _, data = await request('POST', '/analyze', body, 'application/json')
+            try:
+                values = strict_json(data)['features']['pitch']['f0_yin']
+                ok = status == 200 and None in values
+            except ValueError:
+                ok = False
+            check("POST /analyze speech_only (poprawny JSON, null)", ok, str(status))
+
+            t0 = time.perf_counter()
+            status, _, _ = await request('POST', '/analyze?features=f0,spectral,pitch&format=json',
+                                         wav_bytes(args.seconds, 0))
+            check("Powtórzone żądanie z pamięci podręcznej", status == 200,
+                  f"{status}, {1000 * (time.perf_counter() - t0):.1f} ms")
+
+            for label, body, content_type in (
+                    ("Niepoprawny JSON -> 400", b'{bad', 'application/json'),
+                    ("Parametr niebędący skalarem -> 400",
+                     json.dumps({'path': path, 'params': {'frame_size': [1]}}).encode(), 'application/json'),
+                    ("Cechy niebędące listą -> 400",
+                     json.dumps({'path': path, 'features': 'f0'}).encode(), 'application/json'),
+                    ("Nieznane okno -> 400",
+                     json.dumps({'path': path, 'params': {'window_type': 'x'}}).encode(), 'application/json'),
+                    ("Dane, które nie są WAV -> 400", b'RIFF1234WAVEfmt ', 'audio/wav')):
+                status, _, data = await request('POST', '/analyze', body, content_type)
+                check(label, status == 400, f"{status} {strict_json(data).get('error', '')[:40]}")
+
+            # Kolejka: tyle żądań naraz, że część musi zostać odrzucona
+            bodies = [wav_bytes(args.burst_seconds, seed) for seed in range(1, args.burst + 1)]
+            results = await asyncio.gather(*(request('POST', '/analyze?features=mfcc,spectrogram', body)
+                                              for body in bodies))
+            statuses = [status for status, _, _ in results]
+            rejected = [headers for status, headers, _ in results if status == 503]
+            check("Przepełniona kolejka -> 503 z Retry-After",
+                  rejected and all('Retry-After' in headers for headers in rejected)
+                  and set(statuses) <= {200, 503},
+                  f"{statuses.count(200)}× 200, {len(rejected)}× 503")
+
+            status, _, data = await request('GET', '/metrics')
+            metrics = strict_json(data)
+            check("GET /metrics", status == 200 and metrics['requests_rejected'] == len(rejected)
+                  and metrics['queue_capacity'] == args.queue,
+                  f"p50 {metrics['latency_ms']['p50']:.0f} ms, p99 {metrics['latency_ms']['p99']:.0f} ms, "
+                  f"trafienia pamięci {metrics['cache_hits']}")
+        finally:
+            pool.shutdown()
+            await service.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(directory))
+    return all(checks)
+
+
+def bench_live(args):
+    from audio_sources import SyntheticSource
+    from streaming import StreamingAnalyzer, StreamWorker
+
+    # Źródło syntetyczne w czasie rzeczywistym zastępuje mikrofon
+    source = SyntheticSource(args.rate, args.block, queue_blocks=args.queue)
+    analyzer = StreamingAnalyzer(args.rate)
+    worker = StreamWorker(source, analyzer)
+    worker.start()
+    time.sleep(args.seconds)
+    worker.stop()
+
+    print(f"Bloki: odebrane {source.blocks_received}, przetworzone {worker.blocks_processed}, "
+          f"odrzucone {source.dropped_blocks}, przepełnienia {source.overruns}")
+    print(f"Ramki analizy: {analyzer.columns_total}, ostatnia klasa ramki: {analyzer.latest_label()}")
+    return source.dropped_blocks == 0 and worker.blocks_processed > 0
+
+
+def parse_latency(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def bench_playback(args):
+    from playback import PlaybackEngine
+
+    signal, fs = synthetic_speech(args.seconds, args.rate)
+    player = PlaybackEngine(signal, fs, blocksize=args.blocksize, latency=args.latency,
+                            buffer_blocks=args.buffer_blocks)
+    try:
+        player.start()
+    except Exception as e:
+        print(f"Nie udało się otworzyć urządzenia audio: {e}")
+        return False
+    while not player.finished:
+        time.sleep(0.1)
+    player.close()
+
+    stats = player.stats()
+    print(f"Blok {args.blocksize} próbek, opóźnienie {args.latency}, bufor {args.buffer_blocks} bloków")
+    print(f"Niedobory bufora: {stats['underflows']}, niedobory urządzenia: {stats['device_underflows']}, "
+          f"przepełnienia urządzenia: {stats['device_overflows']}")
+    print(f"Czas wywołania zwrotnego: maks. {stats['callback_max_ms']:.3f} ms")
+    lower = 0
+    for upper, count in zip(stats['callback_bins_us'] + (None,), stats['callback_hist']):
+        label = f"{lower}-{upper} µs" if upper is not None else f">{lower} µs"
+        print(f"  {label:>14}: {count}")
+        lower = upper
+    return stats['underflows'] == 0 and stats['device_underflows'] == 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki aplikacji audio")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("startup", help="Czas startu (import okna głównego)")
+    p.add_argument("--budget", type=float, default=1.5, help="Budżet czasu importu [s]")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("precision", help="Porównanie trybów float64 i float32 (czas, pamięć, tolerancja)")
+    p.add_argument("--seconds", type=float, default=120.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_precision)
+
+    p = sub.add_parser("channels", help="Skalowanie czasu i pamięci z liczbą kanałów (analiza wsadowa)")
+    p.add_argument("--seconds", type=float, default=30.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--max-channels", type=int, default=4)
+    p.add_argument("--repeat", type=int, default=1)
+    p.set_defaults(func=bench_channels)
+
+    p = sub.add_parser("resample", help="Analiza po przepróbkowaniu (zgodność z resample_poly, czas)")
+    p.add_argument("--seconds", type=float, default=30.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--rate", type=int, default=96000, help="Częstotliwość nagrania [Hz]")
+    p.add_argument("--target", type=int, default=16000, help="Częstotliwość analizy [Hz]")
+    p.add_argument("--repeat", type=int, default=1)
+    p.set_defaults(func=bench_resample)
+
+    p = sub.add_parser("view", help="Analiza zakresu widoku przy przesuwaniu wykresu (zgodność, czas)")
+    p.add_argument("--seconds", type=float, default=120.0)
+    p.add_argument("--width", type=float, default=5.0)
+    p.set_defaults(func=bench_view)
+
+    p = sub.add_parser("windows", help="Porównanie okien: jedno FFT wzdłuż osi okien a osobne spektrogramy")
+    p.add_argument("--seconds", type=float, default=60.0)
+    p.set_defaults(func=bench_windows)
+
+    p = sub.add_parser("fft", help="Strojenie FFT: backend, liczba wątków i długość dla typowych ramek")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--prime", type=int, default=1021)
+    p.add_argument("--save", nargs="?", const=None, default=False,
+                   help="Zapisz strojenie (domyślnie w pliku fft_backend.TUNING_FILE)")
+    p.set_defaults(func=bench_fft)
+
+    p = sub.add_parser("zoom", help="Widmo w paśmie: transformata chirp-z a pełne FFT z dopełnieniem")
+    p.add_argument("--frames", type=int, default=500)
+    p.add_argument("--frame-length", type=int, default=2048)
+    p.add_argument("--band", type=float, nargs=2, default=(50.0, 600.0), metavar=("OD", "DO"))
+    p.add_argument("--points", type=int, default=1101)
+    p.set_defaults(func=bench_zoom)
+
+    p = sub.add_parser("ltas", help="Widmo długoterminowe: pamięć akumulatora a spektrogram, zgodność z Welchem")
+    p.add_argument("--seconds", type=float, default=600.0, help="Długość sygnału testowego [s]")
+    p.set_defaults(func=bench_ltas)
+
+    p = sub.add_parser("mfcc", help="Przepustowość potoku MFCC (sekundy audio na sekundę)")
+    p.add_argument("--seconds", type=float, default=600.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--frame-length", type=int, default=1024)
+    p.add_argument("--hop", type=int, default=256)
+    p.add_argument("--mels", type=int, default=40)
+    p.add_argument("--coefficients", type=int, default=13)
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_mfcc)
+
+    p = sub.add_parser("formants", help="Tory formantów LPC: czas względem spektrogramu, newton a eig")
+    p.add_argument("--seconds", type=float, default=60.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--frame-length", type=int, default=512)
+    p.add_argument("--overlap", type=float, default=0.5)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--max-cost", type=float, default=6.0,
+                   help="Największy dopuszczalny czas metody newton jako wielokrotność czasu spektrogramu")
+    p.set_defaults(func=bench_formants)
+
+    p = sub.add_parser("pitch", help="Estymatory F0: GPE, FPE i przepustowość na głosie syntetycznym o znanym F0")
+    p.add_argument("--seconds", type=float, default=6.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--rate", type=int, default=16000, help="Częstotliwość próbkowania [Hz]")
+    p.add_argument("--frame-sizes", type=int, nargs="+", default=[512, 1024, 2048])
+    p.add_argument("--snr", type=float, nargs="+", default=[np.inf, 20.0, 10.0, 0.0],
+                   help="Stosunki sygnał/szum [dB] (inf – bez szumu)")
+    p.add_argument("--estimators", nargs="+", default=None, help="Nazwy z pitch.ESTIMATORS (domyślnie wszystkie)")
+    p.add_argument("--min-f0", type=float, default=50.0)
+    p.add_argument("--max-f0", type=float, default=500.0)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--max-clean-gpe", type=float, default=10.0,
+                   help="Największy dopuszczalny GPE każdego estymatora dla najwyższego SNR [%%]")
+    p.set_defaults(func=bench_pitch)
+
+    p = sub.add_parser("speech", help="Analiza samej mowy: czas z pominięciem ciszy, zgodność policzonych ramek")
+    p.add_argument("--seconds", type=float, default=60.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--mode", choices=("speech", "voiced"), default="speech")
+    p.add_argument("--silence-threshold", type=float, default=0.01, help="Próg ciszy (RMS ramki)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_speech)
+
+    p = sub.add_parser("featurefile", help="Kolumnowe pliki cech: rozmiar, zapis, odczyt kolumny, sklejanie plików")
+    p.add_argument("--seconds", type=float, default=600.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--frame-length", type=int, default=1024)
+    p.add_argument("--files", type=int, default=20, help="Liczba plików przy sklejaniu kolumn")
+    p.set_defaults(func=bench_featurefile)
+
+    p = sub.add_parser("corpus", help="Indeks korpusu: koszt statystyk pliku, zapytanie do dużego indeksu")
+    p.add_argument("--files", type=int, default=100000, help="Liczba plików syntetycznego indeksu")
+    p.add_argument("--seconds", type=float, default=10.0, help="Długość nagrania testowego [s]")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--budget", type=float, default=0.1, help="Budżet czasu zapytania [s]")
+    p.set_defaults(func=bench_corpus)
+
+    p = sub.add_parser("fingerprint", help="Odciski widmowe: budowa indeksu, rozmiar, skuteczność i czas zapytań")
+    p.add_argument("--files", type=int, default=100, help="Liczba nagrań syntetycznego korpusu")
+    p.add_argument("--seconds", type=float, default=30.0, help="Długość nagrania [s]")
+    p.add_argument("--clip", type=float, default=5.0, help="Długość fragmentu zapytania [s]")
+    p.add_argument("--snr", type=float, default=10.0, help="Stosunek sygnału do szumu fragmentu [dB]")
+    p.add_argument("--queries", type=int, default=40)
+    p.add_argument("--min-matches", type=int, default=5)
+    p.add_argument("--min-ratio", type=float, default=0.01)
+    p.add_argument("--workers", type=int, default=1)
+    p.set_defaults(func=bench_fingerprint)
+
+    p = sub.add_parser("service", help="Usługa analizy na localhost: JSON, npz, błędy klienta, metryki, 503")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--queue", type=int, default=1, help="Pojemność kolejki usługi")
+    p.add_argument("--seconds", type=float, default=3.0, help="Długość nagrania w zwykłych żądaniach [s]")
+    p.add_argument("--burst", type=int, default=8, help="Liczba jednoczesnych żądań przy sprawdzaniu kolejki")
+    p.add_argument("--burst-seconds", type=float, default=20.0, help="Długość nagrań w żądaniach jednoczesnych [s]")
+    p.set_defaults(func=bench_service)
+
+    p = sub.add_parser("live", help="Analiza na żywo ze źródła syntetycznego (odrzucone bloki)")
+    p.add_argument("--seconds", type=float, default=5.0, help="Czas trwania [s]")
+    p.add_argument("--rate", type=int, default=16000, help="Częstotliwość próbkowania [Hz]")
+    p.add_argument("--block", type=int, default=512, help="Rozmiar bloku [próbki]")
+    p.add_argument("--queue", type=int, default=32, help="Pojemność kolejki [bloki]")
+    p.set_defaults(func=bench_live)
+
+    p = sub.add_parser("playback", help="Odtwarzanie przez silnik z buforem (niedobory, czas wywołania zwrotnego)")
+    p.add_argument("--seconds", type=float, default=5.0, help="Długość sygnału testowego [s]")
+    p.add_argument("--rate", type=int, default=22050, help="Częstotliwość próbkowania [Hz]")
+    p.add_argument("--blocksize", type=int, default=256, help="Rozmiar bloku urządzenia [próbki]")
+    p.add_argument("--latency", type=parse_latency, default="low", help="'low', 'high' lub liczba sekund")
+    p.add_argument("--buffer-blocks", type=int, default=8, help="Pojemność bufora pierścieniowego [bloki]")
+    p.set_defaults(func=bench_playback)
+
+    args = parser.parse_args(argv)
+    ok = args.func(args)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,26 @@
+from functools import lru_cache
+
 import numpy as np
+
+import fft_backend
 from windowing import apply_window
 
 
-def compute_cepstrum(frame, sample_rate, window_type='hamming'):
-    # Stosujemy okno
-    windowed_frame = apply_window(frame, window_type)
+def compute_cepstrum(frame, sample_rate, window_type='hamming', dtype=None):
+    # Stosujemy okno (dtype=float32 utrzymuje cały potok w pojedynczej precyzji)
+    windowed_frame = apply_window(frame, window_type, dtype)
 
-    # Obliczamy FFT
-    spectrum = np.fft.rfft(windowed_frame)
+    # Obliczamy FFT (dla macierzy ramek wzdłuż ostatniej osi)
+    spectrum = fft_backend.rfft(windowed_frame, axis=-1)
 
     # Obliczamy logarytmiczne widmo amplitudowe
     log_spectrum = np.log(np.abs(spectrum) + 1e-10)  # Dodajemy małą wartość, aby uniknąć log(0)
 
     # Obliczamy odwrotną FFT logarytmicznego widma amplitudowego (rzeczywiste cepstrum)
-    cepstrum = np.fft.irfft(log_spectrum)
+    cepstrum = fft_backend.irfft(log_spectrum, axis=-1)
 
     # Obliczamy oś kwefrencji (czasu)
-    quefrency = np.arange(len(cepstrum)) / sample_rate
+    quefrency = np.arange(cepstrum.shape[-1]) / sample_rate
 
     return cepstrum, quefrency, log_spectrum
 
@@ -33,12 +37,109 @@ def estimate_f0_from_cepstrum(cepstrum, quefrency, min_f0=50, max_f0=500):
     # Unikamy problemu z pustym zakresem
     if min_idx >= max_idx:
         min_idx = max(0, min_idx - 1)
-        max_idx = min(len(cepstrum) - 1, max_idx + 1)
+        max_idx = min(cepstrum.shape[-1] - 1, max_idx + 1)
 
-    # Znajdujemy szczyt w zakresie kwefrencji
-    peak_idx = min_idx + np.argmax(cepstrum[min_idx:max_idx])
+    # Znajdujemy szczyt w zakresie kwefrencji (dla każdej ramki, jeśli podano macierz cepstrów)
+    peak_idx = min_idx + np.argmax(cepstrum[..., min_idx:max_idx], axis=-1)
 
     # Konwertujemy szczytową kwefrencję na częstotliwość podstawową
     f0 = 1 / quefrency[peak_idx]
 
-    return f0, peak_idx
\ No newline at end of file
+    return f0, peak_idx
+
+def hz_to_mel(freq):
+    # Skala melowa w wariancie HTK
+    return 2595.0 * np.log10(1.0 + np.asarray(freq) / 700.0)
+
+
+def mel_to_hz(mel):
+    return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+def mel_frequencies(n_mels, f_min, f_max):
+    """Częstotliwości środkowe pasm melowych (równo rozłożone w skali melowej)."""
+    return mel_to_hz(np.linspace(hz_to_mel(f_min), hz_to_mel(f_max), n_mels + 2))[1:-1]
+
+
+@lru_cache(maxsize=32)
+def mel_filterbank(sample_rate, n_fft, n_mels=40, f_min=0.0, f_max=None, dtype_name='float64'):
+    """
+    Bank trójkątnych filtrów melowych dla widm rfft o długości n_fft.
+
+    Filtry mają wzmocnienie 1 w częstotliwości środkowej. Przechowywana jest tylko
+    część macierzy obejmująca biny od pierwszego do ostatniego niezerowego – biny
+    poza pasmem [f_min, f_max] nie biorą udziału w mnożeniu.
+
+    Returns:
+        Krotka (wagi (n_mels, biny pasma) tylko do odczytu, slice binów widma).
+    """
+    f_max = sample_rate / 2 if f_max is None else f_max
+    freqs = np.fft.rfftfreq(n_fft, d=1 / sample_rate)
+    edges = mel_to_hz(np.linspace(hz_to_mel(f_min), hz_to_mel(f_max), n_mels + 2))
+    left, center, right = edges[:-2, np.newaxis], edges[1:-1, np.newaxis], edges[2:, np.newaxis]
+    rising = (freqs - left) / (center - left)
+    falling = (right - freqs) / (right - center)
+    weights = np.maximum(0.0, np.minimum(rising, falling))
+
+    nonzero = np.flatnonzero(np.any(weights > 0, axis=0))
+    bins = slice(int(nonzero[0]), int(nonzero[-1]) + 1) if len(nonzero) else slice(0, 0)
+    weights = np.ascontiguousarray(weights[:, bins], dtype=dtype_name)
+    weights.flags.writeable = False
+    return weights, bins
+
+
+@lru_cache(maxsize=32)
+def _dct_matrix(n_mels, n_mfcc, dtype_name):
+    # Ortonormalna macierz DCT-II ograniczona do n_mfcc pierwszych współczynników (jak scipy.fft.dct, norm='ortho')
+    k = np.arange(n_mfcc)[np.newaxis, :]
+    n = np.arange(n_mels)[:, np.newaxis]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    basis[:, 0] /= np.sqrt(2.0)
+    basis = basis.astype(dtype_name)
+    basis.flags.writeable = False
+    return basis
+
+
+def compute_log_mel(spectra, sample_rate, n_fft, n_mels=40, f_min=0.0, f_max=None):
+    """
+    Logarytm energii w pasmach melowych.
+
+    Args:
+        spectra: Widma zespolone rfft (pasma liczone wzdłuż ostatniej osi).
+        n_fft: Długość FFT, z której pochodzą widma.
+
+    Returns:
+        Tablica (..., n_mels) w typie rzeczywistym odpowiadającym widmom.
+    """
+    dtype = spectra.real.dtype
+    weights, bins = mel_filterbank(sample_rate, n_fft, n_mels, float(f_min),
+                                   None if f_max is None else float(f_max), dtype.name)
+    band = spectra[..., bins]
+    power = band.real ** 2 + band.imag ** 2
+    return np.log(power @ weights.T + 1e-10)
+
+
+def compute_mfcc(log_mel, n_mfcc=13):
+    """Współczynniki MFCC – DCT-II (ortonormalna) logarytmów energii pasm melowych wzdłuż ostatniej osi."""
+    return log_mel @ _dct_matrix(log_mel.shape[-1], n_mfcc, log_mel.dtype.name)
+
+
+def compute_deltas(features, width=2, axis=-1):
+    """
+    Współczynniki delta (nachylenie regresji liniowej po 2 * width + 1 ramkach).
+
+    Na brzegach powielane są skrajne ramki.
+    """
+    features = np.moveaxis(features, axis, -1)
+    num_frames = features.shape[-1]
+    if num_frames == 0:
+        return np.moveaxis(features.copy(), -1, axis)
+    padded = np.concatenate(
+        (np.repeat(features[..., :1], width, axis=-1), features, np.repeat(features[..., -1:], width, axis=-1)),
+        axis=-1
+    )
+    deltas = np.zeros_like(features)
+    for n in range(1, width + 1):
+        deltas += n * (padded[..., width + n:width + n + num_frames] - padded[..., width - n:width - n + num_frames])
+    deltas /= 2 * sum(n * n for n in range(1, width + 1))
+    return np.moveaxis(deltas, -1, axis)
@@ -0,0 +1,72 @@
+"""
+Widmo w wybranym paśmie (zoom) liczone transformatą chirp-z (algorytm Bluesteina).
+
+Dla ramki o długości n wyznaczamy m wartości widma w równo rozłożonych
+częstotliwościach f_start..f_stop. Suma DFT jest zapisywana jako splot z
+sygnałem świergotowym i liczona przez FFT długości >= n + m - 1, więc koszt
+zależy od n + m, a nie od długości FFT potrzebnej do uzyskania tej samej
+gęstości próbek widma (sample_rate / df). Wartości są równe zwykłemu widmu
+(rfft z dopełnieniem zerami) w tych samych częstotliwościach.
+
+Wektory świergotowe dla danej długości ramki i pasma są zapamiętywane, a
+macierze ramek przetwarzane jednym wywołaniem FFT wzdłuż ostatniej osi.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+import fft_backend
+from precision import complex_dtype, DEFAULT_PRECISION
+
+
+def zoom_frequencies(f_start, f_stop, num_points):
+    """Częstotliwości, w których liczone jest widmo zoom (z obydwoma końcami pasma)."""
+    return np.linspace(f_start, f_stop, num_points)
+
+
+@lru_cache(maxsize=16)
+def _zoom_plan(n, f_start, f_stop, num_points, sample_rate, precision):
+    dtype = complex_dtype(precision)
+    step = (f_stop - f_start) / max(num_points - 1, 1)
+    w = 2 * np.pi * step / sample_rate
+    length = fft_backend.next_fast_len(n + num_points - 1)
+
+    # X_k = post_k * sum_i (x_i * pre_i) * chirp_(k - i), gdzie ik = (i^2 + k^2 - (k - i)^2) / 2
+    i = np.arange(n)
+    k = np.arange(num_points)
+    pre = np.exp(-1j * (2 * np.pi * f_start / sample_rate * i + w * i ** 2 / 2))
+    post = np.exp(-1j * w * k ** 2 / 2)
+    chirp = np.zeros(length, dtype=np.complex128)
+    chirp[:num_points] = np.exp(1j * w * k ** 2 / 2)
+    chirp[length - n + 1:] = np.exp(1j * w * i[:0:-1] ** 2 / 2)
+
+    plan = (pre.astype(dtype), fft_backend.fft(chirp, length).astype(dtype), post.astype(dtype), length)
+    for array in plan[:3]:
+        array.flags.writeable = False
+    return plan
+
+
+def zoom_fft(frames, sample_rate, f_start, f_stop, num_points, precision=DEFAULT_PRECISION):
+    """
+    Widmo ramek w paśmie [f_start, f_stop] transformatą chirp-z.
+
+    Args:
+        frames: Ramka (tablica 1D) lub macierz ramek (widmo wzdłuż ostatniej osi), zwykle już z oknem.
+        sample_rate: Częstotliwość próbkowania.
+        f_start: Początek pasma [Hz].
+        f_stop: Koniec pasma [Hz] (włącznie).
+        num_points: Liczba punktów widma w paśmie.
+        precision: 'float64' lub 'float32' (widmo complex128 / complex64).
+
+    Returns:
+        Krotka (widmo zespolone o kształcie (..., num_points), oś częstotliwości).
+    """
+    n = np.shape(frames)[-1]
+    if not 0 <= f_start < f_stop <= sample_rate / 2:
+        raise ValueError(f"Pasmo zoom musi spełniać 0 <= od < do <= {sample_rate / 2:g} Hz.")
+    pre, chirp_spectrum, post, length = _zoom_plan(n, float(f_start), float(f_stop), int(num_points),
+                                                   float(sample_rate), precision)
+    spectrum = fft_backend.fft(frames * pre, length, axis=-1)
+    spectrum *= chirp_spectrum
+    result = fft_backend.ifft(spectrum, length, axis=-1)[..., :num_points] * post
+    return result, zoom_frequencies(f_start, f_stop, num_points)
@@ -0,0 +1,357 @@
+"""
+Indeks korpusu: statystyki podsumowujące nagrań w tabeli kolumnowej.
+
+Dla każdego pliku zapisywany jest jeden wiersz statystyk (SUMMARY_COLUMNS):
+czas trwania, udział ciszy i fragmentów dźwięcznych, percentyle F0 (YIN,
+tylko ramki z pewną estymatą), percentyle centroidu i szerokości pasma oraz
+średnie stosunki energii ERSB1-3 (tylko ramki z mową). Tabela zapisywana
+jest jako nieskompresowany plik .npz z jedną tablicą na kolumnę – zapytanie
+czyta tylko kolumny użyte w warunkach, sortowaniu i wyniku, a warunki
+liczone są wektorowo dla wszystkich plików naraz.
+
+Indeks budowany jest przyrostowo: analizowane są tylko pliki nowe lub
+zmienione (rozmiar, czas modyfikacji), a postęp zapisywany co kilkaset
+plików, więc przerwaną budowę można wznowić.
+
+Uruchomienie (z katalogu files/):
+    python corpus_index.py build korpus.npz ../audio_files/*.wav --workers 4
+    python corpus_index.py query korpus.npz --where "f0_p50>=180" "f0_p50<=250" "silence_ratio>0.3" --sort f0_p50
+    python corpus_index.py info korpus.npz
+"""
+import argparse
+import operator
+import os
+import re
+import time
+
+import numpy as np
+
+from incremental_index import SAVE_EVERY, build_incremental, expand_paths, file_signature
+
+
+VERSION = 1
+
+PERCENTILES = (10, 50, 90)
+
+# Kolumny statystyk (float32); NaN – brak danych (np. brak ramek dźwięcznych)
+SUMMARY_COLUMNS = (
+    'duration', 'sample_rate', 'channels', 'silence_ratio', 'voiced_ratio',
+    *(f'f0_p{p}' for p in PERCENTILES),
+    *(f'fc_p{p}' for p in PERCENTILES),
+    *(f'bw_p{p}' for p in PERCENTILES),
+    'ersb1', 'ersb2', 'ersb3',
+)
+
+# Kolumny pomocnicze: ścieżka oraz rozmiar i czas modyfikacji pliku (wykrywanie zmian)
+FILE_COLUMNS = ('path', 'size', 'mtime')
+
+DEFAULT_PARAMS = {
+    'segment_frame_size': 256,
+    'silence_threshold': 0.001,
+    'frame_length': 1024,
+    'f0_frame_length': 2048,
+    'hop_length': 512,
+    'min_f0': 50,
+    'max_f0': 500,
+    'min_confidence': 0.5,
+}
+
+OPERATORS = {
+    '<=': operator.le,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '~': lambda column, value: np.char.find(column, value) >= 0,
+}
+
+_CONDITION = re.compile(r'^\s*(\w+)\s*(<=|>=|==|!=|<|>|~)\s*(.+?)\s*$')
+
+
+def _percentiles(values, prefix):
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {f'{prefix}_p{p}': np.nan for p in PERCENTILES}
+    return {f'{prefix}_p{p}': value for p, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def summarize_session(session, params=None):
+    """
+    Statystyki podsumowujące nagrania (wiersz indeksu).
+
+    Cisza i fragmenty dźwięczne pochodzą z segmentacji sesji (maski set_speech_only), a parametry
+    widmowe i F0 liczone są tylko dla ramek z mową. Tryb analizy mowy sesji jest przywracany.
+
+    Args:
+        session: AnalysisSession (statystyki dla bieżącego widoku kanałów).
+        params: Parametry analizy (patrz DEFAULT_PARAMS).
+
+    Returns:
+        Słownik {kolumna z SUMMARY_COLUMNS: wartość}.
+    """
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    previous = session.speech_only
+    try:
+        session.set_speech_only('voiced', p['segment_frame_size'], p['silence_threshold'])
+        voiced_ratio = float(np.mean(session.speech_mask())) if session.num_samples else np.nan
+        session.set_speech_only('speech', p['segment_frame_size'], p['silence_threshold'])
+        speech = session.speech_mask()
+        silence_ratio = 1.0 - float(np.mean(speech)) if session.num_samples else np.nan
+
+        spectral = session.spectral_features(p['frame_length'], 'hamming', frame_step=p['hop_length'],
+                                             features=('fc', 'bw', 'ersb'))
+        pitch = session.pitch(p['f0_frame_length'], p['hop_length'], 'hamming', ('yin',), p['min_f0'], p['max_f0'])
+    finally:
+        session.speech_only = previous
+
+    f0 = pitch['f0_yin']
+    reliable = (f0 > 0) & (pitch['confidence_yin'] >= p['min_confidence'])
+    summary = {
+        'duration': session.duration,
+        'sample_rate': session.sample_rate,
+        'channels': session.num_channels,
+        'silence_ratio': silence_ratio,
+        'voiced_ratio': voiced_ratio,
+        **_percentiles(np.where(reliable, f0, np.nan).ravel(), 'f0'),
+        **_percentiles(spectral['fc'].ravel(), 'fc'),
+        **_percentiles(spectral['bw'].ravel(), 'bw'),
+    }
+    for name in ('ersb1', 'ersb2', 'ersb3'):
+        values = spectral[name][np.isfinite(spectral[name])]
+        summary[name] = float(np.mean(values)) if len(values) else np.nan
+    return summary
+
+
+def summarize_file(path, params=None):
+    """Statystyki pliku WAV (miks mono kanałów)."""
+    from analysis_session import AnalysisSession
+    return summarize_session(AnalysisSession.from_wav(path), params)
+
+
+class CorpusIndex:
+    """
+    Tabela statystyk plików korpusu.
+
+    Kolumny zapisanego indeksu czytane są dopiero przy pierwszym użyciu; wiersze dodane
+    (add) są dołączane do tabeli przy najbliższym odczycie kolumny lub zapisie.
+
+    Args:
+        path: Plik .npz indeksu (nie musi istnieć).
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._archive = np.load(path) if path and os.path.exists(path) else None
+        if self._archive is not None and int(self._archive['version']) > VERSION:
+            raise ValueError(f"{path}: nieobsługiwana wersja indeksu {int(self._archive['version'])}.")
+        self._columns = {}
+        self._pending = {}
+        self._rows = None
+
+    def __len__(self):
+        return len(self.column('path'))
+
+    @property
+    def column_names(self):
+        return FILE_COLUMNS + SUMMARY_COLUMNS
+
+    def column(self, name):
+        """Cała kolumna indeksu (tylko do odczytu)."""
+        if name not in self.column_names:
+            raise KeyError(f"Nieznana kolumna indeksu: {name}. Dostępne: {', '.join(self.column_names)}")
+        if self._pending:
+            self._merge()
+        if name not in self._columns:
+            self._columns[name] = self._load(name)
+        return self._columns[name]
+
+    def _load(self, name):
+        if self._archive is None:
+            return np.array([], dtype=_column_dtype(name))
+        values = self._archive[name]
+        values.flags.writeable = False
+        return values
+
+    def _merge(self):
+        # Zmienione pliki zastępują swoje wiersze, nowe są dopisywane na końcu
+        pending, self._pending = self._pending, {}
+        stored = {name: self._columns.get(name, None) for name in self.column_names}
+        stored = {name: values if values is not None else self._load(name) for name, values in stored.items()}
+        keep = ~np.isin(stored['path'], list(pending))
+        for name in self.column_names:
+            new = np.array([row[name] for row in pending.values()], dtype=_column_dtype(name))
+            values = np.concatenate((stored[name][keep].astype(new.dtype), new))
+            values.flags.writeable = False
+            self._columns[name] = values
+        self._rows = None
+
+    def row_of(self, path):
+        """Numer wiersza pliku albo None."""
+        if self._rows is None:
+            self._rows = {str(p): i for i, p in enumerate(self.column('path'))}
+        return self._rows.get(str(path))
+
+    def needs_update(self, path):
+        """Czy plik nie ma aktualnego wiersza (brak w indeksie, inny rozmiar lub czas modyfikacji)."""
+        path, size, mtime = file_signature(path)
+        if path in self._pending:
+            return False
+        row = self.row_of(path)
+        if row is None:
+            return True
+        return self.column('size')[row] != size or self.column('mtime')[row] != mtime
+
+    def add(self, path, summary):
+        """Dodaje lub zastępuje wiersz pliku (statystyki z summarize_session / summarize_file)."""
+        path, size, mtime = file_signature(path)
+        self._pending[path] = {'path': path, 'size': size, 'mtime': mtime,
+                               **{name: summary.get(name, np.nan) for name in SUMMARY_COLUMNS}}
+
+    def save(self, path=None):
+        """Zapisuje indeks (atomowo – przez plik tymczasowy)."""
+        path = path or self.path
+        columns = {name: self.column(name) for name in self.column_names}
+        temporary = path + '.tmp.npz'
+        np.savez(temporary, version=np.array(VERSION), **columns)
+        os.replace(temporary, path)
+        self.path = path
+
+    def query(self, where=(), sort=None, descending=False, limit=None):
+        """
+        Numery wierszy spełniających wszystkie warunki.
+
+        Args:
+            where: Warunki (kolumna, operator z OPERATORS, wartość) lub napisy "kolumna>=wartość";
+                porównania z NaN są fałszywe, '~' to wyszukiwanie fragmentu ścieżki.
+            sort: Kolumna sortowania (NaN na końcu).
+            descending: Sortowanie malejące.
+            limit: Największa liczba zwracanych wierszy.
+
+        Returns:
+            Tablica numerów wierszy.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for condition in where:
+            name, op, value = parse_condition(condition) if isinstance(condition, str) else condition
+            with np.errstate(invalid='ignore'):
+                mask &= OPERATORS[op](self.column(name), value)
+        rows = np.flatnonzero(mask)
+        if sort is not None:
+            keys = self.column(sort)[rows]
+            if descending and np.issubdtype(keys.dtype, np.number):
+                order = np.argsort(-keys, kind='stable')
+            else:
+                order = np.argsort(keys, kind='stable')
+                order = order[::-1] if descending else order
+            rows = rows[order]
+        return rows[:limit] if limit is not None else rows
+
+    def rows(self, rows, columns=None):
+        """Słownik {kolumna: wartości} wybranych wierszy."""
+        return {name: self.column(name)[rows] for name in (columns or self.column_names)}
+
+
+def _column_dtype(name):
+    if name == 'path':
+        return np.str_
+    if name == 'size':
+        return np.int64
+    if name == 'mtime':
+        return np.float64
+    return np.float32
+
+
+def parse_condition(text):
+    """Zamienia napis "kolumna>=wartość" na krotkę (kolumna, operator, wartość)."""
+    match = _CONDITION.match(text)
+    if match is None:
+        raise ValueError(f"Nieprawidłowy warunek: {text}")
+    name, op, value = match.groups()
+    if op != '~':
+        value = float(value)
+    return name, op, value
+
+
+def build_index(index, paths, params=None, workers=1, save_every=SAVE_EVERY, log=print):
+    """
+    Dodaje do indeksu pliki nowe i zmienione.
+
+    Args:
+        index: CorpusIndex (zapisywany co save_every plików i na końcu, jeśli ma ścieżkę).
+        paths: Ścieżki plików WAV.
+        params: Parametry analizy (patrz DEFAULT_PARAMS).
+        workers: Liczba procesów roboczych.
+
+    Returns:
+        Krotka (liczba przeanalizowanych plików, lista (ścieżka, błąd)).
+    """
+    return build_incremental(index, paths, summarize_file, params, workers, index.save if index.path else None,
+                             save_every, log)
+
+
+def _format(value):
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.4g}"
+    return str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indeks statystyk korpusu nagrań")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="Dodaje do indeksu pliki nowe i zmienione")
+    p.add_argument("index", help="Plik indeksu .npz")
+    p.add_argument("files", nargs="+", help="Pliki WAV lub katalogi")
+    p.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    p.add_argument("--silence-threshold", type=float, default=DEFAULT_PARAMS['silence_threshold'])
+
+    p = sub.add_parser("query", help="Pliki spełniające warunki")
+    p.add_argument("index", help="Plik indeksu .npz")
+    p.add_argument("--where", nargs="*", default=[], help='Warunki, np. "f0_p50>=180" "silence_ratio>0.3" "path~aba"')
+    p.add_argument("--sort", default=None, help="Kolumna sortowania")
+    p.add_argument("--desc", action="store_true", help="Sortowanie malejące")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--show", nargs="*", default=None, help="Wyświetlane kolumny (domyślnie kolumny warunków)")
+    p.add_argument("--count", action="store_true", help="Tylko liczba pasujących plików")
+
+    p = sub.add_parser("info", help="Liczba plików i zakresy kolumn")
+    p.add_argument("index", help="Plik indeksu .npz")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = CorpusIndex(args.index)
+        t0 = time.perf_counter()
+        done, errors = build_index(index, list(expand_paths(args.files)),
+                                   {'silence_threshold': args.silence_threshold}, args.workers)
+        print(f"Przeanalizowano {done} plików w {time.perf_counter() - t0:.1f} s, błędy: {len(errors)}, "
+              f"indeks: {len(index)} plików")
+        return 1 if errors else 0
+
+    if not os.path.exists(args.index):
+        parser.error(f"Brak pliku indeksu: {args.index}")
+    index = CorpusIndex(args.index)
+    if args.command == "info":
+        print(f"{args.index}: {len(index)} plików, {os.path.getsize(args.index)} B")
+        for name in SUMMARY_COLUMNS:
+            values = index.column(name)
+            finite = values[np.isfinite(values)]
+            low, high = (finite.min(), finite.max()) if len(finite) else (np.nan, np.nan)
+            print(f"  {name:<15}{_format(low):>10} – {_format(high):<10} (brak danych: {len(values) - len(finite)})")
+        return 0
+
+    t0 = time.perf_counter()
+    conditions = [parse_condition(text) for text in args.where]
+    rows = index.query(conditions, args.sort, args.desc, None if args.count else args.limit)
+    elapsed = time.perf_counter() - t0
+    if not args.count:
+        shown = args.show or list(dict.fromkeys([name for name, _, _ in conditions if name != 'path']
+                                                + ([args.sort] if args.sort else [])))
+        for values in zip(*index.rows(rows, ['path'] + shown).values()):
+            print("  ".join(_format(value) for value in values))
+    print(f"{len(rows)} plików z {len(index)} ({1000 * elapsed:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,332 @@
+"""
+Kolumnowy format plików cech ramkowych (.afeat) czytanych przez np.memmap.
+
+Układ pliku:
+  - sygnatura MAGIC (8 bajtów) i długość nagłówka (uint64 little-endian),
+  - nagłówek JSON (UTF-8) z częstotliwością próbkowania, długością ramki,
+    przesunięciem, oknem, wersją formatu i opisem kolumn,
+  - kolumny: każda to jedna ciągła tablica little-endian z osią ramek na
+    początku (dla nagrań wielokanałowych (ramki, kanały)), zaczynająca się
+    na granicy ALIGNMENT bajtów (pozycja w pliku podana w nagłówku).
+Dzięki temu pojedynczą kolumnę można odwzorować w pamięci (np.memmap) bez
+czytania pozostałych, a kolumny wielu plików skleić w jedną tablicę
+(read_columns) bez wczytywania całych plików.
+
+Kodowanie kolumn:
+  - 'raw' – typ tablicy (np. '<f4', '<f8', '<i8'),
+  - 'float16' – liczby zmiennoprzecinkowe połowicznej precyzji,
+  - 'uint8' / 'uint16' – kwantyzacja liniowa: kod = round((x - minimum) / scale),
+    największy kod oznacza NaN; błąd odczytu nie przekracza scale / 2.
+
+Eksport wsadowy (z katalogu files/):
+    python feature_file.py export nagranie1.wav nagranie2.wav --tables time spectral pitch --out cechy/
+    python feature_file.py info cechy/nagranie1_spectral.afeat
+"""
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+from pitch import ESTIMATOR_NAMES
+
+
+MAGIC = b'AFEAT\x00\x00\x00'
+VERSION = 1
+
+# Wyrównanie początku każdej kolumny w pliku (linia pamięci podręcznej – wyrównane odczyty wektorowe)
+ALIGNMENT = 64
+
+TABLES = ('time', 'spectral', 'pitch')
+
+ENCODINGS = ('raw', 'float16', 'uint8', 'uint16')
+
+
+def _little_endian(dtype):
+    dtype = np.dtype(dtype)
+    return dtype.newbyteorder('<') if dtype.byteorder not in ('|', '<') else dtype
+
+
+def _aligned(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def _encode(values, encoding):
+    # Tablica do zapisu i opis kolumny w nagłówku
+    if encoding == 'raw':
+        return values.astype(_little_endian(values.dtype), copy=False), {}
+    if encoding == 'float16':
+        return values.astype('<f2'), {}
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Nieznane kodowanie kolumny: {encoding}. Dostępne: {', '.join(ENCODINGS)}")
+    dtype = np.dtype(encoding).newbyteorder('<')
+    missing_code = np.iinfo(dtype).max
+    finite = np.isfinite(values)
+    low = float(np.min(values[finite])) if np.any(finite) else 0.0
+    high = float(np.max(values[finite])) if np.any(finite) else 0.0
+    scale = (high - low) / (missing_code - 1) if high > low else 1.0
+    codes = np.full(values.shape, missing_code, dtype=dtype)
+    codes[finite] = np.rint((values[finite] - low) / scale)
+    return codes, {'minimum': low, 'scale': scale}
+
+
+def write_feature_file(path, columns, sample_rate, hop_length, frame_length=None, window_type=None, start_frame=0,
+                       encodings=None, metadata=None):
+    """
+    Zapisuje tabelę cech w formacie kolumnowym.
+
+    Args:
+        path: Ścieżka pliku.
+        columns: Słownik {nazwa: tablica} z osią ramek na początku (ta sama liczba ramek).
+        sample_rate: Częstotliwość próbkowania.
+        hop_length: Przesunięcie między ramkami (czas ramki i = (start_frame + i) * hop / sample_rate).
+        frame_length: Długość ramki.
+        window_type: Funkcja okienkowa.
+        start_frame: Indeks pierwszej ramki (np. dla zakresu widoku).
+        encodings: Opcjonalny słownik {nazwa kolumny: kodowanie z ENCODINGS} (domyślnie 'raw').
+        metadata: Dodatkowe dane nagłówka (muszą dać się zapisać jako JSON).
+
+    Returns:
+        Nagłówek zapisanego pliku.
+    """
+    encodings = encodings or {}
+    unknown = [name for name in encodings if name not in columns]
+    if unknown:
+        raise ValueError(f"Kodowanie podano dla nieistniejących kolumn: {', '.join(unknown)}")
+    arrays = {name: np.asarray(values) for name, values in columns.items()}
+    lengths = {len(values) for values in arrays.values()}
+    if len(lengths) > 1:
+        raise ValueError("Kolumny mają różną liczbę ramek.")
+
+    encoded = {}
+    descriptions = []
+    for name, values in arrays.items():
+        data, extra = _encode(values, encodings.get(name, 'raw'))
+        encoded[name] = data
+        descriptions.append({'name': name, 'encoding': encodings.get(name, 'raw'), 'dtype': data.dtype.str,
+                             'shape': list(data.shape), 'source_dtype': values.dtype.str, **extra})
+    header = {
+        'version': VERSION,
+        'sample_rate': float(sample_rate),
+        'hop_length': int(hop_length),
+        'frame_length': None if frame_length is None else int(frame_length),
+        'window_type': window_type,
+        'start_frame': int(start_frame),
+        'num_frames': lengths.pop() if lengths else 0,
+        'metadata': metadata or {},
+        'columns': descriptions,
+    }
+
+    # Pozycje kolumn zależą od długości nagłówka, a ta od wpisanych pozycji – powtarzamy, aż nagłówek się zmieści
+    for description in descriptions:
+        description['offset'] = 0
+    data_start = _aligned(len(MAGIC) + 8 + len(json.dumps(header)))
+    while True:
+        position = data_start
+        for description in descriptions:
+            description['offset'] = position
+            position = _aligned(position + encoded[description['name']].nbytes)
+        text = json.dumps(header).encode('utf-8')
+        needed = _aligned(len(MAGIC) + 8 + len(text))
+        if needed <= data_start:
+            break
+        data_start = needed
+    text = text.ljust(data_start - len(MAGIC) - 8)
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(text)))
+        f.write(text)
+        for description in descriptions:
+            f.write(b'\x00' * (description['offset'] - f.tell()))
+            np.ascontiguousarray(encoded[description['name']]).tofile(f)
+    return header
+
+
+class FeatureFile:
+    """
+    Plik cech otwarty do odczytu; kolumny czytane są dopiero na żądanie.
+
+    Args:
+        path: Ścieżka pliku .afeat.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} nie jest plikiem cech (.afeat).")
+            length, = struct.unpack('<Q', f.read(8))
+            self.header = json.loads(f.read(length).decode('utf-8'))
+        if self.header['version'] > VERSION:
+            raise ValueError(f"{path}: nieobsługiwana wersja formatu {self.header['version']}.")
+        self.columns = {column['name']: column for column in self.header['columns']}
+
+    @property
+    def sample_rate(self):
+        return self.header['sample_rate']
+
+    @property
+    def hop_length(self):
+        return self.header['hop_length']
+
+    @property
+    def num_frames(self):
+        return self.header['num_frames']
+
+    def times(self):
+        """Czasy początków ramek [s]."""
+        return (self.header['start_frame'] + np.arange(self.num_frames)) * self.hop_length / self.sample_rate
+
+    def raw(self, name):
+        """Kolumna w zapisanej postaci (kody dla kolumn kwantowanych) odwzorowana w pamięci."""
+        column = self.columns[name]
+        shape = tuple(column['shape'])
+        if 0 in shape:
+            return np.empty(shape, dtype=column['dtype'])
+        return np.memmap(self.path, dtype=column['dtype'], mode='r', offset=column['offset'], shape=shape)
+
+    def column(self, name, dtype=None):
+        """
+        Wartości kolumny.
+
+        Kolumny 'raw' i 'float16' zwracane są jako np.memmap (bez czytania pliku), o ile nie
+        podano innego dtype; kolumny kwantowane są dekodowane do float32 (lub dtype).
+        """
+        column = self.columns[name]
+        data = self.raw(name)
+        if column['encoding'] in ('raw', 'float16'):
+            return data if dtype is None else data.astype(dtype)
+        values = (data * column['scale'] + column['minimum']).astype(dtype or np.float32)
+        values[data == np.iinfo(data.dtype).max] = np.nan
+        return values
+
+    def read(self, names=None):
+        """Słownik {nazwa: wartości} wybranych kolumn (domyślnie wszystkich)."""
+        return {name: self.column(name) for name in (names or self.columns)}
+
+
+def read_columns(paths, names, dtype=np.float32):
+    """
+    Skleja wybrane kolumny wielu plików wzdłuż osi ramek.
+
+    Tablice wyniku alokowane są raz, a z każdego pliku czytane są tylko wskazane kolumny.
+
+    Returns:
+        Krotka (słownik {nazwa: tablica}, indeksy pierwszych ramek kolejnych plików (len(paths) + 1)).
+    """
+    files = [FeatureFile(path) for path in paths]
+    offsets = np.concatenate(([0], np.cumsum([f.num_frames for f in files]))).astype(np.int64)
+    result = {}
+    for name in names:
+        trailing = {tuple(f.columns[name]['shape'][1:]) for f in files}
+        if len(trailing) > 1:
+            raise ValueError(f"Kolumna {name} ma różne kształty w sklejanych plikach.")
+        out = np.empty((int(offsets[-1]),) + (trailing.pop() if files else ()), dtype=dtype)
+        for f, start, stop in zip(files, offsets[:-1], offsets[1:]):
+            out[start:stop] = f.column(name)
+        result[name] = out
+    return result, offsets
+
+
+def feature_table(session, table, frame_length=1024, hop_length=None, window_type='hamming',
+                  estimators=ESTIMATOR_NAMES, min_f0=50, max_f0=500):
+    """
+    Tabela cech sesji gotowa do zapisu (write_feature_file).
+
+    Args:
+        session: AnalysisSession (dla ustawionego widoku – tylko ramki widoku).
+        table: 'time' (cechy czasowe, ramki bez nakładania), 'spectral' (parametry częstotliwościowe)
+            lub 'pitch' (F0 i pewność estymatorów).
+        frame_length: Długość ramki.
+        hop_length: Przesunięcie między ramkami (domyślnie pół ramki; w tabeli 'time' równe ramce).
+
+    Returns:
+        Krotka (słownik kolumn z osią ramek na początku, słownik argumentów write_feature_file).
+    """
+    if table not in TABLES:
+        raise ValueError(f"Nieznana tabela cech: {table}. Dostępne: {', '.join(TABLES)}")
+    hop_length = hop_length or frame_length // 2
+    metadata = {'table': table}
+    if table == 'time':
+        hop_length = frame_length
+        # Dane widmowe cech z rejestru (grupa 'time') liczone są z oknem Hamminga
+        window_type = 'hamming'
+        result = session.time_features(frame_length, pitch_estimators=())
+    elif table == 'spectral':
+        result = session.spectral_features(frame_length, window_type, frame_step=hop_length)
+    else:
+        result = session.pitch(frame_length, hop_length, window_type, estimators, min_f0, max_f0)
+        metadata.update(min_f0=min_f0, max_f0=max_f0)
+
+    times = result['time']
+    start_frame = int(round(times[0] * session.sample_rate / hop_length)) if len(times) else 0
+    frame_axis = session.signal.ndim - 1
+    columns = {name: np.moveaxis(values, frame_axis, 0) for name, values in result.items() if name != 'time'}
+    return columns, {'sample_rate': session.sample_rate, 'hop_length': hop_length, 'frame_length': frame_length,
+                     'window_type': window_type, 'start_frame': start_frame, 'metadata': metadata}
+
+
+def parse_encodings(items):
+    """Zamienia wpisy 'kolumna:kodowanie' na słownik."""
+    encodings = {}
+    for item in items or ():
+        name, _, encoding = item.partition(':')
+        if encoding not in ENCODINGS:
+            raise argparse.ArgumentTypeError(f"Nieprawidłowe kodowanie kolumny: {item}")
+        encodings[name] = encoding
+    return encodings
+
+
+def main(argv=None):
+    from analysis_session import AnalysisSession
+
+    parser = argparse.ArgumentParser(description="Eksport cech ramkowych do plików kolumnowych (.afeat)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="Liczy tabele cech plików WAV i zapisuje je jako .afeat")
+    p.add_argument("files", nargs="+", help="Pliki WAV")
+    p.add_argument("--tables", nargs="+", choices=TABLES, default=list(TABLES))
+    p.add_argument("--frame-length", type=int, default=1024)
+    p.add_argument("--hop", type=int, default=None, help="Przesunięcie ramek (domyślnie pół ramki)")
+    p.add_argument("--window", default="hamming")
+    p.add_argument("--all-channels", action="store_true", help="Kolumny (ramki, kanały) zamiast miksu mono")
+    p.add_argument("--encode", nargs="*", default=[], metavar="KOLUMNA:KODOWANIE",
+                   help="Kodowanie kolumn, np. fc:float16 sfm:uint8")
+    p.add_argument("--float16", action="store_true", help="Wszystkie kolumny zmiennoprzecinkowe jako float16")
+    p.add_argument("--out", default=".", help="Katalog wyników")
+
+    p = sub.add_parser("info", help="Nagłówek i kolumny pliku .afeat")
+    p.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        for path in args.files:
+            f = FeatureFile(path)
+            h = f.header
+            print(f"{path}: wersja {h['version']}, {f.num_frames} ramek, {h['sample_rate']:g} Hz, "
+                  f"ramka {h['frame_length']}, przesunięcie {h['hop_length']}, okno {h['window_type']}")
+            for column in h['columns']:
+                print(f"  {column['name']:<20}{column['encoding']:>8}{column['dtype']:>6}  {tuple(column['shape'])}")
+        return 0
+
+    encodings = parse_encodings(args.encode)
+    os.makedirs(args.out, exist_ok=True)
+    for path in args.files:
+        session = AnalysisSession.from_wav(path, keep_channels=args.all_channels)
+        name = os.path.splitext(os.path.basename(path))[0]
+        for table in args.tables:
+            columns, info = feature_table(session, table, args.frame_length, args.hop, args.window)
+            table_encodings = {column: 'float16' for column, values in columns.items()
+                               if args.float16 and np.issubdtype(values.dtype, np.floating)}
+            table_encodings.update({column: encoding for column, encoding in encodings.items()
+                                    if column in columns})
+            out_path = os.path.join(args.out, f"{name}_{table}.afeat")
+            write_feature_file(out_path, columns, encodings=table_encodings, **info)
+            print(f"{out_path}: {len(columns)} kolumn, {os.path.getsize(out_path)} B")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
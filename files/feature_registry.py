@@ -0,0 +1,264 @@
+"""
+Rejestr cech ramkowych z deklarowanymi danymi pośrednimi.
+
+Cecha deklaruje, czego potrzebuje (needs), i podaje wektorową funkcję
+liczącą ją dla całej macierzy ramek. Dostępne dane pośrednie (FrameData):
+  - 'frames' – surowe ramki (..., długość ramki),
+  - 'windowed' – ramki z oknem,
+  - 'spectrum' – widma zespolone rfft ramek z oknem,
+  - 'magnitude' – widma amplitudowe |S|,
+  - 'power' – widma mocy |S|^2,
+  - 'cepstrum' – rzeczywiste cepstrum (IFFT logarytmu |S|),
+  - 'freqs' i 'sample_rate' – oś częstotliwości widm i częstotliwość próbkowania.
+needs może też wskazywać wyniki cech zarejestrowanych wcześniej w tej samej
+grupie (np. szerokość pasma korzysta z centroidu). Silnik (compute_features)
+w jednym przebiegu liczy każdą daną pośrednią co najwyżej raz i przekazuje
+ją wszystkim cechom, które jej potrzebują.
+
+Grupy cech:
+  - 'time' – nienakładające się ramki potoku time_features (okno „Wykresy
+    cech sygnału”, okno 'hamming' dla danych widmowych),
+  - 'spectral' – ramki z oknem potoku spectral_features (okno „Wykresy
+    parametrów częstotliwościowych”).
+Zarejestrowane cechy pojawiają się automatycznie w oknach wykresów, w wynikach
+AnalysisSession.time_features / spectral_features (także w usłudze analizy)
+i w kluczach pamięci podręcznej sesji.
+
+Cechy spoza aplikacji rejestruje się przy imporcie własnego modułu:
+
+    from feature_registry import register_feature
+
+    def rolloff(power, freqs):
+        cumulative = np.cumsum(power, axis=-1)
+        return freqs[np.argmax(cumulative >= 0.85 * cumulative[..., -1:], axis=-1)]
+
+    register_feature('spectral', 'rolloff', "Rolloff 85%", ('power', 'freqs'), rolloff, ylabel='Hz')
+
+Procesy robocze (parallel.py, service.py) startują jako nowe interpretery,
+dlatego moduły z cechami podaje się też w zmiennej środowiskowej
+AUDIO_FEATURE_PLUGINS (nazwy modułów rozdzielone przecinkami) – rejestr
+importuje je przy własnym imporcie.
+"""
+from functools import cached_property
+import importlib
+import os
+
+import numpy as np
+
+import fft_backend
+from features import compute_volume, compute_ste, compute_zcr, silent_ratio_from
+from frequency_features import (
+    volume_from_power, centroid_from_magnitude, bandwidth_from_power, ersb_from_power,
+    flatness_from_power, crest_factor_from_power
+)
+from windowing import apply_window
+
+
+PLUGINS_VARIABLE = 'AUDIO_FEATURE_PLUGINS'
+
+GROUPS = ('time', 'spectral')
+
+# Nazwy danych pośrednich, które cecha może zadeklarować w needs
+INTERMEDIATES = ('frames', 'windowed', 'spectrum', 'magnitude', 'power', 'cepstrum', 'freqs', 'sample_rate')
+
+
+class FrameData:
+    """
+    Ramki i leniwie liczone dane pośrednie jednego przebiegu cech.
+
+    Args:
+        frames: Macierz ramek (..., długość ramki).
+        sample_rate: Częstotliwość próbkowania.
+        window_type: Okno stosowane przed FFT.
+        dtype: Typ rzeczywisty ramek z oknem i widm (domyślnie typ ramek).
+    """
+
+    def __init__(self, frames, sample_rate, window_type='hamming', dtype=None):
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.window_type = window_type
+        self.dtype = np.dtype(dtype or frames.dtype)
+
+    @cached_property
+    def windowed(self):
+        return apply_window(self.frames, self.window_type, self.dtype)
+
+    @cached_property
+    def spectrum(self):
+        return fft_backend.rfft(self.windowed, axis=-1)
+
+    @cached_property
+    def magnitude(self):
+        return np.abs(self.spectrum)
+
+    @cached_property
+    def power(self):
+        return self.magnitude ** 2
+
+    @cached_property
+    def cepstrum(self):
+        """Rzeczywiste cepstrum ramek (jak cepstrum_analysis.compute_cepstrum)."""
+        return fft_backend.irfft(np.log(self.magnitude + 1e-10), axis=-1)
+
+    @cached_property
+    def freqs(self):
+        return fft_backend.rfft_freqs(self.frames.shape[-1], self.sample_rate, self.dtype)
+
+
+class Feature:
+    """
+    Opis cechy w rejestrze (patrz register_feature).
+
+    Atrybuty outputs (nazwy tablic wyniku) i output_labels (etykiety legendy)
+    dla cechy o jednej tablicy to odpowiednio (name,) i {name: label}.
+    """
+
+    def __init__(self, name, label, needs, compute, outputs=None, description='', title=None, ylabel=None,
+                 color=None, default=False):
+        self.name = name
+        self.label = label
+        self.needs = tuple(needs)
+        self.compute = compute
+        self.multiple = outputs is not None
+        self.output_labels = dict(outputs) if self.multiple else {name: label}
+        self.outputs = tuple(self.output_labels)
+        self.description = description
+        self.title = title or label
+        self.ylabel = ylabel or label
+        self.color = color
+        self.default = default
+
+
+# Rejestr: grupa -> {nazwa cechy: Feature} w kolejności rejestracji (zarazem kolejności liczenia)
+FEATURES = {group: {} for group in GROUPS}
+
+# Licznik zmian rejestru – zwiększany przy każdej rejestracji (także zastąpieniu cechy)
+_version = 0
+
+
+def register_feature(group, name, label, needs, compute, outputs=None, description='', title=None, ylabel=None,
+                     color=None, default=False):
+    """
+    Rejestruje cechę ramkową (ponowna rejestracja tej samej nazwy zastępuje cechę).
+
+    Args:
+        group: 'time' lub 'spectral'.
+        name: Nazwa cechy (klucz wyniku dla cechy o jednej tablicy).
+        label: Nazwa wyświetlana (pole wyboru, legenda).
+        needs: Nazwy danych pośrednich (INTERMEDIATES) lub wyników wcześniejszych cech grupy;
+            funkcja dostaje je jako argumenty nazwane.
+        compute: Funkcja (**needs) -> tablica z jedną wartością na ramkę (kształt danych pośrednich
+            bez ostatniej osi) albo – gdy podano outputs – słownik takich tablic.
+        outputs: Opcjonalny słownik {nazwa tablicy: etykieta} dla cechy o kilku tablicach.
+        description: Opis cechy.
+        title, ylabel: Tytuł i opis osi wykresu (domyślnie label).
+        color: Kolor przebiegu na wykresie (domyślny kolor okna, gdy None).
+        default: Czy cecha jest rysowana po otwarciu okna.
+
+    Returns:
+        Obiekt Feature.
+    """
+    global _version
+    if group not in FEATURES:
+        raise ValueError(f"Nieznana grupa cech: {group}. Dostępne: {', '.join(GROUPS)}")
+    features = FEATURES[group]
+    # Cecha może korzystać tylko z cech liczonych przed nią (zastępowana cecha zachowuje swoje miejsce)
+    available = set(INTERMEDIATES)
+    for other in features.values():
+        if other.name == name:
+            break
+        available.update(other.outputs)
+    unknown = [need for need in needs if need not in available]
+    if unknown:
+        raise ValueError(f"Cecha {name} wymaga nieznanych danych: {', '.join(unknown)}")
+    feature = Feature(name, label, needs, compute, outputs, description, title, ylabel, color, default)
+    features[name] = feature
+    _version += 1
+    return feature
+
+
+def feature_names(group):
+    """Nazwy zarejestrowanych cech grupy (w kolejności liczenia)."""
+    return tuple(FEATURES[group])
+
+
+def registry_version():
+    """Numer wersji rejestru – zmienia się przy każdej rejestracji, więc nadaje się do kluczy pamięci podręcznej."""
+    return _version
+
+
+def compute_features(data, group, names=None):
+    """
+    Liczy cechy grupy w jednym przebiegu po danych pośrednich.
+
+    Args:
+        data: FrameData z ramkami przebiegu.
+        group: 'time' lub 'spectral'.
+        names: Nazwy cech do policzenia (domyślnie wszystkie zarejestrowane); cechy, od których
+            zależą, liczone są dodatkowo, ale nie trafiają do wyniku.
+
+    Returns:
+        Słownik {nazwa tablicy: tablica wartości dla ramek}.
+    """
+    features = FEATURES[group]
+    selected = list(features) if names is None else list(names)
+    unknown = [name for name in selected if name not in features]
+    if unknown:
+        raise ValueError(f"Nieznane cechy grupy {group}: {', '.join(unknown)}")
+
+    # Cechy potrzebne wybranym (przechodnio) – przegląd od końca rejestru
+    owner = {output: name for name, feature in features.items() for output in feature.outputs}
+    required = set(selected)
+    for name in reversed(list(features)):
+        if name in required:
+            required.update(owner[need] for need in features[name].needs if need in owner)
+
+    values = {}
+    for name, feature in features.items():
+        if name not in required:
+            continue
+        args = {need: values[need] if need in values else getattr(data, need) for need in feature.needs}
+        result = feature.compute(**args)
+        values.update(result if feature.multiple else {name: result})
+    return {output: values[output] for name in selected for output in features[name].outputs}
+
+
+def load_plugins(modules=None):
+    """Importuje moduły z cechami (domyślnie ze zmiennej środowiskowej AUDIO_FEATURE_PLUGINS)."""
+    if modules is None:
+        modules = os.environ.get(PLUGINS_VARIABLE, '').split(',')
+    for module in modules:
+        if module.strip():
+            importlib.import_module(module.strip())
+
+
+# ----------------------------------------------------------------------
+# Cechy wbudowane
+# ----------------------------------------------------------------------
+register_feature('time', 'volume', "Volume (RMS)", ('frames',), lambda frames: compute_volume(frames),
+                 description="Volume określa średnią głośność sygnału (RMS).", color="#4DB6AC", default=True)
+register_feature('time', 'ste', "STE", ('frames',), lambda frames: compute_ste(frames),
+                 description="Short Time Energy – rozróżnianie fragmentów dźwięcznych/bezdźwięcznych.",
+                 color="#81C784", default=True)
+register_feature('time', 'zcr', "ZCR", ('frames',), lambda frames: compute_zcr(frames),
+                 description="Zero Crossing Rate – liczba przejść przez zero.", color="#FFF176", default=True)
+register_feature('time', 'sr', "SR (Silent Ratio)", ('volume', 'zcr'), silent_ratio_from,
+                 description="1 oznacza ramkę sklasyfikowaną jako cisza.", color="#FFD54F", default=True)
+
+register_feature('spectral', 'volume', "Volume (Głośność)", ('power',), volume_from_power,
+                 ylabel='Głośność', default=True)
+register_feature('spectral', 'fc', "Centroid częstotliwościowy (FC)", ('magnitude', 'freqs'),
+                 centroid_from_magnitude, title='Centroid częstotliwościowy', ylabel='FC (Hz)', default=True)
+register_feature('spectral', 'bw', "Szerokość pasma (BW)", ('power', 'freqs', 'fc'),
+                 lambda power, freqs, fc: bandwidth_from_power(power, freqs, fc),
+                 title='Szerokość pasma', ylabel='BW (Hz)', default=True)
+register_feature('spectral', 'ersb', "Stosunki energii (ERSB)", ('power', 'freqs', 'sample_rate', 'volume'),
+                 ersb_from_power,
+                 outputs={'ersb1': 'ERSB1 (0-630 Hz)', 'ersb2': 'ERSB2 (630-1720 Hz)',
+                          'ersb3': 'ERSB3 (1720-4400 Hz)'},
+                 title='Stosunki energii w pasmach częstotliwości', ylabel='ERSB')
+register_feature('spectral', 'sfm', "Płaskość widma (SFM)", ('power',), flatness_from_power, ylabel='SFM')
+register_feature('spectral', 'scf', "Współczynnik szczytu (SCF)", ('power',), crest_factor_from_power,
+                 title='Współczynnik szczytu widma (SCF)', ylabel='SCF')
+
+load_plugins()
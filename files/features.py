@@ -1,21 +1,31 @@
 import numpy as np
 
+import fft_backend
+
+# Funkcje cech przyjmują pojedynczą ramkę lub macierz ramek (cechy liczone wzdłuż ostatniej osi)
+
 def compute_volume(frame):
-    return np.sqrt(np.mean(frame**2)) if len(frame) > 0 else 0.0
+    return np.sqrt(np.mean(frame**2, axis=-1)) if np.shape(frame)[-1] > 0 else 0.0
 
 def compute_ste(frame):
-    return np.sum(frame**2) / len(frame) if len(frame) > 0 else 0.0
+    return np.sum(frame**2, axis=-1) / np.shape(frame)[-1] if np.shape(frame)[-1] > 0 else 0.0
 
 def compute_zcr(frame):
-    if len(frame) == 0:
+    if np.shape(frame)[-1] == 0:
         return 0.0
-    zero_crossings = np.count_nonzero(np.diff(np.sign(frame)))
-    return zero_crossings / len(frame)
+    zero_crossings = np.count_nonzero(np.diff(np.sign(frame), axis=-1), axis=-1)
+    return zero_crossings / np.shape(frame)[-1]
 
 def compute_sr(frame, vol_threshold=0.01, zcr_threshold=0.1):
     vol = compute_volume(frame)
     zcr = compute_zcr(frame)
-    return 1 if (vol < vol_threshold and zcr < zcr_threshold) else 0
+    if np.ndim(frame) < 2:
+        return 1 if (vol < vol_threshold and zcr < zcr_threshold) else 0
+    return silent_ratio_from(vol, zcr, vol_threshold, zcr_threshold)
+
+def silent_ratio_from(volume, zcr, vol_threshold=0.01, zcr_threshold=0.1):
+    """SR ramek z gotowych wartości Volume i ZCR (1 – ramka ciszy)."""
+    return ((volume < vol_threshold) & (zcr < zcr_threshold)).astype(int)
 
 def compute_autocorr_f0(frame, fs, fmin=50, fmax=500):
     if len(frame) == 0:
@@ -69,3 +79,42 @@ def compute_amdf_f0(frame, fs, fmin=50, fmax=500):
     if f0 < fmin or f0 > fmax:
         return 0
     return f0
+
+
+def compute_autocorrelation_frames(frames):
+    """Autokorelacje ramek (po odjęciu średniej) dla opóźnień 0..n-1, liczone jednym wywołaniem FFT."""
+    n = frames.shape[-1]
+    frames = frames - np.mean(frames, axis=-1, keepdims=True)
+    n_fft = 1 << int(np.ceil(np.log2(2 * n)))
+    spectrum = fft_backend.rfft(frames, n_fft, axis=-1)
+    return fft_backend.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n_fft, axis=-1)[..., :n]
+
+def amdf_lag_range(length, fs, fmin=50, fmax=500):
+    """
+    Zakres opóźnień [min_lag, max_lag) przeszukiwany przez compute_amdf_f0.
+
+    Returns:
+        Krotka (min_lag, max_lag) albo None, gdy zakres jest pusty.
+    """
+    min_lag = int(fs // fmax)
+    max_lag = int(fs // fmin) if fmin != 0 else length // 2
+    if max_lag > length:
+        max_lag = length - 1
+    if min_lag < 1 or min_lag >= max_lag:
+        return None
+    return min_lag, max_lag
+
+def compute_amdf_frames(frames, min_lag, max_lag):
+    """AMDF ramek (po odjęciu średniej) dla opóźnień min_lag..max_lag-1, jednocześnie dla wszystkich ramek."""
+    length = frames.shape[-1]
+    frames = frames - np.mean(frames, axis=-1, keepdims=True)
+    amdf_values = np.empty(frames.shape[:-1] + (max_lag - min_lag,), dtype=frames.dtype)
+    for i, tau in enumerate(range(min_lag, max_lag)):
+        amdf_values[..., i] = np.mean(np.abs(frames[..., :length - tau] - frames[..., tau:]), axis=-1)
+    return amdf_values
+
+def amdf_f0_from_values(amdf_values, min_lag, fs, fmin=50, fmax=500):
+    """F0 ramek z wartości AMDF dla opóźnień od min_lag (reguła compute_amdf_f0)."""
+    best_lag = min_lag + np.argmin(amdf_values, axis=-1)
+    f0 = fs / best_lag
+    return np.where((f0 < fmin) | (f0 > fmax), 0.0, f0).astype(amdf_values.dtype)
@@ -5,11 +5,10 @@ matplotlib.use("TkAgg")
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
-from features import (
-    compute_volume, compute_ste, compute_zcr, compute_sr,
-    compute_autocorr_f0, compute_amdf_f0
-)
+from analysis_session import AnalysisSession
 from design import ColorScheme
+from feature_registry import FEATURES
+from pitch import ESTIMATORS, ESTIMATOR_NAMES
 
 def auto_frame_size(total_samples, max_frames=2000):
 
@@ -30,7 +29,7 @@ def downsample_block(x, y, max_points=2000):
     return x_ds, y_ds
 
 class FeaturesWindow:
-    def __init__(self, master, data, fs, frame_size, silence_threshold):
+    def __init__(self, master, data, fs, frame_size, silence_threshold, session=None):
         self.top = tk.Toplevel(master)
         self.top.title("Wykresy cech sygnału")
         self.top.geometry("1000x800")
@@ -45,43 +44,34 @@ class FeaturesWindow:
 
         self.data = data
         self.fs = fs
+        self.session = session if session is not None else AnalysisSession(data, fs)
 
         # Automatyczne dobranie rozmiaru ramki – dla długich nagrań zwiększamy ją, aby liczba ramek nie była zbyt duża.
         candidate = auto_frame_size(len(data))
         self.frame_size = min(candidate, frame_size)  # wybieramy większą z tych wartości
         self.silence_threshold = silence_threshold
 
-        # Dzielimy sygnał na ramki i obliczamy cechy
-        self.frames, self.times = self.frame_signal(data, fs, self.frame_size)
-        self.volume = np.array([compute_volume(f) for f in self.frames])
-        self.ste = np.array([compute_ste(f) for f in self.frames])
-        self.zcr = np.array([compute_zcr(f) for f in self.frames])
-        self.sr = np.array([compute_sr(f) for f in self.frames])
-        self.f0_autocorr = np.array([compute_autocorr_f0(f, fs) for f in self.frames])
-        self.f0_amdf = np.array([compute_amdf_f0(f, fs) for f in self.frames])
-
-        # Przechowujemy cechy
-        self.features_info = {
-            "Volume (RMS)": (
-                self.volume,
-                "Volume określa średnią głośność sygnału (RMS).",
-                "#4DB6AC"
-            ),
-            "STE": (
-                self.ste,
-                "Short Time Energy – rozróżnianie fragmentów dźwięcznych/bezdźwięcznych.",
-                "#81C784"
-            ),
-            "ZCR": (
-                self.zcr,
-                "Zero Crossing Rate – liczba przejść przez zero.",
-                "#FFF176"
-            ),
-            "SR (Silent Ratio)": (
-                self.sr,
-                "1 oznacza ramkę sklasyfikowaną jako cisza.",
-                "#FFD54F"
-            ),
+        # Cechy wszystkich ramek liczy sesja analizy (wszystkie estymatory F0 na tych samych ramkach)
+        features = self.session.time_features(self.frame_size, pitch_estimators=ESTIMATOR_NAMES)
+        self.times = features['time']
+        self.volume = features['volume']
+        self.ste = features['ste']
+        self.zcr = features['zcr']
+        self.sr = features['sr']
+        self.f0_autocorr = features['f0_autocorr']
+        self.f0_amdf = features['f0_amdf']
+        self.f0_tracks = {ESTIMATORS[name][0]: features[f'f0_{name}'] for name in ESTIMATOR_NAMES}
+
+        # Przechowujemy cechy: najpierw cechy z rejestru (grupa 'time'), potem estymatory F0
+        self.features_info = {}
+        for feature in FEATURES['time'].values():
+            if feature.multiple:
+                # Cecha o kilku tablicach – przebiegi na wspólnym wykresie
+                data_array = {label: features[key] for key, label in feature.output_labels.items()}
+            else:
+                data_array = features[feature.name]
+            self.features_info[feature.label] = (data_array, feature.description, feature.color)
+        self.features_info.update({
             "F0 (Autocorr)": (
                 self.f0_autocorr,
                 "Częstotliwość podstawowa - metoda autokorelacji.",
@@ -92,7 +82,30 @@ class FeaturesWindow:
                 "Częstotliwość podstawowa - metoda AMDF.",
                 "#FF8A65"
             ),
-        }
+            "F0 (Cepstrum)": (
+                features['f0_cepstrum'],
+                "Częstotliwość podstawowa - metoda cepstralna.",
+                "#7986CB"
+            ),
+            "F0 (YIN)": (
+                features['f0_yin'],
+                "Częstotliwość podstawowa - skumulowana znormalizowana funkcja różnicowa (YIN).",
+                "#4FC3F7"
+            ),
+            "F0 (HPS)": (
+                features['f0_hps'],
+                "Częstotliwość podstawowa - iloczyn widm harmonicznych.",
+                "#A1887F"
+            ),
+            "Porównanie F0": (
+                self.f0_tracks,
+                "Przebiegi F0 wszystkich estymatorów na wspólnym wykresie.",
+                None
+            ),
+        })
+        # Domyślnie rysujemy cechy podstawowe, pozostałe estymatory F0 włącza się na liście
+        default_features = [feature.label for feature in FEATURES['time'].values() if feature.default]
+        default_features += ["F0 (Autocorr)", "F0 (AMDF)"]
 
         # Panel wyboru cech
         self.select_frame = tk.Frame(self.main_frame, bg=self.main_bg_color)
@@ -108,7 +121,7 @@ class FeaturesWindow:
 
         self.feature_vars = {}
         for feat_name in self.features_info.keys():
-            var = tk.BooleanVar(value=True)
+            var = tk.BooleanVar(value=feat_name in default_features)
             cb = tk.Checkbutton(
                 self.select_frame,
                 text=feat_name,
@@ -140,21 +153,6 @@ class FeaturesWindow:
         # Rysujemy wykresy przy starcie
         self.draw_selected_features()
 
-    def frame_signal(self, data, fs, frame_size):
-        total_samples = len(data)
-        num_frames = int(np.ceil(total_samples / frame_size))
-        frames = []
-        times = []
-        for i in range(num_frames):
-            start = i * frame_size
-            end = start + frame_size
-            frame = data[start:end]
-            if len(frame) < frame_size:
-                frame = np.pad(frame, (0, frame_size - len(frame)), mode='constant')
-            frames.append(frame)
-            times.append(start / fs)
-        return frames, np.array(times)
-
     def draw_selected_features(self):
         selected_features = [name for name, var in self.feature_vars.items() if var.get()]
 
@@ -186,9 +184,16 @@ class FeaturesWindow:
         for i, feat_name in enumerate(selected_features, start=1):
             ax = self.fig.add_subplot(rows, cols, i)
             data_array, description, color_line = self.features_info[feat_name]
-            # Używamy funkcji downsample_block, by zredukować liczbę punktów
-            x_plot, y_plot = downsample_block(self.times, data_array, max_points=2000)
-            ax.plot(x_plot, y_plot, linewidth=1.0, color=color_line, rasterized=True)
+            if isinstance(data_array, dict):
+                # Kilka przebiegów na jednej osi (porównanie estymatorów)
+                for label, track in data_array.items():
+                    x_plot, y_plot = downsample_block(self.times, track, max_points=2000)
+                    ax.plot(x_plot, y_plot, linewidth=1.0, label=label, rasterized=True)
+                ax.legend(fontsize=8)
+            else:
+                # Używamy funkcji downsample_block, by zredukować liczbę punktów
+                x_plot, y_plot = downsample_block(self.times, data_array, max_points=2000)
+                ax.plot(x_plot, y_plot, linewidth=1.0, color=color_line, rasterized=True)
             ax.set_title(feat_name, fontsize=10, fontweight="bold", color="#2E7D32")
             ax.set_xlabel("Czas [s]", fontsize=9)
             ax.set_ylabel(feat_name, fontsize=9)
@@ -209,5 +214,7 @@ class FeaturesWindow:
             return (2, 2)
         elif n <= 6:
             return (2, 3)
+        elif n <= 9:
+            return (3, 3)
         else:
-            return (2, 3)
+            return (int(np.ceil(n / 4)), 4)
@@ -0,0 +1,273 @@
+"""
+Wspólny punkt wywołań FFT dla modułów analizy.
+
+Backend 'numpy' (domyślny) korzysta z np.fft. Backend 'scipy' korzysta ze
+scipy.fft, który liczy transformaty wielu ramek w kilku wątkach (workers).
+Opcja fast_len dopełnia ramki zerami do najbliższej "szybkiej" długości
+(scipy.fft.next_fast_len) – pomaga, gdy długość ramki jest np. liczbą
+pierwszą. Widmo ma wtedy fft_size(n) // 2 + 1 binów, dlatego oś częstotliwości
+należy zawsze wyznaczać przez rfft_freqs(n, ...), a nie z długości ramki.
+
+autotune() mierzy na bieżącej maszynie czasy dla typowych długości ramek
+i zapamiętuje dla każdej z nich najszybszy backend i liczbę wątków – osobno
+bez dopełnienia i z dopełnieniem (wtedy także najszybszą długość FFT).
+save_tuning / load_tuning zapisują wynik w pliku JSON.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+
+BACKENDS = ('numpy', 'scipy')
+
+# Długości ramek strojone domyślnie przez autotune()
+COMMON_FRAME_SIZES = (256, 512, 1000, 1024, 2000, 2048, 4096)
+
+# Domyślny plik z wynikami strojenia (w katalogu domowym użytkownika)
+TUNING_FILE = os.path.join(os.path.expanduser("~"), ".audio_analysis_fft.json")
+
+_config = {'backend': 'numpy', 'workers': 1, 'fast_len': False}
+# Wyniki strojenia: długość ramki -> ((backend, workers), (backend, workers, długość FFT z dopełnieniem))
+_tuning = {}
+
+
+def configure(backend=None, workers=None, fast_len=None, tuning=None):
+    """
+    Zmienia ustawienia FFT (parametry None pozostają bez zmian).
+
+    Args:
+        backend: 'numpy' lub 'scipy'.
+        workers: Liczba wątków scipy.fft (-1 – wszystkie rdzenie).
+        fast_len: Czy dopełniać ramki zerami do szybkiej długości FFT.
+        tuning: Słownik {długość ramki: ((backend, workers), (backend, workers, długość FFT))}
+            z autotune() – plan bez dopełnienia i z dopełnieniem.
+    """
+    if backend is not None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Nieznany backend FFT: {backend}. Dostępne: {', '.join(BACKENDS)}")
+        _config['backend'] = backend
+    if workers is not None:
+        _config['workers'] = int(workers)
+    if fast_len is not None:
+        _config['fast_len'] = bool(fast_len)
+    if tuning is not None:
+        _tuning.clear()
+        _tuning.update({
+            int(n): ((plain[0], int(plain[1])), (padded[0], int(padded[1]), int(padded[2])))
+            for n, (plain, padded) in tuning.items()
+        })
+
+
+def get_config():
+    """Bieżące ustawienia w postaci argumentów configure()."""
+    return {**_config, 'tuning': dict(_tuning)}
+
+
+def result_key():
+    """
+    Część ustawień wpływająca na wyniki (długości FFT) – do kluczy pamięci podręcznej.
+
+    Backend i liczba wątków zmieniają tylko czas obliczeń.
+    """
+    if not _config['fast_len']:
+        return (False,)
+    return (True,) + tuple(sorted((n, padded[2]) for n, (_, padded) in _tuning.items()))
+
+
+def next_fast_len(n):
+    """Najmniejsza długość >= n, dla której FFT rzeczywiste jest szybkie."""
+    import scipy.fft
+    return scipy.fft.next_fast_len(int(n), real=True)
+
+
+def fft_size(n):
+    """
+    Długość FFT używana dla ramek o długości n.
+
+    Returns:
+        n albo – przy włączonym fast_len – dobrana szybka długość (ze strojenia lub next_fast_len).
+    """
+    if not _config['fast_len']:
+        return n
+    if n in _tuning:
+        return _tuning[n][1][2]
+    return next_fast_len(n)
+
+
+def _plan(n):
+    # Backend i liczba wątków dla ramek długości n
+    if n in _tuning:
+        plain, padded = _tuning[n]
+        return padded[:2] if _config['fast_len'] else plain
+    return _config['backend'], _config['workers']
+
+
+def rfft(x, n=None, axis=-1):
+    """
+    FFT rzeczywiste wzdłuż osi axis.
+
+    Args:
+        x: Ramka lub macierz ramek.
+        n: Długość FFT; domyślnie fft_size(długość ramki).
+        axis: Oś ramki.
+
+    Returns:
+        Widmo zespolone (complex64 dla wejścia float32).
+    """
+    length = np.shape(x)[axis]
+    if n is None:
+        n = fft_size(length)
+    backend, workers = _plan(length)
+    if backend == 'scipy':
+        import scipy.fft
+        return scipy.fft.rfft(x, n, axis=axis, workers=workers)
+    return np.fft.rfft(x, n, axis=axis)
+
+
+def irfft(x, n=None, axis=-1):
+    """
+    Odwrotne FFT rzeczywiste wzdłuż osi axis.
+
+    Args:
+        x: Widmo lub macierz widm.
+        n: Długość wyniku; domyślnie 2 * (liczba binów - 1).
+        axis: Oś binów.
+    """
+    if n is None:
+        n = 2 * (np.shape(x)[axis] - 1)
+    backend, workers = _plan(n)
+    if backend == 'scipy':
+        import scipy.fft
+        return scipy.fft.irfft(x, n, axis=axis, workers=workers)
+    return np.fft.irfft(x, n, axis=axis)
+
+
+def fft(x, n, axis=-1):
+    """Zespolone FFT o długości n wzdłuż osi axis (bez dopełniania fast_len – n podaje wywołujący)."""
+    backend, workers = _plan(n)
+    if backend == 'scipy':
+        import scipy.fft
+        return scipy.fft.fft(x, n, axis=axis, workers=workers)
+    return np.fft.fft(x, n, axis=axis)
+
+
+def ifft(x, n, axis=-1):
+    """Odwrotne zespolone FFT o długości n wzdłuż osi axis."""
+    backend, workers = _plan(n)
+    if backend == 'scipy':
+        import scipy.fft
+        return scipy.fft.ifft(x, n, axis=axis, workers=workers)
+    return np.fft.ifft(x, n, axis=axis)
+
+
+def rfft_freqs(n, sample_rate, dtype=None):
+    """
+    Oś częstotliwości widma rfft() ramek o długości n (uwzględnia dopełnienie fast_len).
+
+    Args:
+        n: Długość ramki.
+        sample_rate: Częstotliwość próbkowania.
+        dtype: Typ wyniku (domyślnie float64).
+    """
+    freqs = np.fft.rfftfreq(fft_size(n), d=1 / sample_rate)
+    return freqs if dtype is None else freqs.astype(dtype)
+
+
+def _time_rfft(frames, backend, workers, n_fft, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        if backend == 'scipy':
+            import scipy.fft
+            scipy.fft.rfft(frames, n_fft, axis=-1, workers=workers)
+        else:
+            np.fft.rfft(frames, n_fft, axis=-1)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def autotune(frame_sizes=COMMON_FRAME_SIZES, worker_counts=None, allow_padding=True, samples=1 << 18,
+             repeat=5, apply=True):
+    """
+    Mierzy czas FFT macierzy ramek i dobiera najszybsze ustawienia dla każdej długości ramki.
+
+    Args:
+        frame_sizes: Długości ramek do strojenia.
+        worker_counts: Sprawdzane liczby wątków scipy.fft (domyślnie 1, 2, 4, ... do liczby rdzeni).
+        allow_padding: Czy rozważać dopełnienie do next_fast_len i do potęgi dwójki.
+        samples: Łączna liczba próbek w mierzonej macierzy ramek.
+        repeat: Liczba powtórzeń pomiaru (bierzemy najkrótszy czas).
+        apply: Czy od razu zastosować wynik (configure(tuning=...)).
+
+    Returns:
+        Krotka (strojenie {długość ramki: ((backend, workers), (backend, workers, długość FFT))},
+        czasy {długość ramki: {(backend, workers, długość FFT): czas w sekundach}}).
+    """
+    cpus = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = sorted({1, cpus} | {2 ** k for k in range(1, 6) if 2 ** k < cpus})
+    rng = np.random.default_rng(0)
+
+    tuning = {}
+    timings = {}
+    for n in frame_sizes:
+        lengths = {n}
+        if allow_padding:
+            lengths |= {next_fast_len(n), 1 << int(np.ceil(np.log2(n)))}
+        frames = rng.standard_normal((max(1, samples // n), n))
+        candidates = [('numpy', 1)] + [('scipy', workers) for workers in worker_counts]
+        timings[n] = {
+            (backend, workers, n_fft): _time_rfft(frames, backend, workers, n_fft, repeat)
+            for backend, workers in candidates for n_fft in sorted(lengths)
+        }
+        plain = min((plan for plan in timings[n] if plan[2] == n), key=timings[n].get)
+        tuning[n] = (plain[:2], min(timings[n], key=timings[n].get))
+    if apply:
+        configure(tuning=tuning)
+    return tuning, timings
+
+
+def save_tuning(path=TUNING_FILE):
+    """Zapisuje wynik strojenia do pliku JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({str(n): [list(plain), list(padded)] for n, (plain, padded) in _tuning.items()}, f, indent=1)
+
+
+def _parse_tuning(data):
+    # Sprawdza układ pliku strojenia: {"długość ramki": [[backend, workers], [backend, workers, długość FFT]]}
+    if not isinstance(data, dict):
+        raise ValueError("Plik strojenia FFT musi zawierać obiekt JSON")
+    tuning = {}
+    for n, entry in data.items():
+        try:
+            (plain_backend, plain_workers), (padded_backend, padded_workers, n_fft) = entry
+            frame_length = int(n)
+            plans = ((plain_backend, int(plain_workers)), (padded_backend, int(padded_workers), int(n_fft)))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Niepoprawny wpis strojenia FFT dla ramki {n}: {entry!r}") from e
+        if plain_backend not in BACKENDS or padded_backend not in BACKENDS:
+            raise ValueError(f"Nieznany backend FFT w strojeniu ramki {n}: {entry!r}")
+        if frame_length < 1 or plans[1][2] < frame_length:
+            raise ValueError(f"Niepoprawna długość FFT w strojeniu ramki {n}: {entry!r}")
+        tuning[frame_length] = plans
+    return tuning
+
+
+def load_tuning(path=TUNING_FILE):
+    """
+    Wczytuje wynik strojenia zapisany przez save_tuning().
+
+    Returns:
+        True, jeśli plik istniał i został wczytany.
+
+    Raises:
+        OSError: Nie udało się odczytać pliku.
+        ValueError: Plik nie jest poprawnym JSON-em albo ma inny układ niż zapisywany przez save_tuning().
+    """
+    if not os.path.exists(path):
+        return False
+    with open(path, encoding="utf-8") as f:
+        configure(tuning=_parse_tuning(json.load(f)))
+    return True
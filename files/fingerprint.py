@@ -0,0 +1,474 @@
+"""
+Odciski widmowe nagrań i indeks odwrotny do wyszukiwania duplikatów.
+
+Odcisk powstaje ze STFT sesji analizy (AnalysisSession.stft) liczonego po
+przepróbkowaniu do wspólnej częstotliwości (DEFAULT_PARAMS['sample_rate']):
+  - konstelacja – lokalne maksima widma amplitudowego (w dB względem
+    maksimum nagrania), najwyżej kilka najsilniejszych na ramkę,
+  - hasze – pary punktu kotwicy z kilkoma kolejnymi punktami strefy
+    docelowej: (bin kotwicy, bin celu, odstęp w ramkach) w 24 bitach,
+    zapisywane razem z numerem ramki kotwicy.
+Odcisk nie zależy od wzmocnienia ani częstotliwości próbkowania nagrania
+i znosi szum oraz wycinanie fragmentów.
+
+Indeks to katalog z posortowaną tablicą haszy i równoległymi tablicami
+numerów plików i ramek (.npy, odwzorowywane w pamięci) oraz opisem plików
+(files.npz). Zapytanie wyszukuje hasze fragmentu binarnie (np.searchsorted),
+więc jego koszt rośnie z logarytmem rozmiaru indeksu, a nie z liczbą plików.
+Plik pasuje, gdy wiele wspólnych haszy ma to samo przesunięcie w czasie
+(głosowanie w histogramie przesunięć).
+
+Uruchomienie (z katalogu files/):
+    python fingerprint.py build odciski/ ../audio_files --workers 4
+    python fingerprint.py query odciski/ fragment.wav [--start 1.0 --stop 4.0]
+    python fingerprint.py duplicates odciski/ [--min-ratio 0.05]
+    python fingerprint.py info odciski/
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from incremental_index import SAVE_EVERY, build_incremental, expand_paths, file_signature
+
+
+VERSION = 1
+
+DEFAULT_PARAMS = {
+    'sample_rate': 8000,
+    'frame_length': 512,
+    'hop_length': 128,
+    'window_type': 'hann',
+    # Otoczenie lokalnego maksimum: ramki × biny
+    'neighborhood': (9, 15),
+    'peaks_per_frame': 5,
+    # Punkty słabsze od maksimum nagrania o więcej niż range_db są pomijane
+    'range_db': 60.0,
+    # Strefa docelowa: najwyżej fan_out par na kotwicę, odstęp 1..max_dt ramek, różnica binów do max_df
+    'fan_out': 10,
+    'max_dt': 63,
+    'max_df': 128,
+}
+
+# Parametry, które muszą być takie same przy budowie indeksu i zapytaniu
+_HASH_PARAMS = ('sample_rate', 'frame_length', 'hop_length', 'window_type', 'neighborhood', 'peaks_per_frame',
+                'range_db', 'fan_out', 'max_dt', 'max_df')
+
+FREQ_BITS = 9
+DT_BITS = 6
+
+# Hasze występujące w większej liczbie miejsc są pomijane przy zapytaniu (nic nie rozróżniają)
+MAX_POSTINGS = 5000
+
+_ARRAYS = ('hashes', 'file_ids', 'times')
+
+
+def _max_filter(values, size, axis):
+    # Maksimum w oknie o długości size (wyśrodkowanym) wzdłuż osi
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (size // 2, size - 1 - size // 2)
+    padded = np.pad(values, pad, constant_values=-np.inf)
+    return np.lib.stride_tricks.sliding_window_view(padded, size, axis=axis).max(axis=-1)
+
+
+def constellation(magnitude, params=None):
+    """
+    Punkty konstelacji: lokalne maksima widma.
+
+    Args:
+        magnitude: Widma amplitudowe ramek (ramki, biny).
+        params: Parametry odcisku (patrz DEFAULT_PARAMS).
+
+    Returns:
+        Krotka (numery ramek, numery binów) punktów posortowanych po czasie i częstotliwości.
+    """
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    if magnitude.size == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    level = 20 * np.log10(np.maximum(magnitude, 1e-10))
+    level[:, 0] = -np.inf  # składowa stała nie niesie informacji o treści
+    time_size, freq_size = p['neighborhood']
+    local_max = _max_filter(_max_filter(level, time_size, 0), freq_size, 1)
+    candidates = (level == local_max) & (level > level.max() - p['range_db'])
+
+    # Najsilniejsze punkty każdej ramki
+    ranked = np.where(candidates, level, -np.inf)
+    keep = min(p['peaks_per_frame'], ranked.shape[1])
+    strongest = np.argpartition(-ranked, keep - 1, axis=1)[:, :keep]
+    selected = np.zeros_like(candidates)
+    np.put_along_axis(selected, strongest, True, axis=1)
+    frames, bins = np.nonzero(selected & candidates)
+    return frames, bins
+
+
+def peak_pairs(frames, bins, params=None):
+    """
+    Hasze par punktów konstelacji.
+
+    Args:
+        frames, bins: Punkty konstelacji posortowane po czasie (constellation).
+        params: Parametry odcisku (patrz DEFAULT_PARAMS).
+
+    Returns:
+        Krotka (hasze uint32, ramki kotwic uint32).
+    """
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    hashes, anchors = [], []
+    taken = np.zeros(len(frames), dtype=np.int64)
+    # Kolejne punkty po kotwicy; przegląd kończy się, gdy żaden nie mieści się już w strefie czasu
+    for step in range(1, len(frames)):
+        anchor = np.arange(len(frames) - step)
+        target = anchor + step
+        dt = frames[target] - frames[anchor]
+        if not np.any(dt <= p['max_dt']):
+            break
+        valid = ((dt >= 1) & (dt <= p['max_dt']) & (np.abs(bins[target] - bins[anchor]) <= p['max_df'])
+                 & (taken[anchor] < p['fan_out']))
+        anchor, target = anchor[valid], target[valid]
+        taken[anchor] += 1
+        hashes.append((bins[anchor].astype(np.uint32) << (FREQ_BITS + DT_BITS))
+                      | (bins[target].astype(np.uint32) << DT_BITS)
+                      | (frames[target] - frames[anchor]).astype(np.uint32))
+        anchors.append(frames[anchor].astype(np.uint32))
+    if not hashes:
+        return np.array([], dtype=np.uint32), np.array([], dtype=np.uint32)
+    return np.concatenate(hashes), np.concatenate(anchors)
+
+
+def fingerprint_session(session, params=None):
+    """
+    Odcisk bieżącego widoku sesji (miks kanałów, zakres set_view).
+
+    Częstotliwość analizy i tryb analizy mowy sesji są przywracane po obliczeniu.
+
+    Returns:
+        Krotka (hasze uint32, ramki kotwic uint32).
+    """
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    if p['frame_length'] // 2 >= 2 ** FREQ_BITS or p['max_dt'] >= 2 ** DT_BITS:
+        raise ValueError("Długość ramki lub max_dt nie mieszczą się w haszu.")
+    rate, speech_only = session.sample_rate, session.speech_only
+    try:
+        session.speech_only = None
+        session.set_analysis_rate(p['sample_rate'])
+        magnitude = np.abs(session.stft(p['frame_length'], p['hop_length'], p['window_type']))
+    finally:
+        session.set_analysis_rate(rate)
+        session.speech_only = speech_only
+    if magnitude.ndim == 3:
+        # Widok wszystkich kanałów – wspólny odcisk z widm średnich
+        magnitude = magnitude.mean(axis=0)
+    # Ostatni bin (Nyquist) nie mieści się w haszu
+    return peak_pairs(*constellation(magnitude[:, :2 ** FREQ_BITS - 1], p), p)
+
+
+def fingerprint_file(path, params=None, view=None):
+    """
+    Odcisk pliku WAV (miks mono kanałów, opcjonalnie zakres (start, koniec) w sekundach).
+
+    Returns:
+        Krotka (hasze uint32, ramki kotwic uint32, czas trwania nagrania [s]).
+    """
+    from analysis_session import AnalysisSession
+    session = AnalysisSession.from_wav(path)
+    session.set_view(view)
+    return (*fingerprint_session(session, params), session.duration)
+
+
+def _ranges(starts, stops):
+    # Indeksy wszystkich elementów przedziałów [start, stop) w jednej tablicy
+    lengths = stops - starts
+    offsets = np.repeat(stops - np.cumsum(lengths), lengths)
+    return np.arange(lengths.sum()) + offsets
+
+
+class FingerprintIndex:
+    """
+    Indeks odwrotny haszy odcisków.
+
+    Tablice haszy, plików i ramek zapisanego indeksu są odwzorowywane w pamięci
+    (np.load(mmap_mode='r')); pliki dodane (add) są dołączane do tablic przy
+    zapisie lub najbliższym zapytaniu.
+
+    Args:
+        directory: Katalog indeksu (nie musi istnieć).
+        params: Parametry odcisku nowego indeksu (istniejący indeks używa zapisanych).
+    """
+
+    def __init__(self, directory, params=None):
+        self.directory = directory
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.paths, self.sizes, self.mtimes, self.durations = [], [], [], []
+        self._arrays = {name: np.array([], dtype=np.uint32) for name in _ARRAYS}
+        self._pending = {}
+        meta_path = os.path.join(directory, 'files.npz')
+        if os.path.exists(meta_path):
+            with np.load(meta_path) as meta:
+                if int(meta['version']) > VERSION:
+                    raise ValueError(f"{directory}: nieobsługiwana wersja indeksu {int(meta['version'])}.")
+                self.params = {**DEFAULT_PARAMS, **json.loads(str(meta['params']))}
+                self.params['neighborhood'] = tuple(self.params['neighborhood'])
+                self.paths = [str(path) for path in meta['path']]
+                self.sizes, self.mtimes, self.durations = (meta[name].tolist()
+                                                           for name in ('size', 'mtime', 'duration'))
+            self._arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+                            for name in _ARRAYS}
+        self._rows = {path: i for i, path in enumerate(self.paths)}
+
+    def __len__(self):
+        return len(self.paths)
+
+    @property
+    def num_hashes(self):
+        self._merge()
+        return len(self._arrays['hashes'])
+
+    def size_bytes(self):
+        """Rozmiar zapisanego indeksu na dysku [B]."""
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory))
+
+    def needs_update(self, path):
+        """Czy plik nie ma aktualnego odcisku (brak w indeksie, inny rozmiar lub czas modyfikacji)."""
+        path, size, mtime = file_signature(path)
+        if path in self._pending:
+            return False
+        row = self._rows.get(path)
+        if row is None:
+            return True
+        return self.sizes[row] != size or self.mtimes[row] != mtime
+
+    def add(self, path, fingerprint):
+        """Dodaje lub zastępuje odcisk pliku (wynik fingerprint_file)."""
+        hashes, times, duration = fingerprint
+        path, size, mtime = file_signature(path)
+        row = self._rows.get(path)
+        if row is None:
+            row = len(self.paths)
+            self._rows[path] = row
+            self.paths.append(path)
+            self.sizes.append(0)
+            self.mtimes.append(0.0)
+            self.durations.append(0.0)
+        self.sizes[row], self.mtimes[row], self.durations[row] = size, mtime, duration
+        self._pending[path] = (row, hashes, times)
+
+    def _merge(self):
+        # Scalanie posortowanych tablic z nowymi haszami (liniowo); odciski zmienionych plików są zastępowane
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        rows = np.array([row for row, _, _ in pending.values()], dtype=np.uint32)
+        arrays = self._arrays
+        if len(arrays['hashes']):
+            keep = ~np.isin(arrays['file_ids'], rows)
+            arrays = {name: np.asarray(values)[keep] for name, values in arrays.items()}
+        new = {
+            'hashes': np.concatenate([hashes for _, hashes, _ in pending.values()]),
+            'file_ids': np.concatenate([np.full(len(hashes), row, dtype=np.uint32)
+                                        for row, hashes, _ in pending.values()]),
+            'times': np.concatenate([times for _, _, times in pending.values()]),
+        }
+        order = np.argsort(new['hashes'], kind='stable')
+        new = {name: values[order].astype(np.uint32) for name, values in new.items()}
+        positions = np.searchsorted(arrays['hashes'], new['hashes'], side='right') + np.arange(len(order))
+        is_new = np.zeros(len(arrays['hashes']) + len(order), dtype=bool)
+        is_new[positions] = True
+        merged = {}
+        for name in _ARRAYS:
+            values = np.empty(len(is_new), dtype=np.uint32)
+            values[is_new] = new[name]
+            values[~is_new] = arrays[name]
+            merged[name] = values
+        self._arrays = merged
+
+    def save(self):
+        """Zapisuje indeks (tablice przez pliki tymczasowe, opis plików na końcu)."""
+        self._merge()
+        os.makedirs(self.directory, exist_ok=True)
+        params = {name: self.params[name] for name in _HASH_PARAMS}
+        written = []
+        for name in _ARRAYS:
+            temporary = os.path.join(self.directory, name + '.tmp.npy')
+            np.save(temporary, np.asarray(self._arrays[name]))
+            written.append((temporary, os.path.join(self.directory, name + '.npy')))
+        temporary = os.path.join(self.directory, 'files.tmp.npz')
+        np.savez(temporary, version=np.array(VERSION), params=np.array(json.dumps(params)),
+                 path=np.array(self.paths, dtype=np.str_), size=np.array(self.sizes, dtype=np.int64),
+                 mtime=np.array(self.mtimes, dtype=np.float64), duration=np.array(self.durations, dtype=np.float64))
+        written.append((temporary, os.path.join(self.directory, 'files.npz')))
+        # Zamiana odwzorowanych tablic na nowe pliki – stare odwzorowania zostają ważne do zwolnienia
+        self._arrays = {name: np.asarray(values) for name, values in self._arrays.items()}
+        for temporary, path in written:
+            os.replace(temporary, path)
+
+    def query(self, hashes, times, min_matches=5, min_ratio=0.01, top=10, exclude=None):
+        """
+        Pliki zawierające fragment o podanym odcisku.
+
+        Args:
+            hashes, times: Odcisk fragmentu (fingerprint_session / fingerprint_file).
+            min_matches: Najmniejsza liczba haszy zgodnych w czasie.
+            min_ratio: Najmniejszy udział zgodnych haszy fragmentu; przypadkowe zgodności rosną
+                z długością fragmentu i rozmiarem indeksu, prawdziwe – z długością fragmentu.
+            top: Największa liczba zwracanych plików.
+            exclude: Numer pliku pomijanego w wyniku (wyszukiwanie duplikatów pliku z indeksu).
+
+        Returns:
+            Lista słowników {'path', 'file', 'matches', 'ratio', 'offset'} od najlepszego dopasowania;
+            offset to początek fragmentu w pliku [s], ratio – udział zgodnych haszy fragmentu.
+        """
+        self._merge()
+        index = self._arrays['hashes']
+        starts = np.searchsorted(index, hashes, side='left')
+        stops = np.searchsorted(index, hashes, side='right')
+        common = (stops > starts) & (stops - starts <= MAX_POSTINGS)
+        positions = _ranges(starts[common], stops[common])
+        if len(positions) == 0:
+            return []
+        file_ids = np.asarray(self._arrays['file_ids'][positions], dtype=np.int64)
+        deltas = (np.asarray(self._arrays['times'][positions], dtype=np.int64)
+                  - np.repeat(times[common].astype(np.int64), (stops - starts)[common]))
+        if exclude is not None:
+            file_ids, deltas = file_ids[file_ids != exclude], deltas[file_ids != exclude]
+
+        # Histogram przesunięć każdego pliku; sąsiednie przesunięcia łączone (siatka ramek fragmentu)
+        keys, counts = np.unique((file_ids << 32) + (deltas + 2 ** 31), return_counts=True)
+        following = np.searchsorted(keys, keys + 1)
+        following = np.minimum(following, len(keys) - 1)
+        scores = counts + np.where(keys[following] == keys + 1, counts[following], 0)
+        order = np.lexsort((-scores, keys >> 32))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (keys[order][1:] >> 32) != (keys[order][:-1] >> 32)
+        best = order[first]
+        best = best[(scores[best] >= min_matches) & (scores[best] >= min_ratio * len(hashes))]
+        best = best[np.argsort(-scores[best], kind='stable')][:top]
+
+        hop_seconds = self.params['hop_length'] / self.params['sample_rate']
+        return [{
+            'path': self.paths[int(keys[i] >> 32)],
+            'file': int(keys[i] >> 32),
+            'matches': int(scores[i]),
+            'ratio': float(scores[i] / len(hashes)),
+            'offset': float(((keys[i] & (2 ** 32 - 1)) - 2 ** 31) * hop_seconds),
+        } for i in best]
+
+    def query_file(self, path, view=None, **kwargs):
+        """Zapytanie fragmentem pliku WAV (patrz query)."""
+        hashes, times, _ = fingerprint_file(path, self.params, view)
+        return self.query(hashes, times, **kwargs)
+
+    def duplicates(self, min_matches=20, min_ratio=0.05):
+        """
+        Pary plików indeksu o wspólnej treści.
+
+        Każdy plik jest zapytaniem do indeksu (z pominięciem samego siebie), więc koszt
+        rośnie z liczbą plików razy logarytm rozmiaru indeksu.
+
+        Returns:
+            Lista krotek (ścieżka, ścieżka, zgodne hasze, udział, przesunięcie [s]); każda para raz.
+        """
+        self._merge()
+        file_ids = np.asarray(self._arrays['file_ids'])
+        order = np.argsort(file_ids, kind='stable')
+        bounds = np.searchsorted(file_ids[order], np.arange(len(self) + 1))
+        pairs = {}
+        for row in range(len(self)):
+            rows = order[bounds[row]:bounds[row + 1]]
+            hashes, times = np.asarray(self._arrays['hashes'])[rows], np.asarray(self._arrays['times'])[rows]
+            for match in self.query(hashes, times, min_matches, min_ratio, exclude=row):
+                key = tuple(sorted((row, match['file'])))
+                if key not in pairs or pairs[key][3] < match['ratio']:
+                    pairs[key] = (self.paths[row], match['path'], match['matches'], match['ratio'], match['offset'])
+        return sorted(pairs.values(), key=lambda pair: -pair[3])
+
+
+def build_index(index, paths, workers=1, save_every=SAVE_EVERY, log=print):
+    """
+    Dodaje do indeksu odciski plików nowych i zmienionych.
+
+    Args:
+        index: FingerprintIndex (zapisywany co save_every plików i na końcu).
+        paths: Ścieżki plików WAV.
+        workers: Liczba procesów roboczych.
+
+    Returns:
+        Krotka (liczba dodanych plików, lista (ścieżka, błąd)).
+    """
+    return build_incremental(index, paths, fingerprint_file, index.params, workers, index.save, save_every, log)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Odciski widmowe nagrań i wyszukiwanie duplikatów")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="Dodaje do indeksu odciski plików nowych i zmienionych")
+    p.add_argument("index", help="Katalog indeksu")
+    p.add_argument("files", nargs="+", help="Pliki WAV lub katalogi")
+    p.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+
+    p = sub.add_parser("query", help="Pliki zawierające fragment nagrania")
+    p.add_argument("index", help="Katalog indeksu")
+    p.add_argument("clip", help="Plik WAV z fragmentem")
+    p.add_argument("--start", type=float, default=None, help="Początek fragmentu [s]")
+    p.add_argument("--stop", type=float, default=None, help="Koniec fragmentu [s]")
+    p.add_argument("--min-matches", type=int, default=5)
+    p.add_argument("--min-ratio", type=float, default=0.01, help="Najmniejszy udział zgodnych haszy fragmentu")
+    p.add_argument("--top", type=int, default=10)
+
+    p = sub.add_parser("duplicates", help="Pary plików indeksu o wspólnej treści")
+    p.add_argument("index", help="Katalog indeksu")
+    p.add_argument("--min-matches", type=int, default=20)
+    p.add_argument("--min-ratio", type=float, default=0.05)
+
+    p = sub.add_parser("info", help="Liczba plików, haszy i rozmiar indeksu")
+    p.add_argument("index", help="Katalog indeksu")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = FingerprintIndex(args.index)
+        t0 = time.perf_counter()
+        done, errors = build_index(index, list(expand_paths(args.files)), args.workers)
+        print(f"Dodano {done} plików w {time.perf_counter() - t0:.1f} s, błędy: {len(errors)}, "
+              f"indeks: {len(index)} plików, {index.num_hashes} haszy, {index.size_bytes()} B")
+        return 1 if errors else 0
+
+    if not os.path.exists(os.path.join(args.index, 'files.npz')):
+        parser.error(f"Brak indeksu: {args.index}")
+    index = FingerprintIndex(args.index)
+    if args.command == "info":
+        hours = sum(index.durations) / 3600
+        print(f"{args.index}: {len(index)} plików ({hours:.2f} h), {index.num_hashes} haszy, "
+              f"{index.size_bytes()} B ({index.size_bytes() / max(hours, 1e-9) / 2 ** 20:.1f} MiB/h)")
+        return 0
+
+    if args.command == "duplicates":
+        t0 = time.perf_counter()
+        pairs = index.duplicates(args.min_matches, args.min_ratio)
+        for first, second, matches, ratio, offset in pairs:
+            print(f"{first}  {second}  zgodne: {matches} ({100 * ratio:.0f}%), przesunięcie {offset:+.2f} s")
+        print(f"{len(pairs)} par wśród {len(index)} plików ({time.perf_counter() - t0:.2f} s)")
+        return 0
+
+    view = None
+    if args.start is not None or args.stop is not None:
+        view = (args.start or 0.0, args.stop if args.stop is not None else np.inf)
+    t0 = time.perf_counter()
+    hashes, times, _ = fingerprint_file(args.clip, index.params, view)
+    fingerprinted = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    matches = index.query(hashes, times, args.min_matches, args.min_ratio, args.top)
+    elapsed = time.perf_counter() - t0
+    for match in matches:
+        print(f"{match['path']}  zgodne: {match['matches']} ({100 * match['ratio']:.0f}%), "
+              f"od {match['offset']:.2f} s")
+    print(f"{len(matches)} plików ({len(hashes)} haszy fragmentu; odcisk {1000 * fingerprinted:.1f} ms, "
+          f"wyszukiwanie {1000 * elapsed:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
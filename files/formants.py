@@ -0,0 +1,265 @@
+"""
+Analiza LPC i śledzenie formantów dla macierzy ramek.
+
+Autokorelacje wszystkich ramek liczone są jednym FFT (|X|^2 -> IFFT) o długości
+zaledwie ramka + rząd predykcji, a rekurencja Levinsona-Durbina wykonywana jest równolegle dla wszystkich ramek
+(pętla tylko po rzędzie predykcji). Formanty to pierwiastki wielomianu A(z)
+leżące blisko okręgu jednostkowego:
+  - method='newton' (domyślnie) – pierwiastki wyznaczane iteracją Newtona
+    startującą z maksimów krzywizny logarytmu obwiedni LPC (obwiednia z
+    autokorelacji współczynników – jedno mnożenie przez macierz kosinusów); ramki, w których iteracja nie zbiega się lub dwa starty
+    trafiają w ten sam pierwiastek, liczone są metodą 'eig',
+  - method='eig' – wszystkie pierwiastki jako wartości własne macierzy
+    towarzyszących (np.linalg.eigvals na stosie macierzy).
+"""
+from functools import lru_cache
+
+import numpy as np
+
+import fft_backend
+
+
+# Liczba punktów obwiedni LPC w [0, pi] przy wyszukiwaniu jej maksimów krzywizny
+ENVELOPE_BINS = 257
+
+NEWTON_ITERATIONS = 12
+# Liczba punktów startowych Newtona ponad liczbę szukanych formantów (na pierwiastki poniżej min_freq
+# lub o zbyt szerokim paśmie); ramki, w których to nie wystarcza, liczone są metodą 'eig'
+SPARE_CANDIDATES = 2
+
+
+def default_order(sample_rate):
+    """Typowy rząd predykcji: 2 + liczba kHz częstotliwości próbkowania."""
+    return int(2 + sample_rate / 1000)
+
+
+def pre_emphasis(frames, coefficient=0.97):
+    """Filtr preemfazy y[n] = x[n] - a * x[n-1] stosowany osobno w każdej ramce."""
+    emphasized = np.empty_like(frames)
+    emphasized[..., 0] = frames[..., 0]
+    np.multiply(frames[..., :-1], -coefficient, out=emphasized[..., 1:])
+    emphasized[..., 1:] += frames[..., 1:]
+    return emphasized
+
+
+@lru_cache(maxsize=16)
+def _lag_basis(n_fft, max_lag, dtype_name):
+    # Odwrotne rzeczywiste DFT ograniczone do opóźnień 0..max_lag: r_k = sum_m w_m P_m cos(2 pi m k / n)
+    m = np.arange(n_fft // 2 + 1)[:, np.newaxis]
+    weights = np.full((len(m), 1), 2.0 / n_fft)
+    weights[0] = 1.0 / n_fft
+    if n_fft % 2 == 0:
+        weights[-1] = 1.0 / n_fft
+    basis = (weights * np.cos(2 * np.pi * m * np.arange(max_lag + 1) / n_fft)).astype(dtype_name)
+    basis.flags.writeable = False
+    return basis
+
+
+@lru_cache(maxsize=16)
+def _envelope_basis(order, num_bins):
+    # |A(e^jw)|^2 = c_0 + 2 sum_k c_k cos(k w), gdzie c_k to autokorelacja współczynników A(z)
+    k = np.arange(order + 1)[:, np.newaxis]
+    basis = (np.where(k > 0, 2.0, 1.0) * np.cos(k * np.linspace(0, np.pi, num_bins))).astype(np.float32)
+    basis.flags.writeable = False
+    return basis
+
+
+def autocorrelation(frames, max_lag):
+    """
+    Autokorelacje ramek dla opóźnień 0..max_lag liczone przez FFT.
+
+    Potrzebnych jest tylko kilkadziesiąt opóźnień, więc zamiast odwrotnego FFT
+    widmo mocy mnożone jest przez macierz kosinusów (jedno mnożenie macierzy).
+
+    Returns:
+        Tablica (..., max_lag + 1).
+    """
+    n = frames.shape[-1]
+    # Autokorelacja cykliczna dla opóźnienia k to r_k + r_(n_fft - k); dopełnienie do >= n + max_lag
+    # zeruje drugi składnik dla wszystkich potrzebnych opóźnień (pełne 2n - 1 nie jest potrzebne)
+    n_fft = fft_backend.next_fast_len(n + max_lag)
+    spectra = fft_backend.rfft(frames, n_fft, axis=-1)
+    power = spectra.real ** 2 + spectra.imag ** 2
+    return power @ _lag_basis(n_fft, max_lag, power.dtype.name)
+
+
+def levinson_durbin(r, order):
+    """
+    Rekurencja Levinsona-Durbina dla wszystkich ramek naraz.
+
+    Args:
+        r: Autokorelacje (..., >= order + 1).
+        order: Rząd predykcji.
+
+    Returns:
+        Krotka (współczynniki A(z) (..., order + 1) z a[..., 0] = 1, błąd predykcji (...)).
+        Dla ramek o zerowej energii współczynniki to [1, 0, ..., 0].
+    """
+    r = np.asarray(r)
+    a = np.zeros(r.shape[:-1] + (order + 1,), dtype=r.dtype)
+    a[..., 0] = 1.0
+    silent = r[..., 0] <= 0
+    error = np.where(silent, 1.0, r[..., 0])
+    for i in range(1, order + 1):
+        # Współczynnik odbicia k_i = -(r_i + sum a_j r_(i-j)) / E
+        acc = r[..., i] + np.sum(a[..., 1:i] * r[..., i - 1:0:-1], axis=-1)
+        k = np.where(silent, 0.0, -acc / error)
+        a[..., 1:i] = a[..., 1:i] + k[..., np.newaxis] * a[..., i - 1:0:-1]
+        a[..., i] = k
+        error = error * (1.0 - k * k)
+    return a, np.where(silent, 0.0, error)
+
+
+def lpc(frames, order):
+    """Współczynniki LPC (metoda autokorelacji) dla macierzy ramek."""
+    return levinson_durbin(autocorrelation(frames, order), order)
+
+
+def lpc_roots(a):
+    """Wszystkie pierwiastki wielomianów A(z) – wartości własne stosu macierzy towarzyszących."""
+    order = a.shape[-1] - 1
+    companion = np.zeros(a.shape[:-1] + (order, order), dtype=a.dtype)
+    companion[..., 0, :] = -a[..., 1:]
+    companion[..., np.arange(1, order), np.arange(order - 1)] = 1.0
+    return np.linalg.eigvals(companion)
+
+
+def _evaluate(coefficients, z):
+    # Schemat Hornera dla z^p A(z) i jego pochodnej; coefficients: (p + 1, kandydaci) – wiersze ciągłe
+    # w pamięci, z: (kandydaci,)
+    value = coefficients[0].astype(z.dtype)
+    derivative = np.zeros_like(value)
+    for row in coefficients[1:]:
+        derivative *= z
+        derivative += value
+        value *= z
+        value += row
+    return value, derivative
+
+
+def _newton_roots(a, sample_rate, max_candidates, max_bandwidth):
+    # Punkty startowe: maksima krzywizny ln|A|^2 (dla bieguna o promieniu r druga pochodna w jego
+    # częstotliwości wynosi 2 / (1 - r)^2). W przeciwieństwie do maksimów obwiedni 1/|A|^2 rozdzielają
+    # one również bieguny zlane w jeden szczyt (formant widoczny tylko jako "ramię" obwiedni).
+    # Obwiednia z autokorelacji współczynników: mnożenie (ramki, p + 1) x (p + 1, ENVELOPE_BINS) zamiast FFT
+    order = a.shape[-1] - 1
+    c = np.empty_like(a)
+    for k in range(order + 1):
+        c[:, k] = np.einsum('ij,ij->i', a[:, :order + 1 - k], a[:, k:])
+    # Obwiednia wyznacza tylko punkty startowe iteracji, więc wystarcza pojedyncza precyzja
+    envelope = c.astype(np.float32) @ _envelope_basis(order, ENVELOPE_BINS)
+    log_magnitude = np.log(np.maximum(envelope, np.finfo(np.float32).tiny, out=envelope), out=envelope)
+    bin_width = np.pi / (ENVELOPE_BINS - 1)
+    curvature = np.zeros_like(log_magnitude)
+    curvature[..., 1:-1] = log_magnitude[..., :-2] - 2 * log_magnitude[..., 1:-1] + log_magnitude[..., 2:]
+    # Maksima zbyt płaskie, by dać formant, pomijamy (z zapasem – sąsiednie bieguny zmieniają krzywiznę):
+    # odległość bieguna od okręgu sqrt(2 / krzywizna) * bin_width musi być mniejsza niż limit
+    limit = 3 * np.pi * max_bandwidth / sample_rate
+    is_peak = np.zeros(curvature.shape, dtype=bool)
+    is_peak[..., 2:-2] = ((curvature[..., 2:-2] > 2.0 * (bin_width / limit) ** 2)
+                          & (curvature[..., 2:-2] > curvature[..., 1:-3])
+                          & (curvature[..., 2:-2] >= curvature[..., 3:-1]))
+
+    # Pierwsze max_candidates maksimów każdej ramki (np.nonzero zachowuje kolejność częstotliwości);
+    # iterujemy tylko po rzeczywistych kandydatach (spłaszczonych), odrzucając już zbieżne
+    frame_index, peak = np.nonzero(is_peak)
+    counts = np.count_nonzero(is_peak, axis=-1)
+    slot = np.arange(len(peak)) - np.repeat(np.cumsum(counts) - counts, counts)
+    truncated = counts > max_candidates
+    max_candidates = max(1, min(max_candidates, int(np.max(counts, initial=0))))
+    keep = slot < max_candidates
+    frame_index, peak, slot = frame_index[keep], peak[keep], slot[keep]
+    valid = np.zeros((len(a), max_candidates), dtype=bool)
+    valid[frame_index, slot] = True
+    # Start: położenie maksimum krzywizny z interpolacji parabolicznej i promień z jej wartości
+    left = curvature[frame_index, peak - 1]
+    center = curvature[frame_index, peak]
+    right = curvature[frame_index, peak + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.nan_to_num(0.5 * (left - right) / (left - 2 * center + right))
+    radius = np.exp(-np.sqrt(2.0 / center.astype(np.float64)) * bin_width)
+    z = radius * np.exp(1j * (peak + np.clip(offset, -0.5, 0.5)) * bin_width)
+    converged = np.zeros(len(z), dtype=bool)
+    active = np.arange(len(z))
+    coefficients = np.ascontiguousarray(a[frame_index].T)
+    for _ in range(NEWTON_ITERATIONS):
+        if len(active) == 0:
+            break
+        value, derivative = _evaluate(coefficients[:, active], z[active])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = value / derivative
+        finite = np.isfinite(step)
+        z[active[finite]] -= step[finite]
+        done = finite & (np.abs(step) < 1e-10)
+        converged[active[done]] = True
+        active = active[finite & ~done]
+
+    # Zbieżność: mały ostatni krok, pierwiastek wewnątrz okręgu i różne pierwiastki dla różnych startów
+    converged &= (np.abs(z) < 1.0) & (z.imag >= 0)
+    candidates = np.full(valid.shape, np.nan, dtype=complex)
+    candidates[frame_index, slot] = z
+    failed = np.zeros(len(valid), dtype=bool)
+    failed[frame_index[~converged]] = True
+    z = candidates
+    ordered = np.sort(np.where(valid, np.angle(z), np.inf), axis=-1)
+    with np.errstate(invalid='ignore'):
+        duplicates = np.isfinite(ordered[..., 1:]) & (np.diff(ordered, axis=-1) < 1e-6)
+    failed |= np.any(duplicates, axis=-1)
+    return np.where(valid, z, np.nan), failed, truncated
+
+
+def _root_parameters(roots, sample_rate, min_freq, max_bandwidth):
+    # Częstotliwości i szerokości pasm pierwiastków oraz maska pierwiastków będących formantami
+    with np.errstate(divide='ignore', invalid='ignore'):
+        freqs = np.angle(roots) * sample_rate / (2 * np.pi)
+        bandwidths = -np.log(np.abs(roots)) * sample_rate / np.pi
+    return freqs, bandwidths, (roots.imag > 0) & (freqs > min_freq) & (bandwidths < max_bandwidth)
+
+
+def formants_from_lpc(a, sample_rate, num_formants=3, min_freq=90.0, max_bandwidth=400.0, method='newton'):
+    """
+    Częstotliwości i szerokości pasm formantów z współczynników LPC.
+
+    Args:
+        a: Współczynniki A(z) (..., order + 1).
+        sample_rate: Częstotliwość próbkowania.
+        num_formants: Liczba zwracanych formantów (F1, F2, ...).
+        min_freq: Pierwiastki poniżej tej częstotliwości są pomijane [Hz].
+        max_bandwidth: Pierwiastki o szerszym paśmie są pomijane [Hz].
+        method: 'newton' lub 'eig' (patrz opis modułu).
+
+    Returns:
+        Krotka (częstotliwości (..., num_formants), szerokości pasm (..., num_formants)); NaN, gdy
+        w ramce jest mniej formantów.
+    """
+    if method not in ('newton', 'eig'):
+        raise ValueError(f"Nieznana metoda wyznaczania pierwiastków: {method}")
+    lead_shape = a.shape[:-1]
+    a = a.reshape(-1, a.shape[-1]).astype(np.float64, copy=False)
+    if method == 'eig':
+        roots = lpc_roots(a)
+    else:
+        # Newton startuje tylko z num_formants + SPARE_CANDIDATES najniższych maksimów krzywizny; ramki,
+        # w których pominięto maksima, a znalezionych formantów jest za mało, liczone są dokładnie
+        roots, failed, truncated = _newton_roots(a, sample_rate, num_formants + SPARE_CANDIDATES, max_bandwidth)
+        keep = _root_parameters(roots, sample_rate, min_freq, max_bandwidth)[2]
+        failed |= truncated & (np.count_nonzero(keep, axis=-1) < num_formants)
+        if np.any(failed):
+            exact = lpc_roots(a[failed])
+            roots = np.concatenate((roots, np.full((len(roots), exact.shape[-1] - roots.shape[-1]), np.nan)),
+                                   axis=-1)
+            roots[failed] = exact
+
+    freqs, bandwidths, keep = _root_parameters(roots, sample_rate, min_freq, max_bandwidth)
+    freqs = np.where(keep, freqs, np.inf)
+    index = np.argsort(freqs, axis=-1)[:, :num_formants]
+    freqs = np.take_along_axis(freqs, index, axis=-1)
+    bandwidths = np.take_along_axis(bandwidths, index, axis=-1)
+    missing = ~np.isfinite(freqs)
+    freqs[missing] = np.nan
+    bandwidths[missing] = np.nan
+    if freqs.shape[-1] < num_formants:
+        pad = np.full((len(freqs), num_formants - freqs.shape[-1]), np.nan)
+        freqs = np.concatenate((freqs, pad), axis=-1)
+        bandwidths = np.concatenate((bandwidths, pad), axis=-1)
+    return freqs.reshape(lead_shape + (num_formants,)), bandwidths.reshape(lead_shape + (num_formants,))
@@ -1,18 +1,15 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
 from tkinter import ttk, messagebox
 
 from design import ColorScheme
-from frequency_features import (
-    compute_volume_frequency, compute_frequency_centroid,
-    compute_bandwidth, compute_band_energy_ratio,
-    compute_spectral_flatness, compute_spectral_crest_factor
-)
-from windowing import apply_window, get_window_type_name
-from cepstrum_analysis import compute_cepstrum, estimate_f0_from_cepstrum
+import fft_backend
+from windowing import get_window_type_name, WINDOW_TYPES
+from ltas import METHODS as LTAS_METHODS
+from cepstrum_analysis import estimate_f0_from_cepstrum
+from pitch import ESTIMATORS as PITCH_ESTIMATOR_INFO, ESTIMATOR_NAMES as PITCH_ESTIMATORS
 from frequency_features_window import FrequencyFeaturesWindow
 
 
@@ -22,6 +19,8 @@ class FrequencyAnalysisWindow:
     def __init__(self, parent, audio_app):
         self.parent = parent
         self.audio_app = audio_app
+        # Okno jest widokiem na sesję analizy aplikacji głównej
+        self.session = getattr(audio_app, 'session', None)
 
         # Tworzymy nowe okno
         self.window = tk.Toplevel(parent)
@@ -44,6 +43,7 @@ class FrequencyAnalysisWindow:
         self.frame_length = 1024
         self.window_type = "rectangular"
         self.overlap = 0.5  # 50% nakładanie dla spektrogramu
+        self.zoom_band = None  # (od, do, liczba punktów) w trybie zoom
 
         # Panel statystyk
         self.create_stats_panel()
@@ -51,6 +51,9 @@ class FrequencyAnalysisWindow:
         # Aktualizujemy wykresy
         self.update_plots()
 
+        # Spektrogram obejmuje zakres analizy wybrany na wykresie głównym
+        audio_app.add_view_listener(self.window, self.refresh_view)
+
     def create_control_panel(self):
         """Tworzy panel kontrolny z opcjami analizy częstotliwościowej."""
         control_frame = ttk.LabelFrame(self.main_frame, text="Panel Kontrolny", style="Freq.TLabelframe")
@@ -77,7 +80,7 @@ class FrequencyAnalysisWindow:
         ttk.Label(window_frame, text="Funkcja okienkowa:").grid(row=0, column=0, padx=5, pady=5)
         self.window_var = tk.StringVar(value="rectangular")
         window_combo = ttk.Combobox(window_frame, textvariable=self.window_var, width=15)
-        window_combo['values'] = ('rectangular', 'triangular', 'hamming', 'hann', 'blackman')
+        window_combo['values'] = WINDOW_TYPES
         window_combo.grid(row=0, column=1, padx=5, pady=5)
 
         # Opcje spektrogramu
@@ -89,6 +92,25 @@ class FrequencyAnalysisWindow:
         overlap_entry = ttk.Entry(spec_frame, textvariable=self.overlap_var, width=10)
         overlap_entry.grid(row=0, column=1, padx=5, pady=5)
 
+        # Zoom widma – tylko wybrane pasmo, liczone transformatą chirp-z
+        self.zoom_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(spec_frame, text="Zoom pasma (CZT)", variable=self.zoom_var,
+                        command=self.update_plots).grid(row=0, column=2, padx=(20, 5), pady=5)
+        ttk.Label(spec_frame, text="Od [Hz]:").grid(row=0, column=3, padx=5, pady=5)
+        self.zoom_start_var = tk.StringVar(value="50")
+        ttk.Entry(spec_frame, textvariable=self.zoom_start_var, width=8).grid(row=0, column=4, padx=5, pady=5)
+        ttk.Label(spec_frame, text="Do [Hz]:").grid(row=0, column=5, padx=5, pady=5)
+        self.zoom_stop_var = tk.StringVar(value="600")
+        ttk.Entry(spec_frame, textvariable=self.zoom_stop_var, width=8).grid(row=0, column=6, padx=5, pady=5)
+        ttk.Label(spec_frame, text="Punkty:").grid(row=0, column=7, padx=5, pady=5)
+        self.zoom_points_var = tk.StringVar(value="1000")
+        ttk.Entry(spec_frame, textvariable=self.zoom_points_var, width=8).grid(row=0, column=8, padx=5, pady=5)
+
+        # Tory formantów (LPC) nakładane na spektrogram
+        self.formants_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(spec_frame, text="Formanty F1–F3", variable=self.formants_var,
+                        command=self.update_plots).grid(row=0, column=9, padx=(20, 5), pady=5)
+
         # Przycisk aktualizacji
         update_button = ttk.Button(control_frame, text="Aktualizuj wykresy", command=self.update_plots)
         update_button.pack(padx=5, pady=5)
@@ -109,41 +131,15 @@ class FrequencyAnalysisWindow:
         self.stats_text.config(state=tk.DISABLED)
 
     def update_stats(self):
-        if hasattr(self.audio_app, 'data') and self.audio_app.data is not None:
-            # Pobieramy dane sygnału
-            signal = self.audio_app.data
-            sample_rate = self.audio_app.fs
-
-            # Wycinamy ramkę do analizy
-            end_idx = min(self.frame_start + self.frame_length, len(signal))
-            frame = signal[self.frame_start:end_idx]
-
-            # Stosujemy funkcję okienkową
-            windowed_frame = apply_window(frame, self.window_type)
-
-            # Obliczamy FFT
-            fft_window = np.fft.rfft(windowed_frame)
-            freqs = np.fft.rfftfreq(len(windowed_frame), d=1 / sample_rate)
-
-            # Obliczamy parametry
-            volume = compute_volume_frequency(fft_window)
-            centroid = compute_frequency_centroid(fft_window, freqs)
-            bandwidth = compute_bandwidth(fft_window, freqs, centroid)
-
-            # Pasma częstotliwości dla BER (zakładając częstotliwość próbkowania 22050 Hz lub wyższą)
-            if sample_rate >= 11025:
-                ersb1 = compute_band_energy_ratio(fft_window, freqs, 0, 630)
-                ersb2 = compute_band_energy_ratio(fft_window, freqs, 630, 1720)
-                ersb3 = compute_band_energy_ratio(fft_window, freqs, 1720, 4400)
-            else:
-                # Dostosuj pasma dla niższych częstotliwości próbkowania
-                max_freq = sample_rate / 2
-                ersb1 = compute_band_energy_ratio(fft_window, freqs, 0, min(630, max_freq))
-                ersb2 = compute_band_energy_ratio(fft_window, freqs, min(630, max_freq), min(1720, max_freq))
-                ersb3 = compute_band_energy_ratio(fft_window, freqs, min(1720, max_freq), min(4400, max_freq))
-
-            sfm = compute_spectral_flatness(fft_window)
-            scf = compute_spectral_crest_factor(fft_window)
+        if self.session is not None:
+            # Obliczamy parametry ramki
+            params = self.session.frame_spectral_features(self.frame_start, self.frame_length, self.window_type)
+            volume = params['volume']
+            centroid = params['fc']
+            bandwidth = params['bw']
+            ersb1, ersb2, ersb3 = params['ersb1'], params['ersb2'], params['ersb3']
+            sfm = params['sfm']
+            scf = params['scf']
 
             # Aktualizujemy pole tekstowe
             self.stats_text.config(state=tk.NORMAL)
@@ -176,6 +172,15 @@ class FrequencyAnalysisWindow:
         self.spec_frame = ttk.Frame(self.notebook, style="App.TFrame")
         self.notebook.add(self.spec_frame, text="Spektrogram")
 
+        # Zakładka porównania funkcji okienkowych (liczona dopiero po jej wybraniu)
+        self.compare_frame = ttk.Frame(self.notebook, style="App.TFrame")
+        self.notebook.add(self.compare_frame, text="Porównanie okien")
+
+        # Zakładka długoterminowego widma średniego całego nagrania (również liczona po wybraniu)
+        self.ltas_frame = ttk.Frame(self.notebook, style="App.TFrame")
+        self.notebook.add(self.ltas_frame, text="Widmo długoterminowe (LTAS)")
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
         # Tworzymy figury i płótna dla każdej zakładki
         self.time_fig = Figure(figsize=(10, 6), dpi=100)
         self.time_canvas = FigureCanvasTkAgg(self.time_fig, self.time_frame)
@@ -189,19 +194,50 @@ class FrequencyAnalysisWindow:
         self.spec_canvas = FigureCanvasTkAgg(self.spec_fig, self.spec_frame)
         self.spec_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
+        self.compare_text = tk.Text(self.compare_frame, height=len(WINDOW_TYPES) + 2, font=("Courier", 9))
+        self.compare_text.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+        self.compare_text.config(state=tk.DISABLED)
+        self.compare_fig = Figure(figsize=(10, 6), dpi=100)
+        self.compare_canvas = FigureCanvasTkAgg(self.compare_fig, self.compare_frame)
+        self.compare_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        ltas_controls = ttk.Frame(self.ltas_frame, style="Controls.TFrame")
+        ltas_controls.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(ltas_controls, text="Uśrednianie:").grid(row=0, column=0, padx=5, pady=5)
+        self.ltas_method_var = tk.StringVar(value=LTAS_METHODS[0])
+        ltas_combo = ttk.Combobox(ltas_controls, textvariable=self.ltas_method_var, values=LTAS_METHODS,
+                                  width=12, state="readonly")
+        ltas_combo.grid(row=0, column=1, padx=5, pady=5)
+        ltas_combo.bind("<<ComboboxSelected>>", lambda event: self.plot_ltas())
+        ttk.Label(ltas_controls, text="Okna DPSS:").grid(row=0, column=2, padx=5, pady=5)
+        self.ltas_tapers_var = tk.StringVar(value="4")
+        ttk.Entry(ltas_controls, textvariable=self.ltas_tapers_var, width=6).grid(row=0, column=3, padx=5, pady=5)
+        self.ltas_fig = Figure(figsize=(10, 6), dpi=100)
+        self.ltas_canvas = FigureCanvasTkAgg(self.ltas_fig, self.ltas_frame)
+        self.ltas_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
     def update_plots(self):
-        if hasattr(self.audio_app, 'data') and self.audio_app.data is not None:
+        if self.session is not None:
             try:
                 # Pobieramy parametry z UI
                 self.frame_start = int(self.frame_start_var.get())
                 self.frame_length = int(self.frame_length_var.get())
                 self.window_type = self.window_var.get()
                 self.overlap = float(self.overlap_var.get()) / 100.0
+                if self.zoom_var.get():
+                    self.zoom_band = (float(self.zoom_start_var.get()), float(self.zoom_stop_var.get()),
+                                      int(self.zoom_points_var.get()))
+                else:
+                    self.zoom_band = None
 
                 # Aktualizujemy wykresy
                 self.plot_time_domain()
                 self.plot_frequency_domain()
                 self.plot_spectrogram()
+                if self.comparison_visible():
+                    self.plot_window_comparison()
+                if self.ltas_visible():
+                    self.plot_ltas()
 
                 # Aktualizujemy statystyki
                 self.update_stats()
@@ -214,16 +250,10 @@ class FrequencyAnalysisWindow:
         self.time_fig.clear()
         ax = self.time_fig.add_subplot(111)
 
-        # Pobieramy dane sygnału
-        signal = self.audio_app.data
-        sample_rate = self.audio_app.fs
-
-        # Wycinamy ramkę do analizy
-        end_idx = min(self.frame_start + self.frame_length, len(signal))
-        frame = signal[self.frame_start:end_idx]
-
-        # Stosujemy funkcję okienkową
-        windowed_frame = apply_window(frame, self.window_type)
+        # Wycinamy ramkę do analizy i stosujemy funkcję okienkową
+        sample_rate = self.session.sample_rate
+        frame = self.session.frame(self.frame_start, self.frame_length)
+        windowed_frame, _, _ = self.session.frame_spectrum(self.frame_start, self.frame_length, self.window_type)
 
         # Tworzymy tablicę czasu
         time = np.arange(len(frame)) / sample_rate
@@ -250,34 +280,28 @@ class FrequencyAnalysisWindow:
         self.freq_fig.clear()
         ax = self.freq_fig.add_subplot(111)
 
-        # Pobieramy dane sygnału
-        signal = self.audio_app.data
-        sample_rate = self.audio_app.fs
-
-        # Wycinamy ramkę do analizy
-        end_idx = min(self.frame_start + self.frame_length, len(signal))
-        frame = signal[self.frame_start:end_idx]
-
-        # Stosujemy funkcję okienkową
-        windowed_frame = apply_window(frame, self.window_type)
-
-        # Obliczamy FFT dla oryginalnej ramki
-        fft_orig = np.fft.rfft(frame)
-        freq_orig = np.fft.rfftfreq(len(frame), d=1 / sample_rate)
-
-        # Obliczamy FFT dla ramki z oknem
-        fft_window = np.fft.rfft(windowed_frame)
-        freq_window = np.fft.rfftfreq(len(windowed_frame), d=1 / sample_rate)
+        if self.zoom_band is not None:
+            # Tylko wybrane pasmo – transformata chirp-z dla ramki bez okna i z oknem
+            zoom_orig, freqs = self.session.zoom_spectrum(self.frame_start, self.frame_length, 'rectangular',
+                                                          *self.zoom_band)
+            zoom_window, _ = self.session.zoom_spectrum(self.frame_start, self.frame_length, self.window_type,
+                                                        *self.zoom_band)
+            spectra = (zoom_orig, zoom_window)
+        else:
+            # Obliczamy FFT dla oryginalnej ramki (okno prostokątne) i dla ramki z oknem – jednym wywołaniem
+            _, spectra, freqs, _ = self.session.window_comparison(
+                self.frame_start, self.frame_length, ('rectangular', self.window_type)
+            )
 
         # Konwertujemy na amplitudę w dB
-        magnitude_orig = 20 * np.log10(np.abs(fft_orig) + 1e-10)  # Dodajemy małą wartość, aby uniknąć log(0)
-        magnitude_window = 20 * np.log10(np.abs(fft_window) + 1e-10)
+        magnitude_orig = 20 * np.log10(np.abs(spectra[0]) + 1e-10)  # Dodajemy małą wartość, aby uniknąć log(0)
+        magnitude_window = 20 * np.log10(np.abs(spectra[1]) + 1e-10)
 
         # Rysujemy oryginalne widmo
-        ax.plot(freq_orig, magnitude_orig, '-', color=ColorScheme.ORIGINAL_SIGNAL, alpha=0.5, label='Oryginalny')
+        ax.plot(freqs, magnitude_orig, '-', color=ColorScheme.ORIGINAL_SIGNAL, alpha=0.5, label='Oryginalny')
 
         # Rysujemy widmo z oknem
-        ax.plot(freq_window, magnitude_window, '-', color=ColorScheme.WINDOWED_SIGNAL, label='Z oknem')
+        ax.plot(freqs, magnitude_window, '-', color=ColorScheme.WINDOWED_SIGNAL, label='Z oknem')
 
         # Ustawiamy etykiety i tytuł
         ax.set_xlabel('Częstotliwość (Hz)')
@@ -295,12 +319,17 @@ class FrequencyAnalysisWindow:
         self.spec_fig.clear()
         ax = self.spec_fig.add_subplot(111)
 
-        # Pobieramy dane sygnału
-        signal = self.audio_app.data
-        sample_rate = self.audio_app.fs
-
-        # Obliczamy spektrogram
-        spec_data, freqs, times = self.compute_spectrogram(signal, sample_rate)
+        # Obliczamy spektrogram (w trybie zoom tylko dla wybranego pasma)
+        if self.zoom_band is not None:
+            spec_data, freqs, times = self.session.zoom_spectrogram(self.frame_length, self.overlap,
+                                                                    self.window_type, *self.zoom_band)
+        else:
+            spec_data, freqs, times = self.session.spectrogram(self.frame_length, self.overlap, self.window_type)
+        if spec_data.shape[1] == 0:
+            ax.text(0.5, 0.5, "Sygnał jest krótszy niż długość ramki",
+                    horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+            self.spec_canvas.draw()
+            return
 
         # Rysujemy spektrogram
         im = ax.imshow(spec_data, aspect='auto', origin='lower',
@@ -308,6 +337,14 @@ class FrequencyAnalysisWindow:
                        cmap=ColorScheme.SPECTROGRAM_CMAP)
         #ax.set_ylim(0,4000)
 
+        # Formanty liczone na tych samych ramkach co spektrogram
+        if self.formants_var.get():
+            formant_freqs, _, formant_times = self.session.formants(self.frame_length, self.overlap)
+            for index, track in enumerate(formant_freqs):
+                ax.plot(formant_times, track, '.', markersize=3, label=f'F{index + 1}')
+            ax.set_ylim(freqs[0], freqs[-1])
+            ax.legend(loc='upper right')
+
         # Ustawiamy etykiety i tytuł
         ax.set_xlabel('Czas (s)')
         ax.set_ylabel('Częstotliwość (Hz)')
@@ -320,51 +357,126 @@ class FrequencyAnalysisWindow:
         # Aktualizujemy płótno
         self.spec_canvas.draw()
 
-    def compute_spectrogram(self, signal, sample_rate):
-        # Parametry
-        window_length = self.frame_length
-        hop_length = int(window_length * (1 - self.overlap))  # Bazując na nakładaniu
-
-        # Obliczamy liczbę ramek
-        num_frames = 1 + (len(signal) - window_length) // hop_length
-
-        # Prealokujemy macierz spektrogramu
-        spec = np.zeros((window_length // 2 + 1, num_frames))
-
-        # Obliczamy spektrogram ramka po ramce
-        for i in range(num_frames):
-            # Wycinamy ramkę
-            start = i * hop_length
-            end = start + window_length
-            frame = signal[start:end]
-
-            # Stosujemy okno
-            windowed_frame = apply_window(frame, self.window_type)
-
-            # Obliczamy FFT
-            fft_frame = np.fft.rfft(windowed_frame)
-
-            # Konwertujemy na amplitudę w dB
-            magnitude = 20 * np.log10(np.abs(fft_frame) + 1e-10)
-
-            # Zapisujemy w macierzy spektrogramu
-            spec[:, i] = magnitude
+    def comparison_visible(self):
+        return self.notebook.select() == str(self.compare_frame)
+
+    def ltas_visible(self):
+        return self.notebook.select() == str(self.ltas_frame)
+
+    def on_tab_changed(self, event=None):
+        if self.session is None:
+            return
+        if self.comparison_visible():
+            self.plot_window_comparison()
+        elif self.ltas_visible():
+            self.plot_ltas()
+
+    def refresh_view(self):
+        """Odświeża wykresy zależne od zakresu analizy w oknie głównym."""
+        self.plot_spectrogram()
+        if self.comparison_visible():
+            self.plot_window_comparison()
+
+    def plot_window_comparison(self):
+        """Widma ramki, spektrogramy i parametry przecieku dla wszystkich zarejestrowanych okien."""
+        self.compare_fig.clear()
+
+        # Jedno FFT ramki i jedno FFT ramek spektrogramu wzdłuż osi okien
+        _, spectra, freqs, metrics = self.session.window_comparison(self.frame_start, self.frame_length)
+        specs, spec_freqs, times = self.session.spectrogram_comparison(self.frame_length, self.overlap)
+
+        num_windows = len(WINDOW_TYPES)
+        columns = (num_windows + 1) // 2
+        grid = self.compare_fig.add_gridspec(3, columns)
+        ax = self.compare_fig.add_subplot(grid[0, :])
+        for i, window_type in enumerate(WINDOW_TYPES):
+            ax.plot(freqs, 20 * np.log10(np.abs(spectra[i]) + 1e-10), linewidth=0.8,
+                    label=get_window_type_name(window_type))
+        ax.set_xlabel('Częstotliwość (Hz)')
+        ax.set_ylabel('Amplituda (dB)')
+        ax.set_title('Widmo ramki dla różnych funkcji okienkowych')
+        ax.legend(fontsize=7, ncol=columns)
+        ax.grid(True)
 
-        # Obliczamy tablice częstotliwości i czasu
-        freqs = np.fft.rfftfreq(window_length, d=1 / sample_rate)
-        times = np.arange(0, num_frames * hop_length, hop_length) / sample_rate
+        if specs.shape[-1] > 0:
+            # Wspólna skala kolorów ułatwia porównanie poziomu przecieku
+            vmax = float(specs.max())
+            vmin = vmax - 120
+            for i, window_type in enumerate(WINDOW_TYPES):
+                ax = self.compare_fig.add_subplot(grid[1 + i // columns, i % columns])
+                ax.imshow(specs[i], aspect='auto', origin='lower', vmin=vmin, vmax=vmax,
+                          extent=[times[0], times[-1], spec_freqs[0], spec_freqs[-1]],
+                          cmap=ColorScheme.SPECTROGRAM_CMAP)
+                ax.set_title(get_window_type_name(window_type), fontsize=8)
+                ax.tick_params(labelsize=7)
+        self.compare_fig.tight_layout()
+        self.compare_canvas.draw()
+
+        # Tabela parametrów przecieku
+        lines = [f"{'Okno':<22}{'ENBW':>7}{'-3 dB':>7}{'Listek gł.':>11}{'Boczny':>9}"
+                 f"{'Scalloping':>11}{'Przeciek':>10}{'Rozpiętość':>11}"]
+        for window_type in WINDOW_TYPES:
+            m = metrics[window_type]
+            lines.append(
+                f"{get_window_type_name(window_type):<22}{m['enbw']:>7.2f}{m['width_3db']:>7.2f}"
+                f"{m['mainlobe_width']:>11.2f}{m['sidelobe_db']:>9.1f}{m['scalloping_db']:>11.2f}"
+                f"{float(np.mean(m['leakage_db'])):>10.1f}{float(np.mean(m['dynamic_range_db'])):>11.1f}"
+            )
+        lines.append("Szerokości w binach, poziomy w dB; przeciek – energia poza listkiem głównym najsilniejszego prążka.")
+        self.compare_text.config(state=tk.NORMAL)
+        self.compare_text.delete(1.0, tk.END)
+        self.compare_text.insert(tk.END, "\n".join(lines))
+        self.compare_text.config(state=tk.DISABLED)
+
+    def plot_ltas(self):
+        """Średnie widmo mocy całego nagrania z pasmem percentyli 10-90 i medianą."""
+        self.ltas_fig.clear()
+        ax = self.ltas_fig.add_subplot(111)
+
+        method = self.ltas_method_var.get()
+        try:
+            num_tapers = int(self.ltas_tapers_var.get())
+        except ValueError:
+            num_tapers = 4
+        result = self.session.ltas(self.frame_length, self.overlap, self.window_type, method, num_tapers)
+        if int(result['frames']) == 0:
+            ax.text(0.5, 0.5, "Sygnał jest krótszy niż długość ramki",
+                    horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+            self.ltas_canvas.draw()
+            return
+
+        freqs = result['freq']
+        mean_db = np.atleast_2d(result['mean_db'])
+        low, median, high = (np.atleast_2d(p) for p in result['percentile_db'])
+        for channel in range(len(mean_db)):
+            suffix = f" (kanał {channel + 1})" if len(mean_db) > 1 else ""
+            line, = ax.plot(freqs, mean_db[channel], linewidth=1.0, label=f"Średnia{suffix}")
+            ax.plot(freqs, median[channel], '--', color=line.get_color(), linewidth=0.8, label=f"Mediana{suffix}")
+            ax.fill_between(freqs, low[channel], high[channel], color=line.get_color(), alpha=0.2,
+                            label=f"Percentyle 10-90{suffix}")
 
-        return spec, freqs, times
+        ax.set_xlabel('Częstotliwość (Hz)')
+        ax.set_ylabel('Gęstość mocy (dB/Hz)')
+        if method == 'welch':
+            method_name = f"Welch, okno {get_window_type_name(self.window_type)}"
+        else:
+            method_name = f"wielookienkowe, {num_tapers} okien DPSS"
+        ax.set_title(f"Widmo długoterminowe ({method_name}, {int(result['frames'])} ramek)")
+        ax.legend(fontsize=8)
+        ax.grid(True)
+        self.ltas_canvas.draw()
 
     def open_frequency_features(self):
-        if hasattr(self.audio_app, 'data') and self.audio_app.data is not None:
+        if self.session is not None:
             FrequencyFeaturesWindow(
                 self.window,
-                self.audio_app.data,
-                self.audio_app.fs,
+                self.session.signal,
+                self.session.sample_rate,
                 frame_size=self.frame_length,
                 window_type=self.window_type,
-                overlap=self.overlap
+                overlap=self.overlap,
+                session=self.session,
+                audio_app=self.audio_app
             )
         else:
             messagebox.showerror("Błąd", "Brak danych audio.")
@@ -375,6 +487,8 @@ class CepstrumAnalysisWindow:
     def __init__(self, parent, audio_app):
         self.parent = parent
         self.audio_app = audio_app
+        # Okno jest widokiem na sesję analizy aplikacji głównej
+        self.session = getattr(audio_app, 'session', None)
 
         # Tworzymy nowe okno
         self.window = tk.Toplevel(parent)
@@ -405,6 +519,9 @@ class CepstrumAnalysisWindow:
         # Aktualizujemy wykresy
         self.update_plots()
 
+        # Przebieg F0 i MFCC obejmują zakres analizy wybrany na wykresie głównym
+        audio_app.add_view_listener(self.window, self.refresh_view)
+
     def create_f0_info_panel(self):
         self.f0_info_frame = ttk.LabelFrame(self.main_frame, text="Informacje o F0", style="Freq.TLabelframe")
         self.f0_info_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -451,7 +568,7 @@ class CepstrumAnalysisWindow:
         ttk.Label(window_frame, text="Funkcja okienkowa:").grid(row=0, column=0, padx=5, pady=5)
         self.window_var = tk.StringVar(value="hamming")
         window_combo = ttk.Combobox(window_frame, textvariable=self.window_var, width=15)
-        window_combo['values'] = ('rectangular', 'triangular', 'hamming', 'hann', 'blackman')
+        window_combo['values'] = WINDOW_TYPES
         window_combo.grid(row=0, column=1, padx=5, pady=5)
 
         # Zakres F0
@@ -468,6 +585,11 @@ class CepstrumAnalysisWindow:
         max_f0_entry = ttk.Entry(f0_frame, textvariable=self.max_f0_var, width=10)
         max_f0_entry.grid(row=0, column=3, padx=5, pady=5)
 
+        # Porównanie estymatorów F0 liczonych na tych samych ramkach (pitch.py)
+        self.compare_f0_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(f0_frame, text="Porównaj estymatory F0", variable=self.compare_f0_var,
+                        command=self.update_plots).grid(row=0, column=4, padx=(20, 5), pady=5)
+
         # Przycisk aktualizacji
         update_button = ttk.Button(control_frame, text="Aktualizuj wykresy", command=self.update_plots)
         update_button.pack(padx=5, pady=5)
@@ -496,6 +618,11 @@ class CepstrumAnalysisWindow:
         self.f0_frame = ttk.Frame(self.notebook, style="App.TFrame")
         self.notebook.add(self.f0_frame, text="F0 w czasie")
 
+        # Zakładka MFCC (liczona dopiero po jej wybraniu)
+        self.mfcc_frame = ttk.Frame(self.notebook, style="App.TFrame")
+        self.notebook.add(self.mfcc_frame, text="MFCC")
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
         # Tworzymy figury i płótna dla każdej zakładki
         self.spectrum_fig = Figure(figsize=(10, 6), dpi=100)
         self.spectrum_canvas = FigureCanvasTkAgg(self.spectrum_fig, self.spectrum_frame)
@@ -509,8 +636,23 @@ class CepstrumAnalysisWindow:
         self.f0_canvas = FigureCanvasTkAgg(self.f0_fig, self.f0_frame)
         self.f0_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
+        mfcc_controls = ttk.Frame(self.mfcc_frame, style="Controls.TFrame")
+        mfcc_controls.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(mfcc_controls, text="Pasma melowe:").grid(row=0, column=0, padx=5, pady=5)
+        self.n_mels_var = tk.StringVar(value="40")
+        ttk.Entry(mfcc_controls, textvariable=self.n_mels_var, width=6).grid(row=0, column=1, padx=5, pady=5)
+        ttk.Label(mfcc_controls, text="Współczynniki:").grid(row=0, column=2, padx=5, pady=5)
+        self.n_mfcc_var = tk.StringVar(value="13")
+        ttk.Entry(mfcc_controls, textvariable=self.n_mfcc_var, width=6).grid(row=0, column=3, padx=5, pady=5)
+        self.mfcc_deltas_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(mfcc_controls, text="Delta", variable=self.mfcc_deltas_var,
+                        command=self.plot_mfcc).grid(row=0, column=4, padx=5, pady=5)
+        self.mfcc_fig = Figure(figsize=(10, 6), dpi=100)
+        self.mfcc_canvas = FigureCanvasTkAgg(self.mfcc_fig, self.mfcc_frame)
+        self.mfcc_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
     def update_plots(self):
-        if hasattr(self.audio_app, 'data') and self.audio_app.data is not None:
+        if self.session is not None:
             try:
                 # Pobieramy parametry z UI
                 self.frame_start = int(self.frame_start_var.get())
@@ -523,6 +665,8 @@ class CepstrumAnalysisWindow:
                 self.plot_log_spectrum()
                 f0_value = self.plot_cepstrum()
                 self.plot_f0_over_time()
+                if self.mfcc_visible():
+                    self.plot_mfcc()
 
                 # Aktualizujemy info o F0
                 self.update_f0_info(f0_value)
@@ -535,19 +679,12 @@ class CepstrumAnalysisWindow:
         self.spectrum_fig.clear()
         ax = self.spectrum_fig.add_subplot(111)
 
-        # Pobieramy dane sygnału
-        signal = self.audio_app.data
-        sample_rate = self.audio_app.fs
-
-        # Wycinamy ramkę do analizy
-        end_idx = min(self.frame_start + self.frame_length, len(signal))
-        frame = signal[self.frame_start:end_idx]
-
-        # Obliczamy cepstrum
-        _, _, log_spectrum = compute_cepstrum(frame, sample_rate, self.window_type)
+        # Obliczamy cepstrum ramki
+        _, _, log_spectrum = self.session.cepstrum(self.frame_start, self.frame_length, self.window_type)
 
         # Obliczamy oś częstotliwości
-        freq = np.fft.rfftfreq(len(frame), d=1 / sample_rate)
+        frame = self.session.frame(self.frame_start, self.frame_length)
+        freq = fft_backend.rfft_freqs(frame.shape[-1], self.session.sample_rate)
 
         # Rysujemy widmo logarytmiczne
         ax.plot(freq, log_spectrum, color=ColorScheme.ACCENT)
@@ -566,16 +703,8 @@ class CepstrumAnalysisWindow:
         self.cepstrum_fig.clear()
         ax = self.cepstrum_fig.add_subplot(111)
 
-        # Pobieramy dane sygnału
-        signal = self.audio_app.data
-        sample_rate = self.audio_app.fs
-
-        # Wycinamy ramkę do analizy
-        end_idx = min(self.frame_start + self.frame_length, len(signal))
-        frame = signal[self.frame_start:end_idx]
-
-        # Obliczamy cepstrum
-        cepstrum, quefrency, _ = compute_cepstrum(frame, sample_rate, self.window_type)
+        # Obliczamy cepstrum ramki
+        cepstrum, quefrency, _ = self.session.cepstrum(self.frame_start, self.frame_length, self.window_type)
 
         # Estymujemy F0
         f0, peak_idx = estimate_f0_from_cepstrum(cepstrum, quefrency, self.min_f0, self.max_f0)
@@ -605,48 +734,42 @@ class CepstrumAnalysisWindow:
         return f0
 
     def plot_f0_over_time(self):
-        # Czyścimy poprzedni wykres
+        # Czyścimy poprzedni wykres (przy porównaniu estymatorów drugi wykres pokazuje pewność)
         self.f0_fig.clear()
-        ax = self.f0_fig.add_subplot(111)
-
-        # Pobieramy dane sygnału
-        signal = self.audio_app.data
-        sample_rate = self.audio_app.fs
+        compare = self.compare_f0_var.get()
+        ax = self.f0_fig.add_subplot(211 if compare else 111)
 
         # Parametry analizy
         frame_size = 2048  # Stały rozmiar ramki dla śledzenia F0
         hop_size = 512  # Przeskok między ramkami
 
-        # Obliczamy liczbę ramek
-        num_frames = 1 + (len(signal) - frame_size) // hop_size
-
-        # Prealokujemy tablice
-        f0_values = np.zeros(num_frames)
-        time_values = np.arange(num_frames) * hop_size / sample_rate
-
-        # Obliczamy F0 dla każdej ramki
-        for i in range(num_frames):
-            # Wycinamy ramkę
-            start = i * hop_size
-            end = start + frame_size
-            curr_frame = signal[start:end]
-
-            # Obliczamy cepstrum
-            cepstrum, quefrency, _ = compute_cepstrum(curr_frame, sample_rate, self.window_type)
-
-            # Estymujemy F0
-            f0, _ = estimate_f0_from_cepstrum(cepstrum, quefrency, self.min_f0, self.max_f0)
-
-            # Zapisujemy wartość F0
-            f0_values[i] = f0
-
-        # Rysujemy F0 w czasie
-        ax.plot(time_values, f0_values, color=ColorScheme.ACCENT)
+        # Obliczamy F0 dla ramek z zakresu analizy (cały sygnał lub widok z wykresu głównego);
+        # przy porównaniu wszystkie estymatory korzystają z jednego podziału na ramki i jednego FFT
+        estimators = PITCH_ESTIMATORS if compare else ('cepstrum',)
+        result = self.session.pitch(frame_size, hop_size, self.window_type, estimators, self.min_f0, self.max_f0)
+        time_values = result['time']
+
+        if compare:
+            confidence_ax = self.f0_fig.add_subplot(212, sharex=ax)
+            for name in estimators:
+                label = PITCH_ESTIMATOR_INFO[name][0]
+                f0_values = np.where(result[f'f0_{name}'] > 0, result[f'f0_{name}'], np.nan)
+                ax.plot(time_values, f0_values, '.', markersize=3, label=label)
+                confidence_ax.plot(time_values, result[f'confidence_{name}'], linewidth=1.0, label=label)
+            ax.legend(loc='upper right', fontsize=8)
+            confidence_ax.set_xlabel('Czas (s)')
+            confidence_ax.set_ylabel('Pewność')
+            confidence_ax.set_ylim(0, 1.05)
+            confidence_ax.grid(True)
+            ax.set_title('Zmiany F0 w czasie (porównanie estymatorów)')
+        else:
+            # Rysujemy F0 w czasie
+            ax.plot(time_values, result['f0_cepstrum'], color=ColorScheme.ACCENT)
+            ax.set_xlabel('Czas (s)')
+            ax.set_title('Zmiany F0 w czasie (metoda cepstralna)')
 
-        # Ustawiamy etykiety i tytuł
-        ax.set_xlabel('Czas (s)')
+        # Ustawiamy etykiety
         ax.set_ylabel('Częstotliwość podstawowa (Hz)')
-        ax.set_title('Zmiany F0 w czasie (metoda cepstralna)')
         ax.grid(True)
 
         # Ustawiamy granice osi y na podstawie oczekiwanego zakresu F0
@@ -655,14 +778,71 @@ class CepstrumAnalysisWindow:
         # Aktualizujemy płótno
         self.f0_canvas.draw()
 
+    def mfcc_visible(self):
+        return self.notebook.select() == str(self.mfcc_frame)
+
+    def on_tab_changed(self, event=None):
+        if self.session is not None and self.mfcc_visible():
+            self.plot_mfcc()
+
+    def refresh_view(self):
+        """Odświeża wykresy zależne od zakresu analizy w oknie głównym."""
+        self.plot_f0_over_time()
+        if self.mfcc_visible():
+            self.plot_mfcc()
+
+    def plot_mfcc(self):
+        """Logarytmiczne widmo melowe, współczynniki MFCC i (opcjonalnie) ich delty w czasie."""
+        self.mfcc_fig.clear()
+
+        # Parametry analizy
+        frame_size = 1024  # Stały rozmiar ramki dla MFCC
+        hop_size = 256  # Przeskok między ramkami
+        try:
+            n_mels = int(self.n_mels_var.get())
+            n_mfcc = min(int(self.n_mfcc_var.get()), n_mels)
+        except ValueError as e:
+            messagebox.showerror("Błąd", f"Nieprawidłowe parametry MFCC: {e}")
+            return
+        show_deltas = self.mfcc_deltas_var.get()
+        result = self.session.mfcc(frame_size, hop_size, self.window_type, n_mels, n_mfcc,
+                                   deltas=1 if show_deltas else 0)
+
+        times = result['time']
+        if len(times) == 0:
+            ax = self.mfcc_fig.add_subplot(111)
+            ax.text(0.5, 0.5, "Sygnał jest krótszy niż długość ramki",
+                    horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+            self.mfcc_canvas.draw()
+            return
+
+        # Dla widoku wszystkich kanałów pokazujemy pierwszy kanał
+        panels = [('log_mel', 'Widmo melowe (log)', 'Pasmo melowe'), ('mfcc', 'MFCC', 'Współczynnik')]
+        if show_deltas:
+            panels.append(('delta', 'Delta MFCC', 'Współczynnik'))
+        for i, (key, title, ylabel) in enumerate(panels):
+            data = result[key][0] if result[key].ndim > 2 else result[key]
+            ax = self.mfcc_fig.add_subplot(len(panels), 1, i + 1)
+            im = ax.imshow(data, aspect='auto', origin='lower', extent=[times[0], times[-1], 0, data.shape[0]],
+                           cmap=ColorScheme.SPECTROGRAM_CMAP)
+            ax.set_title(title, fontsize=9)
+            ax.set_ylabel(ylabel, fontsize=8)
+            ax.tick_params(labelsize=7)
+            self.mfcc_fig.colorbar(im, ax=ax)
+        ax.set_xlabel('Czas (s)')
+        self.mfcc_fig.tight_layout()
+        self.mfcc_canvas.draw()
+
     def open_frequency_features(self):
-        if hasattr(self.audio_app, 'data') and self.audio_app.data is not None:
+        if self.session is not None:
             FrequencyFeaturesWindow(
                 self.window,
-                self.audio_app.data,
-                self.audio_app.fs,
+                self.session.signal,
+                self.session.sample_rate,
                 frame_size=self.frame_length,
-                window_type=self.window_type
+                window_type=self.window_type,
+                session=self.session,
+                audio_app=self.audio_app
             )
         else:
             messagebox.showerror("Błąd", "Brak danych audio.")
\ No newline at end of file
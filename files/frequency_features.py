@@ -8,12 +8,17 @@ def compute_volume_frequency(spectrum):
     Volume(n) = (1/N) * sum(S_n^2(k))
 
     Args:
-        spectrum: Widmo częstotliwościowe ramki.
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm ramek).
 
     Returns:
         Wartość głośności.
     """
-    return np.mean(np.abs(spectrum) ** 2)
+    return volume_from_power(np.abs(spectrum) ** 2)
+
+
+def volume_from_power(power):
+    """Volume z gotowego widma mocy |S|^2 (ostatnia oś to biny)."""
+    return np.mean(power, axis=-1)
 
 
 def compute_frequency_centroid(spectrum, freqs):
@@ -23,14 +28,18 @@ def compute_frequency_centroid(spectrum, freqs):
     FC(n) = sum(ω*S_n(ω)) / sum(S_n(ω))
 
     Args:
-        spectrum: Widmo częstotliwościowe ramki.
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm ramek).
         freqs: Tablica częstotliwości odpowiadających binów widma.
 
     Returns:
         Wartość centroidu częstotliwościowego.
     """
-    magnitude = np.abs(spectrum)
-    return np.sum(freqs * magnitude) / (np.sum(magnitude) + 1e-10)
+    return centroid_from_magnitude(np.abs(spectrum), freqs)
+
+
+def centroid_from_magnitude(magnitude, freqs):
+    """Centroid częstotliwościowy z gotowego widma amplitudowego |S|."""
+    return np.sum(freqs * magnitude, axis=-1) / (np.sum(magnitude, axis=-1) + 1e-10)
 
 
 def compute_bandwidth(spectrum, freqs, centroid=None):
@@ -40,7 +49,7 @@ def compute_bandwidth(spectrum, freqs, centroid=None):
     BW^2(n) = sum((ω-FC(n))^2 * S_n^2(ω)) / sum(S_n^2(ω))
 
     Args:
-        spectrum: Widmo częstotliwościowe ramki.
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm ramek).
         freqs: Tablica częstotliwości odpowiadających binów widma.
         centroid: Opcjonalnie prekalkulowany centroid częstotliwościowy.
 
@@ -50,8 +59,13 @@ def compute_bandwidth(spectrum, freqs, centroid=None):
     if centroid is None:
         centroid = compute_frequency_centroid(spectrum, freqs)
 
-    magnitude_squared = np.abs(spectrum) ** 2
-    return np.sqrt(np.sum(((freqs - centroid) ** 2) * magnitude_squared) / (np.sum(magnitude_squared) + 1e-10))
+    return bandwidth_from_power(np.abs(spectrum) ** 2, freqs, centroid)
+
+
+def bandwidth_from_power(power, freqs, centroid):
+    """Efektywna szerokość pasma z gotowego widma mocy i centroidu."""
+    deviation = (freqs - np.asarray(centroid)[..., np.newaxis]) ** 2
+    return np.sqrt(np.sum(deviation * power, axis=-1) / (np.sum(power, axis=-1) + 1e-10))
 
 
 def compute_band_energy(spectrum, freqs, f0, f1):
@@ -61,7 +75,7 @@ def compute_band_energy(spectrum, freqs, f0, f1):
     BE(t) = integral(S_t^2(f)df) / integral(w(t)dt)
 
     Args:
-        spectrum: Widmo częstotliwościowe ramki.
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm ramek).
         freqs: Tablica częstotliwości odpowiadających binów widma.
         f0: Dolna granica pasma częstotliwości.
         f1: Górna granica pasma częstotliwości.
@@ -70,7 +84,7 @@ def compute_band_energy(spectrum, freqs, f0, f1):
         Energia w określonym paśmie częstotliwości.
     """
     mask = (freqs >= f0) & (freqs <= f1)
-    return np.sum(np.abs(spectrum[mask]) ** 2)
+    return np.sum(np.abs(spectrum[..., mask]) ** 2, axis=-1)
 
 
 def compute_band_energy_ratio(spectrum, freqs, f0, f1):
@@ -80,7 +94,7 @@ def compute_band_energy_ratio(spectrum, freqs, f0, f1):
     ERSB_{[f0,f1]}(t) = BE_{[f0,f1]}(t) / Vol(t)
 
     Args:
-        spectrum: Widmo częstotliwościowe ramki.
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm ramek).
         freqs: Tablica częstotliwości odpowiadających binów widma.
         f0: Dolna granica pasma częstotliwości.
         f1: Górna granica pasma częstotliwości.
@@ -88,9 +102,15 @@ def compute_band_energy_ratio(spectrum, freqs, f0, f1):
     Returns:
         Stosunek energii w określonym paśmie do całkowitej energii.
     """
-    band_energy = compute_band_energy(spectrum, freqs, f0, f1)
-    total_energy = compute_volume_frequency(spectrum)
-    return band_energy / (total_energy + 1e-10)
+    return band_energy_ratio_from_power(np.abs(spectrum) ** 2, freqs, f0, f1)
+
+
+def band_energy_ratio_from_power(power, freqs, f0, f1, volume=None):
+    """ERSB z gotowego widma mocy (volume – opcjonalnie policzony już Volume)."""
+    mask = (freqs >= f0) & (freqs <= f1)
+    if volume is None:
+        volume = volume_from_power(power)
+    return np.sum(power[..., mask], axis=-1) / (volume + 1e-10)
 
 
 def compute_spectral_flatness(spectrum):
@@ -100,22 +120,26 @@ def compute_spectral_flatness(spectrum):
     SFM(b,n) = [Product(S_n^2(i))]^(1/(ih(b)-il(b)+1)) / [(1/(ih(b)-il(b)+1)) * Sum(S_n^2(i))]
 
     Args:
-        spectrum: Widmo częstotliwościowe ramki.
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm ramek).
 
     Returns:
         Wartość płaskości widma (SFM).
     """
-    magnitude_squared = np.abs(spectrum) ** 2
-    if np.sum(magnitude_squared) <= 1e-10:
-        return 1.0  # Zgodnie ze standardem MPEG7
+    return flatness_from_power(np.abs(spectrum) ** 2)
+
+
+def flatness_from_power(power):
+    """SFM z gotowego widma mocy."""
+    silent = np.sum(power, axis=-1) <= 1e-10
 
     # Unikamy log(0) przez dodanie małej wartości
-    magnitude_squared = magnitude_squared + 1e-10
+    magnitude_squared = power + 1e-10
 
-    geometric_mean = np.exp(np.mean(np.log(magnitude_squared)))
-    arithmetic_mean = np.mean(magnitude_squared)
+    geometric_mean = np.exp(np.mean(np.log(magnitude_squared), axis=-1))
+    arithmetic_mean = np.mean(magnitude_squared, axis=-1)
 
-    return geometric_mean / arithmetic_mean
+    # Dla ramek ciszy zwracamy 1.0 zgodnie ze standardem MPEG7
+    return _scalar_if_0d(np.where(silent, 1.0, geometric_mean / arithmetic_mean))
 
 
 def compute_spectral_crest_factor(spectrum):
@@ -125,16 +149,120 @@ def compute_spectral_crest_factor(spectrum):
     SCF(b,n) = max_i(S_n^2(i)) / [(1/(ih(b)-il(b)+1)) * Sum(S_n^2(i))]
 
     Args:
-        spectrum: Widmo częstotliwościowe ramki.
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm ramek).
 
     Returns:
         Wartość współczynnika Crest Factor widma (SCF).
     """
-    magnitude_squared = np.abs(spectrum) ** 2
-    if np.sum(magnitude_squared) <= 1e-10:
-        return 1.0
+    return crest_factor_from_power(np.abs(spectrum) ** 2)
+
+
+def crest_factor_from_power(power):
+    """SCF z gotowego widma mocy."""
+    silent = np.sum(power, axis=-1) <= 1e-10
+
+    max_value = np.max(power, axis=-1)
+    mean_value = np.mean(power, axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _scalar_if_0d(np.where(silent, 1.0, max_value / mean_value))
+
+
+def get_ersb_bands(sample_rate):
+    """
+    Zwraca granice pasm ERSB1-ERSB3 dostosowane do częstotliwości próbkowania.
+
+    Args:
+        sample_rate: Częstotliwość próbkowania.
+
+    Returns:
+        Lista krotek (f0, f1) dla kolejnych pasm.
+    """
+    # Pasma zakładają częstotliwość próbkowania 22050 Hz lub wyższą
+    bands = [(0, 630), (630, 1720), (1720, 4400)]
+    if sample_rate >= 11025:
+        return bands
+    # Dostosuj pasma dla niższych częstotliwości próbkowania
+    max_freq = sample_rate / 2
+    return [(min(f0, max_freq), min(f1, max_freq)) for f0, f1 in bands]
+
+
+def compute_spectral_features(spectra, freqs, sample_rate):
+    """
+    Oblicza wszystkie parametry częstotliwościowe dla macierzy widm.
+
+    Args:
+        spectra: Widma ramek (ostatnia oś to biny częstotliwości).
+        freqs: Tablica częstotliwości odpowiadających binów widma.
+        sample_rate: Częstotliwość próbkowania.
+
+    Returns:
+        Słownik {nazwa parametru: tablica wartości dla ramek}.
+    """
+    # Widma amplitudowe i mocy liczone raz dla wszystkich parametrów
+    magnitude = np.abs(spectra)
+    power = magnitude ** 2
+    features = {}
+    features['volume'] = volume_from_power(power)
+    features['fc'] = centroid_from_magnitude(magnitude, freqs)
+    features['bw'] = bandwidth_from_power(power, freqs, features['fc'])
+    features.update(ersb_from_power(power, freqs, sample_rate, features['volume']))
+    features['sfm'] = flatness_from_power(power)
+    features['scf'] = crest_factor_from_power(power)
+    return features
+
+
+def ersb_from_power(power, freqs, sample_rate, volume=None):
+    """Stosunki energii ERSB1-ERSB3 (pasma z get_ersb_bands) z gotowego widma mocy."""
+    if volume is None:
+        volume = volume_from_power(power)
+    return {
+        f'ersb{i}': band_energy_ratio_from_power(power, freqs, f0, f1, volume)
+        for i, (f0, f1) in enumerate(get_ersb_bands(sample_rate), start=1)
+    }
+
+
+def compute_peak_leakage(spectrum, mainlobe_bins):
+    """
+    Obliczanie udziału energii poza listkiem głównym najsilniejszego prążka.
+
+    Dla pojedynczej sinusoidy wartość mierzy przeciek widmowy okna; dla sygnałów
+    złożonych obejmuje też pozostałe składowe, dlatego nadaje się głównie do
+    porównywania okien na tej samej ramce.
+
+    Args:
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm; ostatnia oś to biny).
+        mainlobe_bins: Szerokość listka głównego w binach (skalar lub tablica rozgłaszana
+            na osie widma poza ostatnią, np. jedna wartość na okno).
+
+    Returns:
+        Udział energii poza listkiem głównym w dB (względem energii całego widma).
+    """
+    power = np.abs(spectrum) ** 2
+    peak = np.argmax(power, axis=-1)[..., np.newaxis]
+    half_width = np.asarray(mainlobe_bins)[..., np.newaxis] / 2
+    inside = np.abs(np.arange(power.shape[-1]) - peak) <= half_width
+    total = np.sum(power, axis=-1) + 1e-20
+    outside = total - np.sum(power * inside, axis=-1)
+    return _scalar_if_0d(10 * np.log10(np.maximum(outside, 1e-20) / total))
+
+
+def compute_dynamic_range(spectrum):
+    """
+    Obliczanie rozpiętości widma: poziom najsilniejszego prążka względem mediany widma.
+
+    Okna o niskich listkach bocznych obniżają "podłogę" przecieku, więc rozpiętość rośnie.
+
+    Args:
+        spectrum: Widmo częstotliwościowe ramki (lub macierz widm).
+
+    Returns:
+        Rozpiętość w dB.
+    """
+    magnitude = np.abs(spectrum) + 1e-10
+    return _scalar_if_0d(20 * np.log10(np.max(magnitude, axis=-1) / np.median(magnitude, axis=-1)))
 
-    max_value = np.max(magnitude_squared)
-    mean_value = np.mean(magnitude_squared)
 
-    return max_value / mean_value
\ No newline at end of file
+def _scalar_if_0d(value):
+    # Dla pojedynczej ramki zwracamy skalar, tak jak wcześniejsze wersje funkcji
+    return value[()] if np.ndim(value) == 0 else value
@@ -0,0 +1,89 @@
+"""
+Wspólna budowa przyrostowa indeksów plików (corpus_index.py, fingerprint.py).
+
+Indeks przechowuje dla każdego pliku rozmiar i czas modyfikacji (file_signature),
+więc ponowna budowa przetwarza tylko pliki nowe i zmienione. Pliki analizowane
+są w procesach roboczych, a indeks zapisywany co kilkaset plików, dzięki czemu
+przerwaną budowę można wznowić.
+
+Indeks użyty w build_incremental udostępnia:
+  - needs_update(path) – czy plik trzeba (ponownie) przetworzyć,
+  - add(path, result) – dodanie wyniku zadania dla pliku.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+
+# Co ile przetworzonych plików budowa zapisuje indeks
+SAVE_EVERY = 500
+
+
+def expand_paths(items, extensions=('.wav',)):
+    """Ścieżki plików; katalogi przeszukiwane są rekurencyjnie w poszukiwaniu plików o podanych rozszerzeniach."""
+    for item in items:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                for name in sorted(names):
+                    if name.lower().endswith(extensions):
+                        yield os.path.join(root, name)
+        else:
+            yield item
+
+
+def file_signature(path):
+    """Krotka (ścieżka bezwzględna, rozmiar, czas modyfikacji) – klucz pliku i wykrywanie zmian."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime
+
+
+def _run_task(task, path, params):
+    # Proces roboczy: błąd pojedynczego pliku nie przerywa budowy indeksu
+    try:
+        return path, task(path, params), None
+    except Exception as error:
+        return path, None, f"{type(error).__name__}: {error}"
+
+
+def build_incremental(index, paths, task, params=None, workers=1, save=None, save_every=SAVE_EVERY, log=print):
+    """
+    Dodaje do indeksu wyniki zadania dla plików nowych i zmienionych.
+
+    Args:
+        index: Indeks z metodami needs_update(path) i add(path, wynik).
+        paths: Ścieżki plików.
+        task: Funkcja modułu (task(path, params) -> wynik) – wykonywana w procesach roboczych,
+            więc musi dać się zserializować (pickle).
+        params: Parametry przekazywane zadaniu.
+        workers: Liczba procesów roboczych (1 – w bieżącym procesie).
+        save: Funkcja zapisu indeksu wywoływana co save_every plików i na końcu (None – bez zapisu).
+        log: Funkcja wypisująca komunikaty (błędy plików, zapisy).
+
+    Returns:
+        Krotka (liczba dodanych plików, lista (ścieżka, błąd)).
+    """
+    todo = [path for path in paths if index.needs_update(path)]
+    errors = []
+    done = 0
+
+    def collect(path, result, error):
+        nonlocal done
+        if error is not None:
+            errors.append((path, error))
+            log(f"{path}: {error}")
+            return
+        index.add(path, result)
+        done += 1
+        if save is not None and done % save_every == 0:
+            save()
+            log(f"Zapisano indeks: {done} nowych plików")
+
+    if workers <= 1 or len(todo) <= 1:
+        for path in todo:
+            collect(*_run_task(task, path, params))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_run_task, [task] * len(todo), todo, [params] * len(todo), chunksize=4):
+                collect(*result)
+    if save is not None:
+        save()
+    return done, errors
@@ -0,0 +1,192 @@
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from design import ColorScheme
+from streaming import StreamingAnalyzer, StreamWorker, LABEL_SILENCE, LABEL_VOICED
+
+
+class LiveAnalysisWindow:
+    """
+    Okno analizy na żywo podczas odtwarzania lub z wejścia audio.
+
+    Bez źródła okno odczytuje pozycję odtwarzania z AudioApp i analizuje tylko nowo
+    odtworzone próbki (StreamingAnalyzer). Ze źródłem (audio_sources.py) analizę
+    wykonuje StreamWorker w osobnym wątku, a okno jedynie odczytuje bufory wyników.
+    Wykresy są aktualizowane ze stałą częstotliwością przez blitting – tło osi
+    rysowane jest raz, a przy każdej klatce odświeżane są tylko obraz spektrogramu,
+    przebieg F0 i wskaźnik poziomu.
+    """
+
+    REFRESH_MS = 30
+    METER_FLOOR_DB = -60.0
+    LABEL_NAMES = {LABEL_SILENCE: "cisza", 0: "bezdźwięczna", LABEL_VOICED: "dźwięczna"}
+
+    def __init__(self, parent, audio_app, frame_length=1024, hop_length=256, history_seconds=5.0,
+                 source=None):
+        self.parent = parent
+        self.audio_app = audio_app
+        self.source = source
+
+        self.analyzer = StreamingAnalyzer(
+            source.sample_rate if source is not None else audio_app.fs,
+            frame_length=frame_length,
+            hop_length=hop_length,
+            history_seconds=history_seconds,
+            silence_threshold=audio_app.silence_threshold,
+            max_block=max(8192, source.block_size if source is not None else 0)
+        )
+        self.last_index = audio_app.current_index
+        self.worker = StreamWorker(source, self.analyzer) if source is not None else None
+
+        # Tworzymy nowe okno
+        self.window = tk.Toplevel(parent)
+        self.window.title("Analiza na żywo – mikrofon" if source is not None else "Analiza na żywo")
+        self.window.geometry("900x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.main_frame = ttk.Frame(self.window, style="App.TFrame")
+        self.main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        self.info_var = tk.StringVar(value="Poziom: -∞ dB   F0: –")
+        ttk.Label(self.main_frame, textvariable=self.info_var, style="TitleLabel.TLabel").pack(
+            side=tk.TOP, anchor="w", pady=(0, 5)
+        )
+
+        self.create_plot_area()
+
+        self.background = None
+        self.after_id = None
+        self.closed = False
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.canvas.draw()
+        if self.worker is not None:
+            self.worker.start()
+        else:
+            # W trybie odtwarzania okno budzi AudioApp przy starcie lub wznowieniu odtwarzania
+            audio_app.playback_listeners.append(self.wake)
+        self.tick()
+
+    def create_plot_area(self):
+        self.fig = Figure(figsize=(9, 5), dpi=100)
+        grid = self.fig.add_gridspec(2, 2, width_ratios=[20, 1], height_ratios=[3, 1])
+        self.spec_ax = self.fig.add_subplot(grid[0, 0])
+        self.f0_ax = self.fig.add_subplot(grid[1, 0], sharex=self.spec_ax)
+        self.meter_ax = self.fig.add_subplot(grid[:, 1])
+
+        history = self.analyzer.history_seconds
+        nyquist = self.analyzer.sample_rate / 2
+        time_axis = np.linspace(-history, 0, self.analyzer.n_columns)
+
+        # Artysty animowane nie są rysowane przy pełnym odświeżeniu – tylko przez blitting
+        self.image = self.spec_ax.imshow(
+            self.analyzer.ordered_spectrogram(), aspect='auto', origin='lower',
+            extent=[-history, 0, 0, nyquist], cmap=ColorScheme.SPECTROGRAM_CMAP,
+            vmin=-80, vmax=40, animated=True
+        )
+        self.spec_ax.set_ylabel('Częstotliwość (Hz)')
+        self.spec_ax.set_title('Spektrogram na żywo')
+
+        (self.f0_line,) = self.f0_ax.plot(time_axis, self.analyzer.ordered_f0(), '.',
+                                          markersize=2, color=ColorScheme.F0_PEAK_COLOR, animated=True)
+        self.f0_ax.set_xlim(-history, 0)
+        self.f0_ax.set_ylim(self.analyzer.min_f0, self.analyzer.max_f0)
+        self.f0_ax.set_xlabel('Czas względem bieżącej chwili (s)' if self.source is not None
+                              else 'Czas względem pozycji odtwarzania (s)')
+        self.f0_ax.set_ylabel('F0 (Hz)')
+        self.f0_ax.grid(True)
+
+        (self.meter_bar,) = self.meter_ax.bar([0], [0], bottom=self.METER_FLOOR_DB, width=1.0,
+                                              color=ColorScheme.ACCENT, animated=True)
+        self.meter_ax.set_ylim(self.METER_FLOOR_DB, 0)
+        self.meter_ax.set_xticks([])
+        self.meter_ax.set_title('RMS (dB)', fontsize=9)
+        self.meter_ax.yaxis.tick_right()
+
+        self.fig.tight_layout()
+        self.canvas = FigureCanvasTkAgg(self.fig, self.main_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+    def on_draw(self, event):
+        # Po pełnym odświeżeniu (np. zmianie rozmiaru) zapamiętujemy nowe tło
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_artists_locked()
+
+    def feed(self):
+        """Przekazuje analizatorowi próbki odtworzone od poprzedniego wywołania."""
+        if self.worker is not None:
+            # Próbki z wejścia audio analizuje wątek StreamWorker
+            return
+        data = self.audio_app.data
+        position = self.audio_app.current_index
+        if data is None:
+            return
+        history_samples = self.analyzer.n_columns * self.analyzer.hop_length
+        if position < self.last_index or position - self.last_index > history_samples:
+            # Przewinięcie lub skok pozycji – zaczynamy historię od nowa
+            self.analyzer.reset()
+            self.last_index = max(0, position - self.analyzer.frame_length)
+        if position > self.last_index:
+            self.analyzer.process(data[self.last_index:position])
+            self.last_index = position
+
+    def draw_artists(self):
+        self.image.set_data(self.analyzer.ordered_spectrogram())
+        f0_history = self.analyzer.ordered_f0()
+        self.f0_line.set_ydata(np.where(f0_history > 0, f0_history, np.nan))
+        rms, f0 = self.analyzer.latest()
+        level_db = max(20 * np.log10(rms + 1e-10), self.METER_FLOOR_DB)
+        self.meter_bar.set_height(level_db - self.METER_FLOOR_DB)
+        self.spec_ax.draw_artist(self.image)
+        self.f0_ax.draw_artist(self.f0_line)
+        self.meter_ax.draw_artist(self.meter_bar)
+        f0_text = f"{f0:.1f} Hz" if f0 > 0 else "–"
+        info = f"Poziom: {level_db:.1f} dB   F0: {f0_text}"
+        if self.source is not None:
+            label = self.LABEL_NAMES[self.analyzer.latest_label()]
+            info += (f"   Ramka: {label}   Odrzucone bloki: {self.source.dropped_blocks}"
+                     f"   Przepełnienia: {self.source.overruns}")
+        self.info_var.set(info)
+
+    def draw_artists_locked(self):
+        # Bufory analizatora zmienia wątek StreamWorker – czytamy je pod blokadą
+        if self.worker is None:
+            self.draw_artists()
+            return
+        with self.worker.lock:
+            self.draw_artists()
+
+    def wake(self):
+        if not self.closed and self.after_id is None:
+            self.after_id = self.window.after_idle(self.tick)
+
+    def tick(self):
+        self.after_id = None
+        if self.closed:
+            return
+        columns_before = self.analyzer.columns_total
+        self.feed()
+        if self.analyzer.columns_total != columns_before and self.background is not None:
+            self.canvas.restore_region(self.background)
+            self.draw_artists_locked()
+            self.canvas.blit(self.fig.bbox)
+        if self.worker is None and not (self.audio_app.playing and not self.audio_app.paused):
+            # Odtwarzanie wstrzymane – okno nie odświeża się do czasu wake()
+            return
+        self.after_id = self.window.after(self.REFRESH_MS, self.tick)
+
+    def on_close(self):
+        self.closed = True
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+            self.after_id = None
+        if self.worker is not None:
+            self.worker.stop()
+            if hasattr(self.source, 'close'):
+                self.source.close()
+        elif self.wake in self.audio_app.playback_listeners:
+            self.audio_app.playback_listeners.remove(self.wake)
+        self.window.destroy()
@@ -0,0 +1,330 @@
+"""
+Długoterminowe widmo średnie (LTAS) liczone strumieniowo.
+
+LTASAccumulator przyjmuje kolejne fragmenty sygnału, dzieli je na ramki tak
+samo jak potoki (windowing.frame_signal – ramki na granicy fragmentów są
+sklejane z pozostałych próbek) i dla każdego binu częstotliwości aktualizuje:
+  - średnią i wariancję gęstości widmowej mocy (algorytm Welforda / Chana),
+  - histogram poziomów w dB o stałych przedziałach, z którego wyznaczane są
+    percentyle (z dokładnością do szerokości przedziału).
+Pamięć zależy od liczby binów i przedziałów histogramu, a nie od długości
+nagrania, więc całe pliki można analizować bez trzymania spektrogramu.
+
+Metody uśredniania:
+  - 'welch' – jedno okno (windowing.get_window), jak scipy.signal.welch,
+  - 'multitaper' – średnia z num_tapers okien DPSS (Slepiana) dla każdej ramki.
+
+Uruchomienie wsadowe (z katalogu files/):
+    python ltas.py nagranie1.wav nagranie2.wav --method multitaper --out wyniki/
+"""
+import argparse
+import os
+
+import numpy as np
+
+import fft_backend
+from precision import real_dtype, DEFAULT_PRECISION
+from windowing import get_window, frame_signal
+
+
+METHODS = ('welch', 'multitaper')
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+# Liczba próbek podawanych akumulatorowi naraz przy analizie całego sygnału lub pliku
+CHUNK_SIZE = 1 << 18
+
+# Liczba ramek przetwarzanych jednym wywołaniem FFT (ogranicza pamięć dla dużych fragmentów)
+FRAME_BLOCK = 256
+
+
+class LTASAccumulator:
+
+    def __init__(self, sample_rate, frame_length=2048, overlap=0.5, window_type='hann', method='welch',
+                 num_tapers=4, db_range=(-160.0, 20.0), db_step=0.5, precision=DEFAULT_PRECISION):
+        """
+        Args:
+            sample_rate: Częstotliwość próbkowania.
+            frame_length: Długość ramki (segmentu Welcha) w próbkach.
+            overlap: Nakładanie ramek (0-1).
+            window_type: Funkcja okienkowa dla metody 'welch'.
+            method: 'welch' lub 'multitaper'.
+            num_tapers: Liczba okien DPSS dla metody 'multitaper'.
+            db_range: Zakres histogramu poziomów (dB) – wartości spoza zakresu trafiają do skrajnych przedziałów.
+            db_step: Szerokość przedziału histogramu (dB).
+            precision: Precyzja liczenia widm ('float64' lub 'float32'); statystyki są zawsze float64.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Nieznana metoda uśredniania: {method}. Dostępne: {', '.join(METHODS)}")
+        self.sample_rate = sample_rate
+        self.frame_length = int(frame_length)
+        self.hop_length = max(1, int(frame_length * (1 - overlap)))
+        self.window_type = window_type
+        self.method = method
+        self.dtype = real_dtype(precision)
+
+        self.n_fft = fft_backend.fft_size(self.frame_length)
+        self.freqs = fft_backend.rfft_freqs(self.frame_length, sample_rate)
+
+        # Okna ze skalowaniem gęstości mocy: PSD = średnia po oknach z |FFT(ramka * okno)|^2
+        if method == 'welch':
+            window = get_window(window_type, self.frame_length)
+            tapers = window[np.newaxis] / np.sqrt(sample_rate * np.sum(window ** 2))
+        else:
+            from scipy.signal.windows import dpss
+            tapers = np.atleast_2d(dpss(self.frame_length, (num_tapers + 1) / 2, num_tapers))
+            tapers = tapers / np.sqrt(sample_rate * np.sum(tapers ** 2, axis=-1, keepdims=True))
+        self.tapers = tapers.astype(self.dtype)
+        # Widmo jednostronne – moc z częstotliwości ujemnych dodajemy do dodatnich
+        self._one_sided = np.full(len(self.freqs), 2.0, dtype=self.dtype)
+        self._one_sided[0] = 1.0
+        if self.n_fft % 2 == 0:
+            self._one_sided[-1] = 1.0
+
+        self.db_min = float(db_range[0])
+        self.db_step = float(db_step)
+        self.num_levels = int(np.ceil((db_range[1] - db_range[0]) / db_step))
+
+        self.reset()
+
+    def reset(self):
+        """Usuwa zebrane statystyki i oczekujące próbki."""
+        self.frames = 0
+        self._lead_shape = None
+        self._pending = None
+        self._mean = None
+        self._m2 = None
+        self._hist = None
+
+    def _init_state(self, lead_shape):
+        self._lead_shape = lead_shape
+        num_bins = len(self.freqs)
+        self._pending = np.empty(lead_shape + (0,), dtype=self.dtype)
+        self._mean = np.zeros(lead_shape + (num_bins,))
+        self._m2 = np.zeros(lead_shape + (num_bins,))
+        self._hist = np.zeros(lead_shape + (num_bins, self.num_levels), dtype=np.int64)
+
+    def update(self, chunk):
+        """
+        Dodaje kolejny fragment sygnału.
+
+        Args:
+            chunk: Próbki (tablica 1D) lub macierz (kanały, próbki) – liczba kanałów musi być stała.
+
+        Returns:
+            Liczba nowych ramek uwzględnionych w statystykach.
+        """
+        chunk = np.asarray(chunk)
+        if self._lead_shape is None:
+            self._init_state(chunk.shape[:-1])
+        elif chunk.shape[:-1] != self._lead_shape:
+            raise ValueError("Liczba kanałów fragmentu różni się od poprzednich fragmentów.")
+
+        samples = np.concatenate((self._pending, chunk.astype(self.dtype, copy=False)), axis=-1)
+        frames = frame_signal(samples, self.frame_length, self.hop_length)
+        num_frames = frames.shape[-2]
+        for start in range(0, num_frames, FRAME_BLOCK):
+            self._accumulate(self._psd(frames[..., start:start + FRAME_BLOCK, :]))
+        # Zostawiamy próbki potrzebne do następnej (nakładającej się) ramki
+        self._pending = samples[..., num_frames * self.hop_length:].copy()
+        return num_frames
+
+    def _psd(self, frames):
+        # (..., ramki, okna, próbki) -> (..., ramki, biny)
+        spectra = fft_backend.rfft(frames[..., np.newaxis, :] * self.tapers, self.n_fft, axis=-1)
+        power = spectra.real ** 2 + spectra.imag ** 2
+        power = power[..., 0, :] if len(self.tapers) == 1 else np.mean(power, axis=-2)
+        power *= self._one_sided
+        return power
+
+    def _accumulate(self, psd):
+        count = psd.shape[-2]
+        if count == 0:
+            return
+        # Łączenie średniej i sumy kwadratów odchyleń bloku z dotychczasowymi (Chan i in.)
+        psd64 = psd.astype(np.float64)
+        block_mean = np.mean(psd64, axis=-2)
+        block_m2 = np.sum((psd64 - block_mean[..., np.newaxis, :]) ** 2, axis=-2)
+        total = self.frames + count
+        delta = block_mean - self._mean
+        self._mean += delta * (count / total)
+        self._m2 += block_m2 + delta ** 2 * (self.frames * count / total)
+        self.frames = total
+
+        # Histogram poziomów: jeden bincount dla wszystkich kanałów i binów naraz
+        levels = ((10 * np.log10(psd64 + 1e-30) - self.db_min) / self.db_step).astype(np.int64)
+        np.clip(levels, 0, self.num_levels - 1, out=levels)
+        rows = np.arange(int(np.prod(self._lead_shape, dtype=np.int64)) * len(self.freqs))
+        rows = rows.reshape(self._lead_shape + (1, len(self.freqs)))
+        flat = (rows * self.num_levels + levels).ravel()
+        self._hist += np.bincount(flat, minlength=self._hist.size).reshape(self._hist.shape)
+
+    @property
+    def mean(self):
+        """Średnia gęstość widmowa mocy ([kanały,] biny)."""
+        if not self.frames:
+            return np.full(self._mean.shape if self._mean is not None else len(self.freqs), np.nan)
+        return self._mean.copy()
+
+    @property
+    def variance(self):
+        """Wariancja gęstości widmowej mocy między ramkami ([kanały,] biny)."""
+        if self.frames < 2:
+            return np.full_like(self.mean, np.nan)
+        return self._m2 / (self.frames - 1)
+
+    def percentiles(self, q=DEFAULT_PERCENTILES):
+        """
+        Percentyle poziomu widma w dB wyznaczone z histogramu.
+
+        Args:
+            q: Percentyl lub sekwencja percentyli (0-100).
+
+        Returns:
+            Tablica ([kanały,] biny) dla pojedynczego q albo (len(q), [kanały,] biny).
+        """
+        q_array = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if not self.frames:
+            result = np.full(q_array.shape + self.mean.shape, np.nan)
+            return result if np.ndim(q) else result[0]
+        cumulative = np.cumsum(self._hist, axis=-1)
+        result = []
+        for value in q_array:
+            target = value / 100 * self.frames
+            # Przedział, w którym skumulowana liczba ramek osiąga target, i interpolacja wewnątrz niego
+            index = np.minimum(np.sum(cumulative < target, axis=-1), self.num_levels - 1)
+            before = np.take_along_axis(cumulative, index[..., np.newaxis] - 1, axis=-1)[..., 0]
+            before = np.where(index > 0, before, 0)
+            inside = np.take_along_axis(self._hist, index[..., np.newaxis], axis=-1)[..., 0]
+            fraction = np.clip((target - before) / np.maximum(inside, 1), 0.0, 1.0)
+            result.append(self.db_min + (index + fraction) * self.db_step)
+        result = np.array(result)
+        return result if np.ndim(q) else result[0]
+
+    def result(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        Wynik w postaci słownika tablic (jak wyniki AnalysisSession).
+
+        Returns:
+            Słownik z kluczami 'freq', 'mean', 'variance', 'mean_db', 'std_db' (odchylenie
+            poziomu w dB wyznaczone z wariancji), 'percentile', 'percentile_db' i 'frames'.
+        """
+        mean = self.mean
+        variance = self.variance
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_db = 10 * np.log10(mean + 1e-30)
+            std_db = 10 * np.log10(1 + np.sqrt(variance) / (mean + 1e-30))
+        return {
+            'freq': self.freqs,
+            'mean': mean,
+            'variance': variance,
+            'mean_db': mean_db,
+            'std_db': std_db,
+            'percentile': np.asarray(percentiles, dtype=np.float64),
+            'percentile_db': self.percentiles(tuple(percentiles)),
+            'frames': np.array(self.frames),
+        }
+
+
+def compute_ltas(signal, sample_rate, chunk_size=CHUNK_SIZE, percentiles=DEFAULT_PERCENTILES, **params):
+    """
+    LTAS sygnału przechowywanego w pamięci, podawanego akumulatorowi fragmentami.
+
+    Args:
+        signal: Sygnał (tablica 1D) lub macierz (kanały, próbki).
+        sample_rate: Częstotliwość próbkowania.
+        chunk_size: Długość fragmentu w próbkach.
+        percentiles: Wyznaczane percentyle.
+        **params: Parametry LTASAccumulator.
+
+    Returns:
+        Słownik tablic z LTASAccumulator.result().
+    """
+    accumulator = LTASAccumulator(sample_rate, **params)
+    for start in range(0, max(signal.shape[-1], 1), chunk_size):
+        accumulator.update(signal[..., start:start + chunk_size])
+    return accumulator.result(percentiles)
+
+
+def wav_chunks(filepath, chunk_size=CHUNK_SIZE, keep_channels=False):
+    """
+    Czyta plik WAV fragmentami przez mapowanie pamięci.
+
+    W przeciwieństwie do analysis_session.load_wav próbki nie są normalizowane do
+    wartości szczytowej całego pliku, tylko skalowane do pełnej skali formatu
+    (poziomy LTAS są w dB względem pełnej skali i można je porównywać między plikami).
+
+    Yields:
+        Krotki (częstotliwość próbkowania, fragment float32 – 1D lub (kanały, próbki)).
+    """
+    import warnings
+    from scipy.io import wavfile
+    from scipy.io.wavfile import WavFileWarning
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", WavFileWarning)
+        fs, data = wavfile.read(filepath, mmap=True)
+
+    if data.dtype.kind == 'u':
+        offset, scale = 2 ** (8 * data.dtype.itemsize - 1), 2 ** (8 * data.dtype.itemsize - 1)
+    elif data.dtype.kind == 'i':
+        offset, scale = 0, 2 ** (8 * data.dtype.itemsize - 1)
+    else:
+        offset, scale = 0, 1
+    for start in range(0, len(data), chunk_size):
+        chunk = data[start:start + chunk_size]
+        if chunk.ndim > 1:
+            chunk = chunk.T if keep_channels else chunk[:, 0]
+        chunk = (np.asarray(chunk, dtype=np.float32) - offset) / scale
+        yield fs, chunk
+
+
+def ltas_from_wav(filepath, chunk_size=CHUNK_SIZE, keep_channels=False, percentiles=DEFAULT_PERCENTILES,
+                  **params):
+    """
+    LTAS pliku WAV liczony bez wczytywania całego nagrania do pamięci.
+
+    Returns:
+        Krotka (częstotliwość próbkowania, słownik tablic z LTASAccumulator.result()).
+    """
+    accumulator = None
+    fs = None
+    for fs, chunk in wav_chunks(filepath, chunk_size, keep_channels):
+        if accumulator is None:
+            accumulator = LTASAccumulator(fs, **params)
+        accumulator.update(chunk)
+    if accumulator is None:
+        raise ValueError(f"Plik {filepath} nie zawiera próbek.")
+    return fs, accumulator.result(percentiles)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Długoterminowe widmo średnie (LTAS) plików WAV")
+    parser.add_argument("files", nargs="+", help="Pliki WAV")
+    parser.add_argument("--frame-length", type=int, default=2048)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    parser.add_argument("--window", default="hann", help="Funkcja okienkowa (metoda welch)")
+    parser.add_argument("--method", choices=METHODS, default="welch")
+    parser.add_argument("--tapers", type=int, default=4, help="Liczba okien DPSS (metoda multitaper)")
+    parser.add_argument("--all-channels", action="store_true", help="Osobne LTAS dla każdego kanału")
+    parser.add_argument("--out", help="Katalog na wyniki .npz (po jednym na plik)")
+    args = parser.parse_args(argv)
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    for path in args.files:
+        fs, result = ltas_from_wav(path, keep_channels=args.all_channels, frame_length=args.frame_length,
+                                   overlap=args.overlap, window_type=args.window, method=args.method,
+                                   num_tapers=args.tapers)
+        # Poziom całkowity: suma gęstości mocy po binach razy szerokość binu
+        total_db = 10 * np.log10(np.sum(result['mean'], axis=-1) * fs / fft_backend.fft_size(args.frame_length))
+        levels = ", ".join(f"{level:.1f}" for level in np.atleast_1d(total_db))
+        print(f"{path}: {int(result['frames'])} ramek, {fs} Hz, poziom {levels} dBFS")
+        if args.out:
+            name = os.path.splitext(os.path.basename(path))[0]
+            np.savez(os.path.join(args.out, name + "_ltas.npz"), sample_rate=np.array(fs), **result)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+"""
+Równoległe liczenie potoków ramkowych dla jednego, długiego nagrania.
+
+Sygnał jest jednokrotnie kopiowany do multiprocessing.shared_memory, a procesy
+robocze dostają tylko nazwę segmentu pamięci i zakres ramek do policzenia.
+Fragmenty są wyrównane do granic ramek (kolejne fragmenty nakładają się
+o frame_length - hop_length próbek), więc po sklejeniu wyniki są identyczne
+z obliczeniami w jednym procesie.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import fft_backend
+from pipelines import run_pipeline, pipeline_frames
+
+
+# Poniżej tej liczby ramek narzut uruchomienia procesów przewyższa zysk
+MIN_FRAMES_PER_CHUNK = 2048
+
+
+def split_frame_range(num_frames, workers, min_chunk=MIN_FRAMES_PER_CHUNK):
+    """
+    Dzieli zakres ramek na fragmenty dla procesów roboczych.
+
+    Args:
+        num_frames: Liczba wszystkich ramek.
+        workers: Liczba procesów roboczych.
+        min_chunk: Minimalna liczba ramek we fragmencie.
+
+    Returns:
+        Lista krotek (start_frame, stop_frame).
+    """
+    # Kilka fragmentów na proces wyrównuje obciążenie przy nierównych czasach ramek
+    num_chunks = max(1, min(workers * 4, num_frames // max(min_chunk, 1)))
+    bounds = np.linspace(0, num_frames, num_chunks + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _run_chunk(shm_name, shape, dtype, name, sample_rate, params, start_frame, stop_frame):
+    # Proces roboczy: podpinamy się do pamięci współdzielonej bez kopiowania sygnału
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # Przypisanie przed try – błąd przy tworzeniu widoku nie może zostać przesłonięty w finally
+    signal = None
+    try:
+        signal = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        result = run_pipeline(name, signal, sample_rate, params, start_frame, stop_frame)
+        # Wyniki muszą być niezależne od bufora, który zaraz zamkniemy
+        return {key: np.array(value, copy=True) for key, value in result.items()}
+    finally:
+        # Widok na bufor trzeba zwolnić przed zamknięciem pamięci współdzielonej
+        signal = None
+        shm.close()
+
+
+def run_pipeline_parallel(name, signal, sample_rate, params, workers, min_chunk=MIN_FRAMES_PER_CHUNK):
+    """
+    Uruchamia potok w puli procesów i skleja wyniki.
+
+    Args:
+        name: Nazwa potoku z rejestru pipelines.PIPELINES.
+        signal: Sygnał (tablica 1D) lub macierz (kanały, próbki).
+        sample_rate: Częstotliwość próbkowania.
+        params: Słownik parametrów potoku.
+        workers: Liczba procesów roboczych.
+        min_chunk: Minimalna liczba ramek we fragmencie.
+
+    Returns:
+        Słownik tablic identyczny z wynikiem pipelines.run_pipeline.
+    """
+    num_frames = pipeline_frames(name, signal.shape[-1], params)
+    chunks = split_frame_range(num_frames, workers, min_chunk)
+    if workers <= 1 or len(chunks) <= 1:
+        return run_pipeline(name, signal, sample_rate, params)
+
+    signal = np.ascontiguousarray(signal)
+    shm = shared_memory.SharedMemory(create=True, size=max(signal.nbytes, 1))
+    try:
+        shared = np.ndarray(signal.shape, dtype=signal.dtype, buffer=shm.buf)
+        shared[:] = signal
+
+        # 'spawn' – procesy robocze nie dziedziczą stanu Tk ani wątków audio, więc ustawienia FFT
+        # przekazujemy jawnie (po jednym wątku FFT na proces – równoległość zapewnia pula); plany ze
+        # strojenia mają pierwszeństwo przed ogólną liczbą wątków, więc również w nich ustawiamy jeden wątek
+        context = multiprocessing.get_context('spawn')
+        fft_config = fft_backend.get_config()
+        tuning = {n: ((plain[0], 1), (padded[0], 1, padded[2])) for n, (plain, padded) in fft_config['tuning'].items()}
+        fft_args = (fft_config['backend'], 1, fft_config['fast_len'], tuning)
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context,
+                                 initializer=fft_backend.configure, initargs=fft_args) as pool:
+            futures = [
+                pool.submit(_run_chunk, shm.name, signal.shape, signal.dtype.str, name,
+                            sample_rate, params, start, stop)
+                for start, stop in chunks
+            ]
+            parts = [future.result() for future in futures]
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Oś ramek następuje po osi kanałów (dla sygnału mono jest pierwsza)
+    frame_axis = signal.ndim - 1
+    return {key: np.concatenate([part[key] for part in parts], axis=frame_axis) for key in parts[0]}
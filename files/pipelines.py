@@ -0,0 +1,315 @@
+"""
+Potoki analizy ramkowej liczone na wybranym zakresie ramek.
+
+Każdy potok to funkcja (signal, sample_rate, start_frame, stop_frame, **params),
+która czyta tylko próbki potrzebne ramkom z zakresu [start_frame, stop_frame)
+i zwraca słownik tablic z osią ramek na pierwszej pozycji. Dzięki temu ten sam
+kod liczy cały sygnał w jednym procesie albo jego fragmenty w procesach
+roboczych (parallel.py), a wyniki po sklejeniu są identyczne.
+
+Sygnał wielokanałowy ma postać macierzy (kanały, próbki); wszystkie kanały
+liczone są wtedy jednym wywołaniem, a oś ramek występuje zaraz po osi kanałów.
+
+run_pipeline_masked liczy potok tylko dla ramek wskazanych maską (np. ramek
+z mową), uruchamiając go osobno dla każdego ciągu takich ramek; pozostałe
+ramki wyniku wypełnia NaN, więc oś czasu jest taka sama jak bez maski.
+"""
+import numpy as np
+
+from cepstrum_analysis import compute_log_mel, compute_mfcc
+from chirp_z import zoom_fft
+from feature_registry import FrameData, compute_features
+import fft_backend
+from formants import default_order, pre_emphasis, autocorrelation, levinson_durbin, formants_from_lpc
+from pitch import estimate_pitch, ESTIMATOR_NAMES
+from precision import real_dtype, DEFAULT_PRECISION
+from windowing import apply_window, frame_signal, get_window, get_window_bank
+
+
+# Liczba ramek przetwarzanych naraz w potoku wielu okien
+MULTI_WINDOW_BLOCK = 16
+# Liczba ramek przetwarzanych naraz w potoku zoom (ogranicza rozmiar tablic pośrednich chirp-z)
+ZOOM_BLOCK = 256
+# Liczba ramek przetwarzanych naraz w potoku MFCC (widma zespolone bloku zamiast całego STFT)
+MFCC_BLOCK = 512
+# Liczba ramek przetwarzanych naraz w potoku formantów (preemfaza, okno i widmo mocy bloku mieszczą się
+# w pamięci podręcznej; z całego sygnału zostają tylko autokorelacje)
+FORMANT_BLOCK = 256
+
+
+def count_frames(num_samples, frame_length, hop_length, pad_end=False):
+    """
+    Liczba ramek sygnału.
+
+    Args:
+        num_samples: Długość sygnału w próbkach.
+        frame_length: Długość ramki.
+        hop_length: Przesunięcie między ramkami.
+        pad_end: Czy ostatnia, niepełna ramka jest dopełniana zerami.
+
+    Returns:
+        Liczba ramek.
+    """
+    if pad_end:
+        return int(np.ceil(num_samples / hop_length))
+    if num_samples < frame_length:
+        return 0
+    return 1 + (num_samples - frame_length) // hop_length
+
+
+def frame_range(signal, frame_length, hop_length, start_frame, stop_frame, pad_end=False):
+    """
+    Zwraca macierz ramek [start_frame, stop_frame) sygnału.
+
+    Args:
+        signal: Sygnał (tablica 1D) lub macierz (kanały, próbki).
+        frame_length: Długość ramki.
+        hop_length: Przesunięcie między ramkami.
+        start_frame: Indeks pierwszej ramki.
+        stop_frame: Indeks za ostatnią ramką.
+        pad_end: Czy dopełniać zerami ramki wychodzące poza koniec sygnału.
+
+    Returns:
+        Macierz o kształcie ([kanały,] stop_frame - start_frame, frame_length).
+    """
+    start = start_frame * hop_length
+    end = (stop_frame - 1) * hop_length + frame_length
+    if stop_frame <= start_frame:
+        return np.empty(signal.shape[:-1] + (0, frame_length), dtype=signal.dtype)
+    if pad_end and end > signal.shape[-1]:
+        chunk = np.zeros(signal.shape[:-1] + (end - start,), dtype=signal.dtype)
+        available = signal[..., start:end]
+        chunk[..., :available.shape[-1]] = available
+    else:
+        chunk = signal[..., start:end]
+    return frame_signal(chunk, frame_length, hop_length)
+
+
+def time_features(signal, sample_rate, start_frame, stop_frame, frame_size, pitch_estimators=('autocorr', 'amdf'),
+                  features=None, precision=DEFAULT_PRECISION):
+    """
+    Cechy czasowe z rejestru (grupa 'time', domyślnie wszystkie) i F0 wybranych estymatorów
+    dla nienakładających się ramek (ostatnia dopełniona zerami).
+    """
+    frames = frame_range(signal, frame_size, frame_size, start_frame, stop_frame, pad_end=True)
+    frames = frames.astype(real_dtype(precision), copy=False)
+    return {
+        **compute_features(FrameData(frames, sample_rate), 'time', features),
+        **estimate_pitch(frames, sample_rate, pitch_estimators),
+    }
+
+
+def stft(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type,
+         precision=DEFAULT_PRECISION):
+    """Widma zespolone ramek z oknem (complex64 w trybie float32)."""
+    frames = frame_range(signal, frame_length, hop_length, start_frame, stop_frame)
+    return {'stft': fft_backend.rfft(apply_window(frames, window_type, real_dtype(precision)), axis=-1)}
+
+
+def spectrogram_db(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type,
+                   precision=DEFAULT_PRECISION):
+    """Widma amplitudowe ramek w dB (ramki w wierszach)."""
+    spectra = stft(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type,
+                   precision)['stft']
+    return {'spectrogram': 20 * np.log10(np.abs(spectra) + 1e-10)}
+
+
+def spectrogram_db_multi(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_types,
+                         precision=DEFAULT_PRECISION):
+    """
+    Widma w dB ramek dla kilku funkcji okienkowych naraz.
+
+    Ramki wycinane są raz, wszystkie okna nakładane jednym mnożeniem z rozgłaszaniem,
+    a widma liczone jednym wywołaniem FFT. Oś okien występuje za osią ramek.
+    """
+    dtype = real_dtype(precision)
+    frames = frame_range(signal, frame_length, hop_length, start_frame, stop_frame).astype(dtype, copy=False)
+    bank = get_window_bank(window_types, frame_length, dtype)
+    num_frames = frames.shape[-2]
+    out = np.empty(frames.shape[:-1] + (len(bank), fft_backend.fft_size(frame_length) // 2 + 1), dtype=dtype)
+    # Bloki po kilkanaście ramek – tablice pośrednie (ramki × okna × biny) mieszczą się w pamięci podręcznej
+    for start in range(0, num_frames, MULTI_WINDOW_BLOCK):
+        block = out[..., start:start + MULTI_WINDOW_BLOCK, :, :]
+        spectra = fft_backend.rfft(frames[..., start:start + MULTI_WINDOW_BLOCK, np.newaxis, :] * bank, axis=-1)
+        np.abs(spectra, out=block)
+        block += 1e-10
+        np.log10(block, out=block)
+        block *= 20
+    return {'spectrogram': out}
+
+
+def zoom_spectrogram_db(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type,
+                        f_start, f_stop, num_points, precision=DEFAULT_PRECISION):
+    """Widma w dB ramek w paśmie [f_start, f_stop] liczone transformatą chirp-z."""
+    dtype = real_dtype(precision)
+    frames = frame_range(signal, frame_length, hop_length, start_frame, stop_frame)
+    out = np.empty(frames.shape[:-1] + (num_points,), dtype=dtype)
+    for start in range(0, frames.shape[-2], ZOOM_BLOCK):
+        block = apply_window(frames[..., start:start + ZOOM_BLOCK, :], window_type, dtype)
+        spectrum, _ = zoom_fft(block, sample_rate, f_start, f_stop, num_points, precision)
+        out[..., start:start + ZOOM_BLOCK, :] = 20 * np.log10(np.abs(spectrum) + 1e-10)
+    return {'spectrogram': out}
+
+
+def spectral_features(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type,
+                      features=None, precision=DEFAULT_PRECISION):
+    """
+    Parametry częstotliwościowe ramek z rejestru (grupa 'spectral', domyślnie wszystkie:
+    Volume, FC, BW, ERSB1-3, SFM, SCF i cechy dodatkowe).
+    """
+    frames = frame_range(signal, frame_length, hop_length, start_frame, stop_frame)
+    data = FrameData(frames, sample_rate, window_type, real_dtype(precision))
+    return compute_features(data, 'spectral', features)
+
+
+def mfcc(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type, n_mels=40,
+         n_mfcc=13, f_min=0.0, f_max=None, precision=DEFAULT_PRECISION):
+    """Logarytmy energii pasm melowych i współczynniki MFCC ramek."""
+    dtype = real_dtype(precision)
+    frames = frame_range(signal, frame_length, hop_length, start_frame, stop_frame)
+    n_fft = fft_backend.fft_size(frame_length)
+    log_mel = np.empty(frames.shape[:-1] + (n_mels,), dtype=dtype)
+    for start in range(0, frames.shape[-2], MFCC_BLOCK):
+        block = apply_window(frames[..., start:start + MFCC_BLOCK, :], window_type, dtype)
+        spectra = fft_backend.rfft(block, n_fft, axis=-1)
+        log_mel[..., start:start + MFCC_BLOCK, :] = compute_log_mel(spectra, sample_rate, n_fft, n_mels,
+                                                                     f_min, f_max)
+    return {'log_mel': log_mel, 'mfcc': compute_mfcc(log_mel, n_mfcc)}
+
+
+def formants(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type,
+             order=None, num_formants=3, method='newton', precision=DEFAULT_PRECISION):
+    """Częstotliwości i szerokości pasm formantów ramek (LPC + pierwiastki A(z))."""
+    dtype = real_dtype(precision)
+    order = order or default_order(sample_rate)
+    frames = frame_range(signal, frame_length, hop_length, start_frame, stop_frame)
+    window = get_window(window_type, frame_length, dtype)
+    r = np.empty(frames.shape[:-1] + (order + 1,), dtype=dtype)
+    for start in range(0, frames.shape[-2], FORMANT_BLOCK):
+        block = pre_emphasis(frames[..., start:start + FORMANT_BLOCK, :].astype(dtype, copy=False))
+        block *= window
+        r[..., start:start + FORMANT_BLOCK, :] = autocorrelation(block, order)
+    a, _ = levinson_durbin(r, order)
+    freqs, bandwidths = formants_from_lpc(a, sample_rate, num_formants, method=method)
+    return {'formants': freqs.astype(dtype), 'bandwidths': bandwidths.astype(dtype)}
+
+
+def pitch(signal, sample_rate, start_frame, stop_frame, frame_length, hop_length, window_type,
+          estimators=ESTIMATOR_NAMES, min_f0=50, max_f0=500, precision=DEFAULT_PRECISION):
+    """F0 i pewność estymacji wybranych estymatorów liczone na wspólnej macierzy ramek (pitch.py)."""
+    frames = frame_range(signal, frame_length, hop_length, start_frame, stop_frame)
+    frames = frames.astype(real_dtype(precision), copy=False)
+    return estimate_pitch(frames, sample_rate, estimators, window_type, min_f0, max_f0)
+
+
+# Rejestr potoków: nazwa -> (funkcja, czy ramki są dopełniane na końcu)
+PIPELINES = {
+    'time_features': (time_features, True),
+    'stft': (stft, False),
+    'spectrogram_db': (spectrogram_db, False),
+    'spectrogram_db_multi': (spectrogram_db_multi, False),
+    'zoom_spectrogram_db': (zoom_spectrogram_db, False),
+    'spectral_features': (spectral_features, False),
+    'mfcc': (mfcc, False),
+    'formants': (formants, False),
+    'pitch': (pitch, False),
+}
+
+# Potoki, które w trybie analizy samej mowy (AnalysisSession.set_speech_only) liczone są tylko dla ramek z mową
+SPEECH_ONLY_PIPELINES = frozenset({
+    'stft', 'spectrogram_db', 'spectrogram_db_multi', 'zoom_spectrogram_db', 'spectral_features', 'mfcc',
+    'formants', 'pitch',
+})
+
+
+def pipeline_geometry(name, params):
+    """Długość ramki i przesunięcie między ramkami potoku o podanych parametrach."""
+    if name == 'time_features':
+        return params['frame_size'], params['frame_size']
+    return params['frame_length'], params['hop_length']
+
+
+def pipeline_frames(name, num_samples, params):
+    """Liczba ramek, jaką wyprodukuje potok o podanych parametrach."""
+    _, pad_end = PIPELINES[name]
+    frame_length, hop_length = pipeline_geometry(name, params)
+    return count_frames(num_samples, frame_length, hop_length, pad_end=pad_end)
+
+
+def frames_touching(sample_mask, frame_length, hop_length, start_frame, stop_frame):
+    """
+    Maska ramek [start_frame, stop_frame) zawierających choć jedną próbkę wskazaną przez sample_mask.
+
+    Args:
+        sample_mask: Maska logiczna próbek (1D).
+        frame_length: Długość ramki.
+        hop_length: Przesunięcie między ramkami.
+        start_frame: Indeks pierwszej ramki.
+        stop_frame: Indeks za ostatnią ramką.
+    """
+    counts = np.concatenate(([0], np.cumsum(sample_mask, dtype=np.int64)))
+    starts = np.minimum(np.arange(start_frame, stop_frame) * hop_length, len(sample_mask))
+    ends = np.minimum(starts + frame_length, len(sample_mask))
+    return counts[ends] > counts[starts]
+
+
+def run_pipeline_masked(name, signal, sample_rate, params, frame_mask, start_frame=0):
+    """
+    Uruchamia potok tylko dla ramek wskazanych maską.
+
+    Args:
+        name: Nazwa potoku z rejestru PIPELINES.
+        signal: Sygnał (tablica 1D) lub macierz (kanały, próbki).
+        sample_rate: Częstotliwość próbkowania.
+        params: Słownik parametrów potoku.
+        frame_mask: Maska logiczna ramek [start_frame, start_frame + len(frame_mask)).
+        start_frame: Indeks pierwszej ramki.
+
+    Returns:
+        Słownik tablic jak w run_pipeline; ramki spoza maski mają wartość NaN
+        (0 dla tablic całkowitoliczbowych).
+    """
+    if np.all(frame_mask):
+        return run_pipeline(name, signal, sample_rate, params, start_frame, start_frame + len(frame_mask))
+    frame_axis = signal.ndim - 1
+    edges = np.diff(np.concatenate(([False], frame_mask, [False])).astype(np.int8))
+    runs = zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0])
+
+    # Kształty i typy wyników z pierwszego ciągu ramek (bez ramek z mową – z jednej ramki)
+    pieces = [(start, run_pipeline(name, signal, sample_rate, params, start_frame + start, start_frame + stop))
+              for start, stop in runs]
+    template = pieces[0][1] if pieces else run_pipeline(name, signal, sample_rate, params, start_frame,
+                                                        start_frame + 1)
+    result = {}
+    for key, value in template.items():
+        shape = list(value.shape)
+        shape[frame_axis] = len(frame_mask)
+        fill = np.nan if np.issubdtype(value.dtype, np.inexact) else 0
+        result[key] = np.full(shape, fill, dtype=value.dtype)
+    index = [slice(None)] * (frame_axis + 1)
+    for start, piece in pieces:
+        for key, value in piece.items():
+            index[frame_axis] = slice(start, start + value.shape[frame_axis])
+            result[key][tuple(index)] = value
+    return result
+
+
+def run_pipeline(name, signal, sample_rate, params, start_frame=0, stop_frame=None):
+    """
+    Uruchamia potok w bieżącym procesie.
+
+    Args:
+        name: Nazwa potoku z rejestru PIPELINES.
+        signal: Sygnał (tablica 1D) lub macierz (kanały, próbki).
+        sample_rate: Częstotliwość próbkowania.
+        params: Słownik parametrów potoku.
+        start_frame: Indeks pierwszej ramki.
+        stop_frame: Indeks za ostatnią ramką (domyślnie wszystkie ramki).
+
+    Returns:
+        Słownik tablic z osią ramek na pierwszej pozycji (po osi kanałów dla sygnału wielokanałowego).
+    """
+    func, _ = PIPELINES[name]
+    if stop_frame is None:
+        stop_frame = pipeline_frames(name, signal.shape[-1], params)
+    return func(signal, sample_rate, start_frame, stop_frame, **params)
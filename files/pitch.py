@@ -0,0 +1,252 @@
+"""
+Wspólny silnik estymacji F0 dla macierzy ramek.
+
+Sygnał dzielony jest na ramki raz, a wszystkie estymatory korzystają ze
+wspólnych danych pośrednich (PitchFrames), liczonych leniwie i co najwyżej
+raz: autokorelacji ramek (autokorelacja, YIN) oraz widma ramek z oknem
+(cepstrum, HPS). Każdy estymator zwraca dla każdej ramki F0 (0 – brak
+estymaty) i pewność z zakresu [0, 1], więc tory różnych metod są wyrównane
+w czasie i można je porównywać bezpośrednio.
+
+Estymatory (rejestr ESTIMATORS):
+  - 'autocorr' – maksimum autokorelacji w zakresie opóźnień F0 (z interpolacją
+    paraboliczną); pewność to wartość tego maksimum po normalizacji energią,
+  - 'amdf' – minimum AMDF (compute_amdf_f0); pewność 1 - minimum / średnia,
+  - 'cepstrum' – szczyt cepstrum (estimate_f0_from_cepstrum); pewność to
+    kontrast szczytu w zakresie kwefrencji,
+  - 'yin' – pierwsze minimum skumulowanej znormalizowanej funkcji różnicowej
+    (CMND) poniżej progu; pewność 1 - CMND,
+  - 'hps' – maksimum iloczynu widm harmonicznych (suma log-widm); pewność to
+    kontrast szczytu.
+Nowy estymator to funkcja (PitchFrames) -> (f0, pewność) dopisana do ESTIMATORS.
+"""
+from functools import cached_property
+
+import numpy as np
+
+import fft_backend
+from cepstrum_analysis import estimate_f0_from_cepstrum
+from features import (
+    compute_autocorrelation_frames,
+    amdf_lag_range, compute_amdf_frames, amdf_f0_from_values
+)
+from windowing import apply_window
+
+
+# Próg CMND, poniżej którego YIN przyjmuje pierwsze minimum
+YIN_THRESHOLD = 0.1
+# Liczba harmonicznych w iloczynie widm HPS
+HPS_HARMONICS = 5
+
+
+class PitchFrames:
+    """
+    Ramki i leniwie liczone dane pośrednie współdzielone przez estymatory F0.
+
+    Args:
+        frames: Macierz ramek (..., długość ramki).
+        sample_rate: Częstotliwość próbkowania.
+        window_type: Okno stosowane przed FFT (cepstrum, HPS).
+        min_f0, max_f0: Zakres poszukiwań F0 [Hz].
+    """
+
+    def __init__(self, frames, sample_rate, window_type='hamming', min_f0=50, max_f0=500):
+        self.frames = frames
+        self.sample_rate = sample_rate
+        self.window_type = window_type
+        self.min_f0 = min_f0
+        self.max_f0 = max_f0
+
+    @property
+    def frame_length(self):
+        return self.frames.shape[-1]
+
+    @cached_property
+    def lag_range(self):
+        """Opóźnienia [min, max) odpowiadające zakresowi F0, ograniczone do długości ramki."""
+        low = max(1, int(self.sample_rate // self.max_f0))
+        high = min(self.frame_length, int(self.sample_rate // self.min_f0) + 1)
+        return low, max(low, high)
+
+    @cached_property
+    def centered(self):
+        return self.frames - np.mean(self.frames, axis=-1, keepdims=True)
+
+    @cached_property
+    def autocorrelation(self):
+        """Autokorelacje ramek po odjęciu średniej (opóźnienia 0..n-1)."""
+        return compute_autocorrelation_frames(self.frames)
+
+    @cached_property
+    def spectrum(self):
+        """Widma ramek z oknem window_type."""
+        return fft_backend.rfft(apply_window(self.frames, self.window_type, self.frames.dtype), axis=-1)
+
+    @cached_property
+    def log_magnitude(self):
+        return np.log(np.abs(self.spectrum) + 1e-10)
+
+    @cached_property
+    def cepstrum(self):
+        """Rzeczywiste cepstrum ramek (jak compute_cepstrum)."""
+        return fft_backend.irfft(self.log_magnitude, axis=-1)
+
+
+def _peak_contrast(values, peak):
+    # Położenie szczytu między średnią a minimum zakresu: 0 – brak wyróżnionego szczytu, 1 – wyraźny szczyt
+    with np.errstate(divide='ignore', invalid='ignore'):
+        contrast = (peak - np.mean(values, axis=-1)) / (peak - np.min(values, axis=-1))
+    return np.clip(np.nan_to_num(contrast), 0.0, 1.0)
+
+
+def _parabolic_offset(left, center, right):
+    # Przesunięcie ekstremum paraboli przez trzy punkty względem punktu środkowego (w próbkach)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = 0.5 * (left - right) / (left - 2 * center + right)
+    return np.clip(np.nan_to_num(offset), -0.5, 0.5)
+
+
+def _autocorr(data):
+    low, high = data.lag_range
+    if high <= low:
+        zeros = np.zeros(data.frames.shape[:-1], dtype=data.frames.dtype)
+        return zeros, zeros
+    corr = data.autocorrelation
+    # F0 i pewność z tego samego opóźnienia: maksimum autokorelacji w zakresie F0
+    best = low + np.argmax(corr[..., low:high], axis=-1)
+    peak = np.take_along_axis(corr, best[..., np.newaxis], axis=-1)[..., 0]
+    left = np.take_along_axis(corr, (best - 1)[..., np.newaxis], axis=-1)[..., 0]
+    right = np.take_along_axis(corr, np.minimum(best + 1, data.frame_length - 1)[..., np.newaxis], axis=-1)[..., 0]
+    lag = best + _parabolic_offset(left, peak, right)
+    f0 = data.sample_rate / lag
+    with np.errstate(divide='ignore', invalid='ignore'):
+        periodicity = np.clip(np.nan_to_num(peak / corr[..., 0]), 0.0, 1.0)
+    voiced = (periodicity > 0) & (f0 >= data.min_f0) & (f0 <= data.max_f0)
+    return np.where(voiced, f0, 0.0), np.where(voiced, periodicity, 0.0)
+
+
+def _amdf(data):
+    lags = amdf_lag_range(data.frame_length, data.sample_rate, data.min_f0, data.max_f0)
+    if lags is None:
+        zeros = np.zeros(data.frames.shape[:-1], dtype=data.frames.dtype)
+        return zeros, zeros
+    values = compute_amdf_frames(data.frames, *lags)
+    f0 = amdf_f0_from_values(values, lags[0], data.sample_rate, data.min_f0, data.max_f0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        depth = 1.0 - np.min(values, axis=-1) / np.mean(values, axis=-1)
+    return f0, np.clip(np.nan_to_num(depth), 0.0, 1.0)
+
+
+def _cepstrum(data):
+    cepstrum = data.cepstrum
+    quefrency = np.arange(cepstrum.shape[-1]) / data.sample_rate
+    f0, peak_idx = estimate_f0_from_cepstrum(cepstrum, quefrency, data.min_f0, data.max_f0)
+    low, high = data.lag_range
+    peak = np.take_along_axis(cepstrum, np.expand_dims(peak_idx, -1), axis=-1)[..., 0]
+    return f0, _peak_contrast(cepstrum[..., low:high], peak)
+
+
+def _yin(data):
+    low, high = data.lag_range
+    if high <= low + 1:
+        zeros = np.zeros(data.frames.shape[:-1], dtype=data.frames.dtype)
+        return zeros, zeros
+    n = data.frame_length
+    corr = data.autocorrelation[..., :high]
+    energy = np.cumsum(data.centered ** 2, axis=-1)
+    energy = np.concatenate((np.zeros_like(energy[..., :1]), energy), axis=-1)
+    # Funkcja różnicowa d(t) – średnia (x_j - x_(j+t))^2 po nakładającej się części ramki, liczona
+    # z autokorelacji i energii skumulowanej (średnia zamiast sumy nie faworyzuje długich opóźnień)
+    tau = np.arange(high)
+    difference = energy[..., n - tau] + energy[..., -1:] - energy[..., tau] - 2 * corr
+    difference = np.maximum(difference, 0.0) / (n - tau)
+    difference[..., 0] = 0.0
+    # CMND: d'(t) = d(t) * t / sum_(k=1..t) d(k), d'(0) = 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cmnd = difference * tau / np.cumsum(difference, axis=-1)
+    cmnd[..., 0] = 1.0
+    cmnd = np.nan_to_num(cmnd, nan=1.0)
+
+    # Pierwsze opóźnienie poniżej progu i dalej w dół do lokalnego minimum; bez takiego – minimum globalne
+    search = cmnd[..., low:high]
+    below = search < YIN_THRESHOLD
+    first = np.argmax(below, axis=-1)
+    positions = np.arange(search.shape[-1])
+    rising = np.ones(search.shape, dtype=bool)
+    rising[..., :-1] = search[..., 1:] >= search[..., :-1]
+    descent = np.argmax(rising & (positions >= first[..., np.newaxis]), axis=-1)
+    best = low + np.where(below.any(axis=-1), descent, np.argmin(search, axis=-1))
+
+    value = np.take_along_axis(cmnd, best[..., np.newaxis], axis=-1)[..., 0]
+    left = np.take_along_axis(cmnd, np.maximum(best - 1, 0)[..., np.newaxis], axis=-1)[..., 0]
+    right = np.take_along_axis(cmnd, np.minimum(best + 1, high - 1)[..., np.newaxis], axis=-1)[..., 0]
+    lag = best + _parabolic_offset(left, value, right)
+    f0 = data.sample_rate / lag
+    confidence = np.clip(1.0 - value, 0.0, 1.0)
+    voiced = (confidence > 0) & (f0 >= data.min_f0) & (f0 <= data.max_f0)
+    return np.where(voiced, f0, 0.0), np.where(voiced, confidence, 0.0)
+
+
+def _hps(data):
+    log_magnitude = data.log_magnitude
+    bin_width = data.sample_rate / fft_backend.fft_size(data.frame_length)
+    length = (log_magnitude.shape[-1] - 1) // HPS_HARMONICS + 1
+    low = max(1, int(np.ceil(data.min_f0 / bin_width)))
+    high = min(length - 1, int(data.max_f0 / bin_width) + 1)
+    if high <= low:
+        zeros = np.zeros(data.frames.shape[:-1], dtype=data.frames.dtype)
+        return zeros, zeros
+    # Suma log-widm zdecymowanych o 1..H to logarytm iloczynu |X(k)| |X(2k)| ... |X(Hk)|
+    product = sum(log_magnitude[..., ::h][..., :length] for h in range(1, HPS_HARMONICS + 1))
+    search = product[..., low:high]
+    best = low + np.argmax(search, axis=-1)
+    peak = np.take_along_axis(product, best[..., np.newaxis], axis=-1)[..., 0]
+    left = np.take_along_axis(product, (best - 1)[..., np.newaxis], axis=-1)[..., 0]
+    right = np.take_along_axis(product, (best + 1)[..., np.newaxis], axis=-1)[..., 0]
+    f0 = (best + _parabolic_offset(left, peak, right)) * bin_width
+    confidence = _peak_contrast(search, peak)
+    return np.where(confidence > 0, f0, 0.0), confidence
+
+
+# Rejestr estymatorów: nazwa -> (nazwa wyświetlana, funkcja(PitchFrames) -> (f0, pewność))
+ESTIMATORS = {
+    'autocorr': ('Autokorelacja', _autocorr),
+    'amdf': ('AMDF', _amdf),
+    'cepstrum': ('Cepstrum', _cepstrum),
+    'yin': ('YIN (CMND)', _yin),
+    'hps': ('HPS', _hps),
+}
+
+ESTIMATOR_NAMES = tuple(ESTIMATORS)
+
+
+def estimate_pitch(frames, sample_rate, estimators=ESTIMATOR_NAMES, window_type='hamming', min_f0=50, max_f0=500):
+    """
+    F0 i pewność estymacji wybranych estymatorów dla wspólnej macierzy ramek.
+
+    Args:
+        frames: Macierz ramek (..., długość ramki).
+        sample_rate: Częstotliwość próbkowania.
+        estimators: Nazwy estymatorów z rejestru ESTIMATORS.
+        window_type: Okno dla estymatorów widmowych (cepstrum, HPS).
+        min_f0, max_f0: Zakres poszukiwań F0 [Hz].
+
+    Returns:
+        Słownik {'f0_<nazwa>': F0 w Hz (...), 'confidence_<nazwa>': pewność z [0, 1] (...)} w typie ramek.
+        F0 równe 0 oznacza brak estymaty.
+    """
+    unknown = [name for name in estimators if name not in ESTIMATORS]
+    if unknown:
+        raise ValueError(f"Nieznany estymator F0: {', '.join(unknown)}. Dostępne: {', '.join(ESTIMATOR_NAMES)}")
+    result = {}
+    if frames.shape[-1] == 0 or frames.size == 0:
+        for name in estimators:
+            result[f'f0_{name}'] = np.zeros(frames.shape[:-1], dtype=frames.dtype)
+            result[f'confidence_{name}'] = np.zeros(frames.shape[:-1], dtype=frames.dtype)
+        return result
+    data = PitchFrames(frames, sample_rate, window_type, min_f0, max_f0)
+    for name in estimators:
+        f0, confidence = ESTIMATORS[name][1](data)
+        result[f'f0_{name}'] = np.asarray(f0).astype(frames.dtype, copy=False)
+        result[f'confidence_{name}'] = np.asarray(confidence).astype(frames.dtype, copy=False)
+    return result
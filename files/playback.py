@@ -0,0 +1,254 @@
+"""
+Silnik odtwarzania z buforem pierścieniowym.
+
+Wątek zasilający kopiuje kolejne fragmenty nagrania do wstępnie przydzielonego
+bufora pierścieniowego, a wywołanie zwrotne sounddevice jedynie przepisuje
+gotowe próbki do bufora wyjściowego. Bufor ma jednego producenta (wątek
+zasilający, indeks zapisu) i jednego konsumenta (wywołanie zwrotne, indeks
+odczytu), więc nie są potrzebne blokady.
+
+Przewinięcie w trakcie odtwarzania odbywa się w dwóch krokach: seek() zgłasza
+nową pozycję, wywołanie zwrotne potwierdza ją i wypisuje ciszę, a wątek
+zasilający opróżnia bufor i zaczyna czytać od nowej pozycji.
+"""
+import threading
+import time
+from bisect import bisect
+
+import numpy as np
+
+
+# Górne granice przedziałów histogramu czasu wywołania zwrotnego [µs]
+CALLBACK_BINS_US = (50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000)
+
+
+class PlaybackEngine:
+
+    def __init__(self, data, sample_rate, blocksize=1024, latency=None, buffer_blocks=8, device=None):
+        """
+        Args:
+            data: Sygnał mono (tablica 1D float32).
+            sample_rate: Częstotliwość próbkowania.
+            blocksize: Rozmiar bloku urządzenia w próbkach.
+            latency: Opóźnienie urządzenia ('low', 'high' lub liczba sekund; None – domyślne).
+            buffer_blocks: Pojemność bufora pierścieniowego w blokach.
+            device: Urządzenie wyjściowe sounddevice (None – domyślne).
+        """
+        self.data = np.ascontiguousarray(data, dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.latency = latency
+        self.device = device
+
+        self._ring = np.zeros(blocksize * buffer_blocks, dtype=np.float32)
+        self._read = 0
+        self._write = 0
+        self._source_pos = 0
+        self._position = 0
+        self._seek_target = None
+        self._seek_ack = False
+        # Zegar strumienia: czas DAC początku ostatniego bloku i pozycja nagrania na tym początku
+        self._block_dac_time = 0.0
+        self._block_position = 0
+
+        self.paused = False
+        self.finished = False
+        self.reset_stats()
+
+        self.stream = None
+        self._feeder = None
+        self._feeding = False
+
+    # --- Statystyki ---
+
+    def reset_stats(self):
+        self.underflows = 0
+        self.device_underflows = 0
+        self.device_overflows = 0
+        self.callback_hist = np.zeros(len(CALLBACK_BINS_US) + 1, dtype=np.int64)
+        self.callback_max = 0.0
+
+    def stats(self):
+        """
+        Liczniki błędów i histogram czasu trwania wywołania zwrotnego.
+
+        Returns:
+            Słownik z licznikami niedoborów / przepełnień, histogramem (granice w µs) i maksimum [ms].
+        """
+        return {
+            'underflows': self.underflows,
+            'device_underflows': self.device_underflows,
+            'device_overflows': self.device_overflows,
+            'callback_bins_us': CALLBACK_BINS_US,
+            'callback_hist': self.callback_hist.tolist(),
+            'callback_max_ms': self.callback_max * 1000,
+            'buffered': self.buffered / self.sample_rate,
+        }
+
+    # --- Stan ---
+
+    @property
+    def position(self):
+        """Indeks próbki nagrania, która zostanie przekazana do urządzenia jako następna."""
+        target = self._seek_target
+        return target if target is not None else self._position
+
+    def audible_position(self):
+        """
+        Szacuje indeks próbki słyszanej w tej chwili na podstawie zegara strumienia.
+
+        Pozycja jest liczona od czasu DAC ostatniego bloku (time_info.outputBufferDacTime)
+        i bieżącego czasu strumienia (stream.time), więc nie zależy od tego, jak często
+        jest odczytywana.
+
+        Returns:
+            Indeks próbki nagrania.
+        """
+        if not self.active or self.paused or self._seek_target is not None or self._block_dac_time <= 0:
+            return self.position
+        elapsed = self.stream.time - self._block_dac_time
+        estimate = self._block_position + int(elapsed * self.sample_rate)
+        return int(min(max(estimate, 0), self._position, len(self.data)))
+
+    @property
+    def buffered(self):
+        return self._write - self._read
+
+    @property
+    def active(self):
+        return self.stream is not None and self.stream.active
+
+    # --- Sterowanie ---
+
+    def open(self):
+        """Tworzy strumień sounddevice (import odkładamy do pierwszego odtworzenia)."""
+        if self.stream is not None:
+            return
+        import sounddevice as sd
+        self.stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            blocksize=self.blocksize,
+            latency=self.latency,
+            device=self.device,
+            channels=1,
+            dtype='float32',
+            callback=self._callback
+        )
+
+    def start(self):
+        self.open()
+        if self.finished:
+            self._reset(0)
+        self.paused = False
+        if self.stream.active:
+            return
+        self._fill()
+        self._feeding = True
+        self._feeder = threading.Thread(target=self._feed_loop, name="PlaybackFeeder", daemon=True)
+        self._feeder.start()
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None and self.stream.active:
+            self.stream.stop()
+        self._feeding = False
+        if self._feeder is not None:
+            self._feeder.join(timeout=1.0)
+            self._feeder = None
+        # Wywołanie zwrotne już nie działa – przewinięcie możemy wykonać od razu
+        target = self._seek_target
+        if target is not None:
+            self._reset(target)
+
+    def close(self):
+        self.stop()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def seek(self, index):
+        """
+        Przewija odtwarzanie do podanej próbki.
+
+        Args:
+            index: Indeks próbki nagrania.
+        """
+        index = int(min(max(index, 0), len(self.data)))
+        if self.active:
+            self._seek_target = index
+        else:
+            self._reset(index)
+
+    def _reset(self, index):
+        self._block_dac_time = 0.0
+        self._read = self._write
+        self._source_pos = index
+        self._position = index
+        self.finished = index >= len(self.data)
+        self._seek_ack = False
+        self._seek_target = None
+
+    # --- Wątek zasilający ---
+
+    def _fill(self):
+        capacity = len(self._ring)
+        count = min(capacity - (self._write - self._read), len(self.data) - self._source_pos)
+        if count <= 0:
+            return
+        start = self._write % capacity
+        first = min(count, capacity - start)
+        self._ring[start:start + first] = self.data[self._source_pos:self._source_pos + first]
+        if count > first:
+            self._ring[:count - first] = self.data[self._source_pos + first:self._source_pos + count]
+        self._source_pos += count
+        # Indeks zapisu przesuwamy dopiero po skopiowaniu danych
+        self._write += count
+
+    def _feed_loop(self):
+        period = self.blocksize / self.sample_rate / 2
+        while self._feeding:
+            target = self._seek_target
+            if target is not None and self._seek_ack:
+                self._reset(target)
+            self._fill()
+            time.sleep(period)
+
+    # --- Wywołanie zwrotne audio ---
+
+    def _callback(self, outdata, frames, time_info, status):
+        t0 = time.perf_counter()
+        if status.output_underflow:
+            self.device_underflows += 1
+        if status.output_overflow:
+            self.device_overflows += 1
+
+        out = outdata[:, 0]
+        if self._seek_target is not None:
+            # Czekamy, aż wątek zasilający opróżni bufor po przewinięciu
+            self._seek_ack = True
+            out.fill(0)
+        elif self.paused or self.finished:
+            out.fill(0)
+        else:
+            self._block_dac_time = time_info.outputBufferDacTime
+            self._block_position = self._position
+            capacity = len(self._ring)
+            count = min(frames, self._write - self._read)
+            start = self._read % capacity
+            first = min(count, capacity - start)
+            out[:first] = self._ring[start:start + first]
+            if count > first:
+                out[first:count] = self._ring[:count - first]
+            if count < frames:
+                out[count:] = 0
+                if self._source_pos >= len(self.data) and count == self._write - self._read:
+                    self.finished = True
+                else:
+                    self.underflows += 1
+            self._read += count
+            self._position += count
+
+        elapsed = time.perf_counter() - t0
+        self.callback_hist[bisect(CALLBACK_BINS_US, elapsed * 1e6)] += 1
+        if elapsed > self.callback_max:
+            self.callback_max = elapsed
@@ -0,0 +1,38 @@
+"""
+Polityka precyzji obliczeń.
+
+W trybie 'float64' (domyślnym) potoki liczą tak jak wcześniej – ramki float32
+są promowane do float64 przy mnożeniu przez okno. W trybie 'float32' okna,
+ramki, STFT (complex64), cepstrum, cechy i pamięć podręczna pozostają w
+pojedynczej precyzji, co zmniejsza o połowę zużycie pamięci i przepustowości.
+"""
+import numpy as np
+
+
+PRECISIONS = {
+    'float64': (np.dtype(np.float64), np.dtype(np.complex128)),
+    'float32': (np.dtype(np.float32), np.dtype(np.complex64)),
+}
+
+DEFAULT_PRECISION = 'float64'
+
+
+def real_dtype(precision=DEFAULT_PRECISION):
+    """
+    Zwraca typ rzeczywisty dla wybranej precyzji.
+
+    Args:
+        precision: Nazwa precyzji ('float64' lub 'float32').
+
+    Returns:
+        Obiekt np.dtype.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Nieznana precyzja: {precision}. Dostępne: {', '.join(PRECISIONS)}")
+    return PRECISIONS[precision][0]
+
+
+def complex_dtype(precision=DEFAULT_PRECISION):
+    """Zwraca typ zespolony odpowiadający wybranej precyzji."""
+    real_dtype(precision)
+    return PRECISIONS[precision][1]
@@ -0,0 +1,101 @@
+"""
+Zmiana częstotliwości próbkowania filtrem polifazowym, liczona fragmentami.
+
+Filtr jest projektowany tak samo jak w scipy.signal.resample_poly (okno Kaisera,
+beta = 5), ale sygnał przetwarzany jest fragmentami przez upfirdn. Każdy
+fragment wejścia zaczyna się od próbki o indeksie podzielnym przez `down`,
+dzięki czemu próbki wyjściowe fragmentu pokrywają się dokładnie z próbkami
+wyniku liczonego jednym wywołaniem, a pamięć pomocnicza nie zależy od długości
+nagrania.
+"""
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+
+# Domyślna liczba próbek wyjściowych liczonych w jednym fragmencie
+CHUNK_SIZE = 1 << 16
+
+
+def resample_ratio(orig_rate, target_rate):
+    """
+    Zwraca nieskracalne czynniki interpolacji i decymacji.
+
+    Returns:
+        Krotka (up, down) taka, że target_rate / orig_rate = up / down.
+    """
+    ratio = Fraction(int(target_rate), int(orig_rate))
+    return ratio.numerator, ratio.denominator
+
+
+@lru_cache(maxsize=16)
+def _design_filter(up, down, dtype_name):
+    from scipy.signal import firwin
+
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0)).astype(dtype_name)
+    h *= up
+
+    # Dopełnienie zerami jak w resample_poly – próbki wyjściowe w środku filtra
+    n_pre_pad = down - half_len % down
+    n_pre_remove = (half_len + n_pre_pad) // down
+    h = np.concatenate((np.zeros(n_pre_pad, dtype=h.dtype), h))
+    h.flags.writeable = False
+    return h, n_pre_remove
+
+
+def resampled_length(num_samples, up, down):
+    """Liczba próbek sygnału po zmianie częstotliwości (jak w resample_poly)."""
+    return -(-num_samples * up // down)
+
+
+def resample(signal, orig_rate, target_rate, chunk_size=CHUNK_SIZE):
+    """
+    Zmienia częstotliwość próbkowania sygnału filtrem polifazowym.
+
+    Wynik odpowiada scipy.signal.resample_poly(signal, up, down, axis=-1).
+
+    Args:
+        signal: Sygnał (tablica 1D) lub macierz (kanały, próbki).
+        orig_rate: Częstotliwość próbkowania sygnału.
+        target_rate: Docelowa częstotliwość próbkowania.
+        chunk_size: Liczba próbek wyjściowych liczonych w jednym fragmencie.
+
+    Returns:
+        Sygnał o częstotliwości target_rate (ten sam typ danych co wejście).
+    """
+    from scipy.signal import upfirdn
+
+    signal = np.asarray(signal)
+    up, down = resample_ratio(orig_rate, target_rate)
+    if up == down:
+        return signal.copy()
+    dtype = signal.dtype if signal.dtype.kind == 'f' else np.dtype(np.float64)
+    signal = signal.astype(dtype, copy=False)
+    h, n_pre_remove = _design_filter(up, down, dtype.name)
+    taps = len(h)
+
+    num_samples = signal.shape[-1]
+    n_out = resampled_length(num_samples, up, down)
+    out = np.empty(signal.shape[:-1] + (n_out,), dtype=dtype)
+
+    for out_start in range(0, n_out, chunk_size):
+        out_stop = min(out_start + chunk_size, n_out)
+        # Indeksy próbek pełnego wyniku upfirdn (przed obcięciem opóźnienia filtra)
+        first = out_start + n_pre_remove
+        last = out_stop + n_pre_remove - 1
+        # Pierwsza potrzebna próbka wejścia, wyrównana w dół do wielokrotności down
+        in_start = max(0, (first * down - (taps - 1)) // up)
+        in_start -= in_start % down
+        in_stop = last * down // up + 1
+        piece = signal[..., in_start:min(in_stop, num_samples)]
+        if in_stop > num_samples:
+            # Ogon filtra za końcem sygnału – dopełniamy wejście zerami (jak dopełnienie filtra w resample_poly)
+            pad = np.zeros(signal.shape[:-1] + (in_stop - num_samples,), dtype=dtype)
+            piece = np.concatenate((piece, pad), axis=-1)
+        chunk = upfirdn(h, piece, up, down, axis=-1)
+        offset = first - in_start * up // down
+        out[..., out_start:out_stop] = chunk[..., offset:offset + out_stop - out_start]
+    return out
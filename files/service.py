@@ -0,0 +1,516 @@
+"""
+Lokalna usługa analizy sygnałów (HTTP na localhost lub gnieździe Unix).
+
+Usługa działa długo, więc numpy, scipy i moduły analizy są importowane raz,
+a nie przy każdym żądaniu. Front-end asyncio przyjmuje żądania do ograniczonej
+kolejki (przepełnienie kończy się odpowiedzią 503), a obliczenia wykonuje pula
+procesów. Procesy robocze przechowują sesje analizy (AnalysisSession) wraz z
+ich pamięcią podręczną, więc powtórne żądania dla tego samego pliku są tanie.
+
+Uruchomienie (z katalogu files/):
+    python service.py --port 8765 --workers 2 --queue 16
+    python service.py --unix /tmp/audio_analysis.sock
+
+Punkty końcowe:
+    POST /analyze?features=f0,spectral&format=json|npz
+        Treść: bajty pliku WAV albo JSON {"path": "...", "features": [...], "params": {...}}.
+    GET /metrics   – liczba żądań, opóźnienia (p50/p95/p99), głębokość kolejki.
+    GET /health
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from analysis_session import AnalysisSession, SPEECH_MODES
+import feature_registry
+from ltas import METHODS as LTAS_METHODS
+from pitch import ESTIMATORS
+from windowing import WINDOW_TYPES
+
+
+FEATURE_NAMES = ('time', 'spectral', 'spectrogram', 'f0', 'pitch', 'ltas', 'mfcc')
+
+DEFAULT_PARAMS = {
+    'frame_size': 1024,
+    'window_type': 'hamming',
+    'overlap': 0.5,
+    'f0_frame_size': 2048,
+    'hop_size': 512,
+    'min_f0': 50,
+    'max_f0': 500,
+    'pitch_estimators': 'autocorr,amdf,cepstrum,yin,hps',  # nazwy z pitch.ESTIMATORS rozdzielone przecinkami
+    'analysis_rate': None,  # None – oryginalna częstotliwość próbkowania
+    'ltas_frame_size': 2048,
+    'ltas_method': 'welch',
+    'ltas_tapers': 4,
+    'mfcc_frame_size': 1024,
+    'mfcc_hop_size': 256,
+    'n_mels': 40,
+    'n_mfcc': 13,
+    'mfcc_deltas': 2,
+    'speech_only': None,  # None, 'speech' (bez ciszy) lub 'voiced' (tylko ramki dźwięczne)
+}
+
+# Parametry tekstowe i ich dozwolone wartości (pozostałe parametry są liczbami)
+CHOICE_PARAMS = {
+    'window_type': WINDOW_TYPES,
+    'ltas_method': LTAS_METHODS,
+    'speech_only': SPEECH_MODES,
+}
+# Parametry liczbowe, dla których None oznacza wartość domyślną analizy
+OPTIONAL_NUMBER_PARAMS = ('analysis_rate',)
+# Parametry liczbowe, które mogą być zerem (pozostałe muszą być dodatnie)
+ZERO_ALLOWED_PARAMS = ('overlap', 'mfcc_deltas')
+
+MAX_BODY_SIZE = 512 * 1024 * 1024
+
+
+# ----------------------------------------------------------------------
+# Część wykonywana w procesach roboczych
+# ----------------------------------------------------------------------
+_worker_sessions = OrderedDict()
+_WORKER_SESSION_LIMIT = 8
+
+
+class ClientError(Exception):
+    """Błąd danych klienta wykryty w procesie roboczym – odpowiedź 400 (pozostałe wyjątki to 500)."""
+
+
+def _get_session(key, source):
+    # Sesje (i ich pamięć podręczna wyników) są współdzielone przez kolejne żądania
+    if key in _worker_sessions:
+        _worker_sessions.move_to_end(key)
+        return _worker_sessions[key]
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    try:
+        session = AnalysisSession.from_wav(source)
+    except Exception as e:
+        # Błąd odczytu to błąd danych klienta (400), nie usługi
+        raise ClientError(f'Niepoprawny plik WAV: {e}') from e
+    _worker_sessions[key] = session
+    if len(_worker_sessions) > _WORKER_SESSION_LIMIT:
+        _worker_sessions.popitem(last=False)
+    return session
+
+
+def analyze(key, source, features, params):
+    """
+    Liczy wybrane cechy dla nagrania.
+
+    Args:
+        key: Klucz sesji (skrót treści lub ścieżka z czasem modyfikacji).
+        source: Bajty pliku WAV albo ścieżka do pliku.
+        features: Lista nazw cech z FEATURE_NAMES.
+        params: Parametry analizy (patrz DEFAULT_PARAMS).
+
+    Returns:
+        Słownik {nazwa cechy: {nazwa tablicy: tablica}} oraz metadane nagrania.
+    """
+    session = _get_session(key, source)
+    p = {**DEFAULT_PARAMS, **params}
+    session.set_analysis_rate(p['analysis_rate'])
+    session.set_speech_only(p['speech_only'])
+    result = {}
+    for name in features:
+        if name == 'time':
+            result['time'] = session.time_features(int(p['frame_size']))
+        elif name == 'spectral':
+            result['spectral'] = session.spectral_features(int(p['frame_size']), p['window_type'],
+                                                           float(p['overlap']))
+        elif name == 'spectrogram':
+            spec, freqs, times = session.spectrogram(int(p['frame_size']), float(p['overlap']), p['window_type'])
+            result['spectrogram'] = {'spectrogram': spec, 'freq': freqs, 'time': times}
+        elif name == 'f0':
+            times, f0 = session.f0_track(int(p['f0_frame_size']), int(p['hop_size']), p['window_type'],
+                                         float(p['min_f0']), float(p['max_f0']))
+            result['f0'] = {'time': times, 'f0': f0}
+        elif name == 'pitch':
+            result['pitch'] = session.pitch(int(p['f0_frame_size']), int(p['hop_size']), p['window_type'],
+                                            tuple(p['pitch_estimators'].split(',')), float(p['min_f0']),
+                                            float(p['max_f0']))
+        elif name == 'ltas':
+            result['ltas'] = session.ltas(int(p['ltas_frame_size']), float(p['overlap']), p['window_type'],
+                                          p['ltas_method'], int(p['ltas_tapers']))
+        elif name == 'mfcc':
+            result['mfcc'] = session.mfcc(int(p['mfcc_frame_size']), int(p['mfcc_hop_size']), p['window_type'],
+                                          int(p['n_mels']), int(p['n_mfcc']), deltas=int(p['mfcc_deltas']))
+    meta = {'sample_rate': int(session.sample_rate), 'duration': session.duration}
+    return meta, result
+
+
+# ----------------------------------------------------------------------
+# Serializacja odpowiedzi
+# ----------------------------------------------------------------------
+def _json_values(value):
+    # JSON nie ma NaN ani nieskończoności – takie wartości (np. ramki pominięte w trybie speech_only) to null
+    value = np.asarray(value)
+    if value.dtype.kind == 'f' and not np.all(np.isfinite(value)):
+        finite = np.isfinite(value)
+        value = value.astype(object)
+        value[~finite] = None
+    return value.tolist()
+
+
+def encode_json(meta, result):
+    payload = {
+        **meta,
+        'features': {
+            name: {key: _json_values(value) for key, value in arrays.items()}
+            for name, arrays in result.items()
+        },
+    }
+    return json.dumps(payload, allow_nan=False).encode('utf-8'), 'application/json'
+
+
+def encode_npz(meta, result):
+    buffer = io.BytesIO()
+    arrays = {f'{name}/{key}': np.asarray(value) for name, group in result.items() for key, value in group.items()}
+    arrays['sample_rate'] = np.array(meta['sample_rate'])
+    arrays['duration'] = np.array(meta['duration'])
+    np.savez(buffer, **arrays)
+    return buffer.getvalue(), 'application/x-npz'
+
+
+# ----------------------------------------------------------------------
+# Front-end asyncio
+# ----------------------------------------------------------------------
+class HTTPError(Exception):
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def validate_params(params):
+    """
+    Sprawdza parametry analizy żądania i sprowadza je do jednolitych typów.
+
+    Liczby podane jako tekst (parametry zapytania URL) są zamieniane na liczby, więc to samo
+    żądanie ma ten sam klucz pamięci podręcznej niezależnie od sposobu przekazania parametrów.
+
+    Returns:
+        Słownik parametrów o wartościach skalarnych (hashowalnych).
+
+    Raises:
+        HTTPError: 400 dla nieznanego parametru lub niepoprawnej wartości.
+    """
+    if not isinstance(params, dict):
+        raise HTTPError(400, 'Pole "params" musi być obiektem JSON')
+    result = {}
+    for key, value in params.items():
+        if key not in DEFAULT_PARAMS:
+            raise HTTPError(400, f'Nieznany parametr: {key}')
+        if value is not None and not isinstance(value, (str, int, float)):
+            raise HTTPError(400, f'Parametr {key} musi być wartością skalarną')
+        if value in ('', 'None', 'null'):
+            value = None
+        if key in CHOICE_PARAMS:
+            if value not in CHOICE_PARAMS[key]:
+                allowed = ', '.join(map(str, CHOICE_PARAMS[key]))
+                raise HTTPError(400, f'Niepoprawna wartość parametru {key}: {value}. Dostępne: {allowed}')
+        elif key == 'pitch_estimators':
+            names = str(value).split(',')
+            unknown = [name for name in names if name not in ESTIMATORS]
+            if unknown:
+                raise HTTPError(400, f'Nieznane estymatory F0: {", ".join(unknown)}')
+            value = ','.join(names)
+        elif value is not None or key not in OPTIONAL_NUMBER_PARAMS:
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise HTTPError(400, f'Parametr {key} musi być liczbą')
+            positive = number >= 0 if key in ZERO_ALLOWED_PARAMS else number > 0
+            if not np.isfinite(number) or not positive or (key == 'overlap' and number >= 1):
+                raise HTTPError(400, f'Niepoprawna wartość parametru {key}: {value}')
+            default = DEFAULT_PARAMS[key]
+            value = number if isinstance(default, float) else int(number)
+        result[key] = value
+    return result
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class ServiceMetrics:
+
+    def __init__(self, window=1000):
+        self.requests_total = 0
+        self.requests_failed = 0
+        self.requests_rejected = 0
+        self.cache_hits = 0
+        # Ostatnie czasy obsługi żądań (przesuwne okno)
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self, queue):
+        latencies = np.array(self.latencies) * 1000.0
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        else:
+            p50 = p95 = p99 = 0.0
+        return {
+            'requests_total': self.requests_total,
+            'requests_failed': self.requests_failed,
+            'requests_rejected': self.requests_rejected,
+            'cache_hits': self.cache_hits,
+            'queue_depth': queue.qsize(),
+            'queue_capacity': queue.maxsize,
+            'latency_ms': {'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                           'count': int(len(latencies))},
+        }
+
+
+class AnalysisService:
+
+    def __init__(self, workers=2, queue_size=16, result_cache_size=64):
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.metrics = ServiceMetrics()
+        self.executor = None
+        self.dispatchers = []
+        self.server = None
+
+        # Pamięć podręczna gotowych odpowiedzi (klucz: źródło, cechy, parametry, format)
+        self.result_cache_size = result_cache_size
+        self.result_cache = OrderedDict()
+
+    async def start(self, host='127.0.0.1', port=8765, unix_path=None):
+        # 'spawn' – procesy robocze nie dziedziczą działającej pętli asyncio ani jej wątków; jako nowe
+        # interpretery importują moduły cech z AUDIO_FEATURE_PLUGINS
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=feature_registry.load_plugins)
+        # Tyle dyspozytorów, ile procesów – kolejka nie rośnie poza ustalony limit
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    @property
+    def address(self):
+        return self.server.sockets[0].getsockname() if self.server else None
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, future = await self.queue.get()
+            try:
+                result = await loop.run_in_executor(self.executor, analyze, *job)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def _handle_connection(self, reader, writer):
+        started = time.perf_counter()
+        try:
+            method, target, headers, body = await self._read_request(reader)
+            status, content_type, payload, extra = await self._route(method, target, headers, body)
+        except HTTPError as e:
+            status, content_type, extra = e.status, 'application/json', e.headers
+            payload = json.dumps({'error': str(e)}).encode('utf-8')
+            if e.status == 503:
+                self.metrics.requests_rejected += 1
+            else:
+                self.metrics.requests_failed += 1
+        except Exception as e:
+            status, content_type, extra = 500, 'application/json', {}
+            payload = json.dumps({'error': str(e)}).encode('utf-8')
+            self.metrics.requests_failed += 1
+
+        head = [f'HTTP/1.1 {status} {REASONS.get(status, "")}',
+                f'Content-Type: {content_type}',
+                f'Content-Length: {len(payload)}',
+                'Connection: close']
+        head += [f'{key}: {value}' for key, value in extra.items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+        self.metrics.latencies.append(time.perf_counter() - started)
+
+    async def _read_request(self, reader):
+        try:
+            raw = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            raise HTTPError(400, 'Niepoprawny nagłówek żądania')
+        lines = raw.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, 'Niepoprawny wiersz żądania')
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, 'Niepoprawny nagłówek Content-Length')
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(413, 'Zbyt duża treść żądania')
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    async def _route(self, method, target, headers, body):
+        url = urlsplit(target)
+        if method == 'GET' and url.path == '/health':
+            return 200, 'application/json', b'{"status": "ok"}', {}
+        if method == 'GET' and url.path == '/metrics':
+            payload = json.dumps(self.metrics.snapshot(self.queue)).encode('utf-8')
+            return 200, 'application/json', payload, {}
+        if method == 'POST' and url.path == '/analyze':
+            self.metrics.requests_total += 1
+            payload, content_type = await self._analyze(parse_qs(url.query), headers, body)
+            return 200, content_type, payload, {}
+        raise HTTPError(404, f'Nieznany punkt końcowy: {method} {url.path}')
+
+    async def _analyze(self, query, headers, body):
+        features = query.get('features', ['f0,spectral'])[0].split(',')
+        fmt = query.get('format', ['json'])[0]
+        params = validate_params({key: values[0] for key, values in query.items() if key in DEFAULT_PARAMS})
+
+        if headers.get('content-type', '').startswith('application/json'):
+            try:
+                request = json.loads(body or b'{}')
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise HTTPError(400, f'Niepoprawny JSON: {e}')
+            if not isinstance(request, dict):
+                raise HTTPError(400, 'Treść żądania JSON musi być obiektem')
+            if not isinstance(request.get('path'), str):
+                raise HTTPError(400, 'Brak pola "path" (tekst) w żądaniu JSON')
+            source = os.path.abspath(request['path'])
+            if not os.path.isfile(source):
+                raise HTTPError(404, f'Plik nie istnieje: {source}')
+            features = request.get('features', features)
+            if not isinstance(features, list) or not all(isinstance(name, str) for name in features):
+                raise HTTPError(400, 'Pole "features" musi być listą nazw cech')
+            params.update(validate_params(request.get('params', {})))
+            fmt = request.get('format', fmt)
+            key = f'{source}:{os.path.getmtime(source)}'
+        else:
+            if not body:
+                raise HTTPError(400, 'Brak danych WAV w treści żądania')
+            source = body
+            key = hashlib.sha1(body).hexdigest()
+
+        unknown = [name for name in features if name not in FEATURE_NAMES]
+        if unknown:
+            raise HTTPError(400, f'Nieznane cechy: {", ".join(unknown)}')
+        if fmt not in ('json', 'npz'):
+            raise HTTPError(400, f'Nieznany format: {fmt}')
+
+        cache_key = (key, tuple(features), tuple(sorted(params.items())), fmt)
+        if cache_key in self.result_cache:
+            self.result_cache.move_to_end(cache_key)
+            self.metrics.cache_hits += 1
+            return self.result_cache[cache_key]
+
+        # Ograniczona kolejka – przy przepełnieniu odrzucamy żądanie zamiast zwiększać opóźnienia
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait(((key, source, features, params), future))
+        except asyncio.QueueFull:
+            raise HTTPError(503, 'Kolejka analiz jest pełna', {'Retry-After': '1'})
+        try:
+            meta, result = await future
+        except ClientError as e:
+            # Niepoprawne dane wejściowe (np. plik, który nie jest WAV); inne wyjątki, także ValueError
+            # z kodu analizy, to błędy usługi (500)
+            raise HTTPError(400, f'Analiza nie powiodła się: {e}')
+
+        response = encode_json(meta, result) if fmt == 'json' else encode_npz(meta, result)
+        self.result_cache[cache_key] = response
+        if len(self.result_cache) > self.result_cache_size:
+            self.result_cache.popitem(last=False)
+        return response
+
+
+def request_analysis(host, port, wav_bytes=None, path=None, features=('f0', 'spectral'), fmt='json',
+                     params=None, timeout=60):
+    """
+    Klient usługi (HTTP na localhost) – wysyła nagranie i zwraca wynik.
+
+    Returns:
+        Słownik JSON albo obiekt NpzFile (dla fmt='npz').
+    """
+    import http.client
+
+    query = f'features={",".join(features)}&format={fmt}'
+    if path is not None:
+        body = json.dumps({'path': path, 'params': params or {}}).encode('utf-8')
+        content_type = 'application/json'
+    else:
+        body = wav_bytes
+        content_type = 'audio/wav'
+        if params:
+            query += ''.join(f'&{key}={value}' for key, value in params.items())
+    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        conn.request('POST', f'/analyze?{query}', body=body, headers={'Content-Type': content_type})
+        response = conn.getresponse()
+        data = response.read()
+    finally:
+        conn.close()
+    if response.status != 200:
+        raise RuntimeError(f'{response.status}: {data.decode("utf-8", "replace")}')
+    if fmt == 'npz':
+        return np.load(io.BytesIO(data))
+    return json.loads(data)
+
+
+async def serve(args):
+    service = AnalysisService(workers=args.workers, queue_size=args.queue)
+    await service.start(args.host, args.port, args.unix)
+    where = args.unix or f'http://{args.host}:{service.address[1]}'
+    print(f'Usługa analizy nasłuchuje: {where}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Lokalna usługa analizy sygnałów audio')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='Ścieżka gniazda Unix zamiast TCP')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument('--queue', type=int, default=16, help='Maksymalna liczba oczekujących analiz')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
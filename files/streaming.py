@@ -0,0 +1,242 @@
+"""
+Przyrostowa analiza strumienia próbek (bez GUI).
+
+StreamingAnalyzer przyjmuje kolejne bloki próbek i dla każdej nowej ramki
+liczy kolumnę spektrogramu (dB), poziom RMS, klasę ramki (cisza / dźwięczna /
+bezdźwięczna), parametry częstotliwościowe oraz F0 metodą cepstralną.
+Wyniki trafiają do buforów pierścieniowych o stałym rozmiarze, przydzielonych
+raz przy tworzeniu obiektu, więc koszt i zużycie pamięci nie rosną z czasem
+trwania strumienia.
+
+StreamWorker pobiera bloki ze źródła dźwięku (audio_sources.py) w osobnym
+wątku, dzięki czemu analiza nie obciąża wątku audio ani wątku GUI.
+"""
+import threading
+
+import numpy as np
+
+import fft_backend
+from cepstrum_analysis import compute_cepstrum, estimate_f0_from_cepstrum
+from features import compute_zcr
+from frequency_features import compute_spectral_features
+from precision import real_dtype
+from windowing import get_window, frame_signal
+
+
+# Kody klas ramek – zgodne z VoicedAudioProcessor.classify_frames
+LABEL_SILENCE = -1
+LABEL_UNVOICED = 0
+LABEL_VOICED = 1
+
+SPECTRAL_FEATURES = ('volume', 'fc', 'bw', 'ersb1', 'ersb2', 'ersb3', 'sfm', 'scf')
+
+
+class StreamingAnalyzer:
+
+    def __init__(self, sample_rate, frame_length=1024, hop_length=256, window_type='hann',
+                 history_seconds=5.0, min_f0=50, max_f0=500, silence_threshold=0.001,
+                 vol_threshold=0.02, zcr_threshold=0.3, precision='float32', max_block=8192):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.window_type = window_type
+        self.min_f0 = min_f0
+        self.max_f0 = max_f0
+        self.silence_threshold = silence_threshold
+        self.vol_threshold = vol_threshold
+        self.zcr_threshold = zcr_threshold
+        self.dtype = real_dtype(precision)
+
+        # Długość FFT ustalamy raz – bufory mają stałą liczbę binów
+        self.n_fft = fft_backend.fft_size(frame_length)
+        self.n_bins = self.n_fft // 2 + 1
+        self.n_columns = max(1, int(history_seconds * sample_rate / hop_length))
+        self.freqs = fft_backend.rfft_freqs(frame_length, sample_rate, self.dtype)
+
+        # Bufory pierścieniowe wyników (kolumna = jedna ramka)
+        self.spectrogram = np.empty((self.n_bins, self.n_columns), dtype=self.dtype)
+        self.rms = np.empty(self.n_columns, dtype=self.dtype)
+        self.f0 = np.empty(self.n_columns, dtype=self.dtype)
+        self.labels = np.empty(self.n_columns, dtype=np.int8)
+        self.features = {name: np.empty(self.n_columns, dtype=self.dtype) for name in SPECTRAL_FEATURES}
+
+        # Bufory wyjściowe w kolejności czasowej (od najstarszej kolumny)
+        self._ordered_spec = np.empty_like(self.spectrogram)
+        self._ordered_rms = np.empty_like(self.rms)
+        self._ordered_f0 = np.empty_like(self.f0)
+
+        # Próbki oczekujące na kompletną ramkę
+        self.max_block = max_block
+        self._pending = np.zeros(frame_length + max_block, dtype=self.dtype)
+        self._window = get_window(window_type, frame_length, self.dtype)
+
+        self.reset()
+
+    def reset(self):
+        """Czyści historię (np. po przewinięciu nagrania)."""
+        self.spectrogram.fill(-120.0)
+        self.rms.fill(0.0)
+        self.f0.fill(0.0)
+        self.labels.fill(LABEL_SILENCE)
+        for ring in self.features.values():
+            ring.fill(0.0)
+        self.write_pos = 0
+        self.columns_total = 0
+        self._pending_len = 0
+
+    @property
+    def history_seconds(self):
+        return self.n_columns * self.hop_length / self.sample_rate
+
+    def process(self, block):
+        """
+        Analizuje nowy blok próbek.
+
+        Args:
+            block: Tablica 1D z nowymi próbkami (dowolnej długości).
+
+        Returns:
+            Liczba nowych kolumn dopisanych do buforów.
+        """
+        added = 0
+        offset = 0
+        while offset < len(block):
+            # Bufor oczekujących próbek ma stałą pojemność – duże bloki dzielimy na części
+            take = min(len(block) - offset, len(self._pending) - self._pending_len)
+            self._pending[self._pending_len:self._pending_len + take] = block[offset:offset + take]
+            self._pending_len += take
+            offset += take
+            added += self._consume_frames()
+        return added
+
+    def _consume_frames(self):
+        if self._pending_len < self.frame_length:
+            return 0
+        frames = frame_signal(self._pending[:self._pending_len], self.frame_length, self.hop_length)
+        num_frames = len(frames)
+
+        spectra = fft_backend.rfft(frames * self._window, self.n_fft, axis=-1)
+        spec_db = 20 * np.log10(np.abs(spectra) + 1e-10)
+        rms = np.sqrt(np.mean(frames ** 2, axis=-1))
+        cepstra, quefrency, _ = compute_cepstrum(frames, self.sample_rate, self.window_type, self.dtype)
+        f0, _ = estimate_f0_from_cepstrum(cepstra, quefrency, self.min_f0, self.max_f0)
+        f0 = np.where(rms < self.silence_threshold, 0.0, f0)
+
+        # Segmentacja tymi samymi progami co VoicedAudioProcessor
+        zcr = compute_zcr(frames)
+        labels = ((rms > self.vol_threshold) & (zcr < self.zcr_threshold)).astype(np.int8)
+        labels[rms < self.silence_threshold] = LABEL_SILENCE
+
+        columns = {'rms': rms, 'f0': f0, 'labels': labels}
+        columns.update(compute_spectral_features(spectra, self.freqs, self.sample_rate))
+        self._write_columns(spec_db, columns)
+
+        # Zostawiamy próbki potrzebne do kolejnej (nakładającej się) ramki
+        consumed = num_frames * self.hop_length
+        remaining = self._pending_len - consumed
+        self._pending[:remaining] = self._pending[consumed:self._pending_len]
+        self._pending_len = remaining
+        return num_frames
+
+    def _rings(self):
+        rings = {'rms': self.rms, 'f0': self.f0, 'labels': self.labels}
+        rings.update(self.features)
+        return rings
+
+    def _write_columns(self, spec_db, columns):
+        count = len(spec_db)
+        if count >= self.n_columns:
+            # Więcej kolumn niż historia – zostają tylko najnowsze
+            spec_db = spec_db[-self.n_columns:]
+            columns = {name: values[-self.n_columns:] for name, values in columns.items()}
+            count = self.n_columns
+        first = min(count, self.n_columns - self.write_pos)
+        end = self.write_pos + first
+        rest = count - first
+        self.spectrogram[:, self.write_pos:end] = spec_db[:first].T
+        if rest:
+            self.spectrogram[:, :rest] = spec_db[first:].T
+        for name, ring in self._rings().items():
+            ring[self.write_pos:end] = columns[name][:first]
+            if rest:
+                ring[:rest] = columns[name][first:]
+        self.write_pos = (self.write_pos + count) % self.n_columns
+        self.columns_total += count
+
+    def _ordered(self, ring, out):
+        # Przepisujemy bufor pierścieniowy do stałego bufora wyjściowego bez nowych alokacji
+        tail = self.n_columns - self.write_pos
+        out[..., :tail] = ring[..., self.write_pos:]
+        out[..., tail:] = ring[..., :self.write_pos]
+        return out
+
+    def ordered_spectrogram(self):
+        """Spektrogram historii (biny × kolumny), od najstarszej do najnowszej kolumny."""
+        return self._ordered(self.spectrogram, self._ordered_spec)
+
+    def ordered_rms(self):
+        return self._ordered(self.rms, self._ordered_rms)
+
+    def ordered_f0(self):
+        return self._ordered(self.f0, self._ordered_f0)
+
+    def ordered(self, name):
+        """Historia wybranej wielkości ('rms', 'f0', 'labels' lub parametru widmowego), od najstarszej."""
+        return np.concatenate((self._rings()[name][self.write_pos:], self._rings()[name][:self.write_pos]))
+
+    def latest(self):
+        """
+        Ostatnio policzone wartości.
+
+        Returns:
+            Krotka (RMS, F0) najnowszej kolumny.
+        """
+        if self.columns_total == 0:
+            return 0.0, 0.0
+        last = (self.write_pos - 1) % self.n_columns
+        return float(self.rms[last]), float(self.f0[last])
+
+    def latest_label(self):
+        """Klasa najnowszej ramki (LABEL_SILENCE, LABEL_UNVOICED lub LABEL_VOICED)."""
+        if self.columns_total == 0:
+            return LABEL_SILENCE
+        return int(self.labels[(self.write_pos - 1) % self.n_columns])
+
+
+class StreamWorker:
+    """
+    Wątek analizy: pobiera bloki ze źródła dźwięku i przekazuje je do StreamingAnalyzer.
+
+    Dostęp do buforów analizatora (np. z wątku GUI) należy otaczać blokadą `lock`.
+    """
+
+    def __init__(self, source, analyzer):
+        self.source = source
+        self.analyzer = analyzer
+        self.lock = threading.Lock()
+        self.blocks_processed = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self.source.start()
+        self._thread = threading.Thread(target=self._run, name="StreamWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self.source.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        while self._running:
+            block = self.source.read(timeout=0.1)
+            if block is None:
+                continue
+            with self.lock:
+                self.analyzer.process(block)
+            self.source.release()
+            self.blocks_processed += 1
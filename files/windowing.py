@@ -1,33 +1,179 @@
+from functools import lru_cache
+
 import numpy as np
 
+import fft_backend
+
+
+def _cosine_sum(N, coefficients):
+    # Okno symetryczne będące sumą kosinusów (tak jak np.blackman)
+    if N == 1:
+        return np.ones(1)
+    n = np.arange(N)
+    return sum((-1) ** k * a * np.cos(2 * np.pi * k * n / (N - 1)) for k, a in enumerate(coefficients))
+
+
+# Rejestr funkcji okienkowych: nazwa -> (polska nazwa, funkcja N -> współczynniki float64)
+WINDOWS = {
+    'rectangular': ('Prostokątne', np.ones),
+    'triangular': ('Trójkątne (Bartlett)', np.bartlett),
+    'hamming': ('Hamminga', np.hamming),
+    'hann': ('Hanna', np.hanning),
+    'blackman': ('Blackmana', np.blackman),
+    'blackmanharris': ('Blackmana-Harrisa', lambda N: _cosine_sum(N, (0.35875, 0.48829, 0.14128, 0.01168))),
+    'flattop': ('Flat top', lambda N: _cosine_sum(
+        N, (0.21557895, 0.41663158, 0.277263158, 0.083578947, 0.006947368))),
+    'kaiser': ('Kaisera (β = 8,6)', lambda N: np.kaiser(N, 8.6)),
+}
+
+WINDOW_TYPES = tuple(WINDOWS)
+
 
-def apply_window(frame, window_type):
+def get_window(window_type, N, dtype=np.float64):
+    """
+    Zwraca współczynniki wybranej funkcji okienkowej o długości N.
+
+    Wynik jest zapamiętywany, więc tablica jest tylko do odczytu.
+
+    Args:
+        window_type: Typ funkcji okienkowej (klucz rejestru WINDOWS, np. 'hamming').
+        N: Długość okna.
+        dtype: Typ współczynników okna (np. float32 w trybie pojedynczej precyzji).
+
+    Returns:
+        Tablica 1D ze współczynnikami okna.
+    """
+    return _cached_window(window_type, N, np.dtype(dtype).name)
+
+
+@lru_cache(maxsize=64)
+def _cached_window(window_type, N, dtype_name):
+    # Nieznany typ – domyślnie okno prostokątne
+    _, factory = WINDOWS.get(window_type, WINDOWS['rectangular'])
+    window = np.asarray(factory(N), dtype=np.float64).astype(dtype_name)
+    window.flags.writeable = False
+    return window
+
+
+def get_window_bank(window_types, N, dtype=np.float64):
+    """
+    Zwraca macierz współczynników kilku funkcji okienkowych (jedno okno w wierszu).
+
+    Pozwala zastosować wszystkie okna do tych samych ramek jednym mnożeniem
+    z rozgłaszaniem i policzyć widma jednym wywołaniem FFT.
+
+    Args:
+        window_types: Krotka typów funkcji okienkowych.
+        N: Długość okien.
+        dtype: Typ współczynników.
+
+    Returns:
+        Tablica (liczba_okien, N) tylko do odczytu.
+    """
+    return _cached_window_bank(tuple(window_types), N, np.dtype(dtype).name)
+
+
+@lru_cache(maxsize=16)
+def _cached_window_bank(window_types, N, dtype_name):
+    bank = np.stack([get_window(window_type, N, dtype_name) for window_type in window_types])
+    bank.flags.writeable = False
+    return bank
+
+
+def _crossing(response, index, level):
+    # Interpolowane liniowo położenie przejścia charakterystyki przez poziom level przed próbką index
+    if index == 0:
+        return 0.0
+    before, after = response[index - 1], response[index]
+    return index - 1 + (before - level) / (before - after)
+
+
+@lru_cache(maxsize=16)
+def window_properties(window_types, N, oversample=32):
+    """
+    Parametry przecieku widmowego funkcji okienkowych o długości N.
+
+    Widma wszystkich okien liczone są jednym wywołaniem FFT (z dopełnieniem zerami
+    do oversample * N próbek), a szerokości podawane w binach FFT długości N.
+
+    Args:
+        window_types: Krotka typów funkcji okienkowych.
+        N: Długość okien.
+        oversample: Krotność dopełnienia zerami przy wyznaczaniu listka głównego.
+
+    Returns:
+        Słownik {typ okna: słownik parametrów}:
+            'coherent_gain' – wzmocnienie koherentne (średnia współczynników),
+            'enbw' – równoważna szerokość pasma szumowego [biny],
+            'width_3db' – szerokość listka głównego na poziomie −3 dB [biny],
+            'mainlobe_width' – szerokość listka głównego między zerami [biny],
+            'sidelobe_db' – poziom najwyższego listka bocznego [dB],
+            'scalloping_db' – strata dla sinusoidy w połowie między binami [dB].
+    """
+    bank = get_window_bank(window_types, N)
+    sums = bank.sum(axis=-1)
+    spectra = np.abs(fft_backend.rfft(bank, n=oversample * N, axis=-1))
+    spectra_db = 20 * np.log10(spectra / sums[:, None] + 1e-300)
+    half_bin = np.abs(bank @ np.exp(-1j * np.pi * np.arange(N) / N))
+
+    properties = {}
+    for i, window_type in enumerate(window_types):
+        response = spectra_db[i]
+        below_3db = np.nonzero(response < -3.0103)[0]
+        edge_3db = below_3db[0] if len(below_3db) else len(response) - 1
+        # Koniec listka głównego – pierwsze minimum lokalne za punktem −3 dB
+        # (okno flat top ma lekko wypukły wierzchołek)
+        rising = np.nonzero(np.diff(response[edge_3db:]) > 0)[0]
+        null = edge_3db + rising[0] if len(rising) else len(response) - 1
+        properties[window_type] = {
+            'coherent_gain': sums[i] / N,
+            'enbw': N * np.sum(bank[i] ** 2) / sums[i] ** 2,
+            'width_3db': 2 * _crossing(response, edge_3db, -3.0103) / oversample,
+            'mainlobe_width': 2 * null / oversample,
+            'sidelobe_db': response[null:].max() if null < len(response) - 1 else -np.inf,
+            'scalloping_db': 20 * np.log10(half_bin[i] / sums[i]),
+        }
+    return properties
+
+
+def apply_window(frame, window_type, dtype=None):
     """
     Stosuje wybraną funkcję okienkową do ramki.
 
     Args:
-        frame: Ramka sygnału (tablica 1D).
-        window_type: Typ funkcji okienkowej ('rectangular', 'triangular', 'hamming', 'hann', 'blackman').
+        frame: Ramka sygnału (tablica 1D) lub macierz ramek (okno stosowane wzdłuż ostatniej osi).
+        window_type: Typ funkcji okienkowej (klucz rejestru WINDOWS).
+        dtype: Typ wyniku; domyślnie okno float64 (ramka jest promowana do float64).
 
     Returns:
         Ramka po zastosowaniu funkcji okienkowej.
     """
-    N = len(frame)
+    if dtype is None:
+        return frame * get_window(window_type, np.shape(frame)[-1])
+    frame = np.asarray(frame).astype(dtype, copy=False)
+    return frame * get_window(window_type, frame.shape[-1], dtype)
+
+
+def frame_signal(signal, frame_length, hop_length):
+    """
+    Dzieli sygnał na nakładające się ramki bez kopiowania danych.
+
+    Ramki, które wychodziłyby poza koniec sygnału, są pomijane.
 
-    if window_type == 'rectangular':
-        window = np.ones(N)
-    elif window_type == 'triangular':
-        window = np.bartlett(N)
-    elif window_type == 'hamming':
-        window = np.hamming(N)
-    elif window_type == 'hann':
-        window = np.hanning(N)
-    elif window_type == 'blackman':
-        window = np.blackman(N)
-    else:
-        window = np.ones(N)  # Domyślnie prostokątne
+    Args:
+        signal: Sygnał (tablica 1D) lub macierz (kanały, próbki) – ramki tworzone są wzdłuż ostatniej osi.
+        frame_length: Długość ramki w próbkach.
+        hop_length: Przesunięcie między kolejnymi ramkami w próbkach.
 
-    return frame * window
+    Returns:
+        Widok o kształcie (liczba_ramek, frame_length) lub (kanały, liczba_ramek, frame_length).
+    """
+    if hop_length < 1:
+        raise ValueError("Przesunięcie między ramkami musi wynosić co najmniej 1 próbkę.")
+    if signal.shape[-1] < frame_length:
+        return np.empty(signal.shape[:-1] + (0, frame_length), dtype=signal.dtype)
+    frames = np.lib.stride_tricks.sliding_window_view(signal, frame_length, axis=-1)
+    return frames[..., ::hop_length, :]
 
 
 def get_window_type_name(window_type):
@@ -40,12 +186,6 @@ def get_window_type_name(window_type):
     Returns:
         Polska nazwa funkcji okienkowej.
     """
-    window_names = {
-        'rectangular': 'Prostokątne',
-        'triangular': 'Trójkątne (Bartlett)',
-        'hamming': 'Hamminga',
-        'hann': 'Hanna',
-        'blackman': 'Blackmana'
-    }
-
-    return window_names.get(window_type, window_type.capitalize())
\ No newline at end of file
+    if window_type in WINDOWS:
+        return WINDOWS[window_type][0]
+    return window_type.capitalize()